@@ -0,0 +1,172 @@
+# bandwidth_budget.py
+import re
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Débit minimal accordé à un téléchargement, même quand le budget est entièrement réservé (octets/s)
+MIN_JOB_RATE = 32 * 1024
+# Durée maximale d'une fenêtre de mesure du débit d'un téléchargement (secondes)
+PACING_WINDOW = 10.0
+# Pause maximale imposée en une fois depuis un hook de progression (secondes)
+MAX_PACING_DELAY = 2.0
+
+# Jours acceptés dans les plages horaires ("lun-ven 08:00-18:00 500")
+DAY_NAMES = ("lun", "mar", "mer", "jeu", "ven", "sam", "dim")
+_SCHEDULE_LINE_RE = re.compile(
+    r'^\s*(?:(?P<days>[a-zé]{3}(?:-[a-zé]{3})?)\s+)?(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})\s+(?P<limit>\d+)\s*$',
+    re.IGNORECASE
+)
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_schedule_line(line: str) -> Optional[Dict]:
+    """
+    Convertit une ligne "[jours] HH:MM-HH:MM limite_en_Kio/s" en règle de plage horaire.
+    Les jours sont optionnels ("lun-ven", "sam"); une plage peut passer minuit (22:00-06:00).
+    Retourne None si la ligne est invalide.
+    """
+    match = _SCHEDULE_LINE_RE.match(line)
+    if not match:
+        return None
+    days = list(range(7))
+    if match.group('days'):
+        names = match.group('days').lower().split("-")
+        if any(name not in DAY_NAMES for name in names):
+            return None
+        first, last = DAY_NAMES.index(names[0]), DAY_NAMES.index(names[-1])
+        days = [(first + offset) % 7 for offset in range((last - first) % 7 + 1)]
+    start, end = _minutes(match.group('start')), _minutes(match.group('end'))
+    if start >= 24 * 60 or end > 24 * 60:
+        return None
+    return {'days': days, 'start': match.group('start'), 'end': match.group('end'), 'limit': int(match.group('limit'))}
+
+
+def format_schedule_rule(rule: Dict) -> str:
+    """Inverse de parse_schedule_line (affichage dans la boîte de dialogue)."""
+    days = rule.get('days', list(range(7)))
+    prefix = ""
+    if len(days) < 7 and days:
+        prefix = DAY_NAMES[days[0]] if len(days) == 1 else f"{DAY_NAMES[days[0]]}-{DAY_NAMES[days[-1]]}"
+        prefix += " "
+    return f"{prefix}{rule['start']}-{rule['end']} {rule['limit']}"
+
+
+class BandwidthBudget:
+    """
+    Budget de bande passante global, partagé entre les téléchargements en cours.
+    La limite (Kio/s, 0: illimitée) peut varier selon des plages horaires; la première plage qui
+    correspond à l'heure courante l'emporte sur la limite générale.
+    - Moteur en bibliothèque: chaque téléchargement est freiné depuis son hook de progression pour
+      ne pas dépasser sa part (limite / nombre de téléchargements), recalculée en continu.
+    - Moteur subprocess: la part est fixée au lancement (--limit-rate): un téléchargement reçoit la part
+      équitable (limite / nombre de téléchargements qui tourneront ensemble: actifs et en attente, au plus
+      le nombre de places), sans dépasser ce que les téléchargements en cours n'ont pas réservé; la part
+      d'un téléchargement terminé revient au suivant. Un téléchargement seul (ou le dernier) reçoit tout le budget.
+    """
+
+    def __init__(self, limit_kib: int = 0, schedule: Optional[List[Dict]] = None):
+        self.limit_kib = limit_kib
+        self.schedule: List[Dict] = list(schedule or [])
+        self.expected_jobs = 1 # Téléchargements entre lesquels le budget est partagé (indiqué par la file)
+        self._reserved: Dict[str, Optional[int]] = {} # id -> débit fixé au lancement (None: freinage dynamique)
+        self._pacing: Dict[str, Dict] = {} # id -> fenêtre de mesure du freinage dynamique
+        self._lock = threading.Lock()
+
+    def configure(self, limit_kib: int, schedule: Optional[List[Dict]] = None):
+        """Change la limite générale et les plages horaires."""
+        with self._lock:
+            self.limit_kib = limit_kib
+            self.schedule = list(schedule or [])
+
+    def current_limit(self, now: Optional[datetime] = None) -> Optional[int]:
+        """Limite globale en vigueur (octets/s), ou None si le débit n'est pas limité."""
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        limit_kib = self.limit_kib
+        for rule in self.schedule:
+            start, end = _minutes(rule['start']), _minutes(rule['end'])
+            if start <= end:
+                in_range = start <= minute < end and now.weekday() in rule['days']
+            else: # Plage qui passe minuit: la partie du matin appartient au jour précédent
+                in_range = ((minute >= start and now.weekday() in rule['days']) or
+                            (minute < end and (now.weekday() - 1) % 7 in rule['days']))
+            if in_range:
+                limit_kib = rule['limit']
+                break
+        return limit_kib * 1024 if limit_kib > 0 else None
+
+    def reserve(self, job_id: str) -> Optional[int]:
+        """
+        Réserve la part d'un téléchargement lancé avec un débit fixe (--limit-rate).
+        Retourne le débit accordé en octets/s, ou None si le débit n'est pas limité.
+        """
+        limit = self.current_limit()
+        with self._lock:
+            if limit is None:
+                self._reserved[job_id] = None
+                return None
+            others = [rate for other_id, rate in self._reserved.items() if other_id != job_id]
+            fair_share = limit // max(self.expected_jobs, len(others) + 1)
+            # Les téléchargements freinés dynamiquement s'adaptent: seules les parts fixes sont déduites
+            unreserved = limit - sum(rate for rate in others if rate)
+            rate = max(MIN_JOB_RATE, min(fair_share, unreserved))
+            self._reserved[job_id] = rate
+            return rate
+
+    def register(self, job_id: str):
+        """Inscrit un téléchargement freiné dynamiquement (moteur en bibliothèque)."""
+        with self._lock:
+            self._reserved[job_id] = None
+            self._pacing.pop(job_id, None)
+
+    def release(self, job_id: str):
+        """Rend la part d'un téléchargement terminé, échoué ou annulé."""
+        with self._lock:
+            self._reserved.pop(job_id, None)
+            self._pacing.pop(job_id, None)
+
+    def job_rate(self, job_id: str) -> Optional[int]:
+        """Débit maximal actuel d'un téléchargement (octets/s), None s'il n'est pas limité."""
+        with self._lock:
+            if job_id not in self._reserved:
+                return None
+            rate = self._reserved[job_id]
+        return rate if rate is not None else self._dynamic_share()
+
+    def _dynamic_share(self) -> Optional[int]:
+        """Part d'un téléchargement freiné dynamiquement: ce qui reste après les parts fixes, partagé équitablement."""
+        limit = self.current_limit()
+        if limit is None:
+            return None
+        with self._lock:
+            fixed = [rate for rate in self._reserved.values() if rate]
+            dynamic_count = sum(1 for rate in self._reserved.values() if rate is None)
+        return max(MIN_JOB_RATE, (limit - sum(fixed)) // max(dynamic_count, 1))
+
+    def pace(self, job_id: str, downloaded_bytes: Optional[int]) -> float:
+        """
+        Retourne la pause (secondes) à observer pour que ce téléchargement ne dépasse pas sa part.
+        Appelé à chaque bloc reçu depuis le hook de progression du moteur en bibliothèque.
+        """
+        if downloaded_bytes is None:
+            return 0.0
+        share = self._dynamic_share()
+        now = time.monotonic()
+        with self._lock:
+            if share is None or job_id not in self._reserved:
+                self._pacing.pop(job_id, None)
+                return 0.0
+            window = self._pacing.get(job_id)
+            if (window is None or window['share'] != share or downloaded_bytes < window['bytes']
+                    or now - window['start'] > PACING_WINDOW):
+                # Nouvelle fenêtre: changement de part, nouveau fichier (fragments/flux séparés) ou fenêtre trop longue
+                self._pacing[job_id] = {'start': now, 'bytes': downloaded_bytes, 'share': share}
+                return 0.0
+        expected_elapsed = (downloaded_bytes - window['bytes']) / share
+        return max(0.0, min(MAX_PACING_DELAY, expected_elapsed - (now - window['start'])))
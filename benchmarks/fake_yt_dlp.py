@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Faux yt-dlp pour les benchmarks: accepte les arguments passés par Downloader et produit, sans réseau,
+une sortie réaliste (extraction, progression --progress-template ou ancienne sortie texte, post-traitement,
+fichiers --print after_move). Le comportement est réglé par des variables d'environnement FAKE_YTDLP_*
+(héritées du processus qui lance les téléchargements):
+
+    FAKE_YTDLP_SIZE           taille d'un élément en octets (défaut: 5000000)
+    FAKE_YTDLP_LINES          lignes de progression par élément (défaut: 50)
+    FAKE_YTDLP_RATE           lignes de progression par seconde, 0: sans pause (défaut: 10)
+    FAKE_YTDLP_PLAYLIST       éléments d'une playlist (extraction --flat-playlist ou URL list=) (défaut: 10)
+    FAKE_YTDLP_EXTRACT_DELAY  durée d'une extraction -J / --dump-json en secondes (défaut: 0)
+    FAKE_YTDLP_EXIT_CODE      code de retour des téléchargements (défaut: 0)
+    FAKE_YTDLP_FAIL_MATCH     les URLs qui contiennent ce texte échouent (code 1) (défaut: "fail")
+    FAKE_YTDLP_ERROR          message d'erreur affiché sur stderr en cas d'échec
+    FAKE_YTDLP_LEGACY         1: ancienne sortie texte ("[download]  12.3% of ...") même avec --progress-template
+    FAKE_YTDLP_TIMESTAMPS     1: ajoute l'heure d'émission ("t") aux lignes JSON (mesure de latence)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+from typing import Iterator, List, Optional
+
+VERSION = "2099.01.01-fake"
+PROGRESS_MARKER = "[DLP]" # Même préfixe que progress_parser.PROGRESS_MARKER
+_VIDEO_ID_RE = re.compile(r'(?:v=|youtu\.be/|shorts/)([\w-]{1,20})')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.2f}{unit}"
+        size /= 1024
+    return f"{size:.2f}TiB"
+
+
+def video_id(url: str) -> str:
+    match = _VIDEO_ID_RE.search(url)
+    return match.group(1) if match else "fakevideo01"
+
+
+def video_info(url: str, size: int) -> dict:
+    """Infos -J d'une vidéo, avec une liste de formats comparable à celle de YouTube (planification des formats)."""
+    vid = video_id(url)
+    return {
+        'id': vid, 'title': f"Vidéo {vid}", 'webpage_url': f"https://www.youtube.com/watch?v={vid}",
+        'duration': 213, 'extractor': "youtube",
+        'formats': [
+            {'format_id': "251", 'ext': "webm", 'acodec': "opus", 'vcodec': "none", 'abr': 130, 'filesize': size // 10},
+            {'format_id': "140", 'ext': "m4a", 'acodec': "mp4a.40.2", 'vcodec': "none", 'abr': 129, 'filesize': size // 10},
+            {'format_id': "248", 'ext': "webm", 'acodec': "none", 'vcodec': "vp9", 'height': 1080, 'fps': 30, 'filesize': size},
+            {'format_id': "137", 'ext': "mp4", 'acodec': "none", 'vcodec': "avc1.640028", 'height': 1080, 'fps': 30, 'filesize': size},
+            {'format_id': "18", 'ext': "mp4", 'acodec': "mp4a.40.2", 'vcodec': "avc1.42001E", 'height': 360, 'fps': 30, 'filesize': size // 4},
+        ],
+    }
+
+
+def progress_lines(size: int, lines: int, legacy: bool = False, playlist_index: Optional[int] = None,
+                   playlist_count: Optional[int] = None, speed: float = 2.5e6, timestamps: bool = False) -> Iterator[str]:
+    """Lignes de progression d'un élément, au format des --progress-template de l'application ou de l'ancienne sortie."""
+    lines = max(1, lines)
+    for index in range(1, lines + 1):
+        downloaded = size * index // lines
+        finished = index == lines
+        eta = int((size - downloaded) / speed)
+        if legacy:
+            percent = downloaded * 100.0 / size if size else 100.0
+            if finished:
+                yield f"[download] 100% of {_format_size(size)} in 00:00:02 at {_format_size(speed)}/s"
+            else:
+                yield (f"[download] {percent:5.1f}% of {_format_size(size)} at {_format_size(speed)}/s "
+                       f"ETA {eta // 60:02}:{eta % 60:02}")
+            continue
+        event = {"stage": "download", "status": "finished" if finished else "downloading",
+                 "downloaded_bytes": downloaded, "total_bytes": size, "total_bytes_estimate": None,
+                 "speed": None if finished else speed, "eta": None if finished else eta,
+                 "fragment_index": None, "fragment_count": None,
+                 "playlist_index": playlist_index, "playlist_count": playlist_count}
+        if timestamps:
+            event['t'] = time.time()
+        yield PROGRESS_MARKER + json.dumps(event, separators=(",", ":"))
+
+
+def postprocess_lines(postprocessor: str, destination: str, legacy: bool = False) -> List[str]:
+    if legacy:
+        return [f"[{postprocessor}] Destination: {destination}"]
+    return [PROGRESS_MARKER + json.dumps({"stage": "postprocess", "status": status, "postprocessor": postprocessor,
+                                          "playlist_index": None, "playlist_count": None}, separators=(",", ":"))
+            for status in ("started", "finished")] + [f"[{postprocessor}] Destination: {destination}"]
+
+
+def _option(args: List[str], name: str) -> Optional[str]:
+    return args[args.index(name) + 1] if name in args and args.index(name) + 1 < len(args) else None
+
+
+def _extract(args: List[str], url: str, size: int):
+    time.sleep(_env_float("FAKE_YTDLP_EXTRACT_DELAY", 0.0))
+    if "-J" in args:
+        print(json.dumps(video_info(url, size)))
+    elif "--flat-playlist" in args and "list=" in url:
+        for index in range(_env_int("FAKE_YTDLP_PLAYLIST", 10)):
+            print(json.dumps({'title': f"Piste {index + 1}", 'url': f"https://www.youtube.com/watch?v=fake{index:05}",
+                              'duration': 180 + index, 'playlist_title': "Playlist de test", 'filesize_approx': size}))
+    else:
+        print(json.dumps(dict(video_info(url, size), formats=None)))
+    return 0
+
+
+def main(args: List[str]) -> int:
+    if "--version" in args:
+        print(VERSION)
+        return 0
+    size = _env_int("FAKE_YTDLP_SIZE", 5000000)
+    url = next((arg for arg in args if arg.startswith("http")), "")
+    info_path = _option(args, "--load-info-json")
+    if not url and info_path:
+        with open(info_path, "r", encoding='utf-8') as f:
+            url = json.load(f).get('webpage_url', "")
+    if "-J" in args or "--dump-json" in args:
+        return _extract(args, url, size)
+
+    vid = video_id(url)
+    print(f"[youtube] Extracting URL: {url}")
+    print(f"[youtube] {vid}: Downloading webpage")
+    print(f"[info] {vid}: Downloading 1 format(s): {_option(args, '-f') or 'best'}", flush=True)
+    failed = _env_int("FAKE_YTDLP_EXIT_CODE", 0) or (os.environ.get("FAKE_YTDLP_FAIL_MATCH", "fail") in url)
+    if failed:
+        message = os.environ.get("FAKE_YTDLP_ERROR", f"ERROR: [youtube] {vid}: HTTP Error 429: Too Many Requests")
+        print(message, file=sys.stderr, flush=True)
+        return _env_int("FAKE_YTDLP_EXIT_CODE", 0) or 1
+
+    legacy = os.environ.get("FAKE_YTDLP_LEGACY") == "1" or "--progress-template" not in args
+    timestamps = os.environ.get("FAKE_YTDLP_TIMESTAMPS") == "1"
+    rate = _env_float("FAKE_YTDLP_RATE", 10.0)
+    output_dir = _option(args, "-P") or "."
+    audio_format = _option(args, "--audio-format")
+    extension = audio_format or _option(args, "--merge-output-format") or _option(args, "--remux-video") or "webm"
+    destination = os.path.join(output_dir, f"Vidéo {vid} [{vid}].{extension}")
+
+    delay = 1.0 / rate if rate > 0 else 0.0
+    # URL de playlist téléchargée telle quelle: un élément après l'autre, comme yt-dlp
+    count = _env_int("FAKE_YTDLP_PLAYLIST", 10) if "list=" in url and "--no-playlist" not in args else 1
+    for index in range(1, count + 1):
+        if count > 1:
+            print(f"[download] Downloading item {index} of {count}", flush=True)
+        print(f"[download] Destination: {destination}", flush=True)
+        for line in progress_lines(size, _env_int("FAKE_YTDLP_LINES", 50), legacy,
+                                   index if count > 1 else None, count if count > 1 else None, timestamps=timestamps):
+            print(line, flush=True)
+            if delay:
+                time.sleep(delay)
+    if "-x" in args:
+        for line in postprocess_lines("ExtractAudio", destination, legacy):
+            print(line, flush=True)
+    elif "--merge-output-format" in args:
+        for line in postprocess_lines("Merger", destination, legacy):
+            print(line, flush=True)
+    elif "--recode-video" in args or "--remux-video" in args:
+        for line in postprocess_lines("VideoConvertor" if "--recode-video" in args else "VideoRemuxer",
+                                      destination, legacy):
+            print(line, flush=True)
+
+    if not legacy: # Le hook de MoveFiles est appelé pour chaque élément, même sans dossier temporaire
+        for line in postprocess_lines("MoveFiles", destination)[:2]:
+            print(line, flush=True)
+    if any(arg.startswith("after_move:") for arg in args):
+        # Pipeline en deux étapes: le fichier doit exister pour être confié au pool de conversion
+        os.makedirs(output_dir, exist_ok=True)
+        with open(destination, "wb") as f:
+            f.write(b"\0" * min(size, 4096))
+        print(PROGRESS_MARKER + json.dumps({"stage": "file", "filepath": destination, "duration": 213}), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de MusicDL, sans réseau (Linux): les téléchargements sont servis par benchmarks/fake_yt_dlp.py,
+vers lequel Downloader.yt_dlp_path est redirigé. Mesures:
+
+    parser    lignes décodées par seconde par ProgressParser (JSON --progress-template et ancienne sortie)
+    pipeline  lignes traitées par seconde de bout en bout (processus, lecture, bus, registre), par moteur E/S
+    latency   délai entre l'émission d'une ligne de progression et son application à l'image suivante du bus, par moteur E/S
+    cpu       temps CPU du processus (et des processus yt-dlp) par téléchargement actif, par moteur E/S
+    queue     temps de mise en file d'attente de N éléments et de la première image qui les affiche
+    memory    croissance de la mémoire (RSS) sur une longue série de téléchargements
+
+Les résultats sont enregistrés en JSON (benchmarks/results/ par défaut) pour comparer deux révisions:
+
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py --compare results/avant.json results/apres.json
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from config_manager import ConfigManager # noqa: E402
+from download_manager import DownloadManager # noqa: E402
+from download_registry import FINAL_STATUSES # noqa: E402
+from progress_parser import ProgressParser # noqa: E402
+from ui_event_bus import UIEventBus # noqa: E402
+import fake_yt_dlp # noqa: E402
+
+FAKE_YT_DLP = os.path.join(BENCHMARKS_DIR, "fake_yt_dlp.py")
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+BENCHMARKS = ("parser", "pipeline", "latency", "cpu", "queue", "memory")
+RUN_TIMEOUT = 600 # Durée maximale d'une série de téléchargements (secondes)
+
+# Paramètres par défaut et avec --quick
+PARAMS = {
+    'parser_lines': 200000, 'pipeline_jobs': 8, 'pipeline_lines': 1000, 'latency_jobs': 4, 'latency_rate': 50,
+    'latency_lines': 200, 'cpu_jobs': [1, 4, 8], 'cpu_rate': 20, 'cpu_lines': 100, 'queue_items': 10000,
+    'memory_jobs': 2000, 'memory_retention': 100, 'memory_concurrency': 8,
+}
+QUICK_PARAMS = {
+    'parser_lines': 20000, 'pipeline_jobs': 4, 'pipeline_lines': 200, 'latency_jobs': 2, 'latency_rate': 50,
+    'latency_lines': 50, 'cpu_jobs': [1, 4], 'cpu_rate': 20, 'cpu_lines': 30, 'queue_items': 2000,
+    'memory_jobs': 200, 'memory_retention': 50, 'memory_concurrency': 8,
+}
+
+
+def rss_kib() -> int:
+    """Mémoire résidente du processus (Ko), lue dans /proc."""
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def children_cpu_seconds() -> float:
+    """Temps CPU cumulé des processus enfants terminés (yt-dlp simulés); 0 hors Unix (pas de getrusage)."""
+    if sys.platform == "win32":
+        return 0.0
+    import resource # Absent sous Windows: importé seulement ici
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'count': len(ordered), 'mean': statistics.mean(ordered), 'p50': at(0.50), 'p95': at(0.95),
+            'p99': at(0.99), 'max': ordered[-1]}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, timeout=10)
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class FakeEnvironment:
+    """Variables FAKE_YTDLP_* le temps d'une mesure (héritées par les processus yt-dlp simulés)."""
+
+    def __init__(self, **values):
+        self.values = {f"FAKE_YTDLP_{key.upper()}": str(value) for key, value in values.items()}
+        self._saved: Dict[str, Optional[str]] = {}
+
+    def __enter__(self):
+        for key, value in self.values.items():
+            self._saved[key] = os.environ.get(key)
+            os.environ[key] = value
+        return self
+
+    def __exit__(self, *exc_info):
+        for key, value in self._saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class BenchSession:
+    """
+    Gestionnaire de téléchargements isolé (dossier de données temporaire) piloté comme en mode sans interface:
+    la boucle appelle flush() à la cadence du bus et évince les téléchargements terminés.
+    """
+
+    def __init__(self, concurrency: int, io_engine: str = "threads", retention: int = 2000,
+                 frame_handler: Optional[Callable] = None):
+        self.directory = tempfile.mkdtemp(prefix="musicdl-bench-")
+        download_path = os.path.join(self.directory, "downloads")
+        os.makedirs(download_path)
+        config_path = os.path.join(self.directory, "config.json")
+        with open(config_path, "w", encoding='utf-8') as f:
+            json.dump({'download_path': download_path, 'data_dir': self.directory,
+                       'concurrent_downloads_limit': concurrency, 'adaptive_concurrency': False,
+                       'io_engine': io_engine, 'format_planning': False, 'two_stage_pipeline': False,
+                       'download_retention': retention, 'download_history': False, 'event_log_enabled': False,
+                       'skip_archived_downloads': False}, f)
+        self.config = ConfigManager(config_path)
+        self.bus = UIEventBus()
+        self.manager = DownloadManager(self.config, self.bus, lambda message, download_id=None: None)
+        self.manager.downloader.yt_dlp_path = FAKE_YT_DLP
+        self.manager.tools_discovered = True
+        self.frame_handler = frame_handler
+        self.bus.attach_headless(self.on_frame)
+
+    def on_frame(self, states: Dict[str, dict], logs: List):
+        if self.frame_handler is not None:
+            self.frame_handler(states)
+        for download_id, state in states.items():
+            self.manager.apply_download_progress(download_id, **state)
+
+    def queue(self, count: int, fmt: str = "mp4", prefix: str = "bench") -> List[str]:
+        return [self.manager.queue_item(f"Élément {index}", f"https://www.youtube.com/watch?v={prefix}{index:06}", fmt)
+                for index in range(count)]
+
+    def run(self, on_tick: Optional[Callable] = None, timeout: float = RUN_TIMEOUT) -> float:
+        """Exécute la file jusqu'à ce que tout soit terminé. Retourne la durée (secondes)."""
+        started = time.perf_counter()
+        deadline = started + timeout
+        while True:
+            self.bus.flush()
+            self.manager.registry.evict_finished()
+            if on_tick is not None:
+                on_tick()
+            if self.manager.is_idle():
+                self.bus.flush()
+                if self.manager.is_idle():
+                    return time.perf_counter() - started
+            if time.perf_counter() > deadline:
+                raise RuntimeError("délai dépassé: les téléchargements simulés ne se terminent pas")
+            time.sleep(self.bus.frame_interval_ms / 1000)
+
+    def counts(self) -> Dict[str, int]:
+        return {status: self.manager.registry.count(status) for status in FINAL_STATUSES}
+
+    def close(self):
+        self.manager.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def bench_parser(params: Dict) -> Dict:
+    """Décodage seul, sans processus: parse_line + overall_percent + describe, comme Downloader._handle_event."""
+    results = {}
+    count = params['parser_lines']
+    for name, legacy in (("json", False), ("legacy", True)):
+        lines = list(fake_yt_dlp.progress_lines(50000000, count, legacy=legacy))
+        parser = ProgressParser()
+        started = time.perf_counter()
+        for line in lines:
+            event = parser.parse_line(line)
+            if event is not None and event.get('percent') is not None:
+                parser.overall_percent(event['percent'])
+                parser.describe(event)
+        elapsed = time.perf_counter() - started
+        results[name] = {'lines': count, 'seconds': elapsed, 'lines_per_second': count / elapsed}
+    return results
+
+
+def bench_pipeline(params: Dict) -> Dict:
+    """Lignes par seconde de bout en bout: processus yt-dlp simulés sans pause, lecture, décodage, bus et registre."""
+    results = {}
+    jobs, lines = params['pipeline_jobs'], params['pipeline_lines']
+    for io_engine in ("threads", "async"):
+        session = BenchSession(jobs, io_engine=io_engine)
+        try:
+            with FakeEnvironment(rate=0, lines=lines):
+                session.queue(jobs)
+                elapsed = session.run()
+            total_lines = jobs * lines
+            results[io_engine] = {'jobs': jobs, 'lines': total_lines, 'seconds': elapsed,
+                                  'lines_per_second': total_lines / elapsed, 'statuses': session.counts()}
+        finally:
+            session.close()
+    return results
+
+
+def bench_latency(params: Dict) -> Dict:
+    """Délai entre l'émission d'une ligne (horodatée par le faux yt-dlp) et son application par l'image du bus, par moteur E/S."""
+    results = {}
+    for io_engine in ("threads", "async"):
+        samples: List[float] = []
+
+        def on_frame(states: Dict[str, dict], samples=samples):
+            now = time.time()
+            for state in states.values():
+                details = state.get('details') or {}
+                if details.get('t'):
+                    samples.append((now - details['t']) * 1000)
+
+        session = BenchSession(params['latency_jobs'], io_engine=io_engine, frame_handler=on_frame)
+        try:
+            with FakeEnvironment(rate=params['latency_rate'], lines=params['latency_lines'], timestamps=1):
+                session.queue(params['latency_jobs'])
+                session.run()
+            results[io_engine] = {'jobs': params['latency_jobs'], 'rate': params['latency_rate'],
+                                  'frame_interval_ms': session.bus.frame_interval_ms, 'latency_ms': percentiles(samples)}
+        finally:
+            session.close()
+    return results
+
+
+def bench_cpu(params: Dict) -> Dict:
+    """Temps CPU de l'application (et des processus yt-dlp simulés) par téléchargement actif, à débit fixe, par moteur E/S."""
+    results = {}
+    for io_engine in ("threads", "async"):
+        results[io_engine] = {}
+        for jobs in params['cpu_jobs']:
+            session = BenchSession(jobs, io_engine=io_engine)
+            try:
+                with FakeEnvironment(rate=params['cpu_rate'], lines=params['cpu_lines']):
+                    children_before = children_cpu_seconds()
+                    cpu_before = time.process_time()
+                    session.queue(jobs)
+                    elapsed = session.run()
+                    cpu = time.process_time() - cpu_before
+                    children = children_cpu_seconds() - children_before
+                results[io_engine][str(jobs)] = {'jobs': jobs, 'seconds': elapsed, 'cpu_seconds': cpu,
+                                                 'cpu_percent_per_job': cpu / elapsed / jobs * 100,
+                                                 'children_cpu_seconds': children}
+            finally:
+                session.close()
+    return results
+
+
+def bench_queue(params: Dict) -> Dict:
+    """Mise en file de N éléments (sans démarrage), puis première image du bus qui les applique."""
+    count = params['queue_items']
+    session = BenchSession(1)
+    session.manager.tools_discovered = False # Les téléchargements ne démarrent pas
+    try:
+        started = time.perf_counter()
+        session.queue(count)
+        queued = time.perf_counter() - started
+        started = time.perf_counter()
+        session.bus.flush()
+        flushed = time.perf_counter() - started
+        return {'items': count, 'queue_seconds': queued, 'items_per_second': count / queued,
+                'flush_seconds': flushed, 'pending': session.manager.registry.count("En attente")}
+    finally:
+        session.close()
+
+
+def bench_memory(params: Dict) -> Dict:
+    """RSS au fil d'une longue série de petits téléchargements (rétention réduite: la croissance doit rester plate)."""
+    count = params['memory_jobs']
+    samples = []
+    session = BenchSession(params['memory_concurrency'], retention=params['memory_retention'])
+    next_sample = [0.0]
+
+    def on_tick():
+        now = time.perf_counter()
+        if now >= next_sample[0]:
+            next_sample[0] = now + 0.5
+            finished = sum(session.counts().values())
+            samples.append((finished, rss_kib()))
+
+    try:
+        with FakeEnvironment(rate=0, lines=5, size=100000):
+            session.queue(count)
+            gc.collect()
+            start_rss = rss_kib()
+            elapsed = session.run(on_tick)
+            gc.collect()
+            end_rss = rss_kib()
+        # Croissance mesurée à partir de la moitié de la série (après la montée en régime)
+        steady = [sample for sample in samples if sample[0] >= count // 2] or samples
+        growth = 0.0
+        if len(steady) >= 2 and steady[-1][0] > steady[0][0]:
+            growth = (steady[-1][1] - steady[0][1]) * 1000 / (steady[-1][0] - steady[0][0])
+        return {'jobs': count, 'retention': params['memory_retention'], 'seconds': elapsed,
+                'start_rss_kib': start_rss, 'end_rss_kib': end_rss, 'peak_rss_kib': max([end_rss] + [rss for _, rss in samples]),
+                'steady_growth_kib_per_1000_jobs': growth, 'in_memory_records': len(session.manager.registry),
+                'statuses': session.counts(), 'samples': samples}
+    finally:
+        session.close()
+
+
+BENCHMARK_FUNCTIONS = {'parser': bench_parser, 'pipeline': bench_pipeline, 'latency': bench_latency,
+                       'cpu': bench_cpu, 'queue': bench_queue, 'memory': bench_memory}
+
+# Valeurs comparées par --compare: (chemin dans les résultats, True si plus grand est meilleur)
+COMPARED_VALUES = (
+    ("parser.json.lines_per_second", True), ("parser.legacy.lines_per_second", True),
+    ("pipeline.threads.lines_per_second", True), ("pipeline.async.lines_per_second", True),
+    ("latency.threads.latency_ms.p50", False), ("latency.threads.latency_ms.p95", False),
+    ("latency.threads.latency_ms.p99", False), ("latency.async.latency_ms.p50", False),
+    ("latency.async.latency_ms.p95", False), ("latency.async.latency_ms.p99", False),
+    ("cpu.threads.1.cpu_percent_per_job", False), ("cpu.threads.4.cpu_percent_per_job", False),
+    ("cpu.threads.8.cpu_percent_per_job", False), ("cpu.async.1.cpu_percent_per_job", False),
+    ("cpu.async.4.cpu_percent_per_job", False), ("cpu.async.8.cpu_percent_per_job", False),
+    ("queue.items_per_second", True), ("queue.flush_seconds", False),
+    ("memory.steady_growth_kib_per_1000_jobs", False), ("memory.peak_rss_kib", False),
+)
+
+
+def _lookup(results: Dict, path: str):
+    value = results
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(before_path: str, after_path: str) -> int:
+    """Affiche les écarts entre deux fichiers de résultats."""
+    with open(before_path, "r", encoding='utf-8') as f:
+        before = json.load(f)
+    with open(after_path, "r", encoding='utf-8') as f:
+        after = json.load(f)
+    print(f"{'mesure':45} {before['meta'].get('revision') or '?':>12} {after['meta'].get('revision') or '?':>12}   écart")
+    for path, higher_is_better in COMPARED_VALUES:
+        old, new = _lookup(before['results'], path), _lookup(after['results'], path)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        better = (change > 0) == higher_is_better if change else None
+        verdict = "" if better is None or abs(change) < 5 else (" mieux" if better else " moins bien")
+        print(f"{path:45} {old:12.2f} {new:12.2f} {change:+7.1f}%{verdict}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne de MusicDL (faux yt-dlp, Linux).")
+    parser.add_argument("--quick", action="store_true", help="séries courtes (vérification rapide)")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS, metavar="NOM",
+                        help="n'exécuter que ce benchmark (répétable): " + ", ".join(BENCHMARKS))
+    parser.add_argument("-o", "--output", metavar="FICHIER",
+                        help="fichier de résultats (défaut: benchmarks/results/<date>-<révision>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("AVANT", "APRES"), help="comparer deux fichiers de résultats")
+    args = parser.parse_args(argv)
+    if args.compare:
+        return compare(*args.compare)
+    if not sys.platform.startswith("linux"):
+        print("Les benchmarks nécessitent Linux (/proc, getrusage).", file=sys.stderr)
+        return 2
+
+    params = dict(QUICK_PARAMS if args.quick else PARAMS)
+    revision = git_revision()
+    meta = {'revision': revision, 'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), 'quick': args.quick,
+            'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'params': params}
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"[{name}] ...", file=sys.stderr, flush=True)
+        started = time.perf_counter()
+        results[name] = BENCHMARK_FUNCTIONS[name](params)
+        print(f"[{name}] {time.perf_counter() - started:.1f} s", file=sys.stderr, flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{revision or 'inconnue'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, ensure_ascii=False)
+    for path, _ in COMPARED_VALUES:
+        value = _lookup(results, path)
+        if value is not None:
+            print(f"{path:45} {value:12.2f}")
+    print(f"Résultats enregistrés dans {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+MusicDL - mode sans interface
+Télécharge des URLs (arguments, fichier ou entrée standard) avec la même file d'attente et les mêmes
+limites que l'interface, sans Tk: pensé pour les tâches planifiées (cron) sur un serveur.
+Avec --daemon, reste actif et reçoit les téléchargements par l'API de contrôle locale (control_api.py).
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+from config_manager import ConfigManager
+from memory_manager import MemoryManager
+from download_manager import DownloadManager, DOWNLOAD_FORMATS, FFMPEG_FORMATS, validate_youtube_url
+from download_registry import FINAL_STATUSES
+from control_api import ControlAPIServer
+from metrics import MetricsFileWriter
+from job_timing import describe_stages
+from concurrency_controller import DEFAULT_SAMPLE_INTERVAL_MS
+from progress_parser import classify_message, format_bytes
+from ui_event_bus import UIEventBus
+
+# Codes de sortie
+EXIT_OK = 0
+EXIT_FAILED = 1 # Au moins un téléchargement ou une extraction a échoué (ou a été annulé)
+EXIT_USAGE = 2 # Arguments invalides ou aucune URL valide
+EXIT_UNAVAILABLE = 3 # yt-dlp (ou FFmpeg pour les formats convertis) introuvable, ou port de l'API déjà utilisé
+EXIT_INTERRUPTED = 130 # Interrompu (Ctrl+C, SIGTERM): les téléchargements en cours sont repris avec --resume
+
+# Intervalle entre deux lignes de progression (secondes)
+PROGRESS_INTERVAL = 2.0
+# Le mode sans interface a son propre journal de file et d'événements (l'interface peut tourner en même temps)
+CLI_JOURNAL_NAME = "queue_journal_cli.jsonl"
+CLI_EVENT_LOG_NAME = "events_cli.jsonl"
+STATUS_LABELS = {"completed": "OK", "failed": "ÉCHEC", "cancelled": "ANNULÉ"}
+
+
+def default_config_path() -> Optional[str]:
+    """
+    Configuration par défaut: celle de l'application sous Windows (None: chemin par défaut de ConfigManager),
+    ailleurs $XDG_CONFIG_HOME/YoutubeDownloader/config.json (~/.config par défaut).
+    """
+    if sys.platform == "win32":
+        return None
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(config_home, "YoutubeDownloader", "config.json")
+
+
+class ConsoleReporter:
+    """
+    Affichage du mode sans interface: une ligne par téléchargement terminé et une ligne de progression
+    globale toutes les PROGRESS_INTERVAL secondes, ou (--json) une ligne JSON par événement sur la sortie
+    standard. Les logs (--verbose) et les erreurs d'extraction vont sur la sortie d'erreur.
+    """
+
+    def __init__(self, manager: DownloadManager, json_output: bool = False, quiet: bool = False,
+                 verbose: bool = False):
+        self.manager = manager
+        self.json_output = json_output
+        self.quiet = quiet
+        self.verbose = verbose
+        self.extraction_failures = 0
+        self._statuses: Dict[str, str] = {} # Dernier état affiché par téléchargement
+        self._last_progress: Dict[str, float] = {} # Dernière ligne de progression JSON par téléchargement
+        self._next_summary = time.monotonic() + PROGRESS_INTERVAL
+        self._started_at = time.monotonic()
+
+    def _emit(self, event: str, **fields):
+        print(json.dumps(dict(event=event, t=round(time.time(), 3), **fields), ensure_ascii=False), flush=True)
+
+    def on_frame(self, states: Dict[str, dict], logs: List):
+        """Handler du bus: les états sont appliqués au gestionnaire, puis les logs affichés."""
+        for download_id, state in states.items():
+            self.manager.apply_download_progress(download_id, **state)
+        if self.verbose:
+            for message, download_id in logs:
+                if classify_message(message) != "raw":
+                    sys.stderr.write(message + "\n")
+            sys.stderr.flush()
+
+    def on_download_added(self, download_id: str):
+        dl_info = self.manager.registry.get(download_id)
+        if dl_info is None:
+            return
+        self._statuses[download_id] = dl_info['status']
+        if self.json_output:
+            self._emit('queued', id=download_id, title=dl_info['title'], url=dl_info['url'], format=dl_info['format'])
+
+    def on_download_changed(self, download_id: str):
+        dl_info = self.manager.registry.get(download_id)
+        if dl_info is None:
+            return
+        status = dl_info['status']
+        changed = self._statuses.get(download_id) != status
+        self._statuses[download_id] = status
+        if self.json_output:
+            if changed:
+                self._emit('status', id=download_id, title=dl_info['title'], status=status, message=dl_info['message'])
+            elif dl_info.get('stage') == 'download':
+                now = time.monotonic()
+                if now - self._last_progress.get(download_id, 0.0) >= PROGRESS_INTERVAL:
+                    self._last_progress[download_id] = now
+                    self._emit('progress', id=download_id, progress=round(dl_info['progress'], 1),
+                               downloaded_bytes=dl_info.get('downloaded_bytes'), total_bytes=dl_info.get('total_bytes'),
+                               speed=dl_info.get('speed'), eta=dl_info.get('eta'))
+            if status in FINAL_STATUSES:
+                self._last_progress.pop(download_id, None)
+        elif changed and status in FINAL_STATUSES and not (self.quiet and status == "completed"):
+            line = f"[{STATUS_LABELS[status]}] {dl_info['title']}"
+            if status != "completed" and dl_info['message']:
+                line += f": {dl_info['message']}"
+            print(line, flush=True)
+
+    def extraction_failed(self, url: str, error: Optional[Exception] = None):
+        """Appelé depuis le thread d'extraction."""
+        self.extraction_failures += 1
+        detail = f": {error}" if error else ""
+        sys.stderr.write(f"Impossible d'extraire les informations de {url}{detail}\n")
+        sys.stderr.flush()
+        if self.json_output:
+            self._emit('extraction_failed', url=url, error=str(error) if error else None)
+
+    def counts(self) -> Dict[str, int]:
+        registry = self.manager.registry
+        return {'pending': registry.count("En attente"), 'active': registry.count("active"),
+                'postprocessing': registry.count("postprocessing"), 'completed': registry.count("completed"),
+                'failed': registry.count("failed"), 'cancelled': registry.count("cancelled")}
+
+    def tick(self):
+        """Ligne de progression globale (mode texte), au plus toutes les PROGRESS_INTERVAL secondes."""
+        now = time.monotonic()
+        if self.json_output or self.quiet or now < self._next_summary:
+            return
+        self._next_summary = now + PROGRESS_INTERVAL
+        counts = self.counts()
+        if not (counts['pending'] or counts['active'] or counts['postprocessing']):
+            return
+        finished = counts['completed'] + counts['failed'] + counts['cancelled']
+        total = finished + counts['pending'] + counts['active'] + counts['postprocessing']
+        speed = sum(dl.get('speed') or 0 for dl in self.manager.registry.with_status("active")
+                    if dl.get('stage') == 'download')
+        print(f"[{finished}/{total}] {counts['active']} actif(s), {counts['postprocessing']} en conversion, "
+              f"{counts['pending']} en attente, {counts['failed'] + counts['cancelled']} échec(s) | "
+              f"{format_bytes(speed)}/s", flush=True)
+
+    def summary(self, interrupted: bool):
+        counts = self.counts()
+        elapsed = time.monotonic() - self._started_at
+        # Temps par étape du lot en cours (interrompu) ou du dernier lot terminé
+        batch = self.manager.timings.finish_batch() or self.manager.last_batch_summary
+        if self.json_output:
+            stages = {stage: round(seconds, 3) for stage, seconds in batch['stages'].items()} if batch else {}
+            self._emit('summary', interrupted=interrupted, elapsed=round(elapsed, 3),
+                       extraction_failures=self.extraction_failures, stages=stages,
+                       bottleneck=batch['bottleneck'] if batch else None, **counts)
+        elif not self.quiet or counts['failed'] or counts['cancelled'] or self.extraction_failures or interrupted:
+            print(f"{'Interrompu' if interrupted else 'Terminé'} en {elapsed:.0f} s: {counts['completed']} réussi(s), "
+                  f"{counts['failed']} échec(s), {counts['cancelled']} annulé(s), "
+                  f"{self.extraction_failures} URL(s) non extraite(s).", flush=True)
+            if batch and not self.quiet:
+                print(describe_stages(batch), flush=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="MusicDL sans interface: télécharge des URLs YouTube/YouTube Music avec la file d'attente "
+                    "et les limites configurées dans l'application.")
+    parser.add_argument("urls", nargs="*", help="URLs de vidéos ou de playlists")
+    parser.add_argument("-i", "--input", action="append", default=[], metavar="FICHIER",
+                        help="fichier d'URLs, une par ligne (lignes vides et # ignorées); '-' pour l'entrée standard")
+    parser.add_argument("-m", "--memory", action="store_true", help="télécharger aussi les éléments de la mémoire")
+    parser.add_argument("-f", "--format", default="mp4", type=str.lower, choices=DOWNLOAD_FORMATS,
+                        help="format de sortie (défaut: mp4)")
+    parser.add_argument("-o", "--output", metavar="DOSSIER", help="dossier de téléchargement (défaut: configuration)")
+    parser.add_argument("-j", "--jobs", type=int, metavar="N",
+                        help="téléchargements simultanés (1-15), limite fixe pour cette exécution")
+    parser.add_argument("--resume", action="store_true",
+                        help="reprendre les téléchargements non terminés des exécutions précédentes")
+    parser.add_argument("--config", metavar="FICHIER", help="fichier de configuration (défaut: celui de l'application sous Windows, "
+                             "~/.config/YoutubeDownloader/config.json ailleurs)")
+    parser.add_argument("--json", action="store_true", help="une ligne JSON par événement sur la sortie standard")
+    parser.add_argument("-q", "--quiet", action="store_true", help="n'afficher que les échecs et le résumé")
+    parser.add_argument("-v", "--verbose", action="store_true", help="afficher les logs sur la sortie d'erreur")
+    parser.add_argument("--metrics-file", metavar="FICHIER",
+                        help="écrire les métriques (format Prometheus) dans ce fichier toutes les 15 s et à la fin")
+    parser.add_argument("--timings-csv", metavar="FICHIER",
+                        help="exporter à la fin le temps passé par chaque téléchargement dans chaque étape (CSV)")
+    parser.add_argument("--offline", action="store_true",
+                        help="n'extraire aucune URL: métadonnées et formats servis par le cache uniquement")
+    parser.add_argument("--api", action="store_true",
+                        help="servir l'API de contrôle locale (port et jeton de la configuration) pendant l'exécution")
+    parser.add_argument("--api-port", type=int, metavar="PORT", help="port de l'API de contrôle (implique --api)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="rester actif une fois la file vide et attendre les téléchargements de l'API "
+                             "jusqu'à Ctrl+C ou SIGTERM (implique --api)")
+    args = parser.parse_args(argv)
+    if args.jobs is not None and not (1 <= args.jobs <= 15):
+        parser.error("--jobs doit être compris entre 1 et 15")
+    if args.api_port is not None and not (1 <= args.api_port <= 65535):
+        parser.error("--api-port doit être compris entre 1 et 65535")
+    args.api = args.api or args.daemon or args.api_port is not None
+    return args
+
+
+def read_urls(args: argparse.Namespace) -> List[str]:
+    """URLs des arguments puis des fichiers (ou de l'entrée standard si rien d'autre n'est fourni et qu'elle est redirigée)."""
+    sources = list(args.input)
+    if (not args.urls and not sources and not args.memory and not args.resume and not args.daemon
+            and not sys.stdin.isatty()):
+        sources.append("-")
+    urls = list(args.urls)
+    for source in sources:
+        lines = sys.stdin if source == "-" else open(source, "r", encoding='utf-8')
+        try:
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+        finally:
+            if source != "-":
+                lines.close()
+    return urls
+
+
+def _queue_sources(manager: DownloadManager, reporter: ConsoleReporter, urls: List[str], memory_items: List[Dict],
+                   selected_format: str, done: threading.Event):
+    """Extraction et mise en file d'attente (thread dédié: les premiers téléchargements démarrent sans attendre la fin)."""
+    try:
+        for url in urls:
+            try:
+                if manager.queue_url(url, selected_format) is None:
+                    reporter.extraction_failed(url)
+            except Exception as e:
+                reporter.extraction_failed(url, e)
+        skipped_count = 0
+        for item in memory_items:
+            if manager.queue_item(item['title'], item['url'], selected_format, item.get('duration')) is None:
+                skipped_count += 1
+        manager.log_archived_skips(skipped_count)
+    finally:
+        done.set()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        urls = read_urls(args)
+    except OSError as e:
+        print(f"Impossible de lire le fichier d'URLs: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    invalid_urls = [url for url in urls if not validate_youtube_url(url)]
+    for url in invalid_urls:
+        print(f"URL ignorée (pas une URL YouTube/YouTube Music valide): {url}", file=sys.stderr)
+    urls = [url for url in urls if validate_youtube_url(url)]
+
+    config_path = args.config or default_config_path()
+    config = ConfigManager(config_path) if config_path else ConfigManager()
+    memory_items = []
+    if args.memory:
+        # Mémoire de l'application sous Windows, à côté du fichier de configuration ailleurs
+        memory = (MemoryManager() if sys.platform == "win32"
+                  else MemoryManager(os.path.join(os.path.dirname(os.path.abspath(config.config_path)), "links.txt")))
+        memory_items = memory.get_memory()
+    if args.jobs is not None:
+        # Limite fixe pour cette exécution uniquement (la configuration n'est pas sauvegardée)
+        config.concurrent_downloads_limit = args.jobs
+        config.adaptive_concurrency = False
+    if args.offline:
+        config.offline_mode = True # Pour cette exécution uniquement
+
+    bus = UIEventBus()
+    manager = DownloadManager(config, bus, bus.publish_log, download_path=args.output,
+                              journal_name=CLI_JOURNAL_NAME, event_log_name=CLI_EVENT_LOG_NAME)
+    reporter = ConsoleReporter(manager, json_output=args.json, quiet=args.quiet, verbose=args.verbose)
+    manager.on_download_added = reporter.on_download_added
+    manager.on_download_changed = reporter.on_download_changed
+    bus.attach_headless(reporter.on_frame)
+
+    interrupted = False
+    api = None
+    metrics_writer = MetricsFileWriter(manager, args.metrics_file) if args.metrics_file else None
+    try:
+        if args.resume:
+            manager.restore_queue()
+        if not urls and not memory_items and not manager.registry.count("En attente") and not args.api:
+            print("Aucune URL valide à télécharger.", file=sys.stderr)
+            return EXIT_USAGE
+
+        yt_dlp_found, ffmpeg_found = manager.discover_tools()
+        if not yt_dlp_found or not manager.downloader.is_available():
+            print("yt-dlp est introuvable: installez-le (pip install yt-dlp) ou ajoutez-le au PATH.", file=sys.stderr)
+            return EXIT_UNAVAILABLE
+        if args.format in FFMPEG_FORMATS and not ffmpeg_found:
+            print(f"FFmpeg est introuvable: impossible de convertir en {args.format.upper()}.", file=sys.stderr)
+            return EXIT_UNAVAILABLE
+        manager.tools_discovered = True
+
+        if args.api:
+            api = ControlAPIServer(manager, args.api_port or config.get_control_api_port(),
+                                   config.get_control_api_token(), default_format=args.format)
+            try:
+                api.start()
+            except OSError as e:
+                print(f"Impossible de démarrer l'API de contrôle sur le port {api.port}: {e}", file=sys.stderr)
+                return EXIT_UNAVAILABLE
+            if not args.quiet and not args.json:
+                print(f"API de contrôle: {api.url}", file=sys.stderr)
+
+        if metrics_writer is not None:
+            metrics_writer.start()
+
+        signal.signal(signal.SIGTERM, _interrupt)
+        queued = threading.Event()
+        threading.Thread(target=_queue_sources, name="Extraction", daemon=True,
+                         args=(manager, reporter, urls, memory_items, args.format, queued)).start()
+        manager.start_next_download_if_possible() # Téléchargements repris (--resume)
+
+        # Même cadence que l'interface: états coalescés et démarrages à chaque image, contrôleur adaptatif périodique
+        next_sample = time.monotonic() + DEFAULT_SAMPLE_INTERVAL_MS / 1000
+        while True:
+            bus.flush()
+            manager.registry.evict_finished() # Mémoire bornée même pour de très gros lots
+            if time.monotonic() >= next_sample:
+                manager.adaptive_concurrency_tick()
+                next_sample = time.monotonic() + DEFAULT_SAMPLE_INTERVAL_MS / 1000
+            reporter.tick()
+            # Sans --daemon, l'exécution se termine une fois les URLs et les soumissions de l'API traitées
+            if queued.is_set() and manager.is_idle() and not args.daemon and not (api and api.busy()):
+                bus.flush()
+                break
+            time.sleep(bus.frame_interval_ms / 1000)
+    except KeyboardInterrupt:
+        # Un démon arrêté alors que sa file est vide s'est terminé normalement
+        interrupted = not (args.daemon and manager.is_idle())
+        # Les processus en cours sont arrêtés sans appliquer leur annulation: le journal les garde "active",
+        # ils seront repris (fichiers .part) par la prochaine exécution avec --resume
+        for status in ("active", "postprocessing"):
+            for download_id in manager.registry.ids_with_status(status):
+                manager.downloader.cancel_download(download_id)
+    finally:
+        if api is not None:
+            api.stop()
+        if metrics_writer is not None:
+            metrics_writer.stop() # Dernière écriture, compteurs finaux compris
+        manager.close()
+
+    reporter.summary(interrupted)
+    if args.timings_csv:
+        try:
+            manager.timings.export_csv(args.timings_csv)
+        except OSError as e:
+            print(f"Impossible d'écrire les temps par étape dans {args.timings_csv}: {e}", file=sys.stderr)
+    if interrupted:
+        return EXIT_INTERRUPTED
+    counts = reporter.counts()
+    if counts['failed'] or counts['cancelled'] or reporter.extraction_failures or invalid_urls:
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# concurrency_controller.py
+import os
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+# psutil (optionnel) donne l'occupation CPU de toute la machine, conversions ffmpeg comprises
+PSUTIL_AVAILABLE = importlib.util.find_spec("psutil") is not None
+psutil = None
+
+# Intervalle entre deux mesures du contrôleur (millisecondes, boucle Tk)
+DEFAULT_SAMPLE_INTERVAL_MS = 5000
+
+
+def cpu_usage_percent() -> Optional[float]:
+    """
+    Occupation CPU globale en pourcentage depuis l'appel précédent (psutil),
+    sinon charge moyenne sur une minute rapportée au nombre de cœurs. None si aucune mesure n'est possible.
+    """
+    global psutil
+    if PSUTIL_AVAILABLE:
+        if psutil is None:
+            import psutil as module
+            psutil = module
+            psutil.cpu_percent(None) # La première mesure sert de référence
+        return psutil.cpu_percent(None)
+    if hasattr(os, "getloadavg"):
+        return os.getloadavg()[0] * 100.0 / (os.cpu_count() or 1)
+    return None
+
+
+class AdaptiveConcurrencyController:
+    """
+    Ajuste le nombre de téléchargements simultanés à la manière d'AIMD (augmentation additive,
+    diminution multiplicative), entre `min_limit` et `max_limit`.
+    - Erreurs ou limitation de débit (HTTP 429/403) depuis la mesure précédente: limite divisée par deux.
+    - CPU saturé: limite réduite d'un quart.
+    - Toutes les places occupées et des téléchargements en attente: +1 tant que le débit total progresse
+      (palier si la dernière place n'a presque rien apporté); si le débit a baissé depuis la dernière
+      augmentation, retour d'une place en arrière.
+    Après chaque changement, quelques mesures sont ignorées le temps que le débit se stabilise.
+    Le débit observé pour chaque limite est oublié après `memory_samples` mesures: les conditions
+    du réseau changent au cours de la journée.
+    """
+
+    def __init__(self, min_limit: int = 1, max_limit: int = 15, initial_limit: int = 2,
+                 cpu_threshold: float = 90.0, settle_samples: int = 2, smoothing: float = 0.5,
+                 memory_samples: int = 60):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = max(self.min_limit, min(self.max_limit, initial_limit))
+        self.cpu_threshold = cpu_threshold
+        self.settle_samples = settle_samples
+        self.smoothing = smoothing
+        self.memory_samples = memory_samples
+        self._throughput: Optional[float] = None # Débit total lissé (octets/s)
+        self._throughput_by_limit: Dict[int, Tuple[float, int]] = {} # limite -> (débit lissé, numéro de mesure)
+        self._samples = 0
+        self._settle = 0
+
+    def set_range(self, min_limit: int, max_limit: int):
+        """Change la plage autorisée; la limite courante y est ramenée."""
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+        self._throughput_by_limit.clear()
+
+    def observe(self, throughput: float, failures: int, throttled: int, cpu: Optional[float],
+                active: int, pending: int) -> Optional[Tuple[int, str]]:
+        """
+        Intègre une mesure et retourne (nouvelle limite, raison) si la limite change, sinon None.
+        `failures` et `throttled` sont comptés depuis la mesure précédente.
+        """
+        self._samples += 1
+        if self._throughput is None:
+            self._throughput = throughput
+        else:
+            self._throughput = self.smoothing * throughput + (1 - self.smoothing) * self._throughput
+
+        # Les diminutions sont immédiates, même pendant la stabilisation
+        if throttled or failures:
+            self._throughput_by_limit.clear() # Conditions différentes: les débits mesurés ne sont plus comparables
+            return self._change(self.limit // 2,
+                                f"{throttled} limitation(s) de débit et {failures} échec(s) depuis la dernière mesure")
+        if cpu is not None and cpu >= self.cpu_threshold and active > self.min_limit:
+            self._throughput_by_limit.clear()
+            return self._change(self.limit * 3 // 4, f"CPU saturé ({cpu:.0f}%)")
+
+        if self._settle > 0:
+            self._settle -= 1
+            return None
+        if active < self.limit:
+            return None # Places libres (fin de file): le débit ne dit rien de la limite
+        self._throughput_by_limit[self.limit] = (self._throughput, self._samples)
+
+        previous = self._recent_throughput(self.limit - 1)
+        if previous is not None and self._throughput < previous * 0.95:
+            # La dernière place ajoutée n'a rien apporté: le goulot est ailleurs (réseau, serveur)
+            return self._change(self.limit - 1, f"débit en baisse ({self._throughput / 1024:.0f} Kio/s contre "
+                                                f"{previous / 1024:.0f} Kio/s avec {self.limit - 1} place(s))")
+        if previous is not None and self._throughput < previous * 1.05:
+            return None # Palier: la dernière place ajoutée n'a presque rien apporté
+        following = self._recent_throughput(self.limit + 1)
+        if following is not None and following <= self._throughput * 1.05:
+            return None # Une place de plus n'a rien apporté récemment
+        if pending > 0:
+            return self._change(self.limit + 1, f"toutes les places occupées, débit total {self._throughput / 1024:.0f} Kio/s")
+        return None
+
+    def _recent_throughput(self, limit: int) -> Optional[float]:
+        entry = self._throughput_by_limit.get(limit)
+        if entry is None or self._samples - entry[1] > self.memory_samples:
+            return None
+        return entry[0]
+
+    def _change(self, new_limit: int, reason: str) -> Optional[Tuple[int, str]]:
+        new_limit = max(self.min_limit, min(self.max_limit, new_limit))
+        if new_limit == self.limit:
+            return None
+        self.limit = new_limit
+        self._settle = self.settle_samples
+        return new_limit, reason
@@ -7,6 +7,34 @@ class ConfigManager:
         self.api_key = ''
         self.download_path = os.getcwd()
         self.concurrent_downloads_limit = 2 # Nouvelle option: limite de téléchargements simultanés, valeur par défaut
+        self.io_engine = 'threads' # Lecture des sorties yt-dlp: 'threads' ou 'async' (boucle E/S partagée)
+        self.download_backend = 'subprocess' # Moteur de téléchargement: 'subprocess' ou 'library' (yt_dlp en processus)
+        self.data_dir = os.path.dirname(config_path) # Dossier des données persistantes (archive des téléchargements, ...)
+        self.skip_archived_downloads = True # Ne pas remettre en file d'attente ce qui figure déjà dans l'archive
+        self.format_planning = True # Inspecter les formats pour copier/remultiplexer au lieu de réencoder
+        self.two_stage_pipeline = True # Séparer le téléchargement réseau de la conversion ffmpeg
+        self.postprocess_workers = 0 # Conversions simultanées (0: nombre de cœurs)
+        self.low_priority_postprocess = True # Conversions ffmpeg en priorité basse
+        self.adaptive_concurrency = False # Limite de téléchargements ajustée automatiquement (AIMD)
+        self.adaptive_min_limit = 1 # Plage autorisée pour la limite automatique
+        self.adaptive_max_limit = 15
+        self.bandwidth_limit = 0 # Limite globale de bande passante en Kio/s (0: illimitée)
+        self.bandwidth_schedule = [] # Plages horaires: [{'days': [0-6], 'start': 'HH:MM', 'end': 'HH:MM', 'limit': Kio/s}]
+        self.scheduler_policy = 'fifo' # Ordre de la file d'attente: 'fifo', 'shortest' ou 'round_robin'
+        self.download_retention = 2000 # Téléchargements terminés gardés affichés avant d'être évincés
+        self.download_history = True # Ajouter les téléchargements évincés à l'historique persistant
+        self.compact_downloads_view = False # Onglet Téléchargements en tableau compact plutôt qu'en cartes
+        self.log_max_lines = 5000 # Lignes gardées par niveau dans la console de log
+        self.event_log_enabled = True # Journal structuré des événements (events.jsonl dans le dossier de données)
+        self.event_log_max_mb = 50 # Taille d'un fichier du journal des événements avant rotation (Mo)
+        self.control_api_enabled = False # API HTTP/JSON locale pour piloter la file d'attente depuis d'autres outils
+        self.control_api_port = 8765 # Port de l'API (écoute sur 127.0.0.1 uniquement)
+        self.control_api_token = '' # Jeton exigé par l'API (en-tête Authorization: Bearer ...); vide: aucun
+        self.metrics_file_enabled = False # Écrire les métriques (format Prometheus) dans metrics.prom périodiquement
+        self.metadata_cache_enabled = True # Cache persistant des métadonnées (metadata_cache.jsonl dans le dossier de données)
+        self.metadata_cache_ttl_hours = 24 # Durée de validité des métadonnées en cache (heures)
+        self.metadata_cache_max_entries = 20000 # Éléments gardés en cache avant éviction des moins récemment utilisés
+        self.offline_mode = False # Métadonnées servies par le cache uniquement (aucune extraction)
         self.load_config()
         
     def load_config(self):
@@ -21,10 +49,92 @@ class ConfigManager:
                 # S'assurer que la valeur est dans les limites acceptables
                 if not (1 <= self.concurrent_downloads_limit <= 15):
                     self.concurrent_downloads_limit = 2 # Réinitialiser si hors limites
+                self.io_engine = config.get('io_engine', 'threads')
+                if self.io_engine not in ('threads', 'async'):
+                    self.io_engine = 'threads'
+                self.download_backend = config.get('download_backend', 'subprocess')
+                if self.download_backend not in ('subprocess', 'library'):
+                    self.download_backend = 'subprocess'
+                self.data_dir = config.get('data_dir') or os.path.dirname(self.config_path)
+                self.skip_archived_downloads = bool(config.get('skip_archived_downloads', True))
+                self.format_planning = bool(config.get('format_planning', True))
+                self.two_stage_pipeline = bool(config.get('two_stage_pipeline', True))
+                self.postprocess_workers = config.get('postprocess_workers', 0)
+                if not isinstance(self.postprocess_workers, int) or not (0 <= self.postprocess_workers <= 64):
+                    self.postprocess_workers = 0 # Réinitialiser si hors limites
+                self.low_priority_postprocess = bool(config.get('low_priority_postprocess', True))
+                self.adaptive_concurrency = bool(config.get('adaptive_concurrency', False))
+                self.adaptive_min_limit = config.get('adaptive_min_limit', 1)
+                self.adaptive_max_limit = config.get('adaptive_max_limit', 15)
+                if (not isinstance(self.adaptive_min_limit, int) or not isinstance(self.adaptive_max_limit, int)
+                        or not (1 <= self.adaptive_min_limit <= self.adaptive_max_limit <= 15)):
+                    self.adaptive_min_limit, self.adaptive_max_limit = 1, 15 # Réinitialiser si hors limites
+                self.bandwidth_limit = config.get('bandwidth_limit', 0)
+                if not isinstance(self.bandwidth_limit, int) or self.bandwidth_limit < 0:
+                    self.bandwidth_limit = 0
+                self.bandwidth_schedule = [rule for rule in config.get('bandwidth_schedule', [])
+                                           if isinstance(rule, dict) and {'days', 'start', 'end', 'limit'} <= set(rule)]
+                self.scheduler_policy = config.get('scheduler_policy', 'fifo')
+                if self.scheduler_policy not in ('fifo', 'shortest', 'round_robin'):
+                    self.scheduler_policy = 'fifo'
+                self.download_retention = config.get('download_retention', 2000)
+                if not isinstance(self.download_retention, int) or not (10 <= self.download_retention <= 100000):
+                    self.download_retention = 2000 # Réinitialiser si hors limites
+                self.download_history = bool(config.get('download_history', True))
+                self.compact_downloads_view = bool(config.get('compact_downloads_view', False))
+                self.log_max_lines = config.get('log_max_lines', 5000)
+                if not isinstance(self.log_max_lines, int) or not (100 <= self.log_max_lines <= 200000):
+                    self.log_max_lines = 5000 # Réinitialiser si hors limites
+                self.event_log_enabled = bool(config.get('event_log_enabled', True))
+                self.event_log_max_mb = config.get('event_log_max_mb', 50)
+                if not isinstance(self.event_log_max_mb, int) or not (1 <= self.event_log_max_mb <= 2000):
+                    self.event_log_max_mb = 50 # Réinitialiser si hors limites
+                self.control_api_enabled = bool(config.get('control_api_enabled', False))
+                self.control_api_port = config.get('control_api_port', 8765)
+                if not isinstance(self.control_api_port, int) or not (1024 <= self.control_api_port <= 65535):
+                    self.control_api_port = 8765 # Réinitialiser si hors limites
+                self.control_api_token = str(config.get('control_api_token', '') or '')
+                self.metrics_file_enabled = bool(config.get('metrics_file_enabled', False))
+                self.metadata_cache_enabled = bool(config.get('metadata_cache_enabled', True))
+                self.metadata_cache_ttl_hours = config.get('metadata_cache_ttl_hours', 24)
+                if not isinstance(self.metadata_cache_ttl_hours, int) or not (1 <= self.metadata_cache_ttl_hours <= 720):
+                    self.metadata_cache_ttl_hours = 24 # Réinitialiser si hors limites
+                self.metadata_cache_max_entries = config.get('metadata_cache_max_entries', 20000)
+                if not isinstance(self.metadata_cache_max_entries, int) or not (100 <= self.metadata_cache_max_entries <= 1000000):
+                    self.metadata_cache_max_entries = 20000 # Réinitialiser si hors limites
+                self.offline_mode = bool(config.get('offline_mode', False))
         except (FileNotFoundError, json.JSONDecodeError):
             self.api_key = ''
             self.download_path = os.getcwd()
             self.concurrent_downloads_limit = 2
+            self.io_engine = 'threads'
+            self.download_backend = 'subprocess'
+            self.data_dir = os.path.dirname(self.config_path)
+            self.skip_archived_downloads = True
+            self.format_planning = True
+            self.two_stage_pipeline = True
+            self.postprocess_workers = 0
+            self.low_priority_postprocess = True
+            self.adaptive_concurrency = False
+            self.adaptive_min_limit = 1
+            self.adaptive_max_limit = 15
+            self.bandwidth_limit = 0
+            self.bandwidth_schedule = []
+            self.scheduler_policy = 'fifo'
+            self.download_retention = 2000
+            self.download_history = True
+            self.compact_downloads_view = False
+            self.log_max_lines = 5000
+            self.event_log_enabled = True
+            self.event_log_max_mb = 50
+            self.control_api_enabled = False
+            self.control_api_port = 8765
+            self.control_api_token = ''
+            self.metrics_file_enabled = False
+            self.metadata_cache_enabled = True
+            self.metadata_cache_ttl_hours = 24
+            self.metadata_cache_max_entries = 20000
+            self.offline_mode = False
             # Créer le répertoire si nécessaire
             os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
             
@@ -34,7 +144,35 @@ class ConfigManager:
             config = {
                 'youtube_api_key': self.api_key,
                 'download_path': self.download_path,
-                'concurrent_downloads_limit': self.concurrent_downloads_limit # Sauvegarder la nouvelle option
+                'concurrent_downloads_limit': self.concurrent_downloads_limit, # Sauvegarder la nouvelle option
+                'io_engine': self.io_engine,
+                'download_backend': self.download_backend,
+                'data_dir': self.data_dir,
+                'skip_archived_downloads': self.skip_archived_downloads,
+                'format_planning': self.format_planning,
+                'two_stage_pipeline': self.two_stage_pipeline,
+                'postprocess_workers': self.postprocess_workers,
+                'low_priority_postprocess': self.low_priority_postprocess,
+                'adaptive_concurrency': self.adaptive_concurrency,
+                'adaptive_min_limit': self.adaptive_min_limit,
+                'adaptive_max_limit': self.adaptive_max_limit,
+                'bandwidth_limit': self.bandwidth_limit,
+                'bandwidth_schedule': self.bandwidth_schedule,
+                'scheduler_policy': self.scheduler_policy,
+                'download_retention': self.download_retention,
+                'download_history': self.download_history,
+                'compact_downloads_view': self.compact_downloads_view,
+                'log_max_lines': self.log_max_lines,
+                'event_log_enabled': self.event_log_enabled,
+                'event_log_max_mb': self.event_log_max_mb,
+                'control_api_enabled': self.control_api_enabled,
+                'control_api_port': self.control_api_port,
+                'control_api_token': self.control_api_token,
+                'metrics_file_enabled': self.metrics_file_enabled,
+                'metadata_cache_enabled': self.metadata_cache_enabled,
+                'metadata_cache_ttl_hours': self.metadata_cache_ttl_hours,
+                'metadata_cache_max_entries': self.metadata_cache_max_entries,
+                'offline_mode': self.offline_mode
             }
             with open(self.config_path, "w", encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
@@ -71,3 +209,233 @@ class ConfigManager:
         """Obtenir la limite de téléchargements simultanés"""
         return self.concurrent_downloads_limit
 
+    def set_io_engine(self, mode: str):
+        """Définir le moteur de lecture des sorties yt-dlp ('threads' ou 'async')"""
+        if mode in ('threads', 'async'):
+            self.io_engine = mode
+            self.save_config()
+        else:
+            print(f"Avertissement: Moteur E/S inconnu: {mode}")
+
+    def get_io_engine(self) -> str:
+        """Obtenir le moteur de lecture des sorties yt-dlp"""
+        return self.io_engine
+
+    def set_download_backend(self, backend: str):
+        """Définir le moteur de téléchargement ('subprocess' ou 'library')"""
+        if backend in ('subprocess', 'library'):
+            self.download_backend = backend
+            self.save_config()
+        else:
+            print(f"Avertissement: Moteur de téléchargement inconnu: {backend}")
+
+    def get_download_backend(self) -> str:
+        """Obtenir le moteur de téléchargement"""
+        return self.download_backend
+
+    def set_data_dir(self, path: str):
+        """Définir le dossier des données persistantes"""
+        self.data_dir = path
+        self.save_config()
+
+    def get_data_dir(self) -> str:
+        """Obtenir le dossier des données persistantes"""
+        return self.data_dir
+
+    def set_skip_archived_downloads(self, enabled: bool):
+        """Activer ou non l'omission des éléments déjà présents dans l'archive"""
+        self.skip_archived_downloads = bool(enabled)
+        self.save_config()
+
+    def get_skip_archived_downloads(self) -> bool:
+        """Savoir si les éléments déjà archivés sont ignorés"""
+        return self.skip_archived_downloads
+
+    def set_format_planning(self, enabled: bool):
+        """Activer ou non l'inspection des formats avant téléchargement"""
+        self.format_planning = bool(enabled)
+        self.save_config()
+
+    def get_format_planning(self) -> bool:
+        """Savoir si les formats sont inspectés avant téléchargement"""
+        return self.format_planning
+
+    def set_two_stage_pipeline(self, enabled: bool):
+        """Activer ou non la séparation téléchargement / conversion"""
+        self.two_stage_pipeline = bool(enabled)
+        self.save_config()
+
+    def get_two_stage_pipeline(self) -> bool:
+        """Savoir si les conversions passent par le pool de post-traitement"""
+        return self.two_stage_pipeline
+
+    def set_postprocess_workers(self, workers: int):
+        """Définir le nombre de conversions simultanées (0: nombre de cœurs)"""
+        if 0 <= workers <= 64:
+            self.postprocess_workers = workers
+            self.save_config()
+        else:
+            print("La limite de conversions doit être comprise entre 0 et 64.")
+
+    def get_postprocess_workers(self) -> int:
+        """Obtenir le nombre de conversions simultanées (0: nombre de cœurs)"""
+        return self.postprocess_workers
+
+    def set_low_priority_postprocess(self, enabled: bool):
+        """Activer ou non la priorité basse des conversions"""
+        self.low_priority_postprocess = bool(enabled)
+        self.save_config()
+
+    def get_low_priority_postprocess(self) -> bool:
+        """Savoir si les conversions sont lancées en priorité basse"""
+        return self.low_priority_postprocess
+
+    def set_adaptive_concurrency(self, enabled: bool, min_limit: int, max_limit: int):
+        """Activer ou non la limite automatique de téléchargements simultanés et définir sa plage"""
+        if 1 <= min_limit <= max_limit <= 15:
+            self.adaptive_concurrency = bool(enabled)
+            self.adaptive_min_limit = min_limit
+            self.adaptive_max_limit = max_limit
+            self.save_config()
+        else:
+            print(f"Avertissement: La plage automatique doit être comprise entre 1 et 15. Valeurs fournies: {min_limit}-{max_limit}")
+
+    def get_adaptive_concurrency(self) -> bool:
+        """Savoir si la limite de téléchargements est ajustée automatiquement"""
+        return self.adaptive_concurrency
+
+    def get_adaptive_limit_range(self) -> tuple:
+        """Obtenir la plage (minimum, maximum) de la limite automatique"""
+        return self.adaptive_min_limit, self.adaptive_max_limit
+
+    def set_bandwidth_limit(self, limit_kib: int, schedule: list):
+        """Définir la limite globale de bande passante (Kio/s, 0: illimitée) et ses plages horaires"""
+        self.bandwidth_limit = max(0, int(limit_kib))
+        self.bandwidth_schedule = list(schedule)
+        self.save_config()
+
+    def get_bandwidth_limit(self) -> int:
+        """Obtenir la limite globale de bande passante en Kio/s (0: illimitée)"""
+        return self.bandwidth_limit
+
+    def get_bandwidth_schedule(self) -> list:
+        """Obtenir les plages horaires de limitation de bande passante"""
+        return self.bandwidth_schedule
+
+    def set_scheduler_policy(self, policy: str):
+        """Définir l'ordre de la file d'attente ('fifo', 'shortest' ou 'round_robin')"""
+        if policy in ('fifo', 'shortest', 'round_robin'):
+            self.scheduler_policy = policy
+            self.save_config()
+
+    def get_scheduler_policy(self) -> str:
+        """Obtenir l'ordre de la file d'attente"""
+        return self.scheduler_policy
+
+    def set_download_retention(self, retention: int, history: bool):
+        """Définir le nombre de téléchargements terminés gardés affichés et l'ajout des évincés à l'historique"""
+        if 10 <= retention <= 100000:
+            self.download_retention = retention
+            self.download_history = bool(history)
+            self.save_config()
+
+    def get_download_retention(self) -> int:
+        """Obtenir le nombre de téléchargements terminés gardés affichés"""
+        return self.download_retention
+
+    def get_download_history(self) -> bool:
+        """Indique si les téléchargements évincés sont ajoutés à l'historique persistant"""
+        return self.download_history
+
+    def set_compact_downloads_view(self, enabled: bool):
+        """Afficher les téléchargements en tableau compact (True) ou en cartes (False)"""
+        self.compact_downloads_view = bool(enabled)
+        self.save_config()
+
+    def get_compact_downloads_view(self) -> bool:
+        """Indique si les téléchargements sont affichés en tableau compact"""
+        return self.compact_downloads_view
+
+    def set_log_max_lines(self, max_lines: int):
+        """Définir le nombre de lignes gardées par niveau dans la console de log"""
+        if 100 <= max_lines <= 200000:
+            self.log_max_lines = max_lines
+            self.save_config()
+
+    def get_log_max_lines(self) -> int:
+        """Obtenir le nombre de lignes gardées par niveau dans la console de log"""
+        return self.log_max_lines
+
+    def set_event_log(self, enabled: bool, max_mb: int):
+        """Activer le journal des événements et définir la taille d'un fichier avant rotation (Mo)"""
+        self.event_log_enabled = bool(enabled)
+        if 1 <= max_mb <= 2000:
+            self.event_log_max_mb = max_mb
+        self.save_config()
+
+    def get_event_log_enabled(self) -> bool:
+        """Indique si le journal des événements est activé"""
+        return self.event_log_enabled
+
+    def get_event_log_max_mb(self) -> int:
+        """Obtenir la taille d'un fichier du journal des événements avant rotation (Mo)"""
+        return self.event_log_max_mb
+
+    def set_control_api(self, enabled: bool, port: int, token: str):
+        """Activer l'API de contrôle locale et définir son port (1024-65535) et son jeton"""
+        self.control_api_enabled = bool(enabled)
+        if 1024 <= port <= 65535:
+            self.control_api_port = port
+        self.control_api_token = token.strip()
+        self.save_config()
+
+    def get_control_api_enabled(self) -> bool:
+        """Indique si l'API de contrôle locale est activée"""
+        return self.control_api_enabled
+
+    def get_control_api_port(self) -> int:
+        """Obtenir le port de l'API de contrôle locale"""
+        return self.control_api_port
+
+    def get_control_api_token(self) -> str:
+        """Obtenir le jeton de l'API de contrôle locale (vide: aucun)"""
+        return self.control_api_token
+
+    def set_metrics_file_enabled(self, enabled: bool):
+        """Écrire (True) ou non les métriques dans metrics.prom (dossier de données)"""
+        self.metrics_file_enabled = bool(enabled)
+        self.save_config()
+
+    def get_metrics_file_enabled(self) -> bool:
+        """Indique si les métriques sont écrites dans metrics.prom"""
+        return self.metrics_file_enabled
+
+    def set_metadata_cache(self, enabled: bool, ttl_hours: int, max_entries: int):
+        """Activer le cache des métadonnées et définir sa durée de validité (1-720 h) et sa taille (100-1000000 éléments)"""
+        self.metadata_cache_enabled = bool(enabled)
+        if 1 <= ttl_hours <= 720:
+            self.metadata_cache_ttl_hours = ttl_hours
+        if 100 <= max_entries <= 1000000:
+            self.metadata_cache_max_entries = max_entries
+        self.save_config()
+
+    def get_metadata_cache_enabled(self) -> bool:
+        """Indique si le cache des métadonnées est activé"""
+        return self.metadata_cache_enabled
+
+    def get_metadata_cache_ttl_hours(self) -> int:
+        """Obtenir la durée de validité des métadonnées en cache (heures)"""
+        return self.metadata_cache_ttl_hours
+
+    def get_metadata_cache_max_entries(self) -> int:
+        """Obtenir le nombre maximal d'éléments en cache"""
+        return self.metadata_cache_max_entries
+
+    def set_offline_mode(self, enabled: bool):
+        """Activer ou non le mode hors ligne (métadonnées du cache uniquement)"""
+        self.offline_mode = bool(enabled)
+        self.save_config()
+
+    def get_offline_mode(self) -> bool:
+        """Indique si le mode hors ligne est activé"""
+        return self.offline_mode
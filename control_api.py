@@ -0,0 +1,557 @@
+# control_api.py
+import re
+import hmac
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from download_manager import DownloadManager, DOWNLOAD_FORMATS, is_playlist_url, validate_youtube_url
+from download_registry import FINAL_STATUSES
+from metrics import METRICS_CONTENT_TYPE
+
+DEFAULT_PORT = 8765
+# Changements d'état gardés pour les clients en attente (long-poll, SSE); au-delà ils doivent relire /api/jobs
+DEFAULT_FEED_SIZE = 20000
+# Soumissions à extraire (playlists, URLs sans titre) gardées pour /api/submissions/<id>
+MAX_SUBMISSIONS = 10000
+DEFAULT_EXTRACTION_WORKERS = 2
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BATCH_SIZE = 10000
+MAX_PAGE_SIZE = 10000
+# Attente maximale d'un long-poll, intervalle des commentaires keep-alive SSE et d'un appel dans le thread du bus (s)
+MAX_POLL_TIMEOUT = 60.0
+SSE_KEEPALIVE_INTERVAL = 15.0
+BUS_CALL_TIMEOUT = 5.0
+# L'API expose des états en anglais; "En attente" est le seul état interne qui diffère
+_API_STATUSES = {"En attente": "pending"}
+_INTERNAL_STATUSES = {"pending": "En attente"}
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def job_to_json(record) -> Dict:
+    """Fiche d'un téléchargement sous forme de dict JSON (état de l'API, progression arrondie)."""
+    job = record.to_dict()
+    job['status'] = _API_STATUSES.get(job['status'], job['status'])
+    job['progress'] = round(job.get('progress') or 0, 1)
+    return job
+
+
+class APIError(Exception):
+    """Erreur renvoyée au client avec son code HTTP."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class JobChangeFeed:
+    """
+    Flux des changements d'état des téléchargements, numérotés par un compteur croissant (seq).
+    Seul le dernier état de chaque téléchargement est gardé (un client qui revient après 10 s reçoit
+    un état par téléchargement, pas chaque image). Au-delà de `max_entries`, les changements les plus
+    anciens sont oubliés: un client resté en arrière reçoit reset=True et doit relire la liste complète.
+    record() est appelé dans le thread du bus; wait() bloque les threads HTTP (long-poll, SSE).
+    """
+
+    def __init__(self, manager: DownloadManager, max_entries: int = DEFAULT_FEED_SIZE):
+        self.manager = manager
+        self.max_entries = max_entries
+        self._changes: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict() # id -> (seq, état JSON)
+        self._seq = 0
+        self._floor = 0 # seq du plus récent changement oublié
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def record(self, download_id: str):
+        dl_info = self.manager.registry.get(download_id)
+        if dl_info is None:
+            return
+        job = job_to_json(dl_info)
+        with self._condition:
+            self._seq += 1
+            self._changes[download_id] = (self._seq, job)
+            self._changes.move_to_end(download_id)
+            while len(self._changes) > self.max_entries:
+                _, (dropped_seq, _) = self._changes.popitem(last=False)
+                self._floor = dropped_seq
+            self._condition.notify_all()
+
+    def _collect(self, since: int) -> Tuple[int, bool, List[Dict]]:
+        reset = since < self._floor or since > self._seq # En retard, ou numéro d'une session précédente
+        if since > self._seq:
+            since = 0
+        jobs = []
+        for seq, job in reversed(self._changes.values()):
+            if seq <= since:
+                break
+            jobs.append(dict(job, seq=seq))
+        jobs.reverse()
+        return self._seq, reset, jobs
+
+    def wait(self, since: int, timeout: float) -> Tuple[int, bool, List[Dict]]:
+        """Changements postérieurs à `since`, en attendant au plus `timeout` s s'il n'y en a pas. Retourne (seq, reset, jobs)."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq != since or self._closed, timeout)
+            return self._collect(since)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class _APIHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, api: "ControlAPIServer"):
+        self.api = api
+        super().__init__(address, handler)
+
+
+class _ControlAPIHandler(BaseHTTPRequestHandler):
+    server_version = "MusicDL-API/1.0"
+
+    def log_message(self, format, *args):
+        pass # Pas de ligne par requête: un client peut en envoyer des milliers
+
+    def _send_json(self, status: int, payload):
+        self._send_body(status, json.dumps(payload, ensure_ascii=False, default=str), "application/json; charset=utf-8")
+
+    def _send_body(self, status: int, text: str, content_type: str):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        api: ControlAPIServer = self.server.api
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        try:
+            api.check_request(self.headers, query)
+            path = parts.path.rstrip("/")
+            matches = [(route_method, pattern.fullmatch(path), handler_name)
+                       for route_method, pattern, handler_name in _ROUTES if pattern.fullmatch(path)]
+            if not matches:
+                raise APIError(404, f"Ressource inconnue: {parts.path}")
+            for route_method, match, handler_name in matches:
+                if route_method != method:
+                    continue
+                if handler_name == 'stream_events':
+                    api.stream_events(self, query)
+                    return
+                if handler_name == 'render_metrics':
+                    self._send_body(200, api.manager.metrics.render(api.manager), METRICS_CONTENT_TYPE)
+                    return
+                body = self._read_body() if method == "POST" else None
+                status, payload = getattr(api, handler_name)(*match.groups(), query=query, body=body)
+                self._send_json(status, payload)
+                return
+            raise APIError(405, f"Méthode {method} non autorisée pour {parts.path}")
+        except APIError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client déconnecté
+        except Exception as e:
+            api.manager.log(f"Erreur de l'API de contrôle ({method} {parts.path}): {e}")
+            self._send_json(500, {'error': str(e)})
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise APIError(413, f"Requête trop volumineuse (maximum {MAX_BODY_BYTES // (1024 * 1024)} Mo)")
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError as e:
+            raise APIError(400, f"JSON invalide: {e}")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+_JOB_ID = r"/api/jobs/([\w-]+)"
+_ROUTES = [(method, re.compile(pattern), handler_name) for method, pattern, handler_name in (
+    ("GET", r"/api/stats", 'get_stats'),
+    ("GET", r"/api/jobs", 'list_jobs'),
+    ("POST", r"/api/jobs", 'submit_jobs'),
+    ("GET", _JOB_ID, 'get_job'),
+    ("POST", _JOB_ID + r"/cancel", 'cancel_job'),
+    ("POST", _JOB_ID + r"/retry", 'retry_job'),
+    ("POST", _JOB_ID + r"/priority", 'prioritize_job'),
+    ("GET", r"/api/queue", 'list_queue'),
+    ("GET", r"/api/submissions/([\w-]+)", 'get_submission'),
+    ("POST", r"/api/submissions/([\w-]+)/cancel", 'cancel_submission'),
+    ("GET", r"/api/changes", 'get_changes'),
+    ("GET", r"/api/events", 'stream_events'),
+    ("GET", r"/metrics", 'render_metrics'), # Format texte de Prometheus
+)]
+
+
+class ControlAPIServer:
+    """
+    API HTTP/JSON locale pour piloter la file d'attente depuis d'autres outils (interface ou mode sans interface).
+    Les téléchargements soumis passent par DownloadManager.add_download_to_queue, comme ceux de l'interface:
+    même ordonnanceur, même archive, même journal. Une URL accompagnée d'un titre est mise en file
+    immédiatement; les autres (et les playlists) sont extraites par quelques threads dédiés.
+    Les actions qui modifient une fiche (annulation, nouvelle tentative) sont exécutées dans le thread du bus.
+    """
+
+    def __init__(self, manager: DownloadManager, port: int = DEFAULT_PORT, token: str = "", host: str = "127.0.0.1",
+                 default_format: str = "mp4", extraction_workers: int = DEFAULT_EXTRACTION_WORKERS):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.token = token
+        self.default_format = default_format
+        self.extraction_workers = extraction_workers
+        self.feed = JobChangeFeed(manager)
+        self._submissions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._submissions_lock = threading.Lock()
+        self._extraction_queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._pending_submissions = 0
+        self._httpd: Optional[_APIHTTPServer] = None
+        self._stopping = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Ouvre le port et sert les requêtes en arrière-plan. Lève OSError si le port est déjà utilisé."""
+        if self._httpd is not None:
+            return
+        self._httpd = _APIHTTPServer((self.host, self.port), _ControlAPIHandler, self)
+        self.port = self._httpd.server_address[1] # Port réel si 0 (choisi par le système)
+        self._stopping.clear()
+        self.manager.change_listeners.append(self.feed.record)
+        threading.Thread(target=self._httpd.serve_forever, name="ControlAPI", daemon=True).start()
+        for index in range(self.extraction_workers):
+            threading.Thread(target=self._run_extraction_worker, name=f"ControlAPIExtraction-{index}",
+                             daemon=True).start()
+        self.manager.log(f"API de contrôle à l'écoute sur {self.url}" + (" (jeton requis)." if self.token else "."))
+
+    def stop(self):
+        """Ferme le port et réveille les clients en attente (long-poll, SSE)."""
+        if self._httpd is None:
+            return
+        self._stopping.set()
+        self.feed.close()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._httpd = None
+        if self.feed.record in self.manager.change_listeners:
+            self.manager.change_listeners.remove(self.feed.record)
+        for _ in range(self.extraction_workers):
+            self._extraction_queue.put(None)
+
+    def busy(self) -> bool:
+        """Des soumissions attendent encore leur extraction (elles ne sont pas encore dans le registre)."""
+        return self._pending_submissions > 0
+
+    def check_request(self, headers, query: Dict[str, str]):
+        if self.host in _LOOPBACK_HOSTS:
+            # Un site web ne doit pas pouvoir atteindre l'API via un nom de domaine résolu vers 127.0.0.1
+            host = (headers.get("Host") or "").rsplit(":", 1)[0].strip("[]")
+            if host not in _LOOPBACK_HOSTS:
+                raise APIError(403, "Hôte non autorisé")
+        if self.token:
+            authorization = headers.get("Authorization") or ""
+            supplied = authorization[7:] if authorization.startswith("Bearer ") else query.get('token', "")
+            if not hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8')):
+                raise APIError(401, "Jeton manquant ou invalide")
+
+    def _call_in_bus(self, func, *args):
+        """Exécute func dans le thread du bus (boucle Tk ou boucle du mode sans interface) et attend son résultat."""
+        done = threading.Event()
+        result = []
+
+        def run():
+            try:
+                result.append(func(*args))
+            finally:
+                done.set()
+
+        self.manager.bus.call(run)
+        if not done.wait(BUS_CALL_TIMEOUT):
+            raise APIError(503, "L'application ne répond pas, réessayez")
+        if not result:
+            raise APIError(500, "Erreur lors de l'exécution de la commande (voir les logs)")
+        return result[0]
+
+    def _job_or_404(self, job_id: str):
+        dl_info = self.manager.registry.get(job_id)
+        if dl_info is None:
+            raise APIError(404, f"Téléchargement inconnu (ou évincé de l'historique): {job_id}")
+        return dl_info
+
+    # --- Lecture ---
+
+    def get_stats(self, query=None, body=None):
+        manager = self.manager
+        registry = manager.registry
+        counts = {_API_STATUSES.get(status, status): registry.count(status)
+                  for status in ("En attente", "active", "postprocessing") + FINAL_STATUSES}
+        throughput = sum(dl.get('speed') or 0 for dl in registry.with_status("active") if dl.get('stage') == 'download')
+        return 200, {
+            'counts': counts,
+            'queue_size': manager.download_queue.qsize(),
+            'scheduler_policy': manager.download_queue.policy,
+            'concurrent_limit': manager.concurrent_limit,
+            'adaptive_concurrency': manager.config.get_adaptive_concurrency(),
+            'throughput': round(throughput), # Octets/s, tous téléchargements confondus
+            'bandwidth_limit': manager.config.get_bandwidth_limit(), # Kio/s, 0: illimitée
+            'pending_submissions': self._pending_submissions,
+            'tools_ready': manager.tools_discovered,
+            'seq': self.feed.seq,
+        }
+
+    def _page_bounds(self, query: Dict[str, str]) -> Tuple[int, int]:
+        try:
+            limit = min(MAX_PAGE_SIZE, max(0, int(query.get('limit', 100))))
+            offset = max(0, int(query.get('offset', 0)))
+        except ValueError:
+            raise APIError(400, "limit et offset doivent être des entiers")
+        return offset, limit
+
+    def list_jobs(self, query=None, body=None):
+        """Téléchargements en mémoire, filtrés par état, URL ou playlist (?status=&url=&group=&limit=&offset=)."""
+        offset, limit = self._page_bounds(query)
+        registry = self.manager.registry
+        if 'url' in query:
+            records = registry.find_by_url(query['url'])
+        elif 'group' in query:
+            records = registry.group_members(query['group'])
+        elif 'status' in query:
+            records = registry.with_status(_INTERNAL_STATUSES.get(query['status'], query['status']))
+        else:
+            records = registry.records()
+        if 'status' in query and ('url' in query or 'group' in query):
+            status = _INTERNAL_STATUSES.get(query['status'], query['status'])
+            records = [dl for dl in records if dl['status'] == status]
+        return 200, {'total': len(records), 'offset': offset, 'seq': self.feed.seq,
+                     'jobs': [job_to_json(dl) for dl in records[offset:offset + limit]]}
+
+    def list_queue(self, query=None, body=None):
+        """Téléchargements en attente dans l'ordre où ils seront lancés."""
+        offset, limit = self._page_bounds(query)
+        pending = self.manager.download_queue.snapshot()
+        return 200, {'total': len(pending), 'offset': offset,
+                     'jobs': [job_to_json(dl) for dl in pending[offset:offset + limit]]}
+
+    def get_job(self, job_id: str, query=None, body=None):
+        return 200, job_to_json(self._job_or_404(job_id))
+
+    def get_submission(self, submission_id: str, query=None, body=None):
+        with self._submissions_lock:
+            submission = self._submissions.get(submission_id)
+            if submission is None:
+                raise APIError(404, f"Soumission inconnue: {submission_id}")
+            submission = dict(submission)
+        extraction = self.manager.extractions.get(submission_id)
+        if extraction is not None:
+            submission['extracted'] = extraction['count'] # Éléments lus jusqu'ici (extraction en cours)
+        return 200, submission
+
+    def cancel_submission(self, submission_id: str, query=None, body=None):
+        """Interrompt l'extraction d'une soumission; les éléments déjà mis en file y restent."""
+        with self._submissions_lock:
+            submission = self._submissions.get(submission_id)
+            if submission is None:
+                raise APIError(404, f"Soumission inconnue: {submission_id}")
+            # Posé avant l'annulation: le thread de la soumission, qui le lit sous le verrou, ne peut plus conclure "queued"
+            submission['cancelled'] = True
+        if not self.manager.cancel_extraction(submission_id):
+            with self._submissions_lock:
+                submission['cancelled'] = False
+            raise APIError(409, "Aucune extraction en cours pour cette soumission")
+        return 200, {'id': submission_id, 'cancelled': True}
+
+    def get_changes(self, query=None, body=None):
+        """Long-poll: changements postérieurs à ?since=, en attendant au plus ?timeout= secondes (défaut 30)."""
+        try:
+            since = int(query.get('since', 0))
+            timeout = min(MAX_POLL_TIMEOUT, max(0.0, float(query.get('timeout', 30))))
+        except ValueError:
+            raise APIError(400, "since et timeout doivent être des nombres")
+        seq, reset, jobs = self.feed.wait(since, timeout)
+        return 200, {'seq': seq, 'reset': reset, 'jobs': jobs}
+
+    def stream_events(self, handler: BaseHTTPRequestHandler, query: Dict[str, str]):
+        """
+        Server-sent events: un événement 'job' par changement d'état (id: seq), un commentaire keep-alive
+        toutes les SSE_KEEPALIVE_INTERVAL s. Reprend après ?since= ou l'en-tête Last-Event-ID,
+        sinon à partir des prochains changements.
+        """
+        try:
+            since = int(handler.headers.get("Last-Event-ID") or query.get('since', self.feed.seq))
+        except ValueError:
+            raise APIError(400, "since doit être un entier")
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        while not self._stopping.is_set():
+            seq, reset, jobs = self.feed.wait(since, SSE_KEEPALIVE_INTERVAL)
+            chunks = []
+            if reset:
+                chunks.append(f"event: reset\ndata: {json.dumps({'seq': seq})}\n\n")
+            for job in jobs:
+                chunks.append(f"id: {job['seq']}\nevent: job\ndata: {json.dumps(job, ensure_ascii=False, default=str)}\n\n")
+            if not chunks:
+                chunks.append(": keep-alive\n\n")
+            handler.wfile.write("".join(chunks).encode('utf-8'))
+            handler.wfile.flush()
+            since = seq
+
+    # --- Soumission et actions ---
+
+    def _parse_job(self, item) -> Dict:
+        if isinstance(item, str):
+            item = {'url': item}
+        if not isinstance(item, dict):
+            raise APIError(400, "Chaque téléchargement doit être une URL ou un objet {url, format, ...}")
+        url = str(item.get('url') or "").strip()
+        if not validate_youtube_url(url):
+            raise APIError(400, f"URL YouTube/YouTube Music invalide: {url or '(vide)'}")
+        selected_format = str(item.get('format') or self.default_format).lower()
+        if selected_format not in DOWNLOAD_FORMATS:
+            raise APIError(400, f"Format non pris en charge: {selected_format}")
+        priority = item.get('priority', 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise APIError(400, "priority doit être un entier")
+        return {'url': url, 'format': selected_format, 'priority': priority,
+                'title': item.get('title'), 'duration': item.get('duration')}
+
+    def submit_jobs(self, query=None, body=None):
+        """
+        Met en file un téléchargement ou un lot: {url, format?, title?, duration?, priority?}, une liste
+        de ces objets (ou d'URLs), ou {"jobs": [...]}. Le résultat contient une entrée par élément, dans l'ordre:
+        {'id'} (en file), {'skipped': 'archive'}, {'submission'} (extraction en cours) ou {'error'}.
+        """
+        items = body.get('jobs') if isinstance(body, dict) and 'jobs' in body else body
+        if isinstance(items, (dict, str)):
+            items = [items]
+        if not isinstance(items, list) or not items:
+            raise APIError(400, "Corps attendu: un téléchargement, une liste ou {\"jobs\": [...]}")
+        if len(items) > MAX_BATCH_SIZE:
+            raise APIError(413, f"Lot trop grand (maximum {MAX_BATCH_SIZE} éléments par requête)")
+        results = []
+        queued_count = 0
+        for item in items:
+            try:
+                job = self._parse_job(item)
+            except APIError as e:
+                results.append({'error': str(e)})
+                continue
+            if job['title'] and not is_playlist_url(job['url']):
+                # Titre fourni: pas d'extraction, mis en file tout de suite
+                download_id = self.manager.queue_item(str(job['title']), job['url'], job['format'],
+                                                      job['duration'], None, None, job['priority'])
+                results.append({'id': download_id} if download_id else {'skipped': 'archive'})
+                queued_count += download_id is not None
+            else:
+                results.append({'submission': self._submit_extraction(job)})
+        accepted = [result for result in results if 'error' not in result]
+        if not accepted:
+            return 400, {'results': results}
+        if queued_count:
+            self.manager.log(f"API de contrôle: {queued_count} téléchargement(s) ajouté(s) à la file d'attente.")
+        return (202 if any('submission' in result for result in results) else 201), {'results': results}
+
+    def _submit_extraction(self, job: Dict) -> str:
+        submission = {'id': str(uuid.uuid4()), 'url': job['url'], 'format': job['format'],
+                      'priority': job['priority'], 'status': "pending", 'queued': None, 'error': None,
+                      'submitted_at': round(time.time(), 3)}
+        with self._submissions_lock:
+            self._submissions[submission['id']] = submission
+            while len(self._submissions) > MAX_SUBMISSIONS:
+                self._submissions.popitem(last=False)
+            self._pending_submissions += 1
+        self._extraction_queue.put(submission)
+        return submission['id']
+
+    def _run_extraction_worker(self):
+        while True:
+            submission = self._extraction_queue.get()
+            if submission is None:
+                return
+            submission['status'] = "extracting"
+            try:
+                queued = self.manager.queue_url(submission['url'], submission['format'], submission['priority'],
+                                                extraction_id=submission['id'])
+                with self._submissions_lock: # 'cancelled' est posé sous le verrou par cancel_submission
+                    if queued is None:
+                        submission['status'], submission['error'] = "failed", "Aucune information extraite"
+                    elif submission.get('cancelled'):
+                        submission['status'], submission['queued'] = "cancelled", queued
+                    else:
+                        submission['status'], submission['queued'] = "queued", queued
+            except Exception as e:
+                with self._submissions_lock:
+                    submission['status'], submission['error'] = "failed", str(e)
+                self.manager.log(f"API de contrôle: échec de l'extraction de {submission['url']}: {e}")
+            finally:
+                with self._submissions_lock:
+                    self._pending_submissions -= 1
+
+    def cancel_job(self, job_id: str, query=None, body=None):
+        def cancel():
+            dl_info = self.manager.registry.get(job_id)
+            if dl_info is None:
+                return 404, {'error': f"Téléchargement inconnu (ou évincé de l'historique): {job_id}"}
+            if dl_info['status'] in FINAL_STATUSES:
+                return 409, {'error': "Le téléchargement est déjà terminé", 'job': job_to_json(dl_info)}
+            self.manager.cancel_download_now(dl_info)
+            return 202, job_to_json(dl_info) # Un téléchargement actif passe à "cancelled" à l'arrêt de son processus
+
+        return self._call_in_bus(cancel)
+
+    def retry_job(self, job_id: str, query=None, body=None):
+        def retry():
+            dl_info = self.manager.registry.get(job_id)
+            if dl_info is None:
+                return 404, {'error': f"Téléchargement inconnu (ou évincé de l'historique): {job_id}"}
+            # État lu avant la relance: un téléchargement déjà en attente n'est pas "relancé"
+            retryable = dl_info['status'] in ("failed", "cancelled")
+            if retryable:
+                self.manager.retry_download(job_id)
+            if not retryable or dl_info['status'] != "En attente": # Ou arrêt encore en cours
+                return 409, {'error': "Seul un téléchargement échoué ou annulé (et arrêté) peut être relancé",
+                             'job': job_to_json(dl_info)}
+            return 202, job_to_json(dl_info)
+
+        return self._call_in_bus(retry)
+
+    def prioritize_job(self, job_id: str, query=None, body=None):
+        """{"priority": n} (plus grand: plus tôt) ou {"position": "front" | "back"}, pour un téléchargement en attente."""
+        self._job_or_404(job_id)
+        body = body if isinstance(body, dict) else {}
+        position = body.get('position')
+        priority = body.get('priority')
+        if position in ("front", "back"):
+            changed = self.manager.move_pending_download(job_id, to_front=position == "front")
+        elif isinstance(priority, int) and not isinstance(priority, bool):
+            changed = self.manager.set_pending_priority(job_id, priority)
+        else:
+            raise APIError(400, "Corps attendu: {\"priority\": entier} ou {\"position\": \"front\" | \"back\"}")
+        if not changed:
+            raise APIError(409, "Le téléchargement n'est plus en attente")
+        return 200, job_to_json(self._job_or_404(job_id))
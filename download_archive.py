@@ -0,0 +1,111 @@
+# download_archive.py
+import os
+import re
+import threading
+from typing import Set, Tuple
+
+# Identifiant vidéo YouTube (11 caractères) dans les formes d'URL courantes
+_YOUTUBE_ID_PATTERNS = [
+    re.compile(r'^https?://(?:www\.|m\.|music\.)?youtube\.com/watch\?(?:.*&)?v=([0-9A-Za-z_-]{11})'),
+    re.compile(r'^https?://(?:www\.|m\.|music\.)?youtube\.com/(?:shorts|embed|live)/([0-9A-Za-z_-]{11})'),
+    re.compile(r'^https?://youtu\.be/([0-9A-Za-z_-]{11})'),
+]
+
+
+def extract_video_key(url: str) -> Tuple[str, str]:
+    """
+    Retourne (extracteur, identifiant) pour une URL, sans accès réseau.
+    Les URLs non reconnues sont identifiées par l'URL elle-même (extracteur 'url').
+    """
+    url = url.strip()
+    for pattern in _YOUTUBE_ID_PATTERNS:
+        match = pattern.match(url)
+        if match:
+            return "youtube", match.group(1)
+    return "url", url
+
+
+class DownloadArchive:
+    """
+    Archive persistante des téléchargements terminés, indexée par (extracteur, identifiant vidéo, format).
+    Le fichier est en ajout seul (une ligne "extracteur format identifiant" par téléchargement),
+    chargé une fois dans un set: la vérification avant mise en file d'attente est en O(1).
+    """
+
+    def __init__(self, archive_path: str = "C:/YoutubeDownloader/archive.txt"):
+        self.archive_path = archive_path
+        self._entries: Set[Tuple[str, str, str]] = set()
+        self._lock = threading.Lock()
+        self.load_archive()
+
+    def load_archive(self):
+        """Charger l'archive depuis le fichier"""
+        entries = set()
+        try:
+            with open(self.archive_path, "r", encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip("\n").split(" ", 2)
+                    if len(parts) == 3:
+                        extractor, fmt, video_id = parts[0], parts[1], parts[2]
+                        entries.add((extractor, video_id, fmt))
+        except FileNotFoundError:
+            # Créer le répertoire si nécessaire
+            os.makedirs(os.path.dirname(self.archive_path) or ".", exist_ok=True)
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'archive des téléchargements: {e}")
+        with self._lock:
+            self._entries = entries
+
+    def _key(self, url: str, fmt: str) -> Tuple[str, str, str]:
+        extractor, video_id = extract_video_key(url)
+        return extractor, video_id, fmt.lower()
+
+    def contains(self, url: str, fmt: str) -> bool:
+        """Indique si cette vidéo a déjà été téléchargée dans ce format"""
+        return self._key(url, fmt) in self._entries
+
+    def add(self, url: str, fmt: str) -> bool:
+        """Enregistrer un téléchargement terminé (ajout d'une ligne au fichier)"""
+        key = self._key(url, fmt)
+        with self._lock:
+            if key in self._entries:
+                return False
+            try:
+                with open(self.archive_path, "a", encoding='utf-8') as f:
+                    # Le format est placé avant l'identifiant, qui peut contenir des espaces (URL)
+                    f.write(f"{key[0]} {key[2]} {key[1]}\n")
+            except Exception as e:
+                print(f"Erreur lors de l'écriture dans l'archive des téléchargements: {e}")
+                return False
+            self._entries.add(key)
+            return True
+
+    def remove(self, url: str, fmt: str) -> bool:
+        """Retirer un élément de l'archive (le fichier est réécrit)"""
+        key = self._key(url, fmt)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.discard(key)
+            self._rewrite()
+            return True
+
+    def clear(self):
+        """Vider l'archive"""
+        with self._lock:
+            self._entries = set()
+            self._rewrite()
+
+    def _rewrite(self):
+        try:
+            temp_path = self.archive_path + ".tmp"
+            with open(temp_path, "w", encoding='utf-8') as f:
+                for extractor, video_id, fmt in self._entries:
+                    f.write(f"{extractor} {fmt} {video_id}\n")
+            os.replace(temp_path, self.archive_path)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde de l'archive des téléchargements: {e}")
+
+    def size(self) -> int:
+        """Obtenir le nombre d'éléments archivés"""
+        return len(self._entries)
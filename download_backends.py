@@ -0,0 +1,804 @@
+# download_backends.py
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import tempfile
+import subprocess
+import importlib.util
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from process_io import ProcessIOEngine
+from progress_parser import ProgressParser, PROGRESS_MARKER, progress_template_args, output_file_args
+from format_planner import plan_format, profile_plan, plan_yt_dlp_args, plan_ydl_params
+from metrics import SUBPROCESS_SPAWNS
+
+# Vérification de la bibliothèque yt_dlp (moteur en processus), importée seulement quand ce moteur est créé
+YT_DLP_LIBRARY_AVAILABLE = importlib.util.find_spec("yt_dlp") is not None
+yt_dlp = None
+
+
+def _import_yt_dlp():
+    global yt_dlp
+    if yt_dlp is None:
+        import yt_dlp as module
+        yt_dlp = module
+    return yt_dlp
+
+# Moteurs de lecture des sorties yt-dlp: un couple de threads par processus, ou une boucle asyncio partagée
+IO_ENGINE_MODES = ("threads", "async")
+
+class DownloadCancelled(Exception):
+    """Levée depuis un hook de progression pour interrompre un téléchargement en processus."""
+
+
+class DownloadBackend:
+    """
+    Interface commune des moteurs de téléchargement utilisés par Downloader.
+    Les rapports de progression passent par les méthodes partagées du Downloader
+    (_handle_event, _finish_download, _report_exception) pour garder le même protocole.
+    """
+    name = "base"
+
+    def __init__(self, downloader):
+        self.downloader = downloader
+
+    def log(self, message: str, download_id: Optional[str] = None):
+        self.downloader.log(message, download_id)
+
+    def is_available(self) -> bool:
+        raise NotImplementedError
+
+    def start(self, url: str, selected_format: str, download_id: str):
+        """Démarre un téléchargement sans bloquer l'appelant."""
+        threading.Thread(target=self.download, args=(url, selected_format, download_id), daemon=True).start()
+
+    def download(self, url: str, selected_format: str, download_id: str) -> bool:
+        """Télécharge un élément et bloque jusqu'à la fin. Retourne True en cas de succès."""
+        raise NotImplementedError
+
+    def cancel(self, download_id: str) -> bool:
+        """Demande l'annulation d'un téléchargement actif. Retourne False s'il n'est pas trouvé."""
+        raise NotImplementedError
+
+    def extract_info(self, url: str, flat_playlist: bool, on_entry: Optional[Callable[[Dict], None]] = None,
+                     extraction_id: Optional[str] = None) -> List[Dict]:
+        """
+        Retourne les métadonnées brutes (une entrée par vidéo) sans télécharger, ou une liste vide en cas d'échec
+        ou d'annulation. `on_entry` reçoit chaque entrée dès qu'elle est décodée (même si l'extraction échoue ensuite).
+        """
+        raise NotImplementedError
+
+    def cancel_extraction(self, extraction_id: str) -> bool:
+        """Interrompt une extraction en cours. Retourne False si elle n'est pas trouvée."""
+        return False
+
+    def shutdown(self):
+        pass
+
+
+class SubprocessBackend(DownloadBackend):
+    """Lance un processus yt-dlp par téléchargement (lecture par threads ou par la boucle E/S partagée)."""
+    name = "subprocess"
+
+    def __init__(self, downloader, io_engine: str = "threads"):
+        super().__init__(downloader)
+        self.active_processes: Dict[str, subprocess.Popen] = {} # Pour suivre les processus actifs et les annuler
+        self._planning: Set[str] = set() # Téléchargements dont les formats sont en cours d'inspection
+        # Extractions en cours (annulables), par identifiant: processus yt-dlp, None avant son lancement
+        self._extractions: Dict[str, Optional[subprocess.Popen]] = {}
+        self._cancelled_extractions: Set[str] = set() # Sous-ensemble de _extractions, vidé à la fin de chacune
+        self._extractions_lock = threading.Lock()
+        self._process_engine: Optional[ProcessIOEngine] = None # Créé à la demande en mode 'async'
+        self.io_engine = "threads"
+        self.set_io_engine(io_engine)
+
+    def set_io_engine(self, mode: str):
+        """Choisit le moteur de lecture des sorties: 'threads' (un thread par flux) ou 'async' (boucle partagée)."""
+        if mode not in IO_ENGINE_MODES:
+            self.log(f"Avertissement: moteur E/S inconnu '{mode}', utilisation de 'threads'.")
+            mode = "threads"
+        self.io_engine = mode
+
+    def _get_process_engine(self) -> ProcessIOEngine:
+        if self._process_engine is None:
+            self._process_engine = ProcessIOEngine(self.log)
+        return self._process_engine
+
+    def shutdown(self):
+        """Arrête le moteur E/S partagé s'il a été démarré."""
+        if self._process_engine is not None:
+            self._process_engine.stop()
+            self._process_engine = None
+
+    def is_available(self) -> bool:
+        return bool(self.downloader.yt_dlp_path)
+
+    def _check_executable(self, download_id: str) -> bool:
+        if not self.downloader.yt_dlp_path:
+            self.log("yt-dlp n'est pas configuré. Impossible de télécharger.")
+            self.downloader._report(download_id, "failed", 0, "yt-dlp non configuré")
+            return False
+        return True
+
+    def _build_yt_dlp_args(self, url: str, selected_format: str, download_id: str, plan: Optional[Dict] = None,
+                           info_json_path: Optional[str] = None) -> list:
+        """
+        Construit la ligne de commande yt-dlp pour un format donné.
+        Avec `info_json_path`, yt-dlp repart des infos déjà extraites lors de la planification (pas de seconde extraction).
+        Si la conversion est confiée au pool de post-traitement, yt-dlp télécharge seulement et affiche les fichiers produits.
+        """
+        downloader = self.downloader
+        plan = plan or profile_plan(selected_format)
+        convert = not downloader._defer_conversion(download_id, plan)
+        yt_dlp_args = [
+            downloader.yt_dlp_path,
+            "-P", downloader.download_path,
+            "--ffmpeg-location", downloader.ffmpeg_path if downloader.ffmpeg_path else "ffmpeg",
+            "--progress",
+            "--newline",
+            "--continue", # Reprendre un fichier .part laissé par un téléchargement interrompu
+            *progress_template_args(),
+        ]
+        if info_json_path:
+            yt_dlp_args.extend(["--load-info-json", info_json_path])
+        else:
+            yt_dlp_args.append(url)
+        yt_dlp_args.extend(plan_yt_dlp_args(plan, convert))
+        if not convert:
+            yt_dlp_args.extend(output_file_args())
+        rate = downloader.bandwidth.reserve(download_id)
+        if rate:
+            yt_dlp_args.extend(["--limit-rate", str(rate)]) # Part du budget global, fixée au lancement
+        return yt_dlp_args
+
+    def _info_json_args(self, url: str) -> list:
+        """Commande yt-dlp qui extrait les infos (dont la liste des formats) d'une seule vidéo."""
+        return [self.downloader.yt_dlp_path, "-J", "--no-playlist", url]
+
+    def _plan_from_cache(self, url: str, selected_format: str, download_id: str) -> Optional[Dict]:
+        """
+        Plan établi sans lancer yt-dlp -J: d'après les formats en cache, ou le profil statique en mode hors ligne.
+        Retourne None si les formats doivent être extraits. yt-dlp repart alors de l'URL (les liens des flux expirent).
+        """
+        downloader = self.downloader
+        formats = downloader.metadata_cache.get_formats(url, offline=downloader.offline_mode)
+        if formats:
+            plan = plan_format(selected_format, {'formats': formats})
+        elif downloader.offline_mode:
+            plan = profile_plan(selected_format, "mode hors ligne, formats absents du cache")
+        else:
+            return None
+        downloader._report_plan(download_id, url, plan)
+        return plan
+
+    def _plan_from_info(self, url: str, selected_format: str, download_id: str,
+                        info_text: Optional[str]) -> (Dict, Optional[str]):
+        """
+        Choisit les flux d'après les infos JSON extraites et les écrit dans un fichier temporaire
+        pour --load-info-json. Retourne (plan, chemin du fichier) ou un plan par défaut si l'extraction a échoué.
+        """
+        info = None
+        if info_text:
+            try:
+                info = json.loads(info_text)
+            except ValueError:
+                self.log(f"Avertissement: infos JSON illisibles pour {url}, formats non inspectés.")
+        if not info:
+            plan = profile_plan(selected_format, "extraction des formats impossible")
+            self.downloader._report_plan(download_id, url, plan)
+            return plan, None
+
+        self.downloader.metadata_cache.put_formats(url, info)
+        plan = plan_format(selected_format, info)
+        self.downloader._report_plan(download_id, url, plan)
+        if plan['mode'] == 'profile' and info.get('_type') == 'playlist':
+            return plan, None # Playlist: yt-dlp repart de l'URL
+        fd, info_json_path = tempfile.mkstemp(prefix="musicdl_", suffix=".info.json")
+        with os.fdopen(fd, "w", encoding='utf-8') as f:
+            f.write(info_text)
+        return plan, info_json_path
+
+    def _remove_info_json(self, info_json_path: Optional[str]):
+        if info_json_path:
+            try:
+                os.remove(info_json_path)
+            except OSError:
+                pass
+
+    def _read_stream(self, stream, queue):
+        """Lit un flux de sortie et place chaque ligne dans une queue."""
+        for line in iter(stream.readline, ''):
+            queue.put(line)
+        stream.close()
+
+    def _handle_stdout_line(self, download_id: str, parser: ProgressParser, output: str):
+        """Décode une ligne stdout de yt-dlp et transmet la progression structurée."""
+        output_stripped = output.strip()
+        if not output_stripped:
+            return
+        event = parser.parse_line(output_stripped)
+        if not output_stripped.startswith(PROGRESS_MARKER):
+            self.log(f"[RAW YT-DLP] {output_stripped}", download_id)
+        if event is not None:
+            self.downloader._handle_event(download_id, parser, event)
+
+    def _handle_stderr_line(self, download_id: str, error_line: str):
+        """Journalise une ligne stderr de yt-dlp."""
+        if error_line.strip():
+            self.downloader._note_error_line(error_line, download_id)
+            self.log(f"yt-dlp Erreur: {error_line.strip()}", download_id)
+
+    def start(self, url: str, selected_format: str, download_id: str):
+        """
+        En mode 'async', le processus est confié à la boucle E/S partagée (aucun thread dédié);
+        en mode 'threads', un thread exécute download() comme auparavant.
+        """
+        if self.io_engine != "async":
+            super().start(url, selected_format, download_id)
+            return
+
+        if not self._check_executable(download_id) or not self.downloader._check_download_path(download_id):
+            return
+
+        self.log(f"Lancement du téléchargement pour: {url}...", download_id)
+        self.downloader._report(download_id, "active", 0, "Démarrage...")
+
+        if not self.downloader.format_planning:
+            self._start_engine_download(url, download_id, self._build_yt_dlp_args(url, selected_format, download_id), None)
+            return
+
+        plan = self._plan_from_cache(url, selected_format, download_id)
+        if plan is not None:
+            self._start_engine_download(url, download_id, self._build_yt_dlp_args(url, selected_format, download_id, plan),
+                                        None)
+            return
+
+        # 1. Extraction des formats (même clé: l'annulation s'applique aussi à cette étape)
+        self._planning.add(download_id)
+        info_lines = []
+        future = self._get_process_engine().run_process(
+            download_id,
+            self._info_json_args(url),
+            info_lines.append,
+            lambda line: self._handle_stderr_line(download_id, line)
+        )
+        future.add_done_callback(lambda f: self._on_engine_info_done(url, selected_format, download_id, info_lines, f))
+
+    def _on_engine_info_done(self, url: str, selected_format: str, download_id: str, info_lines: list, future: Future):
+        """2. Planification, puis lancement du téléchargement depuis les infos extraites."""
+        try:
+            try:
+                returncode = future.result()
+            except Exception as e:
+                self.downloader._report_exception(url, download_id, e)
+                return
+            if download_id in self.downloader._cancelled_ids:
+                self.downloader._finish_download(url, download_id, returncode or 1)
+                return
+            plan, info_json_path = self._plan_from_info(url, selected_format, download_id,
+                                                        "".join(info_lines) if returncode == 0 else None)
+            yt_dlp_args = self._build_yt_dlp_args(url, selected_format, download_id, plan, info_json_path)
+            self._start_engine_download(url, download_id, yt_dlp_args, info_json_path)
+            if download_id in self.downloader._cancelled_ids:
+                self._process_engine.terminate(download_id) # Annulé pendant la planification
+        finally:
+            self._planning.discard(download_id)
+
+    def _start_engine_download(self, url: str, download_id: str, yt_dlp_args: list, info_json_path: Optional[str]):
+        parser = ProgressParser()
+        future = self._get_process_engine().run_process(
+            download_id,
+            yt_dlp_args,
+            lambda line: self._handle_stdout_line(download_id, parser, line),
+            lambda line: self._handle_stderr_line(download_id, line)
+        )
+        future.add_done_callback(lambda f: self._on_engine_process_done(url, download_id, f, info_json_path))
+
+    def _on_engine_process_done(self, url: str, download_id: str, future: Future, info_json_path: Optional[str] = None):
+        self._remove_info_json(info_json_path)
+        try:
+            returncode = future.result()
+        except Exception as e:
+            self.downloader._report_exception(url, download_id, e)
+            return
+        self.downloader._finish_download(url, download_id, returncode)
+
+    def _fetch_info_json(self, url: str, download_id: str) -> Optional[str]:
+        """Exécute yt-dlp -J (processus annulable comme un téléchargement) et retourne sa sortie JSON."""
+        if self.io_engine == "async":
+            info_lines = []
+            returncode = self._get_process_engine().run_process(
+                download_id,
+                self._info_json_args(url),
+                info_lines.append,
+                lambda line: self._handle_stderr_line(download_id, line)
+            ).result()
+            return "".join(info_lines) if returncode == 0 else None
+
+        creationflags = 0
+        if sys.platform == "win32":
+            creationflags = subprocess.CREATE_NO_WINDOW
+        SUBPROCESS_SPAWNS.record(self.downloader.yt_dlp_path)
+        process = subprocess.Popen(
+            self._info_json_args(url),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            creationflags=creationflags
+        )
+        self.active_processes[download_id] = process
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            self.active_processes.pop(download_id, None)
+        if process.returncode != 0:
+            for error_line in (stderr or "").splitlines():
+                self._handle_stderr_line(download_id, error_line)
+            return None
+        return stdout
+
+    def download(self, url: str, selected_format: str, download_id: str) -> bool:
+        info_json_path = None
+        try:
+            if not self._check_executable(download_id) or not self.downloader._check_download_path(download_id):
+                return False
+
+            self.log(f"Lancement du téléchargement pour: {url}...", download_id)
+            self.downloader._report(download_id, "active", 0, "Démarrage...")
+            plan = None
+            if self.downloader.format_planning:
+                # Reste marqué jusqu'au lancement du téléchargement pour qu'une annulation ne soit pas perdue
+                self._planning.add(download_id)
+                plan = self._plan_from_cache(url, selected_format, download_id)
+                if plan is None:
+                    info_text = self._fetch_info_json(url, download_id)
+                    if download_id in self.downloader._cancelled_ids:
+                        return self.downloader._finish_download(url, download_id, 1)
+                    plan, info_json_path = self._plan_from_info(url, selected_format, download_id, info_text)
+            yt_dlp_args = self._build_yt_dlp_args(url, selected_format, download_id, plan, info_json_path)
+            parser = ProgressParser()
+
+            if self.io_engine == "async":
+                # Exécution bloquante via la boucle partagée (utilisé par download_items_in_bulk)
+                future = self._get_process_engine().run_process(
+                    download_id,
+                    yt_dlp_args,
+                    lambda line: self._handle_stdout_line(download_id, parser, line),
+                    lambda line: self._handle_stderr_line(download_id, line)
+                )
+                self._planning.discard(download_id)
+                if download_id in self.downloader._cancelled_ids:
+                    self._process_engine.terminate(download_id) # Annulé pendant la planification
+                return self.downloader._finish_download(url, download_id, future.result())
+
+            creationflags = 0
+            if sys.platform == "win32":
+                creationflags = subprocess.CREATE_NO_WINDOW
+
+            SUBPROCESS_SPAWNS.record(yt_dlp_args[0])
+            process = subprocess.Popen(
+                yt_dlp_args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                creationflags=creationflags,
+                bufsize=1 # Ligne par ligne
+            )
+            self.active_processes[download_id] = process
+            self._planning.discard(download_id)
+            if download_id in self.downloader._cancelled_ids:
+                process.terminate() # Annulé pendant la planification
+
+            # Queues pour les sorties stdout et stderr
+            stdout_queue = queue.Queue()
+            stderr_queue = queue.Queue()
+
+            # Threads pour lire les sorties
+            stdout_thread = threading.Thread(target=self._read_stream, args=(process.stdout, stdout_queue))
+            stderr_thread = threading.Thread(target=self._read_stream, args=(process.stderr, stderr_queue))
+            stdout_thread.daemon = True # Permet au programme de se fermer même si les threads sont actifs
+            stderr_thread.daemon = True
+            stdout_thread.start()
+            stderr_thread.start()
+
+            while process.poll() is None or not stdout_queue.empty() or not stderr_queue.empty():
+                try:
+                    output = stdout_queue.get(timeout=0.1) # Lire avec un timeout pour ne pas bloquer indéfiniment
+                    self._handle_stdout_line(download_id, parser, output)
+                except queue.Empty:
+                    pass # Pas de nouvelle ligne de stdout pour l'instant
+
+                try:
+                    error_line = stderr_queue.get(timeout=0.1)
+                    self._handle_stderr_line(download_id, error_line)
+                except queue.Empty:
+                    pass # Pas de nouvelle ligne de stderr pour l'instant
+
+            process.wait() # Attendre la fin du processus
+            # Les lecteurs s'arrêtent à la fin des flux: les dernières lignes (dont l'événement 'file' de
+            # --print after_move) sont décodées comme les autres. Délai borné si un processus enfant garde le flux ouvert
+            stdout_thread.join(timeout=5)
+            stderr_thread.join(timeout=5)
+            while not stdout_queue.empty():
+                self._handle_stdout_line(download_id, parser, stdout_queue.get_nowait())
+            while not stderr_queue.empty():
+                self._handle_stderr_line(download_id, stderr_queue.get_nowait())
+
+            if download_id in self.active_processes:
+                del self.active_processes[download_id]
+
+            return self.downloader._finish_download(url, download_id, process.returncode)
+
+        except Exception as e:
+            self.downloader._report_exception(url, download_id, e)
+            return False
+        finally:
+            self._planning.discard(download_id)
+            self._remove_info_json(info_json_path)
+
+    def cancel(self, download_id: str) -> bool:
+        downloader = self.downloader
+        if download_id in self._planning and download_id not in self.active_processes and not (
+                self._process_engine is not None and self._process_engine.is_running(download_id)):
+            # Entre l'extraction des formats et le lancement du téléchargement: il ne sera pas lancé
+            downloader._cancelled_ids.add(download_id)
+            self.log(f"Tentative d'annulation du téléchargement {download_id}.")
+            downloader._report(download_id, "cancelled", 0, "Annulé")
+            return True
+        if self._process_engine is not None and self._process_engine.is_running(download_id):
+            # Processus géré par la boucle E/S partagée: terminate puis kill différé, sans bloquer
+            downloader._cancelled_ids.add(download_id)
+            self._process_engine.terminate(download_id, timeout=5)
+            self.log(f"Tentative d'annulation du téléchargement {download_id}.")
+            downloader._report(download_id, "cancelled", 0, "Annulé")
+            return True
+
+        if download_id not in self.active_processes:
+            return False
+
+        process = self.active_processes[download_id]
+        downloader._cancelled_ids.add(download_id)
+        try:
+            process.terminate() # Tente d'arrêter le processus en douceur
+            self.log(f"Tentative d'annulation du téléchargement {download_id}.")
+            downloader._report(download_id, "cancelled", 0, "Annulé")
+            # Optionnel: attendre un court instant et tuer si non terminé
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill() # Tuer le processus si terminate ne fonctionne pas
+            self.log(f"Processus de téléchargement {download_id} tué (forcé).")
+            downloader._report(download_id, "cancelled", 0, "Annulé (forcé)")
+        except Exception as e:
+            self.log(f"Erreur lors de l'annulation du téléchargement {download_id}: {e}")
+            downloader._report(download_id, "failed", 0, "Erreur d'annulation")
+        finally:
+            if download_id in self.active_processes:
+                del self.active_processes[download_id]
+        return True
+
+    def extract_info(self, url: str, flat_playlist: bool, on_entry: Optional[Callable[[Dict], None]] = None,
+                     extraction_id: Optional[str] = None) -> List[Dict]:
+        """
+        yt-dlp écrit une ligne JSON par vidéo: chaque ligne est décodée et transmise à `on_entry` dès sa lecture,
+        sans attendre la fin du processus (une longue playlist alimente la file d'attente au fil de l'extraction).
+        """
+        if not extraction_id:
+            return self._run_extraction(url, flat_playlist, on_entry, None)
+        with self._extractions_lock:
+            self._extractions[extraction_id] = None # Annulable dès maintenant, avant le lancement du processus
+        try:
+            return self._run_extraction(url, flat_playlist, on_entry, extraction_id)
+        finally:
+            with self._extractions_lock:
+                self._extractions.pop(extraction_id, None)
+                self._cancelled_extractions.discard(extraction_id)
+
+    def _run_extraction(self, url: str, flat_playlist: bool, on_entry: Optional[Callable[[Dict], None]],
+                        extraction_id: Optional[str]) -> List[Dict]:
+        creationflags = 0
+        if sys.platform == "win32":
+            creationflags = subprocess.CREATE_NO_WINDOW
+
+        cmd = [self.downloader.yt_dlp_path, "--dump-json"]
+        if flat_playlist:
+            cmd.append("--flat-playlist") # Ne télécharge pas, juste extrait la liste des vidéos
+        cmd.append(url)
+
+        SUBPROCESS_SPAWNS.record(cmd[0])
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1, # Lecture ligne par ligne
+            creationflags=creationflags
+        )
+        # stderr est lu à part pour qu'un flux d'erreurs abondant ne bloque pas yt-dlp
+        stderr_lines = []
+        stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+        stderr_thread.start()
+        if extraction_id:
+            with self._extractions_lock:
+                self._extractions[extraction_id] = process
+                if extraction_id in self._cancelled_extractions:
+                    process.terminate() # Annulée avant le lancement du processus
+        entries = []
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    self.log(f"Avertissement: Ligne non-JSON reçue de yt-dlp: {line[:100]}...") # Log partiel
+                    continue
+                entries.append(entry)
+                if on_entry is not None:
+                    on_entry(entry)
+            returncode = process.wait()
+        finally:
+            process.stdout.close()
+        stderr_thread.join()
+        process.stderr.close()
+        if extraction_id in self._cancelled_extractions:
+            return []
+        if returncode != 0:
+            self.log(f"Erreur lors de l'exécution de yt-dlp pour extraire les infos: {''.join(stderr_lines)}")
+            self.log(f"Commande exécutée: {' '.join(cmd)}")
+            return []
+        return entries
+
+    def cancel_extraction(self, extraction_id: str) -> bool:
+        with self._extractions_lock:
+            if extraction_id not in self._extractions:
+                return False # Terminée ou lancée par l'autre moteur
+            self._cancelled_extractions.add(extraction_id)
+            process = self._extractions[extraction_id]
+        if process is not None:
+            process.terminate()
+        return True
+
+
+class YtDlpLibraryBackend(DownloadBackend):
+    """
+    Pilote yt_dlp.YoutubeDL directement dans le processus de l'application.
+    Évite le démarrage d'un interpréteur par tâche, reçoit la progression sous forme de dicts
+    via les hooks, et réutilise une instance YoutubeDL par thread de travail (et ses extracteurs)
+    d'une tâche à l'autre.
+    """
+    name = "library"
+
+    def __init__(self, downloader, max_workers: int = 32):
+        super().__init__(downloader)
+        _import_yt_dlp()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-dlp")
+        self._local = threading.local()
+        self._active: Set[str] = set()
+        self._cancel_requested: Set[str] = set()
+        self._extractions: Set[str] = set() # Extractions en cours (annulables)
+        self._cancelled_extractions: Set[str] = set() # Extractions annulées (entrées non transmises), vidé à leur fin
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return YT_DLP_LIBRARY_AVAILABLE
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _base_params(self) -> dict:
+        downloader = self.downloader
+        params = {
+            'quiet': True,
+            'no_warnings': False,
+            'noprogress': True,
+            'logger': _YtDlpLogger(self.log, downloader._note_error_line, self._current_job_id),
+            'paths': {'home': downloader.download_path},
+            'continuedl': True, # Reprendre un fichier .part laissé par un téléchargement interrompu
+        }
+        if downloader.ffmpeg_path:
+            params['ffmpeg_location'] = downloader.ffmpeg_path
+        return params
+
+    def _get_ydl(self, selected_format: str, plan: Optional[Dict] = None, convert: bool = True):
+        """
+        Retourne l'instance YoutubeDL du thread courant pour ce format ou ce plan (créée au premier usage).
+        Avec convert=False, les conversions sont laissées au pool de post-traitement.
+        Les postprocesseurs étant fixés à la construction, une instance est gardée par jeu de paramètres
+        (les identifiants de formats YouTube étant peu nombreux, le nombre d'instances reste limité).
+        """
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        format_params = plan_ydl_params(plan or profile_plan(selected_format), convert)
+        key = (json.dumps(format_params, sort_keys=True), self.downloader.download_path, self.downloader.ffmpeg_path)
+        ydl = instances.get(key)
+        if ydl is None:
+            params = self._base_params()
+            params.update(format_params)
+            ydl = yt_dlp.YoutubeDL(params)
+            # Hooks permanents: ils renvoient vers la tâche en cours du thread
+            ydl.add_progress_hook(lambda d: self._on_hook('download', d))
+            ydl.add_postprocessor_hook(lambda d: self._on_hook('postprocess', d))
+            instances[key] = ydl
+        return ydl
+
+    def _current_job_id(self) -> Optional[str]:
+        """Téléchargement en cours dans le thread appelant (pour rattacher les messages de yt_dlp)."""
+        job = getattr(self._local, 'job', None)
+        return job[0] if job else None
+
+    def _on_hook(self, stage: str, data: dict):
+        job = getattr(self._local, 'job', None)
+        if job is None:
+            return
+        download_id, parser = job
+        if download_id in self._cancel_requested:
+            raise DownloadCancelled(download_id)
+        self.downloader._handle_event(download_id, parser, parser.parse_hook(stage, data))
+        if stage == 'download' and data.get('status') == 'downloading':
+            # Freinage dans le hook (appelé à chaque bloc reçu): la part suit le nombre de téléchargements en cours
+            delay = self.downloader.bandwidth.pace(download_id, data.get('downloaded_bytes'))
+            if delay > 0:
+                time.sleep(delay)
+
+    def start(self, url: str, selected_format: str, download_id: str):
+        with self._lock:
+            self._active.add(download_id)
+        self._executor.submit(self.download, url, selected_format, download_id)
+
+    def download(self, url: str, selected_format: str, download_id: str) -> bool:
+        with self._lock:
+            self._active.add(download_id)
+        try:
+            if download_id in self._cancel_requested:
+                # Annulé avant d'avoir démarré: même fin qu'une annulation en cours (retire l'annulation en attente)
+                return self.downloader._finish_download(url, download_id, 1)
+            if not self.is_available():
+                self.log("La bibliothèque yt_dlp n'est pas installée. Impossible de télécharger.")
+                self.downloader._report(download_id, "failed", 0, "yt_dlp non installé")
+                return False
+            if not self.downloader._check_download_path(download_id):
+                return False
+
+            self.log(f"Lancement du téléchargement pour: {url}...", download_id)
+            self.downloader._report(download_id, "active", 0, "Démarrage...")
+            self.downloader.bandwidth.register(download_id)
+            self._local.job = (download_id, ProgressParser())
+            try:
+                if self.downloader.format_planning:
+                    returncode = self._download_with_plan(url, selected_format, download_id)
+                else:
+                    plan = profile_plan(selected_format)
+                    convert = not self.downloader._defer_conversion(download_id, plan)
+                    returncode = self._get_ydl(selected_format, plan, convert).download([url])
+            except DownloadCancelled:
+                returncode = 1
+            except yt_dlp.utils.DownloadError as e:
+                if download_id in self._cancel_requested:
+                    returncode = 1 # DownloadCancelled encapsulée par yt-dlp
+                else:
+                    self.log(f"yt-dlp Erreur: {e}", download_id)
+                    returncode = 1
+            finally:
+                self._local.job = None
+            return self.downloader._finish_download(url, download_id, returncode)
+        except Exception as e:
+            self.downloader._report_exception(url, download_id, e)
+            return False
+        finally:
+            with self._lock:
+                self._active.discard(download_id)
+                self._cancel_requested.discard(download_id)
+
+    def _download_with_plan(self, url: str, selected_format: str, download_id: str) -> int:
+        """Extrait les formats, choisit les flux (copie/remultiplexage si possible) puis télécharge sans réextraire."""
+        ydl = self._get_ydl(selected_format)
+        info = ydl.extract_info(url, download=False)
+        if download_id in self._cancel_requested:
+            raise DownloadCancelled(download_id) # Annulé pendant l'extraction (aucun hook appelé)
+        self.downloader.metadata_cache.put_formats(url, info or {})
+        plan = plan_format(selected_format, info or {})
+        self.downloader._report_plan(download_id, url, plan)
+        convert = not self.downloader._defer_conversion(download_id, plan)
+        if plan['mode'] != 'profile' or not convert:
+            ydl = self._get_ydl(selected_format, plan, convert)
+        ydl.process_ie_result(info, download=True)
+        return 0
+
+    def cancel(self, download_id: str) -> bool:
+        with self._lock:
+            if download_id not in self._active:
+                return False
+            self._cancel_requested.add(download_id)
+        # L'arrêt effectif a lieu au prochain hook de progression
+        self.downloader._cancelled_ids.add(download_id)
+        self.log(f"Tentative d'annulation du téléchargement {download_id}.")
+        self.downloader._report(download_id, "cancelled", 0, "Annulé")
+        return True
+
+    def extract_info(self, url: str, flat_playlist: bool, on_entry: Optional[Callable[[Dict], None]] = None,
+                     extraction_id: Optional[str] = None) -> List[Dict]:
+        """
+        yt_dlp ne rend la main qu'une fois la playlist entièrement extraite: les entrées sont ensuite transmises
+        une à une à `on_entry`, et une annulation demandée entre-temps les écarte.
+        """
+        if not extraction_id:
+            return self._run_extraction(url, flat_playlist, on_entry, None)
+        with self._lock:
+            self._extractions.add(extraction_id)
+        try:
+            return self._run_extraction(url, flat_playlist, on_entry, extraction_id)
+        finally:
+            with self._lock:
+                self._extractions.discard(extraction_id)
+                self._cancelled_extractions.discard(extraction_id)
+
+    def _run_extraction(self, url: str, flat_playlist: bool, on_entry: Optional[Callable[[Dict], None]],
+                        extraction_id: Optional[str]) -> List[Dict]:
+        params = self._base_params()
+        if flat_playlist:
+            params['extract_flat'] = 'in_playlist'
+        try:
+            with yt_dlp.YoutubeDL(params) as ydl:
+                info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        except yt_dlp.utils.DownloadError as e:
+            self.log(f"Erreur lors de l'extraction des infos avec yt_dlp: {e}")
+            return []
+        if info is None:
+            return []
+        if info.get('_type') == 'playlist':
+            entries = [entry for entry in info.get('entries') or [] if entry]
+        else:
+            entries = [info]
+        for entry in entries:
+            if extraction_id in self._cancelled_extractions:
+                break
+            if on_entry is not None:
+                on_entry(entry)
+        if extraction_id in self._cancelled_extractions:
+            return []
+        return entries
+
+    def cancel_extraction(self, extraction_id: str) -> bool:
+        with self._lock:
+            if extraction_id not in self._extractions:
+                return False # Terminée ou lancée par l'autre moteur
+            self._cancelled_extractions.add(extraction_id)
+        return True
+
+
+class _YtDlpLogger:
+    """Redirige les messages de yt_dlp vers le log de l'application."""
+
+    def __init__(self, log_callback, error_callback=None, job_id_callback=None):
+        self.log_callback = log_callback
+        self.error_callback = error_callback # Reçoit les avertissements et erreurs (détection des limitations de débit)
+        self.job_id_callback = job_id_callback # Retourne le téléchargement en cours du thread
+
+    def _log(self, message: str):
+        self.log_callback(message, self.job_id_callback() if self.job_id_callback else None)
+
+    def debug(self, msg: str):
+        # yt-dlp envoie aussi les messages d'information via debug()
+        if not msg.startswith('[debug] '):
+            self._log(f"[RAW YT-DLP] {msg}")
+
+    def info(self, msg: str):
+        self._log(f"[RAW YT-DLP] {msg}")
+
+    def _note_error(self, msg: str):
+        if self.error_callback:
+            self.error_callback(msg, self.job_id_callback() if self.job_id_callback else None)
+
+    def warning(self, msg: str):
+        self._note_error(msg)
+        self._log(f"yt-dlp Avertissement: {msg}")
+
+    def error(self, msg: str):
+        self._note_error(msg)
+        self._log(f"yt-dlp Erreur: {msg}")
@@ -0,0 +1,628 @@
+# download_manager.py
+import os
+import re
+import time
+import uuid
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config_manager import ConfigManager
+from downloader import Downloader
+from download_archive import DownloadArchive
+from queue_journal import QueueJournal
+from download_registry import DownloadRegistry, FINAL_STATUSES
+from download_scheduler import DownloadScheduler
+from concurrency_controller import AdaptiveConcurrencyController, cpu_usage_percent
+from event_log import EventLog
+from metrics import DownloadMetrics
+from job_timing import JobTimingTracker, describe_batch
+from progress_parser import classify_message
+from ui_event_bus import UIEventBus
+
+# Formats proposés, et ceux qui nécessitent une conversion FFmpeg
+DOWNLOAD_FORMATS = ("mp3", "mp4", "wav", "flac", "webm", "mkv", "m4a", "opus", "mov", "avi")
+FFMPEG_FORMATS = ("mp3", "wav", "flac", "m4a", "opus")
+
+_YOUTUBE_PATTERNS = [
+    # Vidéos YouTube classiques
+    r'https?://(www\.)?youtube\.com/watch\?v=',
+    r'https?://(www\.)?youtu\.be/',
+    r'https?://(www\.)?youtube\.com/embed/',
+    r'https?://(www\.)?youtube\.com/v/',
+    r'https?://m\.youtube\.com/watch\?v=',
+    # Playlists YouTube
+    r'https?://(www\.)?youtube\.com/playlist\?list=',
+    r'https?://(www\.)?youtube\.com/watch\?.*&list=',
+    # YouTube Music
+    r'https?://music\.youtube\.com/watch\?v=',
+    r'https?://music\.youtube\.com/playlist\?list=',
+    # YouTube Shorts
+    r'https?://(www\.)?youtube\.com/shorts/',
+]
+_PLAYLIST_PATTERNS = [
+    r'https?://(www\.)?youtube\.com/playlist\?list=',
+    r'https?://(www\.|m\.)?youtube\.com/watch\?(.*&)?list=',
+    r'https?://music\.youtube\.com/playlist\?list=',
+    r'https?://music\.youtube\.com/watch\?(.*&)?list=',
+]
+
+
+def validate_youtube_url(url: str) -> bool:
+    """Valide si l'URL fournie est une URL YouTube/YouTube Music valide (vidéos individuelles ou playlists)."""
+    return any(re.match(pattern, url) for pattern in _YOUTUBE_PATTERNS)
+
+
+def is_playlist_url(url: str) -> bool:
+    """Vérifie si l'URL est une URL de playlist YouTube."""
+    return any(re.match(pattern, url) for pattern in _PLAYLIST_PATTERNS)
+
+
+def format_duration(seconds) -> str:
+    """Durée en secondes (éventuellement None) au format HH:MM:SS."""
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600:02}:{(seconds % 3600) // 60:02}:{seconds % 60:02}"
+
+
+class DownloadManager:
+    """
+    Orchestration des téléchargements, sans interface: file d'attente ordonnancée, registre, places de
+    téléchargement (limite fixe ou adaptative), archive, journal de la file et journal des événements.
+    Les threads de travail ne font que publier sur le bus d'événements; les changements d'état sont
+    appliqués dans le thread qui vide le bus (boucle Tk de l'interface ou boucle du mode sans interface).
+    Une interface suit les changements via les callbacks on_* (appelés dans ce même thread).
+    """
+
+    def __init__(self, config: ConfigManager, bus: UIEventBus, log_callback: Optional[Callable] = None,
+                 download_path: Optional[str] = None, journal_name: str = "queue_journal.jsonl",
+                 event_log_name: str = "events.jsonl"):
+        self.config = config
+        self.bus = bus
+        self.log_callback = log_callback or (lambda message, download_id=None: print(message))
+        # Callbacks de l'interface: ajout d'un téléchargement, changement d'état, ajout/retrait d'une playlist, compteurs
+        self.on_download_added: Optional[Callable[[str], None]] = None
+        self.on_download_changed: Optional[Callable[[str], None]] = None
+        self.on_group_added: Optional[Callable[[str], None]] = None
+        self.on_group_removed: Optional[Callable[[str], None]] = None
+        self.on_counts_changed: Optional[Callable[[], None]] = None
+        self.on_extractions_changed: Optional[Callable[[], None]] = None # Extractions en cours (nombre d'éléments lus)
+        # Observateurs supplémentaires (API de contrôle): appelés pour chaque ajout ou changement d'état, même thread
+        self.change_listeners: List[Callable[[str], None]] = []
+        data_dir = config.get_data_dir()
+
+        # Journal structuré des événements (une ligne JSON par événement, rotation par taille), écrit en arrière-plan
+        self.event_log = EventLog(os.path.join(data_dir, event_log_name),
+                                  max_bytes=config.get_event_log_max_mb() * 1024 * 1024)
+        self.event_log.enabled = config.get_event_log_enabled()
+        self.event_log.start()
+        # Compteurs et histogrammes exposés au format Prometheus (API de contrôle, fichier de métriques)
+        self.metrics = DownloadMetrics()
+        # Temps passé par chaque téléchargement dans chaque étape (infobulles, bilan de fin de lot, export CSV)
+        self.timings = JobTimingTracker()
+        self.last_batch_summary: Optional[Dict] = None
+        self.downloader = Downloader(download_path or config.download_path, self.log, self.update_download_progress,
+                                     io_engine=config.get_io_engine(),
+                                     backend=config.get_download_backend(),
+                                     executable_cache_path=os.path.join(data_dir, "executables.json"),
+                                     format_planning=config.get_format_planning(),
+                                     two_stage_pipeline=config.get_two_stage_pipeline(),
+                                     postprocess_workers=config.get_postprocess_workers(),
+                                     low_priority_postprocess=config.get_low_priority_postprocess(),
+                                     bandwidth_limit=config.get_bandwidth_limit(),
+                                     bandwidth_schedule=config.get_bandwidth_schedule(),
+                                     event_log=self.event_log,
+                                     metadata_cache_path=os.path.join(data_dir, "metadata_cache.jsonl"),
+                                     metadata_cache=config.get_metadata_cache_enabled(),
+                                     metadata_cache_ttl_hours=config.get_metadata_cache_ttl_hours(),
+                                     metadata_cache_max_entries=config.get_metadata_cache_max_entries(),
+                                     offline_mode=config.get_offline_mode())
+        # Archive des téléchargements terminés, rangée dans le dossier de données (à côté de la configuration)
+        self.archive = DownloadArchive(os.path.join(data_dir, "archive.txt"))
+        # Journal de la file d'attente: rejoué au démarrage pour reprendre les téléchargements interrompus
+        self.journal = QueueJournal(os.path.join(data_dir, journal_name))
+        self.restored_jobs = self.journal.replay()
+        self.journal.start()
+
+        # Registre des téléchargements (en attente, actifs, terminés), indexé par id, état, URL et playlist.
+        # Au-delà de la limite de rétention, les plus anciens téléchargements terminés sont évincés
+        # (et ajoutés à l'historique persistant si l'option est activée)
+        self.registry = DownloadRegistry(
+            retention=config.get_download_retention(),
+            history_path=os.path.join(data_dir, "download_history.jsonl") if config.get_download_history() else None
+        )
+        # Groupes de téléchargements issus d'une même playlist: {'group_id': {'id': ..., 'title': ..., 'ids': [...]}}
+        self.download_groups: Dict[str, Dict] = {}
+        # Extractions en cours: {'extraction_id': {'id': ..., 'url': ..., 'count': éléments lus, 'group_id': ..., 'cancelled': ...}}
+        self.extractions: Dict[str, Dict] = {}
+
+        # File d'attente ordonnancée (priorités, déplacements et annulations sans parcours de la file)
+        self.download_queue = DownloadScheduler(config.get_scheduler_policy())
+        self.concurrent_limit = config.get_concurrent_downloads_limit()
+        self.download_lock = threading.Lock() # Pour synchroniser le lancement des téléchargements et la queue
+        # Limite automatique (AIMD), dans la plage configurée
+        self.concurrency_controller = AdaptiveConcurrencyController(*config.get_adaptive_limit_range(),
+                                                                    initial_limit=self.concurrent_limit)
+        if config.get_adaptive_concurrency():
+            self.concurrent_limit = self.concurrency_controller.limit
+        self.failures_since_sample = 0 # Échecs depuis la dernière mesure du contrôleur
+        self._throttle_events_seen = self.downloader.throttle_events
+        # La file ne démarre qu'une fois yt-dlp/FFmpeg localisés
+        self.tools_discovered = False
+
+    def log(self, message: str, download_id: Optional[str] = None):
+        """Journalise un message (callback de l'interface et journal des événements), depuis n'importe quel thread."""
+        self.log_callback(message, download_id)
+        level = classify_message(message)
+        if level != "raw": # La sortie brute de yt-dlp (progression) est déjà résumée par les événements 'progress'
+            self.event_log.emit('log', download_id, level=level, message=message)
+
+    @staticmethod
+    def _notify(callback: Optional[Callable], *args):
+        if callback is not None:
+            callback(*args)
+
+    def _set_status(self, dl_info, status: str) -> str:
+        """Change l'état d'une fiche (registre et métriques). Retourne l'ancien état."""
+        old_status = self.registry.set_status(dl_info, status)
+        if status != old_status:
+            self.metrics.job_status(dl_info['id'], status)
+            self.timings.job_status(dl_info['id'], status)
+            if status in FINAL_STATUSES:
+                self._finish_batch_if_idle()
+        return old_status
+
+    def _finish_batch_if_idle(self):
+        """Clôt le lot si la file est vide et qu'aucune extraction ne peut encore l'alimenter (thread du bus)."""
+        if self.is_idle() and not self.extractions:
+            self._finish_batch()
+
+    def _finish_batch(self):
+        """La file est vide: bilan du lot par étape (journal et événement 'batch_summary')."""
+        summary = self.timings.finish_batch()
+        if summary is None:
+            return
+        self.last_batch_summary = summary
+        self.log(describe_batch(summary))
+        self.event_log.emit('batch_summary', jobs=summary['jobs'], elapsed=round(summary['elapsed'], 3),
+                            bottleneck=summary['bottleneck'],
+                            stages={stage: round(seconds, 3) for stage, seconds in summary['stages'].items()})
+
+    def _download_added(self, download_id: str):
+        self._notify(self.on_download_added, download_id)
+        for listener in self.change_listeners:
+            listener(download_id)
+
+    def _download_changed(self, download_id: str):
+        self._notify(self.on_download_changed, download_id)
+        for listener in self.change_listeners:
+            listener(download_id)
+
+    @property
+    def active_download_count(self) -> int:
+        """Téléchargements occupant une place réseau (compteur du registre, O(1))."""
+        return self.registry.count("active")
+
+    def is_idle(self) -> bool:
+        """Aucun téléchargement en attente, en cours ou en conversion."""
+        return self.registry.count("En attente", "active", "postprocessing") == 0
+
+    def discover_tools(self) -> Tuple[bool, bool]:
+        """Localise yt-dlp et FFmpeg (résultat en cache, revalidé par stat). Retourne (yt-dlp trouvé, FFmpeg trouvé)."""
+        return bool(self.downloader.find_yt_dlp_location()), bool(self.downloader.find_ffmpeg_location())
+
+    # --- Extraction et mise en file d'attente (appelables depuis n'importe quel thread) ---
+
+    def extract_video_info(self, url: str) -> List[Dict]:
+        """
+        Extrait les informations (titre, URL, durée) depuis une URL YouTube/YouTube Music.
+        Gère à la fois les vidéos individuelles et les playlists.
+        Retourne une liste de dictionnaires, chaque dict étant {'title': ..., 'url': ..., 'duration': ...}.
+        """
+        extracted_items = []
+        self.stream_video_info(url, extracted_items.append)
+        return extracted_items
+
+    def stream_video_info(self, url: str, on_item: Callable[[Dict], None], extraction_id: Optional[str] = None) -> Dict:
+        """
+        Extrait les informations d'une URL et transmet chaque élément à `on_item` dès qu'il est lu
+        (une longue playlist n'attend pas la fin de l'extraction). L'extraction est suivie dans `extractions`
+        et peut être interrompue par cancel_extraction(extraction_id).
+        Retourne la fiche de l'extraction terminée ('count': éléments transmis, 'cancelled': annulée ou non).
+        """
+        is_playlist = is_playlist_url(url)
+        extraction_id = extraction_id or str(uuid.uuid4())
+        extraction = {'id': extraction_id, 'url': url, 'count': 0, 'group_id': None, 'cancelled': False}
+        self.extractions[extraction_id] = extraction
+        self.bus.call_once(self._extractions_changed)
+        self.log(f"Extraction des informations pour: {url} (playlist: {is_playlist})...")
+
+        def on_entry(data: Dict):
+            if extraction['cancelled']:
+                return # Entrées déjà lues par le processus en cours d'arrêt
+            extraction['count'] += 1
+            on_item({
+                "title": data.get('title', 'Titre inconnu'),
+                "url": data.get('webpage_url', data.get('url', url)), # Utilise webpage_url ou url
+                "duration": format_duration(data.get('duration')),
+                "filesize": data.get('filesize') or data.get('filesize_approx'),
+                "playlist_title": data.get('playlist_title') or data.get('playlist')
+            })
+            self.bus.call_once(self._extractions_changed) # Nombre d'éléments lus, redessiné une fois par image
+
+        try:
+            # Le moteur de téléchargement courant fournit les métadonnées (processus yt-dlp ou bibliothèque)
+            self.downloader.extract_info(url, flat_playlist=is_playlist, on_entry=on_entry, extraction_id=extraction_id)
+        finally:
+            self.extractions.pop(extraction_id, None)
+            self.bus.call_once(self._extractions_changed)
+            self.bus.call(self._finish_batch_if_idle) # Téléchargements de la playlist peut-être déjà tous terminés
+
+        if extraction['cancelled']:
+            self.log(f"Extraction annulée pour {url} après {extraction['count']} élément(s).")
+        elif not extraction['count']:
+            self.log(f"Aucune information extraite pour l'URL: {url}.")
+        else:
+            self.log(f"Informations extraites pour {extraction['count']} élément(s) depuis {url}.")
+        return extraction
+
+    def cancel_extraction(self, extraction_id: str) -> bool:
+        """Interrompt une extraction en cours; les éléments déjà transmis sont conservés. Retourne False si elle est introuvable."""
+        extraction = self.extractions.get(extraction_id)
+        if extraction is None or extraction['cancelled']:
+            return False
+        extraction['cancelled'] = True
+        self.downloader.cancel_extraction(extraction_id)
+        self.bus.call_once(self._extractions_changed)
+        return True
+
+    def _extractions_changed(self):
+        self._notify(self.on_extractions_changed)
+
+    def queue_url(self, url: str, selected_format: str, priority: int = 0,
+                  extraction_id: Optional[str] = None) -> Optional[int]:
+        """
+        Extrait une URL (vidéo ou playlist) et met ses éléments en file d'attente au fil de l'extraction:
+        le premier téléchargement peut démarrer avant que toute la playlist soit lue.
+        Une playlist est éclatée en tâches individuelles regroupées sous un groupe parent.
+        Retourne le nombre d'éléments mis en file d'attente, ou None si l'extraction n'a rien donné
+        (0 si elle a été annulée avant le premier élément).
+        """
+        extraction_started = time.monotonic()
+        playlist = is_playlist_url(url)
+        extraction_id = extraction_id or str(uuid.uuid4())
+        group_id = None
+        first_item = None # Premier élément d'une playlist, gardé jusqu'au second (un seul élément: pas de groupe)
+        queued_count = skipped_count = 0
+
+        def queue(item_info: Dict):
+            nonlocal queued_count, skipped_count
+            download_id = self.queue_item(item_info['title'], item_info['url'], selected_format,
+                                          item_info['duration'], item_info.get('filesize'), group_id, priority)
+            if download_id is None:
+                skipped_count += 1
+                return
+            queued_count += 1
+            self.timings.set_extraction(download_id, extraction_started)
+            if group_id:
+                self.download_groups[group_id]['ids'].append(download_id)
+
+        def on_item(item_info: Dict):
+            nonlocal group_id, first_item
+            if not playlist or group_id is not None:
+                queue(item_info)
+            elif first_item is None:
+                first_item = item_info
+            else:
+                group_id = str(uuid.uuid4())
+                playlist_title = first_item.get('playlist_title') or url
+                self.download_groups[group_id] = {'id': group_id, 'title': playlist_title, 'ids': []}
+                extraction = self.extractions.get(extraction_id)
+                if extraction is not None:
+                    extraction['group_id'] = group_id # Annuler la playlist interrompt aussi son extraction
+                if self.on_group_added is not None:
+                    self.bus.call(self.on_group_added, group_id)
+                queue(first_item)
+                queue(item_info)
+
+        extraction = self.stream_video_info(url, on_item, extraction_id)
+        if first_item is not None and group_id is None:
+            queue(first_item)
+        if not extraction['count']:
+            return 0 if extraction['cancelled'] else None
+
+        if group_id:
+            self.log(f"Playlist '{self.download_groups[group_id]['title']}' éclatée en {extraction['count']} téléchargements.")
+        self.log_archived_skips(skipped_count)
+        if group_id and not self.download_groups[group_id]['ids'] and self.on_group_removed is not None:
+            self.bus.call(self.on_group_removed, group_id) # Toute la playlist était déjà archivée
+        return queued_count
+
+    def queue_item(self, title: str, url: str, selected_format: str, duration: Optional[str] = None,
+                   filesize: Optional[int] = None, group_id: Optional[str] = None,
+                   priority: int = 0) -> Optional[str]:
+        """Met un élément en file d'attente. Retourne son identifiant, ou None s'il figure déjà dans l'archive."""
+        download_info = {
+            "id": str(uuid.uuid4()),
+            "title": title,
+            "url": url,
+            "format": selected_format,
+            "status": "En attente",
+            "progress": 0,
+            "duration": duration
+        }
+        if filesize:
+            download_info['filesize'] = filesize
+        if group_id:
+            download_info['group_id'] = group_id
+        return download_info['id'] if self.add_download_to_queue(download_info, priority) else None
+
+    def add_download_to_queue(self, download_info: dict, priority: int = 0) -> bool:
+        """
+        Ajoute un téléchargement à la file d'attente (appelable depuis n'importe quel thread).
+        `priority`: les plus grandes priorités passent avant les autres éléments en attente.
+        Retourne False si l'élément figure déjà dans l'archive et que les éléments archivés sont ignorés.
+        """
+        if self.archive.contains(download_info['url'], download_info['format']):
+            if self.config.get_skip_archived_downloads():
+                return False
+            # Sinon l'élément est retéléchargé, mais signalé comme déjà présent
+            download_info['title'] = f"{download_info['title']} (déjà téléchargé)"
+        elif any(dl['format'] == download_info['format'] and dl['status'] not in FINAL_STATUSES
+                 for dl in self.registry.find_by_url(download_info['url'])):
+            download_info['title'] = f"{download_info['title']} (déjà dans la file)"
+        download_info['priority'] = priority # Gardée pour les nouvelles tentatives et la reprise
+        dl_info = self.registry.add(download_info) # Fiche suivie jusqu'à la fin (et le compteur "en attente")
+        self.metrics.job_queued(dl_info['id'])
+        self.timings.job_queued(dl_info)
+        self.download_queue.push(dl_info, priority)
+        group = self.download_groups.get(dl_info.get('group_id'))
+        self.journal.record_queued(dl_info, group['title'] if group else None)
+        self.event_log.emit('queued', dl_info['id'], url=dl_info['url'], format=dl_info['format'],
+                            title=dl_info['title'], group_id=dl_info.get('group_id'))
+        self.bus.call(self._download_added, dl_info['id'])
+        self.log(f"Ajouté à la file d'attente: {dl_info['title']} (ID: {dl_info['id']})")
+        self.bus.call_once(self.start_next_download_if_possible) # Tenter de démarrer à la prochaine image
+        return True
+
+    def restore_queue(self):
+        """Remet en file d'attente les téléchargements non terminés lors de la session précédente."""
+        restored_jobs, self.restored_jobs = self.restored_jobs, []
+        if not restored_jobs:
+            return
+        interrupted_count = 0
+        restored_groups = []
+        for job in restored_jobs:
+            if job['interrupted']:
+                # yt-dlp reprend à partir du fichier .part laissé dans le dossier de téléchargement
+                interrupted_count += 1
+            group_id = job.get('group_id')
+            if group_id and group_id not in self.download_groups:
+                # Playlist de la session précédente reconstituée (groupe de l'ordonnanceur et carte de l'interface)
+                self.download_groups[group_id] = {'id': group_id, 'title': job.get('group_title') or job['title'], 'ids': []}
+                restored_groups.append(group_id)
+                if self.on_group_added is not None:
+                    self.bus.call(self.on_group_added, group_id)
+            download_info = {
+                "id": job['id'],
+                "title": job['title'],
+                "url": job['url'],
+                "format": job['format'],
+                "status": "En attente",
+                "progress": 0,
+                "duration": job.get('duration')
+            }
+            if group_id:
+                download_info['group_id'] = group_id
+            if self.add_download_to_queue(download_info, job.get('priority') or 0):
+                if group_id:
+                    self.download_groups[group_id]['ids'].append(job['id'])
+            else:
+                self.journal.record_status(job['id'], "completed") # Déjà dans l'archive
+        for group_id in restored_groups:
+            if not self.download_groups[group_id]['ids'] and self.on_group_removed is not None:
+                self.bus.call(self.on_group_removed, group_id)
+        self.log(f"{len(restored_jobs)} téléchargement(s) de la session précédente restauré(s), dont {interrupted_count} interrompu(s) en cours (reprise des fichiers .part).")
+
+    def log_archived_skips(self, skipped_count: int):
+        if skipped_count:
+            self.log(f"{skipped_count} élément(s) déjà présent(s) dans l'archive ignoré(s).")
+
+    # --- Places de téléchargement et progression (thread du bus) ---
+
+    def start_next_download_if_possible(self):
+        """Démarre les prochains téléchargements de la file d'attente tant que la limite n'est pas atteinte."""
+        if not self.tools_discovered:
+            self._notify(self.on_counts_changed)
+            return # Relancé dès que yt-dlp/FFmpeg sont localisés
+        with self.download_lock:
+            while self.active_download_count < self.concurrent_limit:
+                download_info = self.download_queue.pop() # Prochain téléchargement selon la politique et les priorités
+                if download_info is None:
+                    break # La file est vide, rien à faire
+
+                # Vérifier si le téléchargement n'a pas été annulé pendant qu'il était en attente
+                if download_info['status'] == "cancelled":
+                    # Les compteurs ont déjà été mis à jour par cancel_download_now
+                    self.log(f"Téléchargement {download_info['title']} (ID: {download_info['id']}) a été annulé avant de commencer.")
+                    continue
+                if download_info['status'] != "En attente":
+                    continue # Entrée obsolète d'un téléchargement relancé (déjà démarré via une entrée plus récente)
+                self._set_status(download_info, "active") # Quitte le compteur "en attente" pour "actifs"
+                self.journal.record_status(download_info['id'], "active")
+
+                # Nombre de téléchargements qui se partageront le budget de bande passante: ceux qui tourneront
+                # réellement ensemble (actifs et en attente, au plus la limite); un téléchargement seul a tout le budget
+                self.downloader.bandwidth.expected_jobs = min(self.concurrent_limit,
+                                                              self.active_download_count + self.download_queue.qsize())
+
+                self.log(f"Démarrage du téléchargement: {download_info['title']} (Actifs: {self.active_download_count}/{self.concurrent_limit})")
+                # Mettre à jour l'affichage du téléchargement immédiatement
+                self._download_changed(download_info['id'])
+                # Lancer le téléchargement sans bloquer (thread dédié ou boucle E/S partagée selon le moteur)
+                self.downloader.start_download(
+                    download_info['url'],
+                    download_info['format'],
+                    download_info['id']
+                )
+
+            if not self.download_queue.empty():
+                self.log(f"File d'attente pleine ou limite atteinte. Actifs: {self.active_download_count}/{self.concurrent_limit}, En attente: {self.download_queue.qsize()}")
+        self._notify(self.on_counts_changed)
+
+    def update_download_progress(self, download_id: str, status: str, progress: float, message: str = "",
+                                 details: dict = None):
+        """
+        Reçoit la progression d'un téléchargement depuis le Downloader (n'importe quel thread).
+        `details` contient les données structurées de yt-dlp (octets téléchargés, taille totale,
+        débit, temps restant, étape). Seul le dernier état de chaque téléchargement est conservé
+        jusqu'à la prochaine image du bus d'événements.
+        """
+        if details and details.get('stage') == 'plan':
+            # Le plan de format est conservé même si d'autres états le remplacent avant la prochaine image
+            self.bus.call(self.set_format_plan, download_id, details['mode'], details['description'])
+        self.bus.publish_state(
+            download_id,
+            {'status': status, 'progress': progress, 'message': message, 'details': details},
+            final=status in FINAL_STATUSES
+        )
+
+    def set_format_plan(self, download_id: str, mode: str, description: str):
+        """Mémorise le chemin retenu (copie, remultiplexage, réencodage) pour l'afficher."""
+        dl_info = self.registry.get(download_id)
+        if dl_info:
+            dl_info['format_plan_mode'] = mode
+            dl_info['format_plan'] = description
+        self.timings.format_planned(download_id)
+
+    def apply_download_progress(self, download_id: str, status: str, progress: float, message: str = "",
+                                details: dict = None):
+        """Applique la progression d'un téléchargement à sa fiche (thread du bus)."""
+        dl_info = self.registry.get(download_id) # None si le téléchargement a été évincé du registre
+        if not dl_info:
+            return
+        old_status = dl_info['status']
+        if old_status in FINAL_STATUSES and status not in FINAL_STATUSES:
+            return # Progression tardive (conversion ou processus en cours d'arrêt) d'un téléchargement déjà terminé
+        self._set_status(dl_info, status) # Index et compteurs par état mis à jour en O(1)
+        dl_info['progress'] = progress
+        dl_info['message'] = message # Stocker le message de progression détaillé
+        if details:
+            dl_info['stage'] = details.get('stage')
+            self.timings.job_stage(download_id, details)
+            if details.get('stage') == 'download':
+                dl_info['downloaded_bytes'] = details.get('downloaded_bytes')
+                dl_info['total_bytes'] = details.get('total_bytes')
+                dl_info['speed'] = details.get('speed')
+                dl_info['eta'] = details.get('eta')
+                self.metrics.job_progress(download_id, details.get('downloaded_bytes'), details.get('total_bytes'))
+
+        if status != old_status:
+            self.journal.record_status(download_id, status)
+
+        # Fin de l'étape réseau: la place de téléchargement est libérée pendant la conversion
+        if status == "postprocessing" and old_status == "active":
+            self.bus.call_once(self.start_next_download_if_possible)
+
+        # Le statut final est atteint (les compteurs suivent le registre)
+        if status in FINAL_STATUSES and old_status not in FINAL_STATUSES:
+            self.log(f"Téléchargement {download_id} terminé/annulé/échoué. Actifs restants: {self.active_download_count}")
+            last_error = self.downloader.pop_last_error(download_id)
+            if status == "completed":
+                self.archive.add(dl_info['url'], dl_info['format'])
+            elif status == "failed":
+                self.failures_since_sample += 1
+                self.metrics.job_failed(last_error or message)
+
+            self.bus.call_once(self.start_next_download_if_possible) # Tenter de démarrer le suivant
+
+        self._download_changed(download_id)
+
+    def cancel_download_now(self, dl_to_cancel):
+        """Annule un téléchargement actif ou en attente, sans confirmation (thread du bus)."""
+        download_id = dl_to_cancel['id']
+        if dl_to_cancel['status'] in ["active", "postprocessing"]:
+            self.event_log.emit('cancel_requested', download_id, status=dl_to_cancel['status'])
+            self.downloader.cancel_download(download_id)
+            # Le progress_callback mettra à jour le statut à "cancelled"
+        elif dl_to_cancel['status'] == "En attente":
+            self.download_queue.remove(download_id) # Retiré de la file sans la parcourir
+            self._set_status(dl_to_cancel, "cancelled")
+            dl_to_cancel['message'] = "Annulé (en attente)"
+            self.journal.record_status(download_id, "cancelled")
+            self.event_log.emit('cancel_requested', download_id, status="En attente")
+            self._download_changed(download_id)
+            self.log(f"Téléchargement en attente {dl_to_cancel['title']} annulé.")
+            # Tenter de démarrer le prochain téléchargement si un slot se libère (bien que ce ne soit pas un slot "actif")
+            self.bus.call_once(self.start_next_download_if_possible)
+
+    def move_pending_download(self, download_id: str, to_front: bool = True) -> bool:
+        """Place un téléchargement en attente en tête (prochain lancé) ou en fin de file. Retourne False s'il n'y est pas."""
+        moved = (self.download_queue.move_to_front(download_id) if to_front
+                 else self.download_queue.move_to_back(download_id))
+        if moved:
+            dl_info = self.registry.get(download_id)
+            title = dl_info['title'] if dl_info else download_id
+            self.log(f"Téléchargement {title} placé {'en tête' if to_front else 'en fin'} de file d'attente.")
+        return moved
+
+    def set_pending_priority(self, download_id: str, priority: int) -> bool:
+        """Change la priorité d'un téléchargement en attente. Retourne False s'il n'est pas dans la file."""
+        if not self.download_queue.set_priority(download_id, priority):
+            return False
+        dl_info = self.registry.get(download_id)
+        if dl_info:
+            dl_info['priority'] = priority
+            group = self.download_groups.get(dl_info.get('group_id'))
+            self.journal.record_queued(dl_info, group['title'] if group else None) # Nouvelle priorité à la reprise
+        self.log(f"Priorité de {dl_info['title'] if dl_info else download_id} fixée à {priority}.")
+        return True
+
+    def retry_download(self, download_id: str):
+        """Remet en file d'attente un téléchargement échoué ou annulé."""
+        dl_info = self.registry.get(download_id)
+        if not dl_info or dl_info['status'] not in ["failed", "cancelled"]:
+            return
+        if self.downloader.is_cancel_pending(download_id):
+            self.log(f"Le téléchargement {dl_info['title']} est encore en cours d'arrêt, réessayez dans un instant.")
+            return
+        self._set_status(dl_info, "En attente")
+        dl_info['progress'] = 0
+        dl_info['message'] = ""
+        dl_info.pop('stage', None)
+        dl_info.pop('speed', None)
+        dl_info.pop('eta', None)
+        dl_info.pop('downloaded_bytes', None) # Octets de la tentative précédente (API, métriques)
+        dl_info.pop('total_bytes', None)
+        dl_info.pop('format_plan_mode', None)
+        self.download_queue.push(dl_info, dl_info.get('priority', 0)) # Même priorité qu'à l'ajout
+        self.journal.record_status(download_id, "queued")
+        self.event_log.emit('retry', download_id, url=dl_info['url'], format=dl_info['format'])
+        self._download_changed(download_id)
+        self.log(f"Nouvelle tentative pour: {dl_info['title']} (ID: {download_id})")
+        self.bus.call_once(self.start_next_download_if_possible)
+
+    def adaptive_concurrency_tick(self):
+        """Mesure périodique du contrôleur adaptatif: débit total, échecs, limitations de débit et CPU (thread du bus)."""
+        failures, self.failures_since_sample = self.failures_since_sample, 0
+        throttle_events = self.downloader.throttle_events
+        throttled, self._throttle_events_seen = throttle_events - self._throttle_events_seen, throttle_events
+        if not self.config.get_adaptive_concurrency():
+            return
+        throughput = sum(dl.get('speed') or 0 for dl in self.registry.with_status("active")
+                         if dl.get('stage') == 'download')
+        decision = self.concurrency_controller.observe(
+            throughput, failures, throttled, cpu_usage_percent(),
+            self.active_download_count, self.registry.count("En attente")
+        )
+        if decision:
+            new_limit, reason = decision
+            self.log(f"Limite adaptative: {self.concurrent_limit} -> {new_limit} téléchargements simultanés ({reason}).")
+            self.event_log.emit('concurrency_limit', old=self.concurrent_limit, new=new_limit, reason=reason,
+                                throughput=round(throughput), failures=failures, throttled=throttled)
+            self.concurrent_limit = new_limit
+            self.bus.call_once(self.start_next_download_if_possible)
+
+    def close(self):
+        """Arrête les moteurs et ferme les journaux (les téléchargements actifs seront repris au prochain lancement)."""
+        self.downloader.shutdown()
+        self.journal.close()
+        self.event_log.close()
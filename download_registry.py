@@ -0,0 +1,206 @@
+# download_registry.py
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+# États après lesquels un téléchargement ne changera plus (sauf s'il est relancé)
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+# Nombre de téléchargements terminés gardés en mémoire (et affichés) par défaut
+DEFAULT_RETENTION = 2000
+
+
+class DownloadRecord:
+    """
+    Fiche d'un téléchargement. Les attributs sont fixés par __slots__ (pas de dict par instance).
+    L'accès par clé (record['status'], record.get('speed')) est conservé pour les modules
+    qui manipulent les téléchargements comme des dicts (file d'attente, journal).
+    """
+    __slots__ = ('id', 'title', 'url', 'format', 'status', 'progress', 'message', 'group_id', 'priority',
+                 'stage', 'speed', 'eta', 'downloaded_bytes', 'total_bytes', 'format_plan_mode', 'format_plan',
+                 'duration', 'filesize', 'finished_at')
+
+    def __init__(self, download_info: Dict):
+        for name in self.__slots__:
+            setattr(self, name, download_info.get(name))
+        if self.progress is None:
+            self.progress = 0
+        if self.message is None:
+            self.message = ""
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def pop(self, key: str, default=None):
+        """Efface un champ optionnel (remis à None) et retourne son ancienne valeur."""
+        value = self.get(key, default)
+        if key in self.__slots__:
+            setattr(self, key, None)
+        return value
+
+    def keys(self) -> List[str]:
+        return [name for name in self.__slots__ if getattr(self, name) is not None]
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.keys()}
+
+
+class DownloadRegistry:
+    """
+    Registre des téléchargements de la session, indexé par identifiant, état, URL et playlist.
+    Les compteurs par état sont tenus à jour à chaque transition (O(1)), y compris pour les
+    téléchargements terminés qui ont été évincés: au-delà de `retention` téléchargements terminés,
+    les plus anciens sont retirés de la mémoire et, si `history_path` est défini, ajoutés à
+    l'historique persistant (une ligne JSON par téléchargement).
+    """
+
+    def __init__(self, retention: int = DEFAULT_RETENTION, history_path: Optional[str] = None):
+        self.retention = retention
+        self.history_path = history_path
+        self._records: Dict[str, DownloadRecord] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_url: Dict[str, Set[str]] = {}
+        self._by_group: Dict[str, Set[str]] = {}
+        self._counts: Dict[str, int] = {}
+        self._group_counts: Dict[str, Dict[str, int]] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict() # Terminés, du plus ancien au plus récent
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, download_id: str) -> bool:
+        return download_id in self._records
+
+    def add(self, download_info: Dict) -> DownloadRecord:
+        """Crée la fiche d'un nouveau téléchargement et l'indexe."""
+        record = DownloadRecord(download_info)
+        with self._lock:
+            self._records[record.id] = record
+            self._by_url.setdefault(record.url, set()).add(record.id)
+            if record.group_id:
+                self._by_group.setdefault(record.group_id, set()).add(record.id)
+            self._index_status(record, record.status)
+        return record
+
+    def get(self, download_id: str) -> Optional[DownloadRecord]:
+        """Fiche d'un téléchargement en O(1), None s'il est inconnu ou a été évincé."""
+        return self._records.get(download_id)
+
+    def _index_status(self, record: DownloadRecord, status: str):
+        self._by_status.setdefault(status, set()).add(record.id)
+        self._counts[status] = self._counts.get(status, 0) + 1
+        if record.group_id:
+            group_counts = self._group_counts.setdefault(record.group_id, {})
+            group_counts[status] = group_counts.get(status, 0) + 1
+        if status in FINAL_STATUSES:
+            record.finished_at = time.time()
+            self._finished[record.id] = None
+            self._finished.move_to_end(record.id)
+
+    def _unindex_status(self, record: DownloadRecord):
+        self._by_status.get(record.status, set()).discard(record.id)
+        self._counts[record.status] = self._counts.get(record.status, 0) - 1
+        if record.group_id:
+            group_counts = self._group_counts.get(record.group_id, {})
+            group_counts[record.status] = group_counts.get(record.status, 0) - 1
+        self._finished.pop(record.id, None)
+
+    def set_status(self, record: DownloadRecord, status: str) -> str:
+        """Change l'état d'un téléchargement (index et compteurs compris). Retourne l'ancien état."""
+        with self._lock:
+            old_status = record.status
+            if status != old_status:
+                self._unindex_status(record)
+                record.status = status
+                self._index_status(record, status)
+            return old_status
+
+    def count(self, *statuses: str) -> int:
+        """Nombre de téléchargements dans ces états (les téléchargements terminés évincés restent comptés)."""
+        return sum(self._counts.get(status, 0) for status in statuses)
+
+    def ids_with_status(self, status: str) -> List[str]:
+        with self._lock:
+            return list(self._by_status.get(status, ()))
+
+    def with_status(self, status: str) -> List[DownloadRecord]:
+        with self._lock:
+            return [self._records[download_id] for download_id in self._by_status.get(status, ())
+                    if download_id in self._records]
+
+    def records(self) -> List[DownloadRecord]:
+        """Toutes les fiches en mémoire, dans l'ordre d'ajout (copie de la liste, pour un parcours hors du thread du bus)."""
+        with self._lock:
+            return list(self._records.values())
+
+    def find_by_url(self, url: str) -> List[DownloadRecord]:
+        with self._lock:
+            return [self._records[download_id] for download_id in self._by_url.get(url, ())]
+
+    def group_members(self, group_id: str) -> List[DownloadRecord]:
+        """Éléments d'une playlist encore en mémoire."""
+        with self._lock:
+            return [self._records[download_id] for download_id in self._by_group.get(group_id, ())]
+
+    def group_counts(self, group_id: str) -> Dict[str, int]:
+        """Nombre d'éléments d'une playlist par état, évincés compris."""
+        with self._lock:
+            return dict(self._group_counts.get(group_id, {}))
+
+    def evict_finished(self) -> List[DownloadRecord]:
+        """
+        Retire les téléchargements terminés les plus anciens au-delà de la limite de rétention.
+        Retourne les fiches évincées (pour supprimer leur affichage).
+        """
+        with self._lock:
+            evicted = []
+            while len(self._finished) > self.retention:
+                download_id, _ = self._finished.popitem(last=False)
+                record = self._records.pop(download_id, None)
+                if record is None:
+                    continue
+                self._by_status.get(record.status, set()).discard(download_id)
+                self._discard(self._by_url, record.url, download_id)
+                if record.group_id:
+                    self._discard(self._by_group, record.group_id, download_id)
+                evicted.append(record)
+        if evicted and self.history_path:
+            self._append_history(evicted)
+        return evicted
+
+    def _discard(self, index: Dict[str, Set[str]], key: str, download_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(download_id)
+            if not ids:
+                del index[key]
+
+    def _append_history(self, records: Iterable[DownloadRecord]):
+        try:
+            os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+            with open(self.history_path, "a", encoding='utf-8') as f:
+                for record in records:
+                    entry = {'id': record.id, 'title': record.title, 'url': record.url, 'format': record.format,
+                             'status': record.status, 'message': record.message,
+                             'finished_at': round(record.finished_at or time.time(), 3)}
+                    if record.group_id:
+                        entry['group_id'] = record.group_id
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"Erreur lors de l'écriture de l'historique des téléchargements: {e}")
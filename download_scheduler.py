@@ -0,0 +1,166 @@
+# download_scheduler.py
+import heapq
+import itertools
+import threading
+from typing import Dict, List, Optional
+
+# Politiques d'ordonnancement disponibles
+SCHEDULER_POLICIES = ("fifo", "shortest", "round_robin")
+POLICY_LABELS = {
+    "fifo": "Ordre d'ajout",
+    "shortest": "Plus courts d'abord (durée/taille)",
+    "round_robin": "Alternance entre playlists",
+}
+
+# Rangs: les éléments placés en tête passent avant toute priorité, ceux renvoyés en fin après tout le reste
+_RANK_FRONT, _RANK_NORMAL, _RANK_BACK = 0, 1, 2
+_UNKNOWN_SIZE = float('inf')
+# Débit moyen estimé (octets/s, ~128 kbit/s: flux audio) pour comparer une durée connue à une taille connue
+_ESTIMATED_BYTES_PER_SECOND = 16000
+
+
+def duration_to_seconds(duration) -> Optional[int]:
+    """Convertit une durée "HH:MM:SS" (ou un nombre de secondes) en secondes; None si elle est inconnue ou nulle."""
+    if isinstance(duration, (int, float)):
+        return int(duration) or None
+    if not isinstance(duration, str):
+        return None
+    try:
+        seconds = 0
+        for part in duration.split(":"):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
+        return None
+    return seconds or None
+
+
+class DownloadScheduler:
+    """
+    File d'attente des téléchargements ordonnée par (rang, priorité, critère de la politique, ordre d'ajout).
+    Tas binaire avec suppression paresseuse: annuler, changer la priorité ou déplacer un élément
+    invalide son entrée en O(1) (et en ajoute une nouvelle en O(log n)) sans parcourir la file;
+    les entrées invalidées sont ignorées au moment du retrait et purgées quand elles deviennent majoritaires.
+    Politiques: 'fifo', 'shortest' (durée ou taille connue la plus courte d'abord) et
+    'round_robin' (le n-ième élément de chaque playlist passe avant le (n+1)-ième de toutes).
+    """
+
+    def __init__(self, policy: str = "fifo"):
+        self.policy = policy if policy in SCHEDULER_POLICIES else "fifo"
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {} # id -> entrée valide du tas: [clé, id, infos]
+        self._meta: Dict[str, Dict] = {} # id -> rang, priorité, ordre, tour de playlist
+        self._order = itertools.count()
+        self._front_order = itertools.count(-1, -1) # Le dernier élément placé en tête passe en premier
+        self._group_turns: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+    def empty(self) -> bool:
+        return not self._entries
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._entries
+
+    def _policy_value(self, download_info: Dict, meta: Dict):
+        if self.policy == "shortest":
+            # Une seule échelle (octets): la durée est convertie en taille estimée au débit moyen
+            size = download_info.get('filesize') or download_info.get('filesize_approx')
+            if size:
+                return (0, size)
+            seconds = duration_to_seconds(download_info.get('duration_seconds') or download_info.get('duration'))
+            return (0, seconds * _ESTIMATED_BYTES_PER_SECOND) if seconds else (1, _UNKNOWN_SIZE)
+        if self.policy == "round_robin":
+            return meta['turn']
+        return 0
+
+    def _push_entry(self, job_id: str, download_info: Dict):
+        meta = self._meta[job_id]
+        key = (meta['rank'], -meta['priority'], self._policy_value(download_info, meta), meta['order'])
+        entry = [key, job_id, download_info]
+        self._entries[job_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _invalidate(self, job_id: str) -> Optional[Dict]:
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return None
+        entry[1] = None # Marque l'entrée comme supprimée, elle restera dans le tas jusqu'à son retrait
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [e for e in self._heap if e[1] is not None]
+            heapq.heapify(self._heap)
+        return entry[2]
+
+    def push(self, download_info: Dict, priority: int = 0):
+        """Ajoute (ou remet) un téléchargement dans la file."""
+        job_id = download_info['id']
+        with self._lock:
+            self._invalidate(job_id)
+            group = download_info.get('group_id')
+            turn = self._group_turns.get(group, 0)
+            self._group_turns[group] = turn + 1
+            self._meta[job_id] = {'rank': _RANK_NORMAL, 'priority': priority, 'order': next(self._order), 'turn': turn}
+            self._push_entry(job_id, download_info)
+
+    # Compatibilité avec l'interface de queue.Queue
+    put = push
+
+    def pop(self) -> Optional[Dict]:
+        """Retire et retourne le prochain téléchargement, ou None si la file est vide."""
+        with self._lock:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if entry[1] is not None:
+                    del self._entries[entry[1]]
+                    self._meta.pop(entry[1], None)
+                    return entry[2]
+            return None
+
+    def remove(self, job_id: str) -> Optional[Dict]:
+        """Retire un téléchargement de la file (annulation) sans la parcourir. Retourne ses infos ou None."""
+        with self._lock:
+            download_info = self._invalidate(job_id)
+            self._meta.pop(job_id, None)
+            return download_info
+
+    def _reposition(self, job_id: str, **changes) -> bool:
+        with self._lock:
+            download_info = self._invalidate(job_id)
+            if download_info is None:
+                return False
+            self._meta[job_id].update(changes)
+            self._push_entry(job_id, download_info)
+            return True
+
+    def set_priority(self, job_id: str, priority: int) -> bool:
+        """Change la priorité d'un téléchargement en attente (plus grand: plus tôt)."""
+        return self._reposition(job_id, priority=priority)
+
+    def move_to_front(self, job_id: str) -> bool:
+        """Place un téléchargement en tête de file, devant toutes les priorités."""
+        return self._reposition(job_id, rank=_RANK_FRONT, order=next(self._front_order))
+
+    def move_to_back(self, job_id: str) -> bool:
+        """Renvoie un téléchargement en fin de file, derrière tous les autres."""
+        return self._reposition(job_id, rank=_RANK_BACK, order=next(self._order))
+
+    def set_policy(self, policy: str):
+        """Change la politique d'ordonnancement; la file est réordonnée (O(n log n))."""
+        if policy not in SCHEDULER_POLICIES:
+            return
+        with self._lock:
+            self.policy = policy
+            entries = list(self._entries.values())
+            self._heap = []
+            self._entries = {}
+            for entry in entries:
+                self._push_entry(entry[1], entry[2])
+
+    def snapshot(self) -> List[Dict]:
+        """Téléchargements en attente dans l'ordre où ils seront lancés (O(n log n), pour l'affichage)."""
+        with self._lock:
+            return [entry[2] for entry in sorted(self._entries.values(), key=lambda entry: entry[0])]
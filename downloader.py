@@ -1,295 +1,409 @@
 # downloader.py
 import os
 import sys
-import subprocess
 import threading
-from typing import Callable, Optional, Dict
-import re # Importation pour les expressions régulières
-import queue # Pour la communication entre les threads de lecture et le thread principal de téléchargement
+from typing import Callable, Optional, Dict, List, Set
+
+from progress_parser import ProgressParser
+from format_planner import describe_plan
+from executable_cache import ExecutableCache
+from metadata_cache import MetadataCache
+from postprocess_pool import PostProcessPool, needs_postprocess
+from bandwidth_budget import BandwidthBudget
+from event_log import EventLog
+from download_backends import DownloadBackend, SubprocessBackend, YtDlpLibraryBackend, YT_DLP_LIBRARY_AVAILABLE
+
+# Moteurs de téléchargement disponibles: un processus yt-dlp par tâche, ou la bibliothèque yt_dlp en processus
+DOWNLOAD_BACKENDS = ("subprocess", "library")
+
+# Messages de yt-dlp qui signalent une limitation de débit côté serveur
+THROTTLE_MARKERS = ("HTTP Error 429", "Too Many Requests", "HTTP Error 403", "rate-limit", "rate limit")
 
 class Downloader:
-    def __init__(self, download_path: str, log_callback: Optional[Callable] = None, progress_callback: Optional[Callable] = None):
+    def __init__(self, download_path: str, log_callback: Optional[Callable] = None, progress_callback: Optional[Callable] = None,
+                 io_engine: str = "threads", backend: str = "subprocess",
+                 executable_cache_path: str = "C:/YoutubeDownloader/executables.json", format_planning: bool = True,
+                 two_stage_pipeline: bool = True, postprocess_workers: int = 0, low_priority_postprocess: bool = True,
+                 bandwidth_limit: int = 0, bandwidth_schedule: Optional[List[Dict]] = None,
+                 event_log: Optional[EventLog] = None,
+                 metadata_cache_path: str = "C:/YoutubeDownloader/metadata_cache.jsonl", metadata_cache: bool = True,
+                 metadata_cache_ttl_hours: int = 24, metadata_cache_max_entries: int = 20000, offline_mode: bool = False):
         self.download_path = download_path
         self.log_callback = log_callback or print
         self.progress_callback = progress_callback # Nouveau callback pour la progression
         self.yt_dlp_path = None
         self.ffmpeg_path = None
-        self.active_processes: Dict[str, subprocess.Popen] = {} # Pour suivre les processus actifs et les annuler
-
-    def log(self, message: str):
-        self.log_callback(message)
+        # Chemins et versions de yt-dlp/ffmpeg, revalidés par stat au lieu d'être relancés
+        self.executable_cache = ExecutableCache(executable_cache_path)
+        self.executable_versions: Dict[str, str] = {}
+        # Métadonnées déjà extraites (titre, durée, formats): une URL déjà vue n'est pas réextraite
+        self.metadata_cache = MetadataCache(metadata_cache_path, metadata_cache_ttl_hours, metadata_cache_max_entries,
+                                            enabled=metadata_cache)
+        # Mode hors ligne: les métadonnées ne sont servies que par le cache (aucune extraction)
+        self.offline_mode = offline_mode
+        # Inspecter les formats disponibles avant de télécharger pour éviter les réencodages inutiles
+        self.format_planning = format_planning
+        self._cancelled_ids: Set[str] = set() # Téléchargements annulés dont l'échec final ne doit pas être signalé
+        self.throttle_events = 0 # Limitations de débit signalées par yt-dlp depuis le lancement (contrôleur adaptatif)
+        self._last_errors: Dict[str, str] = {} # Dernière ligne ERROR de yt-dlp par téléchargement (classe d'échec)
+        # Journal structuré des événements (transitions, échantillons de progression, limitations de débit)
+        self.event_log = event_log
+        self._event_status: Dict[str, str] = {} # Dernier état enregistré par téléchargement
+        self._event_bytes: Dict[str, Dict] = {} # Derniers octets téléchargés/totaux par téléchargement
+        # Budget de bande passante global (Kio/s, 0: illimité), partagé entre les téléchargements en cours
+        self.bandwidth = BandwidthBudget(bandwidth_limit, bandwidth_schedule)
+        # Pipeline en deux étapes: yt-dlp ne fait que télécharger, les conversions ffmpeg passent par un pool séparé
+        self.two_stage_pipeline = two_stage_pipeline
+        self.postprocess_pool = PostProcessPool(self.log, postprocess_workers, low_priority_postprocess)
+        self._deferred_plans: Dict[str, Dict] = {} # Téléchargements dont la conversion est confiée au pool
+        self._output_files: Dict[str, List[Dict]] = {} # Fichiers téléchargés (événements 'file') par téléchargement
+        self.subprocess_backend = SubprocessBackend(self, io_engine)
+        self._library_backend: Optional[YtDlpLibraryBackend] = None # Créé à la demande
+        self.backend: DownloadBackend = self.subprocess_backend
+        self.set_backend(backend)
+
+    def log(self, message: str, download_id: Optional[str] = None):
+        """Journalise un message; `download_id` rattache le message à un téléchargement (filtre de la console)."""
+        if download_id is None:
+            self.log_callback(message)
+        else:
+            self.log_callback(message, download_id)
 
     def set_download_path(self, path: str):
         self.download_path = path
 
-    def _run_command_check(self, command: list) -> bool:
-        """Exécute une commande pour vérifier si un exécutable est disponible."""
-        try:
-            creationflags = 0
-            if sys.platform == "win32":
-                creationflags = subprocess.CREATE_NO_WINDOW
+    def _path_candidates(self, exec_name: str) -> List[str]:
+        """Emplacements possibles d'un exécutable dans le PATH système, dans l'ordre du PATH."""
+        candidates = []
+        for path_dir in os.environ.get("PATH", "").split(os.pathsep):
+            if path_dir:
+                candidates.append(os.path.join(path_dir, exec_name))
+        return candidates
 
-            subprocess.run(command, check=True, stdout=subprocess.PIPE,
-                           stderr=subprocess.PIPE, text=True, creationflags=creationflags)
-            return True
-        except FileNotFoundError:
-            return False
-        except subprocess.CalledProcessError:
-            return True # La commande a échoué mais le programme existe
+    def _discover_executable(self, name: str, candidates: List[str], version_arg: str, force: bool) -> Optional[str]:
+        """Retourne le premier candidat utilisable, depuis le cache si le fichier n'a pas changé."""
+        try:
+            path, version, from_cache = self.executable_cache.discover(name, candidates, version_arg, force=force)
         except Exception as e:
-            self.log(f"Erreur inattendue lors de la vérification de la commande {command}: {e}")
-            return False
-
-    def find_yt_dlp_location(self) -> str:
+            self.log(f"Erreur lors de la recherche de {name}: {e}")
+            return None
+        if path:
+            self.executable_versions[name] = version
+            origin = " (cache)" if from_cache else ""
+            self.log(f"{name} trouvé à: {path} - version {version}{origin}")
+        return path
+
+    def find_yt_dlp_location(self, force: bool = False) -> str:
         """
         Trouve le chemin de l'exécutable yt-dlp.
         Cherche dans le dossier courant, puis dans le PATH.
+        Le résultat est mis en cache; `force` relance la recherche complète.
         """
         script_dir = os.path.dirname(os.path.abspath(__file__))
         exec_name = "yt-dlp.exe" if sys.platform == "win32" else "yt-dlp"
 
-        # 1. Vérifier le dossier de l'exécutable (ou le dossier du script si c'est un script)
-        candidate_path = os.path.join(script_dir, exec_name)
-        if os.path.exists(candidate_path) and self._run_command_check([candidate_path, "--version"]):
-            self.yt_dlp_path = candidate_path
-            self.log(f"yt-dlp trouvé à: {self.yt_dlp_path}")
-            return candidate_path
-
-        # 2. Chercher dans le PATH système
-        try:
-            path_env = os.environ.get("PATH", "").split(os.pathsep)
-            for path_dir in path_env:
-                full_path = os.path.join(path_dir, exec_name)
-                if os.path.exists(full_path) and self._run_command_check([full_path, "--version"]):
-                    self.yt_dlp_path = full_path
-                    self.log(f"yt-dlp trouvé dans le PATH: {self.yt_dlp_path}")
-                    return full_path
-        except Exception as e:
-            self.log(f"Erreur lors de la recherche de yt-dlp dans le PATH: {e}")
+        # 1. Dossier de l'exécutable (ou du script), 2. PATH système
+        candidates = [os.path.join(script_dir, exec_name)] + self._path_candidates(exec_name)
+        self.yt_dlp_path = self._discover_executable("yt-dlp", candidates, "--version", force)
+        if self.yt_dlp_path:
+            return self.yt_dlp_path
 
         self.log("yt-dlp n'a pas été trouvé. Assurez-vous qu'il est dans le même dossier que l'exécutable ou dans votre PATH.")
-        self.yt_dlp_path = None
         return ""
 
-    def find_ffmpeg_location(self) -> str:
+    def find_ffmpeg_location(self, force: bool = False) -> str:
         """
         Trouve le chemin de l'exécutable ffmpeg.
         Cherche d'abord dans le dossier spécifié './ffmpeg/bin/', puis le dossier courant, puis le PATH.
+        Le résultat est mis en cache; `force` relance la recherche complète.
         """
         script_dir = os.path.dirname(os.path.abspath(__file__))
         exec_name = "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg"
 
-        # 1. Vérifier le chemin spécifique ./ffmpeg/bin/
-        ffmpeg_bin_path = os.path.join(script_dir, "ffmpeg", "bin", exec_name)
-        if os.path.exists(ffmpeg_bin_path) and self._run_command_check([ffmpeg_bin_path, "-version"]):
-            self.ffmpeg_path = ffmpeg_bin_path
-            self.log(f"ffmpeg trouvé à l'emplacement spécifié: {self.ffmpeg_path}")
-            return ffmpeg_bin_path
-
-        # 2. Vérifier le dossier de l'exécutable (ou le dossier du script si c'est un script)
-        candidate_path = os.path.join(script_dir, exec_name)
-        if os.path.exists(candidate_path) and self._run_command_check([candidate_path, "-version"]):
-            self.ffmpeg_path = candidate_path
-            self.log(f"ffmpeg trouvé à: {self.ffmpeg_path}")
-            return candidate_path
-
-        # 3. Chercher dans le PATH système (en dernier recours)
-        try:
-            path_env = os.environ.get("PATH", "").split(os.pathsep)
-            for path_dir in path_env:
-                full_path = os.path.join(path_dir, exec_name)
-                if os.path.exists(full_path) and self._run_command_check([full_path, "-version"]):
-                    self.ffmpeg_path = full_path
-                    self.log(f"ffmpeg trouvé dans le PATH: {self.ffmpeg_path}")
-                    return full_path
-        except Exception as e:
-            self.log(f"Erreur lors de la recherche de ffmpeg dans le PATH: {e}")
+        # 1. ./ffmpeg/bin/, 2. dossier de l'exécutable (ou du script), 3. PATH système (en dernier recours)
+        candidates = [os.path.join(script_dir, "ffmpeg", "bin", exec_name),
+                      os.path.join(script_dir, exec_name)] + self._path_candidates(exec_name)
+        self.ffmpeg_path = self._discover_executable("ffmpeg", candidates, "-version", force)
+        if self.ffmpeg_path:
+            return self.ffmpeg_path
 
         self.log("ffmpeg n'a pas été trouvé. Assurez-vous qu'il est dans './ffmpeg/bin/', le même dossier que l'exécutable ou dans votre PATH. Il est nécessaire pour convertir en MP3/WAV.")
-        self.ffmpeg_path = None
         return ""
 
-    def _read_stream(self, stream, queue):
-        """Lit un flux de sortie et place chaque ligne dans une queue."""
-        for line in iter(stream.readline, ''):
-            queue.put(line)
-        stream.close()
+    def set_io_engine(self, mode: str):
+        """Choisit le moteur de lecture des sorties du moteur subprocess ('threads' ou 'async')."""
+        self.subprocess_backend.set_io_engine(mode)
+
+    @property
+    def io_engine(self) -> str:
+        return self.subprocess_backend.io_engine
+
+    def set_backend(self, name: str):
+        """Choisit le moteur de téléchargement: 'subprocess' (yt-dlp externe) ou 'library' (yt_dlp en processus)."""
+        if name == "library":
+            if not YT_DLP_LIBRARY_AVAILABLE:
+                self.log("Avertissement: la bibliothèque yt_dlp n'est pas installée, utilisation du moteur subprocess.")
+                self.backend = self.subprocess_backend
+                return
+            if self._library_backend is None:
+                self._library_backend = YtDlpLibraryBackend(self)
+            self.backend = self._library_backend
+        else:
+            if name != "subprocess":
+                self.log(f"Avertissement: moteur de téléchargement inconnu '{name}', utilisation de 'subprocess'.")
+            self.backend = self.subprocess_backend
+
+    def is_available(self) -> bool:
+        """Indique si le moteur de téléchargement courant peut être utilisé."""
+        return self.backend.is_available()
+
+    def set_two_stage_pipeline(self, enabled: bool):
+        """Active ou non la séparation téléchargement / conversion pour les prochains téléchargements."""
+        self.two_stage_pipeline = bool(enabled)
+
+    def set_postprocess_workers(self, max_workers: int):
+        """Limite de conversions simultanées (0: nombre de cœurs)."""
+        self.postprocess_pool.set_max_workers(max_workers)
+
+    def set_low_priority_postprocess(self, enabled: bool):
+        """Lance les conversions ffmpeg en priorité basse pour ne pas gêner le reste du système."""
+        self.postprocess_pool.set_low_priority(enabled)
+
+    def set_bandwidth_limit(self, limit_kib: int, schedule: Optional[List[Dict]] = None):
+        """Change la limite globale de bande passante (Kio/s, 0: illimitée) et ses plages horaires."""
+        self.bandwidth.configure(limit_kib, schedule)
+
+    def shutdown(self):
+        """Arrête les ressources partagées des moteurs (boucle E/S, threads de travail)."""
+        self.subprocess_backend.shutdown()
+        if self._library_backend is not None:
+            self._library_backend.shutdown()
+
+    def _report(self, download_id: str, status: str, progress: float, message: str, details: dict = None):
+        """Transmet un état au progress_callback s'il est défini."""
+        if self.event_log is not None:
+            self._record_event(download_id, status, progress, message, details)
+        if self.progress_callback:
+            if details is None:
+                self.progress_callback(download_id, status, progress, message)
+            else:
+                self.progress_callback(download_id, status, progress, message, details=details)
+
+    def _record_event(self, download_id: str, status: str, progress: float, message: str, details: Optional[dict]):
+        """Enregistre un changement d'état ou un échantillon de progression dans le journal des événements."""
+        stage = details.get('stage') if details else None
+        if stage == 'download':
+            self._event_bytes[download_id] = {'downloaded_bytes': details.get('downloaded_bytes'),
+                                              'total_bytes': details.get('total_bytes')}
+        if self._event_status.get(download_id) != status:
+            fields = {'status': status, 'message': message}
+            if status in ("completed", "failed", "cancelled"):
+                self._event_status.pop(download_id, None)
+                fields.update(self._event_bytes.pop(download_id, {}))
+            else:
+                self._event_status[download_id] = status
+            self.event_log.emit('status', download_id, **fields)
+        elif stage == 'plan':
+            self.event_log.emit('plan', download_id, mode=details.get('mode'), description=details.get('description'))
+        elif stage == 'download':
+            self.event_log.emit_progress(download_id, status=status, stage=stage, progress=round(progress, 1),
+                                         downloaded_bytes=details.get('downloaded_bytes'),
+                                         total_bytes=details.get('total_bytes'),
+                                         speed=details.get('speed'), eta=details.get('eta'))
+        else:
+            self.event_log.emit_progress(download_id, status=status, stage=stage, progress=round(progress, 1))
+
+    def set_offline_mode(self, enabled: bool):
+        """Active ou non le mode hors ligne (métadonnées servies par le cache uniquement)."""
+        self.offline_mode = bool(enabled)
+
+    def set_metadata_cache(self, enabled: bool, ttl_hours: int, max_entries: int):
+        """Applique les réglages du cache des métadonnées."""
+        self.metadata_cache.configure(bool(enabled), ttl_hours, max_entries)
+
+    def set_format_planning(self, enabled: bool):
+        """Active ou non l'inspection des formats (copie/remultiplexage plutôt que réencodage)."""
+        self.format_planning = bool(enabled)
+
+    def _report_plan(self, download_id: str, url: str, plan: Dict):
+        """Signale le chemin retenu par la planification des formats (copie, remultiplexage ou réencodage)."""
+        description = describe_plan(plan)
+        self.log(f"Plan de format pour {url}: {description}", download_id)
+        self._report(download_id, "active", 0, description,
+                     details={'stage': 'plan', 'mode': plan['mode'], 'description': description})
+
+    def _check_download_path(self, download_id: str) -> bool:
+        """Vérifie que le dossier de téléchargement est utilisable."""
+        if not self.download_path or not os.path.isdir(self.download_path):
+            self.log(f"Erreur: Le dossier de téléchargement '{self.download_path}' n'est pas valide.", download_id)
+            self._report(download_id, "failed", 0, "Dossier de téléchargement invalide")
+            return False
+        return True
+
+    def _note_error_line(self, line: str, download_id: Optional[str] = None):
+        """Compte les erreurs de yt-dlp qui indiquent une limitation de débit (HTTP 429, 403...)."""
+        if download_id is not None and "ERROR" in line:
+            self._last_errors[download_id] = line.strip()
+        if any(marker in line for marker in THROTTLE_MARKERS):
+            self.throttle_events += 1
+            if self.event_log is not None:
+                self.event_log.emit('throttle', download_id, line=line.strip(), backend=self.backend.name,
+                                    bandwidth_limit=self.bandwidth.current_limit())
+
+    def _defer_conversion(self, download_id: str, plan: Dict) -> bool:
+        """
+        Indique si la conversion de ce téléchargement doit être confiée au pool de post-traitement
+        (yt-dlp se limite alors au téléchargement et signale les fichiers produits).
+        """
+        if not self.two_stage_pipeline or not self.ffmpeg_path or not needs_postprocess(plan):
+            return False
+        self._deferred_plans[download_id] = plan
+        return True
+
+    def _handle_event(self, download_id: str, parser: ProgressParser, event: dict):
+        """Transmet un événement de progression décodé (ligne JSON, ancienne sortie ou hook yt_dlp)."""
+        if event['stage'] == 'file':
+            if download_id in self._deferred_plans and event.get('filepath'):
+                self._output_files.setdefault(download_id, []).append(event)
+            return
+        if event['stage'] == 'download':
+            if event.get('percent') is None:
+                return # Taille totale inconnue: rien de fiable à afficher
+            progress_percent = parser.overall_percent(event['percent'])
+        elif event['stage'] == 'postprocess':
+            progress_percent = parser.overall_percent(100.0)
+        else: # Début d'un élément de playlist
+            progress_percent = parser.overall_percent(0.0)
+
+        # La fin du téléchargement n'est signalée que par le code de retour (post-traitement inclus)
+        self._report(download_id, "active", min(progress_percent, 100.0), parser.describe(event), details=event)
+
+    def _finish_download(self, url: str, download_id: str, returncode: int) -> bool:
+        """Publie le résultat final d'un téléchargement d'après le code de retour de yt-dlp."""
+        self.bandwidth.release(download_id) # Fin de l'étape réseau: la part revient aux autres téléchargements
+        plan = self._deferred_plans.pop(download_id, None)
+        output_files = self._output_files.pop(download_id, [])
+        if download_id in self._cancelled_ids:
+            # L'annulation a déjà été signalée par cancel_download
+            self._cancelled_ids.discard(download_id)
+            self.log(f"Téléchargement annulé pour {url}.", download_id)
+            return False
+
+        if returncode == 0 and plan is not None:
+            return self._start_postprocess(url, download_id, plan, output_files)
+        if returncode == 0:
+            self.log(f"Téléchargement terminé pour {url}.", download_id)
+            self._report(download_id, "completed", 100, "Terminé")
+            return True
+        else:
+            self.log(f"Échec du téléchargement pour {url}. Code de retour: {returncode}", download_id)
+            self._report(download_id, "failed", 0, f"Échec (Code: {returncode})")
+            return False
+
+    def _start_postprocess(self, url: str, download_id: str, plan: Dict, output_files: List[Dict]) -> bool:
+        """Seconde étape: confie les fichiers téléchargés au pool de conversion et libère la place réseau."""
+        if not output_files:
+            self.log(f"Erreur: aucun fichier téléchargé n'a été signalé pour {url}, conversion impossible.", download_id)
+            self._report(download_id, "failed", 0, "Fichier téléchargé introuvable")
+            return False
+        self.log(f"Téléchargement terminé pour {url}, conversion en attente.", download_id)
+        self._report(download_id, "postprocessing", 0, "En attente de conversion...")
+        self.postprocess_pool.submit(
+            download_id,
+            [event['filepath'] for event in output_files],
+            plan,
+            self.ffmpeg_path,
+            lambda job_id, percent: self._report(job_id, "postprocessing", percent, f"Conversion {percent:.0f}%"),
+            lambda job_id, error: self._finish_postprocess(url, job_id, error),
+            durations=[event.get('duration') for event in output_files]
+        )
+        return True
+
+    def _finish_postprocess(self, url: str, download_id: str, error: Optional[str]):
+        """Publie le résultat final d'une conversion du pool de post-traitement."""
+        if download_id in self._cancelled_ids:
+            self._cancelled_ids.discard(download_id)
+            self.log(f"Conversion annulée pour {url}.", download_id)
+            return
+        if error is None:
+            self.log(f"Téléchargement et conversion terminés pour {url}.", download_id)
+            self._report(download_id, "completed", 100, "Terminé")
+        else:
+            self.log(f"Échec de la conversion pour {url}: {error}", download_id)
+            self._report(download_id, "failed", 0, error)
+
+    def _report_exception(self, url: str, download_id: str, error: Exception):
+        """Signale une exception survenue pendant un téléchargement."""
+        self.bandwidth.release(download_id)
+        self._deferred_plans.pop(download_id, None)
+        self._output_files.pop(download_id, None)
+        self._cancelled_ids.discard(download_id)
+        if isinstance(error, FileNotFoundError):
+            self.log(f"Erreur: Le programme '{self.yt_dlp_path}' ou 'ffmpeg' n'a pas été trouvé. Vérifiez votre installation et votre PATH.", download_id)
+            self._report(download_id, "failed", 0, "yt-dlp/ffmpeg non trouvé")
+        else:
+            self.log(f"Une erreur inattendue est survenue lors du téléchargement de {url}: {error}", download_id)
+            self._report(download_id, "failed", 0, f"Erreur inattendue: {error}")
+
+    def pop_last_error(self, download_id: str) -> Optional[str]:
+        """Dernière erreur signalée par yt-dlp pour ce téléchargement (oubliée ensuite)."""
+        return self._last_errors.pop(download_id, None)
+
+    def is_cancel_pending(self, download_id: str) -> bool:
+        """Indique si un téléchargement annulé n'est pas encore complètement arrêté."""
+        return download_id in self._cancelled_ids
+
+    def start_download(self, url: str, selected_format: str, download_id: str):
+        """Démarre un téléchargement sans bloquer l'appelant, avec le moteur courant."""
+        if self.event_log is not None:
+            self.event_log.emit('start', download_id, url=url, format=selected_format, backend=self.backend.name)
+        self.backend.start(url, selected_format, download_id)
 
     def _download_single_item(self, url: str, selected_format: str, download_id: str) -> bool:
         """
-        Télécharge un seul élément (vidéo ou playlist).
+        Télécharge un seul élément (vidéo ou playlist) et bloque jusqu'à la fin.
         La progression est envoyée via progress_callback.
         """
-        try:
-            if not self.yt_dlp_path:
-                self.log("yt-dlp n'est pas configuré. Impossible de télécharger.")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "failed", 0, "yt-dlp non configuré")
-                return False
-
-            if not self.download_path or not os.path.isdir(self.download_path):
-                self.log(f"Erreur: Le dossier de téléchargement '{self.download_path}' n'est pas valide.")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "failed", 0, "Dossier de téléchargement invalide")
-                return False
-
-            yt_dlp_args = [
-                self.yt_dlp_path,
-                "-P", self.download_path,
-                "--ffmpeg-location", self.ffmpeg_path if self.ffmpeg_path else "ffmpeg",
-                "--progress",
-                "--newline",
-                url
-            ]
-
-            if selected_format == "mp3":
-                yt_dlp_args.extend(["-x", "--audio-format", "mp3"])
-            elif selected_format == "mp4":
-                yt_dlp_args.extend(["-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"])
-            elif selected_format == "wav":
-                yt_dlp_args.extend(["-x", "--audio-format", "wav"])
-            elif selected_format == "flac":
-                yt_dlp_args.extend(["-x", "--audio-format", "flac"])
-            elif selected_format == "webm":
-                yt_dlp_args.extend(["-f", "bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]/best"])
-            elif selected_format == "mkv":
-                yt_dlp_args.extend(["-f", "bestvideo[ext=mkv]+bestaudio[ext=mka]/best[ext=mkv]/best"])
-            elif selected_format == "m4a":
-                yt_dlp_args.extend(["-x", "--audio-format", "m4a"])
-            elif selected_format == "opus":
-                yt_dlp_args.extend(["-x", "--audio-format", "opus"])
-            elif selected_format == "mov":
-                yt_dlp_args.extend(["-f", "bestvideo[ext=mov]+bestaudio[ext=mov]/best[ext=mov]/best"])
-            elif selected_format == "avi":
-                yt_dlp_args.extend(["-f", "bestvideo[ext=avi]+bestaudio[ext=avi]/best[ext=avi]/best"])
-
-            creationflags = 0
-            if sys.platform == "win32":
-                creationflags = subprocess.CREATE_NO_WINDOW
-
-            self.log(f"Lancement du téléchargement pour: {url}...")
-            if self.progress_callback:
-                self.progress_callback(download_id, "active", 0, "Démarrage...")
-
-            process = subprocess.Popen(
-                yt_dlp_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=creationflags,
-                bufsize=1 # Ligne par ligne
-            )
-            self.active_processes[download_id] = process
-
-            # Queues pour les sorties stdout et stderr
-            stdout_queue = queue.Queue()
-            stderr_queue = queue.Queue()
-
-            # Threads pour lire les sorties
-            stdout_thread = threading.Thread(target=self._read_stream, args=(process.stdout, stdout_queue))
-            stderr_thread = threading.Thread(target=self._read_stream, args=(process.stderr, stderr_queue))
-            stdout_thread.daemon = True # Permet au programme de se fermer même si les threads sont actifs
-            stderr_thread.daemon = True
-            stdout_thread.start()
-            stderr_thread.start()
-
-            total_playlist_items = 1 # Par default, pour une seule vidéo
-            current_playlist_item_index = 0
-
-            while process.poll() is None or not stdout_queue.empty() or not stderr_queue.empty():
-                try:
-                    output = stdout_queue.get(timeout=0.1) # Lire avec un timeout pour ne pas bloquer indéfiniment
-                    output_stripped = output.strip()
-                    self.log(f"[RAW YT-DLP] {output_stripped}")
-
-                    progress_percent = -1.0
-                    current_status_message = output_stripped
-
-                    playlist_item_match = re.search(r'Downloading item (\d+) of (\d+)', output_stripped)
-                    if playlist_item_match:
-                        current_playlist_item_index = int(playlist_item_match.group(1))
-                        total_playlist_items = int(playlist_item_match.group(2))
-                        current_status_message = f"Téléchargement de l'élément {current_playlist_item_index}/{total_playlist_items}"
-                        base_progress = ((current_playlist_item_index - 1) / total_playlist_items) * 100
-                        progress_percent = base_progress
-
-                    percent_match = re.search(r'(\d+\.?\d*)%', output_stripped)
-                    if percent_match:
-                        try:
-                            item_progress = float(percent_match.group(1))
-                            if total_playlist_items > 1:
-                                progress_percent = ((current_playlist_item_index - 1) / total_playlist_items) * 100 + (item_progress / total_playlist_items)
-                            else:
-                                progress_percent = item_progress
-                            current_status_message = output_stripped
-                        except ValueError:
-                            pass
-
-                    elif "[ExtractAudio]" in output_stripped:
-                        current_status_message = "Extraction audio..."
-                        if total_playlist_items > 1:
-                            progress_percent = ((current_playlist_item_index - 1) / total_playlist_items) * 100 + (90.0 / total_playlist_items)
-                        else:
-                            progress_percent = 90.0
-                    elif "[ffmpeg]" in output_stripped:
-                        current_status_message = "Conversion/Multiplexage..."
-                        if total_playlist_items > 1:
-                            progress_percent = ((current_playlist_item_index - 1) / total_playlist_items) * 100 + (95.0 / total_playlist_items)
-                        else:
-                            progress_percent = 95.0
-                    
-                    if self.progress_callback:
-                        status_to_report = "active"
-                        if progress_percent >= 100.0:
-                            status_to_report = "completed"
-                        elif progress_percent == -1.0:
-                            status_to_report = "En cours..."
-                            progress_percent = 0
-
-                        self.progress_callback(download_id, status_to_report, max(0.0, progress_percent), current_status_message)
-
-                except queue.Empty:
-                    pass # Pas de nouvelle ligne de stdout pour l'instant
-
-                try:
-                    error_line = stderr_queue.get(timeout=0.1)
-                    if error_line.strip():
-                        self.log(f"yt-dlp Erreur: {error_line.strip()}")
-                except queue.Empty:
-                    pass # Pas de nouvelle ligne de stderr pour l'instant
-
-            # Assurez-vous de vider les queues après la fin du processus
-            for output in list(stdout_queue.queue):
-                if output.strip(): self.log(f"[RAW YT-DLP] {output.strip()}")
-            for error_line in list(stderr_queue.queue):
-                if error_line.strip(): self.log(f"yt-dlp Erreur: {error_line.strip()}")
-
-            process.wait() # Attendre la fin du processus
-            
-            if download_id in self.active_processes:
-                del self.active_processes[download_id] 
-
-            if process.returncode == 0:
-                self.log(f"Téléchargement terminé pour {url}.")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "completed", 100, "Terminé")
-                return True
-            else:
-                self.log(f"Échec du téléchargement pour {url}. Code de retour: {process.returncode}")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "failed", 0, f"Échec (Code: {process.returncode})")
-                return False
+        return self.backend.download(url, selected_format, download_id)
 
+    def extract_info(self, url: str, flat_playlist: bool = False, on_entry: Optional[Callable[[Dict], None]] = None,
+                     extraction_id: Optional[str] = None) -> List[Dict]:
+        """
+        Extrait les métadonnées brutes de yt-dlp pour une URL, sans télécharger.
+        Retourne une entrée par vidéo (entrées aplaties pour une playlist si flat_playlist).
+        `on_entry` reçoit chaque entrée dès qu'elle est décodée; `extraction_id` permet d'annuler (cancel_extraction).
+        Les métadonnées en cache sont servies sans lancer yt-dlp; en mode hors ligne, seulement elles.
+        """
+        cached = self.metadata_cache.get_entries(url, flat_playlist, offline=self.offline_mode)
+        if cached is not None:
+            self.log(f"Métadonnées en cache pour {url} ({len(cached)} élément(s)).")
+            if on_entry is not None:
+                for entry in cached:
+                    on_entry(entry)
+            return cached
+        if self.offline_mode:
+            self.log(f"Mode hors ligne: aucune métadonnée en cache pour {url}.")
+            return []
+        if not self.backend.is_available():
+            self.log("Erreur: yt-dlp n'est pas trouvé. Impossible d'extraire les informations.")
+            return []
+        try:
+            entries = self.backend.extract_info(url, flat_playlist, on_entry, extraction_id)
+            self.metadata_cache.put_entries(url, flat_playlist, entries) # Extraction complète uniquement
+            return entries
         except FileNotFoundError:
-            self.log(f"Erreur: Le programme '{self.yt_dlp_path}' ou 'ffmpeg' n'a pas été trouvé. Vérifiez votre installation et votre PATH.")
-            if self.progress_callback:
-                self.progress_callback(download_id, "failed", 0, "yt-dlp/ffmpeg non trouvé")
-            return False
+            self.log("Erreur: yt-dlp n'est pas trouvé. Impossible d'extraire les informations.")
+            return []
         except Exception as e:
-            self.log(f"Une erreur inattendue est survenue lors du téléchargement de {url}: {e}")
-            if self.progress_callback:
-                self.progress_callback(download_id, "failed", 0, f"Erreur inattendue: {e}")
-            return False
+            self.log(f"Erreur inattendue lors de l'extraction des informations: {e}")
+            return []
+
+    def cancel_extraction(self, extraction_id: str) -> bool:
+        """Interrompt une extraction en cours (processus yt-dlp arrêté). Retourne False si elle n'est pas trouvée."""
+        cancelled = self.subprocess_backend.cancel_extraction(extraction_id)
+        if self._library_backend is not None:
+            cancelled = self._library_backend.cancel_extraction(extraction_id) or cancelled
+        return cancelled
 
     # La méthode download_items_in_bulk n'est plus utilisée directement par main_gui.py
     # Elle est remplacée par la gestion de la queue dans main_gui.py
@@ -321,28 +435,15 @@ class Downloader:
         download_thread.start()
 
     def cancel_download(self, download_id: str):
-        """Tente d'annuler un téléchargement en cours."""
-        if download_id in self.active_processes:
-            process = self.active_processes[download_id]
-            try:
-                process.terminate() # Tente d'arrêter le processus en douceur
-                self.log(f"Tentative d'annulation du téléchargement {download_id}.")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "cancelled", 0, "Annulé")
-                # Optionnel: attendre un court instant et tuer si non terminé
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                process.kill() # Tuer le processus si terminate ne fonctionne pas
-                self.log(f"Processus de téléchargement {download_id} tué (forcé).")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "cancelled", 0, "Annulé (forcé)")
-            except Exception as e:
-                self.log(f"Erreur lors de l'annulation du téléchargement {download_id}: {e}")
-                if self.progress_callback:
-                    self.progress_callback(download_id, "failed", 0, "Erreur d'annulation")
-            finally:
-                if download_id in self.active_processes:
-                    del self.active_processes[download_id]
-        else:
+        """Tente d'annuler un téléchargement en cours (étape réseau ou conversion)."""
+        if self.postprocess_pool.has_job(download_id):
+            self._cancelled_ids.add(download_id)
+            if self.postprocess_pool.cancel(download_id):
+                self.log(f"Tentative d'annulation de la conversion {download_id}.")
+                self._report(download_id, "cancelled", 0, "Annulé")
+                return
+            self._cancelled_ids.discard(download_id) # Conversion terminée entre-temps
+        # Le moteur a pu être changé pendant le téléchargement: interroger chacun d'eux
+        backends = [self.subprocess_backend] + ([self._library_backend] if self._library_backend else [])
+        if not any(backend.cancel(download_id) for backend in backends):
             self.log(f"Aucun téléchargement actif trouvé pour l'ID: {download_id}")
-
@@ -0,0 +1,313 @@
+# downloads_view.py
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Hauteur d'une ligne (pixels, marges comprises) selon la vue
+CARD_ROW_HEIGHT = 132
+TABLE_ROW_HEIGHT = 26
+# Colonnes de la vue compacte: (clé, en-tête, largeur en caractères; None: prend la place restante)
+TABLE_COLUMNS = (
+    ('title', "Titre", None),
+    ('format', "Format", 7),
+    ('status', "Statut", 46),
+    ('progress', "Progression", 11),
+)
+# Délai avant l'affichage d'une infobulle, puis intervalle de rafraîchissement tant qu'elle est affichée (ms)
+TOOLTIP_DELAY_MS = 600
+TOOLTIP_REFRESH_MS = 1000
+
+
+class VirtualRowList:
+    """
+    Liste défilante virtualisée: seules les lignes visibles ont des widgets, pris dans un pool recyclé.
+    Les lignes ont une hauteur fixe; la liste ne stocke que des clés, et `bind_row(ligne, clé)`
+    recopie les données de la clé dans les widgets d'une ligne au moment où elle devient visible
+    (ou quand `refresh(clé)` est appelé pour une ligne affichée). Ajouter, retirer ou faire défiler
+    ne coûte que le nombre de lignes visibles, quelle que soit la taille de la liste.
+    """
+
+    def __init__(self, parent, bind_row: Callable[[Dict, str], None], background: str = '#2b2b2b'):
+        self.bind_row = bind_row
+        self.frame = ttk.Frame(parent, style='Custom.TFrame')
+        self.viewport = tk.Frame(self.frame, bg=background, highlightthickness=0)
+        self.viewport.pack(side='left', fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar,
+                                       style='Vertical.TScrollbar')
+        self.scrollbar.pack(side='right', fill='y')
+        self.row_height = CARD_ROW_HEIGHT
+        self.row_padding = (5, 5) # Marges horizontale et verticale autour de chaque ligne
+        self._create_row: Optional[Callable] = None
+        self._keys: List[str] = []
+        self._top = 0 # Décalage de défilement en pixels
+        self._pool: List[Dict] = []
+        self._bound: Dict[str, Dict] = {} # clé -> ligne qui l'affiche
+        self._render_pending = False
+        self.viewport.bind('<Configure>', lambda e: self._schedule_render())
+        self._bind_wheel(self.viewport)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def set_renderer(self, row_height: int, create_row: Callable[[tk.Widget], Dict], row_padding=(5, 5)):
+        """Change le type de ligne (cartes ou tableau): le pool est reconstruit, la position relative conservée."""
+        first = self._top // self.row_height if self.row_height else 0
+        for row in self._pool:
+            row['frame'].destroy()
+        self._pool = []
+        self._bound = {}
+        self.row_height = row_height
+        self.row_padding = row_padding
+        self._create_row = create_row
+        self._top = first * row_height
+        self._schedule_render()
+
+    def append(self, key: str):
+        self._keys.append(key)
+        self._schedule_render()
+
+    def remove(self, keys: Iterable[str]):
+        """Retire des lignes; l'affichage reste sur les mêmes lignes si des lignes au-dessus disparaissent."""
+        keys = set(keys)
+        if not keys:
+            return
+        first = self._top // self.row_height
+        removed_above = sum(1 for key in self._keys[:first] if key in keys)
+        self._keys = [key for key in self._keys if key not in keys]
+        self._top = max(0, self._top - removed_above * self.row_height)
+        self._schedule_render()
+
+    def refresh(self, key: str):
+        """Redessine la ligne d'une clé si elle est visible (sinon rien: elle le sera quand elle apparaîtra)."""
+        row = self._bound.get(key)
+        if row is not None:
+            self.bind_row(row, key)
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.viewport.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        if self._create_row is None:
+            return
+        height = self.viewport.winfo_height()
+        total = len(self._keys) * self.row_height
+        self._top = max(0, min(self._top, total - height))
+        first = self._top // self.row_height
+        last = min(len(self._keys), (self._top + height) // self.row_height + 1)
+        needed = max(0, last - first)
+        while len(self._pool) < needed:
+            row = self._create_row(self.viewport)
+            row['key'] = None
+            self._bind_wheel(row['frame'])
+            self._pool.append(row)
+
+        # Chaque position garde la même ligne du pool tant qu'elle reste visible (position modulo taille du pool):
+        # défiler d'une ligne ne redessine qu'une ligne
+        pad_x, pad_y = self.row_padding
+        bound = {}
+        used = set()
+        for position in range(first, last):
+            slot = position % len(self._pool)
+            row = self._pool[slot]
+            key = self._keys[position]
+            if row['key'] != key:
+                row['key'] = key
+                self.bind_row(row, key)
+            row['frame'].place(x=pad_x, y=position * self.row_height - self._top + pad_y,
+                               relwidth=1.0, width=-2 * pad_x, height=self.row_height - 2 * pad_y)
+            bound[key] = row
+            used.add(slot)
+        for slot, row in enumerate(self._pool):
+            if slot not in used and row['key'] is not None:
+                row['key'] = None
+                row['frame'].place_forget()
+        self._bound = bound
+
+        if total > 0:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_to(self, top: int):
+        self._top = max(0, int(top))
+        self._schedule_render()
+
+    def _on_scrollbar(self, action: str, value, unit: str = None):
+        if action == "moveto":
+            self._scroll_to(float(value) * len(self._keys) * self.row_height)
+        elif action == "scroll":
+            step = self.viewport.winfo_height() if unit == "pages" else self.row_height
+            self._scroll_to(self._top + int(value) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, 'num', None) == 4:
+            direction = -1
+        elif getattr(event, 'num', None) == 5:
+            direction = 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self._scroll_to(self._top + direction * max(self.row_height, 3 * TABLE_ROW_HEIGHT))
+        return "break"
+
+    def _bind_wheel(self, widget: tk.Widget):
+        """La molette fait défiler la liste depuis n'importe quel widget d'une ligne."""
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self._on_wheel)
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+
+class RowTooltip:
+    """
+    Infobulle des lignes recyclées de la liste: le texte est demandé à `text_for(clé)` pour la clé que la ligne
+    affiche au moment du survol (None: pas d'infobulle), puis rafraîchi tant que la souris reste sur la ligne.
+    """
+
+    def __init__(self, root: tk.Misc, text_for: Callable[[Optional[str]], Optional[str]]):
+        self.root = root
+        self.text_for = text_for
+        self._row: Optional[Dict] = None # Ligne survolée
+        self._window: Optional[tk.Toplevel] = None
+        self._label: Optional[tk.Label] = None
+        self._after_id = None
+
+    def attach(self, row: Dict) -> Dict:
+        """Active l'infobulle sur une ligne (cadre et widgets enfants). Retourne la ligne."""
+        widgets = [row['frame']]
+        while widgets:
+            widget = widgets.pop()
+            widget.bind("<Enter>", lambda event: self._on_enter(row), add='+')
+            widget.bind("<Leave>", lambda event: self._on_leave(row, event), add='+')
+            widgets.extend(widget.winfo_children())
+        return row
+
+    def _on_enter(self, row: Dict):
+        if self._row is row:
+            return # Passage d'un widget à l'autre de la même ligne
+        self.hide()
+        self._row = row
+        self._after_id = self.root.after(TOOLTIP_DELAY_MS, self._show)
+
+    def _on_leave(self, row: Dict, event):
+        frame_name = str(row['frame'])
+        widget = self.root.winfo_containing(event.x_root, event.y_root)
+        if widget is not None and (str(widget) == frame_name or str(widget).startswith(frame_name + ".")):
+            return # Toujours sur la ligne (entrée dans un widget enfant)
+        if self._row is row:
+            self.hide()
+
+    def _show(self):
+        self._after_id = None
+        if self._row is None:
+            return
+        text = self.text_for(self._row['key'])
+        if not text:
+            self._destroy_window()
+        elif self._window is None:
+            self._window = tk.Toplevel(self.root)
+            self._window.wm_overrideredirect(True)
+            self._label = tk.Label(self._window, text=text, justify='left', bg='#3c3c3c', fg='white',
+                                   relief='solid', borderwidth=1, padx=6, pady=4)
+            self._label.pack()
+            self._window.wm_geometry(f"+{self.root.winfo_pointerx() + 16}+{self.root.winfo_pointery() + 16}")
+        else:
+            self._label.config(text=text)
+        self._after_id = self.root.after(TOOLTIP_REFRESH_MS, self._show) # Durée de l'étape en cours
+
+    def _destroy_window(self):
+        if self._window is not None:
+            self._window.destroy()
+            self._window = None
+            self._label = None
+
+    def hide(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._row = None
+        self._destroy_window()
+
+
+def create_card_row(parent, actions: Dict[str, Callable[[str], None]]) -> Dict:
+    """
+    Construit une carte réutilisable (titre, statut, barre de progression, boutons).
+    Les boutons appellent actions['cancel'|'retry'|'front'|'back'|'logs'] avec la clé affichée au moment du clic.
+    """
+    row: Dict = {'kind': 'card', 'key': None}
+    card_frame = ttk.Frame(parent, style='DownloadCard.TFrame')
+
+    title_label = ttk.Label(card_frame, text="", style='DownloadTitle.TLabel')
+    title_label.pack(fill='x', anchor='w', pady=(0, 5))
+
+    status_label = ttk.Label(card_frame, text="", style='DownloadStatus.TLabel')
+    status_label.pack(fill='x', anchor='w', pady=(0, 5))
+
+    progressbar = ttk.Progressbar(card_frame, orient="horizontal", length=200, mode="determinate", style="TProgressbar")
+    progressbar.pack(fill='x', pady=(0, 5))
+
+    cancel_button = ttk.Button(card_frame, text="Annuler", style='Danger.TButton',
+                               command=lambda: actions['cancel'](row['key']))
+    cancel_button.pack(side='right', pady=(0, 0))
+
+    retry_button = ttk.Button(card_frame, text="Réessayer", style='Custom.TButton', state='disabled',
+                              command=lambda: actions['retry'](row['key']))
+    retry_button.pack(side='right', padx=(0, 5))
+
+    # Réordonnancement des téléchargements en attente
+    back_button = ttk.Button(card_frame, text="En fin", style='Custom.TButton',
+                             command=lambda: actions['back'](row['key']))
+    back_button.pack(side='left', padx=(0, 5))
+    front_button = ttk.Button(card_frame, text="En tête", style='Custom.TButton',
+                              command=lambda: actions['front'](row['key']))
+    front_button.pack(side='left', padx=(0, 5))
+    logs_button = ttk.Button(card_frame, text="Logs", style='Custom.TButton',
+                             command=lambda: actions['logs'](row['key']))
+    logs_button.pack(side='left', padx=(0, 5))
+
+    row.update({
+        'frame': card_frame,
+        'card_frame': card_frame,
+        'title_label': title_label,
+        'status_label': status_label,
+        'progressbar': progressbar,
+        'cancel_button': cancel_button,
+        'retry_button': retry_button,
+        'front_button': front_button,
+        'back_button': back_button,
+        'logs_button': logs_button
+    })
+    return row
+
+
+def _grid_columns(frame: ttk.Frame, labels: Dict[str, ttk.Label]):
+    for column, (name, _, width) in enumerate(TABLE_COLUMNS):
+        labels[name].grid(row=0, column=column, sticky='ew' if width is None else 'w', padx=(4, 4))
+        frame.columnconfigure(column, weight=1 if width is None else 0)
+
+
+def create_table_header(parent) -> ttk.Frame:
+    """En-tête des colonnes de la vue compacte (mêmes largeurs que les lignes)."""
+    header = ttk.Frame(parent, style='Custom.TFrame')
+    labels = {name: ttk.Label(header, text=text, style='DownloadRowHeader.TLabel', width=width)
+              for name, text, width in TABLE_COLUMNS}
+    _grid_columns(header, labels)
+    return header
+
+
+def create_table_row(parent, actions: Dict[str, Callable]) -> Dict:
+    """
+    Construit une ligne réutilisable de la vue compacte (une ligne de texte par téléchargement).
+    Le clic droit appelle actions['menu'](clé, événement) pour proposer les actions de la ligne.
+    """
+    row: Dict = {'kind': 'table', 'key': None}
+    frame = ttk.Frame(parent, style='DownloadRow.TFrame')
+    labels = {name: ttk.Label(frame, text="", style='DownloadRow.TLabel', width=width)
+              for name, _, width in TABLE_COLUMNS}
+    _grid_columns(frame, labels)
+    for widget in [frame, *labels.values()]:
+        widget.bind("<Button-3>", lambda event: actions['menu'](row['key'], event))
+    row.update({'frame': frame, **{name + '_label': label for name, label in labels.items()}})
+    return row
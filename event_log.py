@@ -0,0 +1,242 @@
+# event_log.py
+import os
+import re
+import json
+import mmap
+import time
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+# Taille maximale d'un fichier du journal avant rotation (octets) et nombre d'anciens fichiers gardés
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+# Intervalle entre deux écritures groupées (secondes)
+DEFAULT_FLUSH_INTERVAL = 1.0
+# Intervalle minimal entre deux événements de progression enregistrés pour un même téléchargement (secondes)
+PROGRESS_SAMPLE_INTERVAL = 1.0
+
+# Les entrées commencent toujours par {"t": ..., "event": "...", "id": ...}: le lecteur indexe sans décoder le JSON
+_EVENT_RE = re.compile(rb'"event": "([^"]*)"')
+_ID_RE = re.compile(rb'"id": "([^"]*)"')
+
+
+class EventLog:
+    """
+    Journal structuré des événements (une ligne JSON par événement), avec rotation par taille.
+    emit() ne fait qu'empiler l'événement en mémoire: un thread d'écriture sérialise et écrit le tout
+    toutes les `flush_interval` secondes, hors du chemin des téléchargements et de l'interface.
+    Chaque événement porte l'heure ('t'), son type ('event'), le téléchargement concerné ('id') et,
+    pour les téléchargements, le temps écoulé depuis leur démarrage ('elapsed').
+    """
+
+    def __init__(self, path: str = "C:/YoutubeDownloader/events.jsonl", max_bytes: int = DEFAULT_MAX_BYTES,
+                 backup_count: int = DEFAULT_BACKUP_COUNT, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.enabled = True
+        self._pending: List[Dict] = []
+        self._started: Dict[str, float] = {} # id -> début du téléchargement (time.monotonic)
+        self._last_progress: Dict[str, float] = {} # id -> dernier événement de progression enregistré
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # flush() peut aussi être appelé hors du thread d'écriture
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._file = None
+        self._writer: Optional[threading.Thread] = None
+
+    def start(self):
+        """Ouvre le journal en ajout et démarre le thread d'écriture."""
+        if self._writer is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding='utf-8')
+        self._writer = threading.Thread(target=self._run_writer, name="EventLog", daemon=True)
+        self._writer.start()
+
+    def emit(self, event: str, download_id: Optional[str] = None, **fields):
+        """Enregistre un événement (appelable depuis n'importe quel thread, sans E/S)."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        entry = {'t': round(time.time(), 3), 'event': event, 'id': download_id}
+        with self._lock:
+            if self._closed:
+                return
+            if download_id is not None:
+                if event == 'start':
+                    self._started[download_id] = now
+                started = self._started.get(download_id)
+                if started is not None:
+                    entry['elapsed'] = round(now - started, 3)
+                if event == 'status' and fields.get('status') in ("completed", "failed", "cancelled"):
+                    self._started.pop(download_id, None)
+                    self._last_progress.pop(download_id, None)
+            entry.update(fields)
+            self._pending.append(entry)
+
+    def emit_progress(self, download_id: str, **fields):
+        """Enregistre un échantillon de progression (au plus un par PROGRESS_SAMPLE_INTERVAL et par téléchargement)."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_progress.get(download_id, 0.0) < PROGRESS_SAMPLE_INTERVAL:
+                return
+            self._last_progress[download_id] = now
+        self.emit('progress', download_id, **fields)
+
+    def _run_writer(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Écrit en un bloc tous les événements en attente (rotation si le fichier dépasse max_bytes)."""
+        with self._write_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+            if not entries or self._file is None:
+                return
+            try:
+                self._file.write("".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries))
+                self._file.flush()
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except Exception as e:
+                print(f"Erreur lors de l'écriture du journal des événements: {e}")
+
+    def _rotate(self):
+        """
+        events.jsonl -> events.jsonl.1 -> ... -> events.jsonl.N (le plus ancien est supprimé).
+        Si un renommage échoue (fichier ouvert par un lecteur sous Windows), l'écriture continue
+        dans le fichier courant et la rotation est retentée à l'écriture suivante.
+        """
+        self._file.close()
+        try:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            if self.backup_count > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        finally:
+            self._file = open(self.path, "a", encoding='utf-8')
+
+    def close(self):
+        """Écrit les derniers événements et ferme le journal."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            self._writer = None
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def event_log_files(path: str) -> List[str]:
+    """Fichiers du journal, du plus récent (fichier courant) au plus ancien."""
+    files = [path] if os.path.exists(path) else []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.append(f"{path}.{index}")
+        index += 1
+    return files
+
+
+class EventLogReader:
+    """
+    Lecture paginée d'un fichier du journal, même de plusieurs Go: le fichier est projeté en mémoire (mmap)
+    et seul un index est construit (position de chaque ligne, numéros de ligne par téléchargement et par
+    type d'événement). Une page ne décode que les lignes demandées.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.offsets = array('Q') # Position du début de chaque ligne
+        self.by_id: Dict[str, array] = {}
+        self.by_event: Dict[str, array] = {}
+        self.size = 0
+
+    def build_index(self, progress_callback=None):
+        """Parcourt le fichier une fois pour indexer les lignes. progress_callback(fraction) est appelé périodiquement."""
+        self.close()
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.offsets = array('Q')
+        self.by_id = {}
+        self.by_event = {}
+        if self.size == 0:
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mmap
+        position = 0
+        line_number = 0
+        next_report = 0
+        while position < self.size:
+            end = mm.find(b"\n", position)
+            if end == -1:
+                end = self.size
+            head = mm[position:min(end, position + 200)] # Les champs indexés sont en tête de ligne
+            self.offsets.append(position)
+            match = _EVENT_RE.search(head)
+            if match:
+                self.by_event.setdefault(match.group(1).decode('utf-8', 'replace'), array('I')).append(line_number)
+            match = _ID_RE.search(head)
+            if match:
+                self.by_id.setdefault(match.group(1).decode('utf-8', 'replace'), array('I')).append(line_number)
+            line_number += 1
+            position = end + 1
+            if progress_callback and position >= next_report:
+                progress_callback(min(1.0, position / self.size))
+                next_report = position + 16 * 1024 * 1024
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def line_numbers(self, download_id: Optional[str] = None, event: Optional[str] = None):
+        """Numéros de ligne correspondant aux filtres (None: toutes les lignes)."""
+        if download_id is not None and event is not None:
+            events = set(self.by_event.get(event, ()))
+            return array('I', (n for n in self.by_id.get(download_id, ()) if n in events))
+        if download_id is not None:
+            return self.by_id.get(download_id, array('I'))
+        if event is not None:
+            return self.by_event.get(event, array('I'))
+        return range(len(self.offsets))
+
+    def read_line(self, line_number: int) -> Optional[Dict]:
+        start = self.offsets[line_number]
+        end = self.offsets[line_number + 1] - 1 if line_number + 1 < len(self.offsets) else self.size
+        try:
+            return json.loads(self._mmap[start:end].decode('utf-8'))
+        except ValueError:
+            return None # Ligne tronquée par un arrêt brutal
+
+    def page(self, line_numbers, start: int, count: int) -> List[Dict]:
+        """Décode les lignes [start, start + count) d'une sélection de numéros de ligne."""
+        entries = []
+        for line_number in line_numbers[start:start + count]:
+            entry = self.read_line(line_number)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,169 @@
+# event_log_viewer.py
+import os
+import json
+import threading
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk
+from typing import Dict, Optional
+
+from event_log import EventLogReader, event_log_files
+
+# Lignes décodées et affichées par page
+PAGE_SIZE = 500
+ALL_EVENTS = "(tous)"
+# Champs affichés dans leurs propres colonnes (les autres sont regroupés dans "Détails")
+_COLUMN_FIELDS = ('t', 'event', 'id', 'elapsed', 'status')
+
+
+class EventLogViewer:
+    """
+    Fenêtre de consultation du journal des événements. Le fichier choisi est indexé en arrière-plan
+    (lecture projetée en mémoire), puis affiché par pages de PAGE_SIZE lignes, avec filtres par
+    téléchargement et par type d'événement (ex: 'throttle' pour les limitations de débit).
+    """
+
+    def __init__(self, root, path: str):
+        self.root = root
+        self.path = path
+        self.reader: Optional[EventLogReader] = None
+        self.selection = range(0)
+        self.start = 0
+        self._index_progress = 0.0
+        self._index_error: Optional[str] = None
+        self._indexing = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Journal des Événements")
+        self.window.geometry("1000x600")
+        self.window.configure(bg='#2b2b2b')
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        filter_bar = ttk.Frame(self.window, style='Custom.TFrame', padding=(10, 10))
+        filter_bar.pack(fill='x')
+        ttk.Label(filter_bar, text="Fichier:", style='Custom.TLabel').pack(side='left', padx=(0, 5))
+        self.file_var = tk.StringVar()
+        self.file_combobox = ttk.Combobox(filter_bar, textvariable=self.file_var, state="readonly", width=30,
+                                          style='TCombobox')
+        self.file_combobox.pack(side='left', padx=(0, 15))
+        self.file_combobox.bind("<<ComboboxSelected>>", lambda e: self.load_file(self.file_var.get()))
+
+        ttk.Label(filter_bar, text="Téléchargement (id):", style='Custom.TLabel').pack(side='left', padx=(0, 5))
+        self.id_var = tk.StringVar()
+        id_entry = ttk.Entry(filter_bar, textvariable=self.id_var, width=38, style='TEntry')
+        id_entry.pack(side='left', padx=(0, 15))
+        id_entry.bind('<Return>', lambda e: self.apply_filters())
+
+        ttk.Label(filter_bar, text="Événement:", style='Custom.TLabel').pack(side='left', padx=(0, 5))
+        self.event_var = tk.StringVar(value=ALL_EVENTS)
+        self.event_combobox = ttk.Combobox(filter_bar, textvariable=self.event_var, state="readonly", width=14,
+                                           style='TCombobox')
+        self.event_combobox.pack(side='left', padx=(0, 15))
+        self.event_combobox.bind("<<ComboboxSelected>>", lambda e: self.apply_filters())
+
+        ttk.Button(filter_bar, text="Filtrer", command=self.apply_filters, style='Accent.TButton').pack(side='left')
+
+        columns = ('time', 'event', 'id', 'elapsed', 'status', 'details')
+        self.tree = ttk.Treeview(self.window, columns=columns, show='headings')
+        for column, heading, width in (('time', "Heure", 150), ('event', "Événement", 90), ('id', "Téléchargement", 90),
+                                       ('elapsed', "Écoulé (s)", 80), ('status', "État", 100), ('details', "Détails", 480)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=column == 'details')
+        self.tree.pack(fill='both', expand=True, padx=10)
+        # Double-clic: ne garder que les événements de ce téléchargement
+        self.tree.bind("<Double-1>", self._filter_on_selected_id)
+
+        nav_bar = ttk.Frame(self.window, style='Custom.TFrame', padding=(10, 10))
+        nav_bar.pack(fill='x')
+        for text, command in (("Début", lambda: self.show_page(0)),
+                              ("Précédent", lambda: self.show_page(self.start - PAGE_SIZE)),
+                              ("Suivant", lambda: self.show_page(self.start + PAGE_SIZE)),
+                              ("Fin", lambda: self.show_page(len(self.selection) - PAGE_SIZE))):
+            ttk.Button(nav_bar, text=text, command=command, style='Custom.TButton').pack(side='left', padx=(0, 5))
+        self.status_label = ttk.Label(nav_bar, text="", style='Custom.TLabel')
+        self.status_label.pack(side='left', padx=(15, 0))
+
+        files = event_log_files(path)
+        self.file_combobox.config(values=files)
+        if files:
+            # Juste après une rotation, le fichier courant est vide: ouvrir le plus récent qui contient des événements
+            initial = next((name for name in files if os.path.getsize(name) > 0), files[0])
+            self.file_var.set(initial)
+            self.load_file(initial)
+        else:
+            self.status_label.config(text="Aucun événement enregistré pour l'instant.")
+
+    def load_file(self, path: str):
+        """Indexe un fichier du journal en arrière-plan, puis affiche sa dernière page."""
+        if self._indexing:
+            return
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = EventLogReader(path)
+        self._indexing = True
+        self._index_progress = 0.0
+        self._index_error = None
+        self.tree.delete(*self.tree.get_children())
+        threading.Thread(target=self._build_index, name="EventLogIndex", daemon=True).start()
+        self._poll_index()
+
+    def _build_index(self):
+        try:
+            self.reader.build_index(lambda fraction: setattr(self, '_index_progress', fraction))
+        except Exception as e:
+            self._index_error = str(e)
+        finally:
+            self._indexing = False
+
+    def _poll_index(self):
+        if not self.window.winfo_exists():
+            return
+        if self._indexing:
+            self.status_label.config(text=f"Indexation... {self._index_progress * 100:.0f}%")
+            self.window.after(100, self._poll_index)
+            return
+        if self._index_error:
+            self.status_label.config(text=f"Erreur lors de la lecture du journal: {self._index_error}")
+            return
+        self.event_combobox.config(values=[ALL_EVENTS] + sorted(self.reader.by_event))
+        self.apply_filters(last_page=True)
+
+    def apply_filters(self, last_page: bool = False):
+        if self.reader is None or self._indexing:
+            return
+        download_id = self.id_var.get().strip() or None
+        event = self.event_var.get()
+        self.selection = self.reader.line_numbers(download_id, None if event == ALL_EVENTS else event)
+        self.show_page(len(self.selection) - PAGE_SIZE if last_page else 0)
+
+    def show_page(self, start: int):
+        if self.reader is None or self._indexing:
+            return
+        self.start = max(0, min(start, len(self.selection) - PAGE_SIZE))
+        self.tree.delete(*self.tree.get_children())
+        for entry in self.reader.page(self.selection, self.start, PAGE_SIZE):
+            self.tree.insert('', 'end', values=self._row_values(entry))
+        end = min(len(self.selection), self.start + PAGE_SIZE)
+        self.status_label.config(text=f"Lignes {self.start + 1 if end else 0}-{end} sur {len(self.selection)} "
+                                      f"({len(self.reader)} dans le fichier)")
+
+    def _row_values(self, entry: Dict):
+        timestamp = entry.get('t')
+        time_text = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else ""
+        details = {key: value for key, value in entry.items() if key not in _COLUMN_FIELDS and value is not None}
+        return (time_text, entry.get('event', ''), entry.get('id') or "", entry.get('elapsed', ""),
+                entry.get('status', ""), json.dumps(details, ensure_ascii=False))
+
+    def _filter_on_selected_id(self, event):
+        selected = self.tree.focus()
+        if not selected:
+            return
+        download_id = self.tree.item(selected, 'values')[2]
+        if download_id:
+            self.id_var.set(download_id)
+            self.apply_filters()
+
+    def close(self):
+        if self.reader is not None and not self._indexing:
+            self.reader.close()
+        self.window.destroy()
@@ -0,0 +1,120 @@
+# executable_cache.py
+import os
+import sys
+import json
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from metrics import SUBPROCESS_SPAWNS
+
+# Nombre maximal de candidats testés simultanément lors d'une recherche à froid
+MAX_PROBE_WORKERS = 8
+PROBE_TIMEOUT = 15 # secondes
+
+
+def probe_executable(path: str, version_arg: str) -> Optional[str]:
+    """
+    Exécute `path version_arg` et retourne la première ligne de sa sortie (la version).
+    Retourne None si le programme ne peut pas être lancé.
+    """
+    creationflags = 0
+    if sys.platform == "win32":
+        creationflags = subprocess.CREATE_NO_WINDOW
+    SUBPROCESS_SPAWNS.record(path)
+    try:
+        result = subprocess.run([path, version_arg], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, timeout=PROBE_TIMEOUT, creationflags=creationflags)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    output = (result.stdout or result.stderr or "").strip()
+    # Un code de retour non nul signifie que le programme existe mais a refusé l'argument
+    return output.splitlines()[0] if output else "?"
+
+
+class ExecutableCache:
+    """
+    Cache persistant des exécutables externes (yt-dlp, ffmpeg): chemin, version, date de modification et taille.
+    Une entrée est revalidée par un simple os.stat(): le programme n'est relancé que s'il a changé.
+    À froid, les candidats existants sont testés en parallèle et le premier dans l'ordre de priorité est retenu.
+    """
+
+    def __init__(self, cache_path: str = "C:/YoutubeDownloader/executables.json"):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.load_cache()
+
+    def load_cache(self):
+        """Charger le cache depuis le fichier"""
+        try:
+            with open(self.cache_path, "r", encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def save_cache(self):
+        """Sauvegarder le cache dans le fichier"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "w", encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde du cache des exécutables: {e}")
+
+    def lookup(self, name: str, candidates: List[str]) -> Optional[Tuple[str, str]]:
+        """Retourne (chemin, version) depuis le cache si le fichier n'a pas changé depuis sa vérification."""
+        entry = self.entries.get(name)
+        if not entry or entry.get('path') not in candidates:
+            return None
+        try:
+            stat = os.stat(entry['path'])
+        except OSError:
+            return None
+        if stat.st_mtime != entry.get('mtime') or stat.st_size != entry.get('size'):
+            return None
+        return entry['path'], entry.get('version', '?')
+
+    def store(self, name: str, path: str, version: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            self.entries[name] = {'path': path, 'version': version, 'mtime': stat.st_mtime, 'size': stat.st_size}
+            self.save_cache()
+
+    def invalidate(self, name: str):
+        with self._lock:
+            if self.entries.pop(name, None) is not None:
+                self.save_cache()
+
+    def discover(self, name: str, candidates: List[str], version_arg: str,
+                 force: bool = False) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        Trouve le premier candidat utilisable (ordre de priorité de la liste).
+        Retourne (chemin, version, depuis_le_cache); (None, None, False) si aucun ne convient.
+        """
+        if not force:
+            cached = self.lookup(name, candidates)
+            if cached:
+                return cached[0], cached[1], True
+
+        # Un stat suffit à écarter les candidats absents, seuls les fichiers existants sont lancés
+        existing = []
+        for path in dict.fromkeys(candidates): # Sans doublons, ordre conservé
+            if os.path.isfile(path):
+                existing.append(path)
+        if not existing:
+            self.invalidate(name)
+            return None, None, False
+
+        with ThreadPoolExecutor(max_workers=min(MAX_PROBE_WORKERS, len(existing))) as executor:
+            versions = list(executor.map(lambda path: probe_executable(path, version_arg), existing))
+        for path, version in zip(existing, versions):
+            if version is not None:
+                self.store(name, path, version)
+                return path, version, False
+        self.invalidate(name)
+        return None, None, False
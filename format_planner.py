@@ -0,0 +1,199 @@
+# format_planner.py
+from typing import Dict, List, Optional
+
+# Profils de format par défaut (sans inspection): soit une extraction audio (codec cible), soit un sélecteur de flux yt-dlp
+FORMAT_PROFILES = {
+    "mp3": {"audio_format": "mp3"},
+    "mp4": {"format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"},
+    "wav": {"audio_format": "wav"},
+    "flac": {"audio_format": "flac"},
+    "webm": {"format": "bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]/best"},
+    "mkv": {"format": "bestvideo[ext=mkv]+bestaudio[ext=mka]/best[ext=mkv]/best"},
+    "m4a": {"audio_format": "m4a"},
+    "opus": {"audio_format": "opus"},
+    "mov": {"format": "bestvideo[ext=mov]+bestaudio[ext=mov]/best[ext=mov]/best"},
+    "avi": {"format": "bestvideo[ext=avi]+bestaudio[ext=avi]/best[ext=avi]/best"},
+}
+
+# Codecs source (préfixes des champs acodec de yt-dlp) qu'ExtractAudio copie sans réencodage pour chaque format audio.
+# Le WAV (PCM) demande toujours un décodage.
+AUDIO_COPY_CODECS = {
+    "mp3": ("mp3",),
+    "m4a": ("mp4a", "aac"),
+    "opus": ("opus",),
+    "flac": ("flac",),
+    "wav": (),
+}
+
+# Codecs (préfixes vcodec / acodec) que chaque conteneur accepte par simple copie des flux. None: tous les codecs.
+CONTAINER_CODECS = {
+    "mp4": {"video": ("avc1", "h264", "hev1", "hvc1", "av01", "vp09", "vp9"), "audio": ("mp4a", "aac", "mp3", "ac-3", "ec-3")},
+    "mov": {"video": ("avc1", "h264", "hev1", "hvc1"), "audio": ("mp4a", "aac", "mp3")},
+    "webm": {"video": ("vp8", "vp09", "vp9", "av01"), "audio": ("opus", "vorbis")},
+    "mkv": {"video": None, "audio": None},
+    "avi": {"video": ("avc1", "h264", "mp4v"), "audio": ("mp3",)},
+}
+
+# Chemins possibles, du moins coûteux au plus coûteux
+PLAN_LABELS = {
+    "copy": "copie des flux",
+    "remux": "remultiplexage sans réencodage",
+    "transcode": "réencodage",
+    "profile": "profil par défaut",
+}
+
+
+def _codec(fmt: Dict, key: str) -> Optional[str]:
+    codec = fmt.get(key)
+    return codec.lower() if isinstance(codec, str) else None
+
+
+def _matches(codec: Optional[str], accepted) -> bool:
+    if codec is None or codec == "none":
+        return False
+    if accepted is None:
+        return True
+    return codec.startswith(tuple(accepted))
+
+
+def _audio_score(fmt: Dict):
+    return (fmt.get('abr') or fmt.get('tbr') or 0, fmt.get('asr') or 0)
+
+
+def _video_score(fmt: Dict):
+    return (fmt.get('height') or 0, fmt.get('fps') or 0, fmt.get('tbr') or 0)
+
+
+def profile_plan(target: str, reason: str = "") -> Dict:
+    """Plan de repli: le profil statique du format, sans inspection des flux disponibles."""
+    profile = FORMAT_PROFILES.get(target, {})
+    plan = {'target': target, 'mode': 'profile', 'format': profile.get('format'),
+            'audio_format': profile.get('audio_format'), 'detail': reason or "formats non inspectés"}
+    return plan
+
+
+def plan_format(target: str, info: Dict) -> Dict:
+    """
+    Choisit les flux à télécharger d'après les formats disponibles (champ 'formats' des infos yt-dlp),
+    en privilégiant ceux qui peuvent être copiés ou remultiplexés dans le format demandé.
+    Le réencodage par ffmpeg n'est retenu que si aucun flux compatible n'existe.
+    """
+    formats = [f for f in (info.get('formats') or []) if f.get('format_id')]
+    if info.get('_type') == 'playlist' or not formats:
+        return profile_plan(target, "aucune liste de formats disponible")
+    if target in AUDIO_COPY_CODECS:
+        return _plan_audio(target, formats)
+    if target in CONTAINER_CODECS:
+        return _plan_video(target, formats)
+    return profile_plan(target, "format inconnu")
+
+
+def _plan_audio(target: str, formats: List[Dict]) -> Dict:
+    audio_only = [f for f in formats if _codec(f, 'vcodec') == 'none' and _matches(_codec(f, 'acodec'), None)]
+    candidates = audio_only or [f for f in formats if _matches(_codec(f, 'acodec'), None)]
+    if not candidates:
+        return profile_plan(target, "aucun flux audio identifié")
+
+    compatible = [f for f in candidates if _matches(_codec(f, 'acodec'), AUDIO_COPY_CODECS[target])]
+    if compatible:
+        best = max(compatible, key=_audio_score)
+        return {'target': target, 'mode': 'copy', 'format': best['format_id'], 'audio_format': target,
+                'detail': f"audio {_codec(best, 'acodec')} ({best['format_id']}) -> {target}"}
+
+    best = max(candidates, key=_audio_score)
+    return {'target': target, 'mode': 'transcode', 'format': best['format_id'], 'audio_format': target,
+            'detail': f"audio {_codec(best, 'acodec')} ({best['format_id']}) -> {target}"}
+
+
+def _plan_video(target: str, formats: List[Dict]) -> Dict:
+    accepted = CONTAINER_CODECS[target]
+    video_only = [f for f in formats if _matches(_codec(f, 'vcodec'), None) and _codec(f, 'acodec') == 'none']
+    audio_only = [f for f in formats if _codec(f, 'vcodec') == 'none' and _matches(_codec(f, 'acodec'), None)]
+    combined = [f for f in formats if _matches(_codec(f, 'vcodec'), None) and _matches(_codec(f, 'acodec'), None)]
+
+    # Meilleure paire vidéo + audio séparées, et meilleur flux combiné, dont les codecs conviennent au conteneur
+    compatible_video = [f for f in video_only if _matches(_codec(f, 'vcodec'), accepted['video'])]
+    compatible_audio = [f for f in audio_only if _matches(_codec(f, 'acodec'), accepted['audio'])]
+    compatible_combined = [f for f in combined
+                           if _matches(_codec(f, 'vcodec'), accepted['video']) and _matches(_codec(f, 'acodec'), accepted['audio'])]
+
+    split = None
+    if compatible_video and compatible_audio:
+        split = (max(compatible_video, key=_video_score), max(compatible_audio, key=_audio_score))
+    single = max(compatible_combined, key=_video_score) if compatible_combined else None
+
+    if single is not None and (split is None or _video_score(single)[0] >= _video_score(split[0])[0]):
+        mode = 'copy' if single.get('ext') == target else 'remux'
+        return {'target': target, 'mode': mode, 'format': single['format_id'], 'merge_output_format': None,
+                'detail': f"{_codec(single, 'vcodec')}+{_codec(single, 'acodec')} {single.get('height') or '?'}p "
+                          f"({single['format_id']}) -> {target}"}
+    if split is not None:
+        video, audio = split
+        return {'target': target, 'mode': 'remux', 'format': f"{video['format_id']}+{audio['format_id']}",
+                'merge_output_format': target,
+                'detail': f"vidéo {_codec(video, 'vcodec')} {video.get('height') or '?'}p ({video['format_id']}) + "
+                          f"audio {_codec(audio, 'acodec')} ({audio['format_id']}) -> {target}"}
+
+    # Aucun flux compatible: on prend le meilleur disponible et ffmpeg le convertit
+    if video_only and audio_only:
+        video, audio = max(video_only, key=_video_score), max(audio_only, key=_audio_score)
+        selector = f"{video['format_id']}+{audio['format_id']}"
+        detail = f"vidéo {_codec(video, 'vcodec')} + audio {_codec(audio, 'acodec')} incompatibles avec {target}"
+    elif combined:
+        best = max(combined, key=_video_score)
+        selector = best['format_id']
+        detail = f"{_codec(best, 'vcodec')}+{_codec(best, 'acodec')} incompatible avec {target}"
+    else:
+        return profile_plan(target, "aucun flux vidéo identifié")
+    return {'target': target, 'mode': 'transcode', 'format': selector, 'recode_video': target, 'detail': detail}
+
+
+def plan_yt_dlp_args(plan: Dict, convert: bool = True) -> List[str]:
+    """
+    Options de ligne de commande yt-dlp correspondant à un plan.
+    Avec convert=False, l'extraction audio et le réencodage sont laissés au pool de post-traitement:
+    yt-dlp ne fait que télécharger (et multiplexer) les flux choisis.
+    """
+    args = []
+    if plan.get('format'):
+        args.extend(["-f", plan['format']])
+    elif plan.get('audio_format') and not convert:
+        args.extend(["-f", "bestaudio/best"]) # Sélection implicite de -x
+    if plan.get('audio_format'):
+        if convert:
+            args.extend(["-x", "--audio-format", plan['audio_format']])
+    elif plan['mode'] == 'transcode' and plan.get('recode_video'):
+        if convert:
+            args.extend(["--recode-video", plan['recode_video']])
+    elif plan['mode'] == 'remux':
+        if plan.get('merge_output_format'):
+            args.extend(["--merge-output-format", plan['merge_output_format']])
+        else:
+            args.extend(["--remux-video", plan['target']])
+    return args
+
+
+def plan_ydl_params(plan: Dict, convert: bool = True) -> Dict:
+    """Paramètres yt_dlp.YoutubeDL correspondant à un plan (moteur en bibliothèque). Voir plan_yt_dlp_args pour convert."""
+    params = {}
+    if plan.get('audio_format'):
+        params['format'] = plan.get('format') or 'bestaudio/best'
+        if convert:
+            params['postprocessors'] = [{'key': 'FFmpegExtractAudio', 'preferredcodec': plan['audio_format']}]
+        return params
+    if plan.get('format'):
+        params['format'] = plan['format']
+    if plan['mode'] == 'transcode' and plan.get('recode_video'):
+        if convert:
+            params['postprocessors'] = [{'key': 'FFmpegVideoConvertor', 'preferedformat': plan['recode_video']}]
+    elif plan['mode'] == 'remux':
+        if plan.get('merge_output_format'):
+            params['merge_output_format'] = plan['merge_output_format']
+        else:
+            params['postprocessors'] = [{'key': 'FFmpegVideoRemuxer', 'preferedformat': plan['target']}]
+    return params
+
+
+def describe_plan(plan: Dict) -> str:
+    """Message lisible indiquant le chemin retenu."""
+    return f"{PLAN_LABELS.get(plan['mode'], plan['mode'])}: {plan.get('detail', '')}"
@@ -0,0 +1,257 @@
+# job_timing.py
+import csv
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Étapes d'un téléchargement, dans l'ordre où elles se succèdent
+STAGES = ("extraction", "queue_wait", "planning", "download", "postprocess", "finalize")
+STAGE_LABELS = {
+    'extraction': "Extraction des métadonnées",
+    'queue_wait': "File d'attente",
+    'planning': "Inspection des formats",
+    'download': "Téléchargement",
+    'postprocess': "Conversion",
+    'finalize': "Déplacement des fichiers",
+}
+# Ressource qui limite un lot selon l'étape où le temps est passé
+STAGE_RESOURCES = {
+    'extraction': "extraction des métadonnées",
+    'queue_wait': "file d'attente (limite de téléchargements simultanés)",
+    'planning': "extraction des métadonnées",
+    'download': "réseau",
+    'postprocess': "CPU (conversions)",
+    'finalize': "disque",
+}
+# Nombre de fiches de temps gardées en mémoire (les plus anciennes sont oubliées au-delà)
+DEFAULT_MAX_TIMINGS = 100000
+# Pseudo-étape qui marque la fin d'une tentative
+END = "end"
+_FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def format_seconds(seconds: float) -> str:
+    """Durée lisible: "0.4 s", "12 s", "3 min 05 s", "1 h 02 min"."""
+    if seconds < 10:
+        return f"{seconds:.1f} s"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, secs = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {secs:02} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02} min"
+
+
+class JobTiming:
+    """
+    Fiche de temps d'un téléchargement: début de chaque étape (horloge monotone), dans l'ordre.
+    Une étape dure jusqu'au début de la suivante, la dernière jusqu'à la fin du téléchargement (ou maintenant).
+    La fin est notée par une transition vers END: une nouvelle tentative ajoute ses étapes à la suite,
+    les durées sont cumulées par étape et l'intervalle entre deux tentatives n'est pas compté.
+    """
+    __slots__ = ('id', 'title', 'url', 'format', 'status', 'queued_at', 'transitions', 'ended_at', 'attempts')
+
+    def __init__(self, download_id: str, title: str, url: str, selected_format: str):
+        self.id = download_id
+        self.title = title
+        self.url = url
+        self.format = selected_format
+        self.status = "En attente"
+        self.queued_at = time.time() # Heure de mise en file (horloge murale, pour l'export)
+        self.transitions: List[Tuple[str, float]] = [("queue_wait", time.monotonic())]
+        self.ended_at: Optional[float] = None
+        self.attempts = 1
+
+    @property
+    def stage(self) -> Optional[str]:
+        """Étape en cours, None une fois le téléchargement terminé."""
+        stage = self.transitions[-1][0]
+        return None if stage == END else stage
+
+    def enter(self, stage: str, now: float):
+        if self.transitions[-1][0] != stage:
+            self.transitions.append((stage, now))
+
+    def durations(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Durée cumulée de chaque étape traversée (secondes)."""
+        end = now or time.monotonic()
+        durations: Dict[str, float] = {}
+        for index, (stage, started) in enumerate(self.transitions):
+            if stage == END:
+                continue
+            stopped = self.transitions[index + 1][1] if index + 1 < len(self.transitions) else end
+            durations[stage] = durations.get(stage, 0.0) + max(0.0, stopped - started)
+        return durations
+
+    def total(self, now: Optional[float] = None) -> float:
+        return sum(self.durations(now).values())
+
+    def describe(self) -> str:
+        """Texte de l'infobulle: une ligne par étape, l'étape en cours signalée."""
+        now = time.monotonic()
+        durations = self.durations(now)
+        lines = []
+        for stage in STAGES:
+            if stage in durations:
+                current = " (en cours)" if stage == self.stage else ""
+                lines.append(f"{STAGE_LABELS[stage]}: {format_seconds(durations[stage])}{current}")
+        attempts = f" ({self.attempts} tentatives)" if self.attempts > 1 else ""
+        lines.append(f"Total: {format_seconds(self.total(now))}{attempts}")
+        return "\n".join(lines)
+
+
+class JobTimingTracker:
+    """
+    Temps passé par chaque téléchargement dans chaque étape: extraction des métadonnées, file d'attente,
+    inspection des formats, téléchargement (réseau), conversion (FFmpeg) et déplacement des fichiers.
+    Les transitions sont relevées dans le thread du bus (à une image près); la mise en file et l'extraction
+    peuvent l'être depuis n'importe quel thread. Un lot commence au premier téléchargement mis en file
+    et se termine quand la file est vide: finish_batch() en donne le bilan par étape.
+    """
+
+    def __init__(self, max_timings: int = DEFAULT_MAX_TIMINGS):
+        self.max_timings = max_timings
+        self._timings: "OrderedDict[str, JobTiming]" = OrderedDict()
+        self._batch: "OrderedDict[str, None]" = OrderedDict() # Téléchargements du lot en cours
+        self._lock = threading.Lock()
+
+    def get(self, download_id: str) -> Optional[JobTiming]:
+        return self._timings.get(download_id)
+
+    def job_queued(self, download_info) -> JobTiming:
+        """Ouvre la fiche d'un téléchargement mis en file (étape: file d'attente)."""
+        timing = JobTiming(download_info['id'], download_info['title'], download_info['url'], download_info['format'])
+        with self._lock:
+            self._timings[timing.id] = timing
+            while len(self._timings) > self.max_timings:
+                self._timings.popitem(last=False)
+            self._batch[timing.id] = None
+        return timing
+
+    def set_extraction(self, download_id: str, started: float):
+        """Fait commencer la fiche à l'extraction des métadonnées (horloge monotone), partagée par les éléments d'une playlist."""
+        with self._lock:
+            timing = self._timings.get(download_id)
+            if timing is not None and timing.transitions[0][0] == "queue_wait":
+                timing.transitions.insert(0, ("extraction", started))
+
+    def job_status(self, download_id: str, status: str):
+        """Transition d'état (thread du bus)."""
+        now = time.monotonic()
+        with self._lock:
+            timing = self._timings.get(download_id)
+            if timing is None:
+                return
+            if status == "En attente": # Nouvelle tentative
+                if timing.ended_at is not None:
+                    timing.ended_at = None
+                    timing.attempts += 1
+                timing.status = status
+                timing.enter("queue_wait", now)
+                self._batch[download_id] = None
+            elif status == "active":
+                timing.status = status
+                timing.enter("download", now)
+            elif status == "postprocessing": # Conversion confiée au pool de post-traitement
+                timing.status = status
+                timing.enter("postprocess", now)
+            elif status in _FINAL_STATUSES and timing.ended_at is None:
+                timing.status = status
+                timing.ended_at = now
+                timing.enter(END, now)
+
+    def job_stage(self, download_id: str, details: Dict):
+        """Étape signalée par la progression de yt-dlp pendant que le téléchargement est actif (thread du bus)."""
+        stage = details.get('stage')
+        if stage in ('download', 'playlist_item'):
+            stage = 'download'
+        elif stage == 'postprocess':
+            stage = 'finalize' if details.get('postprocessor') == 'MoveFiles' else 'postprocess'
+        else:
+            return
+        with self._lock:
+            timing = self._timings.get(download_id)
+            if timing is not None and timing.status == "active" and timing.ended_at is None:
+                timing.enter(stage, time.monotonic())
+
+    def format_planned(self, download_id: str):
+        """Fin de l'inspection des formats: le temps écoulé depuis le démarrage lui est attribué (thread du bus)."""
+        now = time.monotonic()
+        with self._lock:
+            timing = self._timings.get(download_id)
+            if timing is None or timing.ended_at is not None or timing.transitions[-1][0] != "download":
+                return
+            timing.transitions[-1] = ("planning", timing.transitions[-1][1])
+            timing.enter("download", now)
+
+    def finish_batch(self) -> Optional[Dict]:
+        """
+        Clôt le lot en cours et retourne son bilan (None s'il était vide): nombre de téléchargements par état,
+        durée écoulée, temps cumulé par étape et part de chaque étape, étape dominante hors file d'attente.
+        """
+        with self._lock:
+            timings = [self._timings[download_id] for download_id in self._batch if download_id in self._timings]
+            self._batch = OrderedDict()
+        if not timings:
+            return None
+        now = time.monotonic()
+        stages = {stage: 0.0 for stage in STAGES}
+        counts = {status: 0 for status in _FINAL_STATUSES}
+        for timing in timings:
+            for stage, seconds in timing.durations(now).items():
+                stages[stage] += seconds
+            if timing.status in counts:
+                counts[timing.status] += 1
+        cumulated = sum(stages.values())
+        shares = {stage: (seconds * 100.0 / cumulated if cumulated else 0.0) for stage, seconds in stages.items()}
+        working = {stage: seconds for stage, seconds in stages.items() if stage != "queue_wait" and seconds > 0}
+        started = min(timing.transitions[0][1] for timing in timings)
+        ended = max(timing.ended_at if timing.ended_at is not None else now for timing in timings)
+        return {'jobs': len(timings), **counts, 'elapsed': max(0.0, ended - started),
+                'stages': stages, 'shares': shares,
+                'bottleneck': max(working, key=working.get) if working else None}
+
+    def export_csv(self, path: str) -> int:
+        """
+        Exporte les fiches en mémoire en CSV: une ligne par téléchargement, durée de chaque étape (secondes)
+        et transitions relatives au début de la fiche ("étape@secondes;...", "end" à la fin de chaque tentative).
+        Retourne le nombre de lignes écrites.
+        """
+        with self._lock:
+            timings = list(self._timings.values())
+        now = time.monotonic()
+        with open(path, "w", encoding='utf-8', newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "title", "url", "format", "status", "attempts", "queued_at",
+                             *(f"{stage}_s" for stage in STAGES), "total_s", "transitions"])
+            for timing in timings:
+                durations = timing.durations(now)
+                origin = timing.transitions[0][1]
+                writer.writerow([timing.id, timing.title, timing.url, timing.format, timing.status, timing.attempts,
+                                 time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timing.queued_at)),
+                                 *(f"{durations[stage]:.3f}" if stage in durations else "" for stage in STAGES),
+                                 f"{timing.total(now):.3f}",
+                                 ";".join(f"{stage}@{started - origin:.3f}" for stage, started in timing.transitions)])
+        return len(timings)
+
+
+def describe_stages(summary: Dict) -> str:
+    """Part de chaque étape dans le temps cumulé d'un lot et ressource limitante (bilan de finish_batch)."""
+    shares = sorted(((share, stage) for stage, share in summary['shares'].items() if share >= 0.5), reverse=True)
+    parts = ", ".join(f"{STAGE_LABELS[stage].lower()} {share:.0f} %" for share, stage in shares)
+    text = f"Temps cumulé par étape: {parts}." if parts else ""
+    if summary['bottleneck']:
+        text += (f" Étape la plus longue hors file d'attente: {STAGE_LABELS[summary['bottleneck']].lower()} "
+                 f"({STAGE_RESOURCES[summary['bottleneck']]}).")
+    return text.strip()
+
+
+def describe_batch(summary: Dict) -> str:
+    """Bilan d'un lot en une ligne: téléchargements, durée, part de chaque étape et ressource limitante."""
+    text = (f"Lot terminé: {summary['jobs']} téléchargement(s) ({summary['completed']} réussi(s), "
+            f"{summary['failed']} échec(s), {summary['cancelled']} annulé(s)) en {format_seconds(summary['elapsed'])}.")
+    stages = describe_stages(summary)
+    return f"{text} {stages}" if stages else text
@@ -0,0 +1,163 @@
+# log_console.py
+import re
+import itertools
+import heapq
+import tkinter as tk
+from collections import deque
+from tkinter import ttk, scrolledtext
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from progress_parser import classify_message
+
+# Lignes gardées par niveau (et affichées au plus) par défaut
+DEFAULT_MAX_LINES = 5000
+# Niveaux des messages, du plus bavard au plus important
+LOG_LEVELS = ("raw", "info", "warning", "error")
+LEVEL_LABELS = {
+    "raw": "Sortie yt-dlp",
+    "info": "Infos",
+    "warning": "Avertissements",
+    "error": "Erreurs",
+}
+LEVEL_COLORS = {"raw": "#999999", "warning": "orange", "error": "#ff6b6b"}
+# Identifiant de téléchargement cité dans un message (uuid4), quand il n'est pas fourni
+_DOWNLOAD_ID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+class LogBuffer:
+    """
+    Tampon circulaire des messages de log: au plus `max_lines` messages par niveau, pour que la sortie
+    brute de yt-dlp (très abondante) ne chasse pas les messages importants. Chaque entrée est
+    (numéro d'ordre, niveau, id de téléchargement ou None, texte).
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES):
+        self.max_lines = max_lines
+        self._order = itertools.count()
+        self._entries: Dict[str, Deque[Tuple[int, str, Optional[str], str]]] = {
+            level: deque(maxlen=max_lines) for level in LOG_LEVELS
+        }
+
+    def set_max_lines(self, max_lines: int):
+        self.max_lines = max_lines
+        self._entries = {level: deque(entries, maxlen=max_lines) for level, entries in self._entries.items()}
+
+    def append(self, message: str, download_id: Optional[str] = None) -> Tuple[int, str, Optional[str], str]:
+        if download_id is None:
+            match = _DOWNLOAD_ID_RE.search(message)
+            download_id = match.group(0) if match else None
+        entry = (next(self._order), classify_message(message), download_id, message)
+        self._entries[entry[1]].append(entry)
+        return entry
+
+    def select(self, levels: Iterable[str], download_id: Optional[str] = None) -> List[Tuple[int, str, Optional[str], str]]:
+        """Dernières entrées (au plus max_lines) des niveaux demandés, éventuellement d'un seul téléchargement."""
+        merged = heapq.merge(*(self._entries[level] for level in levels))
+        if download_id is not None:
+            merged = (entry for entry in merged if entry[2] == download_id)
+        return list(deque(merged, maxlen=self.max_lines))
+
+
+class LogConsole:
+    """
+    Console de log de l'interface: tampon circulaire, filtres par niveau et par téléchargement.
+    Les messages d'une image sont insérés en un seul bloc; la zone de texte ne garde jamais plus de
+    `max_lines` lignes, et ne défile vers le bas que si l'utilisateur y était déjà.
+    La sortie brute de yt-dlp est masquée par défaut (seul son nombre de lignes est affiché).
+    """
+
+    def __init__(self, parent, max_lines: int = DEFAULT_MAX_LINES, background: str = '#4c4c4c',
+                 foreground: str = 'white'):
+        self.buffer = LogBuffer(max_lines)
+        self.frame = ttk.Frame(parent, style='Custom.TFrame')
+        self.level_vars = {level: tk.BooleanVar(value=level != "raw") for level in LOG_LEVELS}
+        self.download_filter: Optional[str] = None
+        self._filter_title = ""
+        self._hidden_raw = 0 # Lignes yt-dlp reçues pendant qu'elles étaient masquées
+
+        filter_bar = ttk.Frame(self.frame, style='Custom.TFrame')
+        filter_bar.pack(fill='x', padx=5, pady=(0, 5))
+        for level in LOG_LEVELS:
+            ttk.Checkbutton(filter_bar, text=LEVEL_LABELS[level], variable=self.level_vars[level],
+                            command=self.rebuild).pack(side='left', padx=(0, 10))
+        self.clear_filter_button = ttk.Button(filter_bar, text="Tous les téléchargements", style='Custom.TButton',
+                                              command=self.clear_download_filter, state='disabled')
+        self.clear_filter_button.pack(side='right')
+        self.filter_label = ttk.Label(filter_bar, text="", style='Custom.TLabel')
+        self.filter_label.pack(side='right', padx=(0, 10))
+
+        self.text = scrolledtext.ScrolledText(self.frame, wrap='word', height=10,
+                                              bg=background, fg=foreground, font=('Consolas', 9),
+                                              state='disabled', relief='flat', borderwidth=0)
+        self.text.pack(fill='both', expand=True, padx=5, pady=5)
+        for level, color in LEVEL_COLORS.items():
+            self.text.tag_configure(level, foreground=color)
+
+    def _visible_levels(self) -> List[str]:
+        return [level for level in LOG_LEVELS if self.level_vars[level].get()]
+
+    def _is_visible(self, entry) -> bool:
+        return self.level_vars[entry[1]].get() and (self.download_filter is None or entry[2] == self.download_filter)
+
+    def append(self, messages: Iterable[Tuple[str, Optional[str]]]):
+        """Ajoute les messages d'une image (message, id de téléchargement ou None) en une seule insertion."""
+        visible = []
+        for message, download_id in messages:
+            entry = self.buffer.append(message, download_id)
+            if self._is_visible(entry):
+                visible.append(entry)
+            elif entry[1] == "raw":
+                self._hidden_raw += 1
+        if visible:
+            self._insert(visible, keep_position=True)
+        self._update_filter_label()
+
+    def _insert(self, entries: List[Tuple[int, str, Optional[str], str]], keep_position: bool):
+        """Insère des entrées en fin de zone et retire les lignes au-delà de la limite."""
+        at_bottom = self.text.yview()[1] >= 0.999
+        self.text.configure(state='normal')
+        # Une insertion par suite de lignes de même niveau (même couleur)
+        for level, group in itertools.groupby(entries, key=lambda entry: entry[1]):
+            self.text.insert(tk.END, "".join(entry[3] + "\n" for entry in group), level)
+        excess = int(self.text.index('end-1c').split('.')[0]) - 1 - self.buffer.max_lines
+        if excess > 0:
+            self.text.delete('1.0', f'{excess + 1}.0') # Les lignes les plus anciennes sortent de la zone
+        if at_bottom or not keep_position:
+            self.text.see(tk.END)
+        self.text.configure(state='disabled')
+
+    def rebuild(self):
+        """Réaffiche le tampon selon les filtres courants (changement de niveau ou de téléchargement)."""
+        self.text.configure(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.text.configure(state='disabled')
+        entries = self.buffer.select(self._visible_levels(), self.download_filter)
+        if entries:
+            self._insert(entries, keep_position=False)
+        if self.level_vars["raw"].get():
+            self._hidden_raw = 0
+        self._update_filter_label()
+
+    def set_max_lines(self, max_lines: int):
+        self.buffer.set_max_lines(max_lines)
+        self.rebuild()
+
+    def set_download_filter(self, download_id: str, title: str):
+        """N'affiche que les messages d'un téléchargement."""
+        self.download_filter = download_id
+        self._filter_title = title
+        self.clear_filter_button.config(state='normal')
+        self.rebuild()
+
+    def clear_download_filter(self):
+        self.download_filter = None
+        self.clear_filter_button.config(state='disabled')
+        self.rebuild()
+
+    def _update_filter_label(self):
+        parts = []
+        if self.download_filter is not None:
+            parts.append(f"Téléchargement: {self._filter_title}")
+        if not self.level_vars["raw"].get() and self._hidden_raw:
+            parts.append(f"{self._hidden_raw} ligne(s) yt-dlp masquée(s)")
+        self.filter_label.config(text=" | ".join(parts))
@@ -7,12 +7,15 @@ Point d'entrée principal de l'application
 import sys
 import os
 import subprocess
+import time
+import threading
 import importlib.util
 
-def check_and_install_package(package_name, import_name=None):
+def check_and_install_package(package_name, import_name=None, required=True):
     """
     Vérifie si un paquet est installé, et l'installe avec pip si ce n'est pas le cas.
     L'installation se fait en silence.
+    Si `required` est faux, un échec d'installation est signalé sans quitter l'application.
     """
     if import_name is None:
         import_name = package_name.replace('-', '_').split('==')[0]
@@ -35,21 +38,39 @@ def check_and_install_package(package_name, import_name=None):
             print(f"ERREUR: Impossible d'installer le paquet '{package_name}'.")
             print(f"Veuillez l'installer manuellement en utilisant: pip install {package_name}")
             print(f"Erreur: {e}")
-            sys.exit(1) # Quitte l'application si une dépendance cruciale ne peut être installée
+            if required:
+                sys.exit(1) # Quitte l'application si une dépendance cruciale ne peut être installée
+
+# Posé quand la vérification (et l'installation éventuelle) des dépendances est terminée
+DEPENDENCIES_CHECKED = threading.Event()
+
+def check_dependencies_in_background():
+    """
+    Vérifie les dépendances optionnelles sans retarder l'affichage de l'interface.
+    google-api-python-client n'est importé qu'à la première recherche: il peut être installé pendant ce temps.
+    """
+    from startup_timer import STARTUP_TIMER
+    started_at = time.perf_counter()
+    try:
+        check_and_install_package('google-api-python-client', 'googleapiclient', required=False)
+    finally:
+        DEPENDENCIES_CHECKED.set() # L'interface n'affiche le résultat qu'après l'installation
+    STARTUP_TIMER.mark_background("Vérification des dépendances", started_at)
 
 def main():
     """Fonction principale de l'application."""
-    # Vérifie et installe les dépendances nécessaires au démarrage
-    check_and_install_package('google-api-python-client', 'googleapiclient')
-
     # Ajoute le répertoire courant au path pour les imports locaux.
-    # C'est fait ici pour s'assurer que les modules locaux sont trouvés après l'installation des paquets.
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from startup_timer import STARTUP_TIMER
+
+    # Vérifie et installe les dépendances en arrière-plan (seule la recherche YouTube en a besoin)
+    threading.Thread(target=check_dependencies_in_background, name="DependencyCheck", daemon=True).start()
 
-    # Les imports des modules de l'application sont faits APRÈS la vérification des dépendances
-    # pour éviter les ImportError si les paquets n'étaient pas encore installés.
+    # Les modules de l'application n'importent aucune dépendance optionnelle au chargement
+    # (googleapiclient, yt_dlp): leur import n'attend pas la vérification des dépendances.
     try:
         from main_gui import MusicDLGUI
+        STARTUP_TIMER.mark("Import des modules de l'application")
     except ImportError as e:
         print(f"Erreur lors de l'importation des modules de l'application: {e}")
         print("Veuillez vous assurer que tous les fichiers (.py) de l'application sont dans le même répertoire.")
@@ -57,7 +78,7 @@ def main():
 
     # Lancement de l'interface graphique
     try:
-        app = MusicDLGUI()
+        app = MusicDLGUI(dependencies_checked=DEPENDENCIES_CHECKED)
         app.run()
     except Exception as e:
         print(f"Une erreur inattendue est survenue lors de l'exécution de l'application: {e}")
@@ -2,64 +2,99 @@
 import os
 import sys
 import glob
-import subprocess
 import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
+from tkinter import ttk, messagebox, filedialog
 import webbrowser # Pour ouvrir le lien de téléchargement
-import uuid # Pour générer des IDs uniques pour les téléchargements
-import queue # Pour gérer la file d'attente des téléchargements
-import json # Pour parser la sortie JSON de yt-dlp
+import time
+from typing import Optional
 
 from config_manager import ConfigManager
-from youtube_api import YouTubeAPI, GOOGLE_API_AVAILABLE
-from downloader import Downloader
+from youtube_api import YouTubeAPI, google_api_installed
 from memory_manager import MemoryManager
+from download_archive import DownloadArchive
 from dialogs import APIKeyDialog
+from progress_parser import format_bytes, format_eta
+from format_planner import PLAN_LABELS
+from postprocess_pool import default_postprocess_workers
+from bandwidth_budget import parse_schedule_line, format_schedule_rule
+from download_registry import FINAL_STATUSES
+from downloads_view import (VirtualRowList, RowTooltip, CARD_ROW_HEIGHT, TABLE_ROW_HEIGHT, create_card_row,
+                            create_table_row, create_table_header)
+from download_scheduler import SCHEDULER_POLICIES, POLICY_LABELS
+from concurrency_controller import DEFAULT_SAMPLE_INTERVAL_MS
+from log_console import LogConsole
+from event_log_viewer import EventLogViewer
+from ui_event_bus import UIEventBus
+from download_manager import DownloadManager, validate_youtube_url
+from control_api import ControlAPIServer
+from metrics import MetricsFileWriter, METRICS_FILE_NAME, DEFAULT_FILE_INTERVAL
+from startup_timer import STARTUP_TIMER
 
 class MusicDLGUI:
-    def __init__(self):
+    def __init__(self, dependencies_checked: Optional[threading.Event] = None):
+        # Vérification des dépendances en arrière-plan (main.pyw): None si elle n'a pas lieu
+        self.dependencies_checked = dependencies_checked
         # Initialiser les gestionnaires
         self.config = ConfigManager()
-        self.log_display = None
+        STARTUP_TIMER.mark("Configuration chargée")
+        self.log_console = None
+        # Bus d'événements: les threads de travail y publient, la boucle Tk le vide à cadence fixe
+        self.ui_bus = UIEventBus()
         self.youtube_api = YouTubeAPI(self.config.api_key)
-        
-        # Initialiser le downloader avec le callback de progression
-        # self.update_download_progress est appelé après setup_gui, donc self.root est créé
-        self.downloader = Downloader(self.config.download_path, self.log, self.update_download_progress)
+
+        # Orchestration des téléchargements (file d'attente, registre, limites, archive, journaux), sans Tk:
+        # partagée avec le mode sans interface (cli.py). Ses changements d'état sont appliqués à chaque image du bus
+        self.manager = DownloadManager(self.config, self.ui_bus, self.ui_bus.publish_log)
+        self.manager.on_download_added = self._add_download_row
+        self.manager.on_download_changed = self._on_download_changed
+        self.manager.on_group_added = self._add_group_row
+        self.manager.on_group_removed = self._remove_group_row
+        self.manager.on_counts_changed = self._refresh_counters
+        self.manager.on_extractions_changed = self._refresh_extraction_status
+        self.downloader = self.manager.downloader
+        self.registry = self.manager.registry
+        self.download_queue = self.manager.download_queue
+        self.download_groups = self.manager.download_groups
+        self.event_log = self.manager.event_log
+        # API HTTP/JSON locale (optionnelle) pour les autres outils, démarrée une fois la fenêtre affichée
+        self.control_api = None
+        self.metrics_file_writer = None # Écriture périodique de metrics.prom (optionnelle)
         self.memory = MemoryManager()
+        # Éléments extraits en attente d'ajout à la mémoire (ajoutés et affichés une fois par image)
+        self._pending_memory_items = []
+        self._pending_memory_lock = threading.Lock()
 
         # Données temporaires pour les recherches
         self.search_results = []
 
-        # Liste pour suivre les téléchargements actifs, terminés et échoués
-        # Chaque élément sera un dict: {'id': uuid, 'title': str, 'status': str, 'progress': float, 'url': str, 'format': str}
-        self.downloads_list = []
-        # Dictionnaire pour mapper download_id aux widgets Tkinter de la carte de téléchargement
-        self.download_widgets = {} # {'download_id': {'card_frame': ..., 'title_label': ..., 'status_label': ..., 'progressbar': ..., 'cancel_button': ...}}
+        # Liste virtualisée de l'onglet Téléchargements (cartes ou tableau compact), construite à la première utilisation.
+        # Elle ne contient que des identifiants: seules les lignes visibles ont des widgets, recyclés au défilement
+        self.downloads_view = None
+        self.row_tooltip = None # Infobulle des lignes: temps passé dans chaque étape
+        self._dirty_groups = set() # Groupes dont la progression agrégée doit être redessinée à la prochaine image
 
         self.download_format_var = None # Initialiser à None ici
 
-        # --- Gestion de la file d'attente des téléchargements ---
-        self.download_queue = queue.Queue()
-        self.active_download_count = 0  # Compteur interne des téléchargements actifs
-        self.active_downloads_count = 0  # Pour la compatibilité avec le code existant
-        self.concurrent_limit = self.config.get_concurrent_downloads_limit()  # Récupérer la limite depuis la config
-        self.download_lock = threading.Lock()  # Pour synchroniser l'accès à active_download_count et la queue
-
-        # Les variables Tkinter pour les compteurs sont maintenant créées dans setup_gui()
+        # Les variables Tkinter pour les compteurs sont créées dans setup_gui() et recopiées depuis le registre à chaque image
         self.active_downloads_count_var = None
         self.completed_downloads_count_var = None
         self.failed_downloads_count_var = None
         self.pending_downloads_count_var = None  # Nouvelle variable pour les téléchargements en attente
+        self.postprocessing_downloads_count_var = None
+
 
+        self._interactive = False
+        STARTUP_TIMER.mark("Gestionnaires, archive et journal initialisés")
 
         self.setup_gui() # setup_gui va créer self.root et self.download_format_var
+        STARTUP_TIMER.mark("Interface construite")
+        self.manager.restore_queue()
 
-        # Vérifications initiales après le démarrage de l'interface graphique
-        self.root.after(100, self.check_and_offer_yt_dlp_install)
-        self.root.after(200, self.check_and_offer_ffmpeg_install)
-        self.root.after(300, self.check_google_api_client)
+        # Vérifications initiales, sans bloquer l'affichage de l'interface
+        threading.Thread(target=self._discover_tools_in_background, name="ToolDiscovery", daemon=True).start()
+        self.root.after(300, self._startup_google_api_check)
+        self.root.after(DEFAULT_SAMPLE_INTERVAL_MS, self._adaptive_concurrency_tick)
 
     def setup_gui(self):
         # Fenêtre principale
@@ -74,6 +109,16 @@ class MusicDLGUI:
         self.completed_downloads_count_var = tk.IntVar(value=0)
         self.failed_downloads_count_var = tk.IntVar(value=0) # Inclura les échecs et les annulations
         self.pending_downloads_count_var = tk.IntVar(value=0) # Initialisation ici
+        self.postprocessing_downloads_count_var = tk.IntVar(value=0)
+        self.async_io_engine_var = tk.BooleanVar(value=self.config.get_io_engine() == "async")
+        self.download_backend_var = tk.StringVar(value=self.downloader.backend.name)
+        self.skip_archived_var = tk.BooleanVar(value=self.config.get_skip_archived_downloads())
+        self.format_planning_var = tk.BooleanVar(value=self.config.get_format_planning())
+        self.offline_mode_var = tk.BooleanVar(value=self.config.get_offline_mode())
+        self.scheduler_policy_var = tk.StringVar(value=self.download_queue.policy)
+        self.two_stage_pipeline_var = tk.BooleanVar(value=self.config.get_two_stage_pipeline())
+        self.low_priority_postprocess_var = tk.BooleanVar(value=self.config.get_low_priority_postprocess())
+        self.compact_downloads_view_var = tk.BooleanVar(value=self.config.get_compact_downloads_view())
 
 
         # --- Styles pour les widgets TTK ---
@@ -110,6 +155,10 @@ class MusicDLGUI:
         style.configure('DownloadStatus.TLabel', background=BG_MEDIUM, foreground=FG_SECONDARY, font=('Arial', 9))
         # Nouveau style pour les compteurs
         style.configure('Counter.TLabel', background=BG_DARK, foreground=FG_PRIMARY, font=('Arial', 11, 'bold'))
+        # Vue compacte des téléchargements (une ligne par téléchargement)
+        style.configure('DownloadRow.TFrame', background=BG_MEDIUM)
+        style.configure('DownloadRow.TLabel', background=BG_MEDIUM, foreground=FG_PRIMARY, font=('Arial', 9))
+        style.configure('DownloadRowHeader.TLabel', background=BG_DARK, foreground=FG_SECONDARY, font=('Arial', 9))
 
 
         # Styles pour les Boutons
@@ -251,6 +300,14 @@ class MusicDLGUI:
                                           command=self.add_url_to_memory, style='Custom.TButton')
         add_url_to_memory_btn.pack(side='right', padx=(0, 10))
 
+        # Extractions en cours (playlists): nombre d'éléments lus et annulation, affichés seulement pendant l'extraction
+        self.extraction_status_frame = ttk.Frame(url_frame, style='Custom.TFrame')
+        self.extraction_status_var = tk.StringVar(value="")
+        ttk.Label(self.extraction_status_frame, textvariable=self.extraction_status_var,
+                  style='Custom.TLabel').pack(side='left')
+        ttk.Button(self.extraction_status_frame, text="Annuler l'extraction", command=self.cancel_extractions,
+                   style='Custom.TButton').pack(side='right')
+
         # Section Résultats de recherche
         results_frame = ttk.LabelFrame(left_frame, text="Résultats de Recherche", style='Custom.TLabelframe',
                                        padding=(15, 10, 15, 15))
@@ -356,50 +413,47 @@ class MusicDLGUI:
                                    padding=(15, 10, 15, 15))
         log_frame.pack(fill='both', expand=True, padx=5, pady=5)
 
-        self.log_display = scrolledtext.ScrolledText(log_frame, wrap='word', height=10,
-                                                     bg=BG_LIGHT, fg=FG_PRIMARY, font=('Consolas', 9),
-                                                     state='disabled', relief='flat', borderwidth=0)
-        self.log_display.pack(fill='both', expand=True, padx=5, pady=5)
+        # Console bornée: tampon circulaire, filtres par niveau et par téléchargement, sortie brute de yt-dlp masquée par défaut
+        self.log_console = LogConsole(log_frame, self.config.get_log_max_lines(), background=BG_LIGHT, foreground=FG_PRIMARY)
+        self.log_console.frame.pack(fill='both', expand=True)
 
         # Tab pour les Téléchargements (nouveau)
         downloads_tab = ttk.Frame(self.notebook, style='Custom.TFrame')
         self.notebook.add(downloads_tab, text="Téléchargements")
 
-        # --- Compteurs de téléchargement (dans l'onglet Téléchargements) ---
-        counters_frame = ttk.Frame(downloads_tab, style='Custom.TFrame', padding=(5, 5))
-        counters_frame.pack(fill='x', pady=(0, 5), padx=5)
-
-        ttk.Label(counters_frame, text="En cours:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
-        ttk.Label(counters_frame, textvariable=self.active_downloads_count_var, style='Counter.TLabel', foreground=ACCENT_COLOR, background=BG_DARK).pack(side='left', padx=(0, 15))
+        # Le contenu de l'onglet Téléchargements (non visible au démarrage) est construit à la première utilisation
+        def build_downloads_tab():
+            # --- Compteurs de téléchargement (dans l'onglet Téléchargements) ---
+            counters_frame = ttk.Frame(downloads_tab, style='Custom.TFrame', padding=(5, 5))
+            counters_frame.pack(fill='x', pady=(0, 5), padx=5)
 
-        ttk.Label(counters_frame, text="Terminés:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
-        ttk.Label(counters_frame, textvariable=self.completed_downloads_count_var, style='Counter.TLabel', foreground="green", background=BG_DARK).pack(side='left', padx=(0, 15))
-        
-        ttk.Label(counters_frame, text="En attente:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
-        ttk.Label(counters_frame, textvariable=self.pending_downloads_count_var, style='Counter.TLabel', foreground="orange", background=BG_DARK).pack(side='left', padx=(0, 15))
+            ttk.Label(counters_frame, text="En cours:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
+            ttk.Label(counters_frame, textvariable=self.active_downloads_count_var, style='Counter.TLabel', foreground=ACCENT_COLOR, background=BG_DARK).pack(side='left', padx=(0, 15))
 
+            ttk.Label(counters_frame, text="Conversion:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
+            ttk.Label(counters_frame, textvariable=self.postprocessing_downloads_count_var, style='Counter.TLabel', foreground="purple", background=BG_DARK).pack(side='left', padx=(0, 15))
 
-        ttk.Label(counters_frame, text="Échoués/Annulés:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
-        ttk.Label(counters_frame, textvariable=self.failed_downloads_count_var, style='Counter.TLabel', foreground=DANGER_COLOR, background=BG_DARK).pack(side='left', padx=(0, 0))
+            ttk.Label(counters_frame, text="Terminés:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
+            ttk.Label(counters_frame, textvariable=self.completed_downloads_count_var, style='Counter.TLabel', foreground="green", background=BG_DARK).pack(side='left', padx=(0, 15))
+        
+            ttk.Label(counters_frame, text="En attente:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
+            ttk.Label(counters_frame, textvariable=self.pending_downloads_count_var, style='Counter.TLabel', foreground="orange", background=BG_DARK).pack(side='left', padx=(0, 15))
 
 
-        # Utiliser un Canvas pour rendre la zone de téléchargements scrollable
-        self.downloads_canvas = tk.Canvas(downloads_tab, bg=BG_DARK, highlightthickness=0)
-        self.downloads_canvas.pack(side='left', fill='both', expand=True)
+            ttk.Label(counters_frame, text="Échoués/Annulés:", style='Counter.TLabel', background=BG_DARK).pack(side='left', padx=(0, 5))
+            ttk.Label(counters_frame, textvariable=self.failed_downloads_count_var, style='Counter.TLabel', foreground=DANGER_COLOR, background=BG_DARK).pack(side='left', padx=(0, 0))
 
-        self.downloads_scrollbar = ttk.Scrollbar(downloads_tab, orient="vertical", command=self.downloads_canvas.yview, style='Vertical.TScrollbar')
-        self.downloads_scrollbar.pack(side='right', fill='y')
 
-        self.downloads_canvas.configure(yscrollcommand=self.downloads_scrollbar.set)
-        
-        # Frame à l'intérieur du Canvas pour contenir les cartes de téléchargement
-        # Le tag "downloads_frame_window" est utilisé pour identifier cette fenêtre dans le canvas
-        self.downloads_container_frame = ttk.Frame(self.downloads_canvas, style='Custom.TFrame')
-        self.downloads_container_frame_id = self.downloads_canvas.create_window((0, 0), window=self.downloads_container_frame, anchor='nw', tags="downloads_frame_window")
+            # Liste virtualisée: seules les lignes visibles sont dessinées, quel que soit le nombre de téléchargements
+            self.downloads_table_header = create_table_header(downloads_tab)
+            self.downloads_view = VirtualRowList(downloads_tab, self._bind_download_row, background=BG_DARK)
+            self.downloads_view.frame.pack(fill='both', expand=True)
+            self.row_tooltip = RowTooltip(self.root, self._row_tooltip_text)
+            self._apply_downloads_view_mode()
 
-        # Bind pour redimensionner le frame interne lorsque le canvas est redimensionné
-        self.downloads_container_frame.bind("<Configure>", lambda e: self.downloads_canvas.configure(scrollregion=self.downloads_canvas.bbox("all")))
-        self.downloads_canvas.bind('<Configure>', self._on_canvas_resize)
+        self._downloads_tab = downloads_tab
+        self._downloads_tab_builder = build_downloads_tab
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_notebook_tab_changed)
 
 
         # --- Menu principal ---
@@ -410,6 +464,9 @@ class MusicDLGUI:
                              activebackground=ACCENT_COLOR, activeforeground='white')
         menubar.add_cascade(label="Fichier", menu=file_menu)
         file_menu.add_command(label="Définir le dossier de téléchargement", command=self.set_download_folder)
+        file_menu.add_command(label="Définir le dossier de données", command=self.set_data_folder)
+        file_menu.add_command(label="Journal des événements", command=self.show_event_log)
+        file_menu.add_command(label="Exporter les temps par étape (CSV)", command=self.export_stage_timings)
         file_menu.add_separator(background=BG_DARK)
         file_menu.add_command(label="Quitter", command=self.root.quit)
 
@@ -418,6 +475,43 @@ class MusicDLGUI:
         menubar.add_cascade(label="Configuration", menu=config_menu)
         config_menu.add_command(label="Configurer la clé API YouTube", command=self.configure_api_key)
         config_menu.add_command(label="Définir la limite de téléchargements", command=self.set_concurrent_downloads_limit_dialog) # Nouvelle option
+        config_menu.add_command(label="Limiter la bande passante", command=self.set_bandwidth_limit_dialog)
+        policy_menu = tk.Menu(config_menu, tearoff=0, bg=BG_MEDIUM, fg=FG_PRIMARY,
+                              activebackground=ACCENT_COLOR, activeforeground='white')
+        config_menu.add_cascade(label="Ordre de la file d'attente", menu=policy_menu)
+        for policy in SCHEDULER_POLICIES:
+            policy_menu.add_radiobutton(label=POLICY_LABELS[policy], value=policy,
+                                        variable=self.scheduler_policy_var, command=self.change_scheduler_policy)
+        config_menu.add_checkbutton(label="Moteur E/S multiplexé (asyncio)", variable=self.async_io_engine_var,
+                                    command=self.toggle_io_engine)
+        backend_menu = tk.Menu(config_menu, tearoff=0, bg=BG_MEDIUM, fg=FG_PRIMARY,
+                               activebackground=ACCENT_COLOR, activeforeground='white')
+        config_menu.add_cascade(label="Moteur de téléchargement", menu=backend_menu)
+        backend_menu.add_radiobutton(label="yt-dlp externe (un processus par tâche)", value="subprocess",
+                                     variable=self.download_backend_var, command=self.change_download_backend)
+        backend_menu.add_radiobutton(label="Bibliothèque yt_dlp (en processus)", value="library",
+                                     variable=self.download_backend_var, command=self.change_download_backend)
+        config_menu.add_checkbutton(label="Éviter les réencodages (inspection des formats)", variable=self.format_planning_var,
+                                    command=self.toggle_format_planning)
+        config_menu.add_checkbutton(label="Conversions séparées des téléchargements", variable=self.two_stage_pipeline_var,
+                                    command=self.toggle_two_stage_pipeline)
+        config_menu.add_command(label="Définir la limite de conversions", command=self.set_postprocess_workers_dialog)
+        config_menu.add_checkbutton(label="Conversions en priorité basse", variable=self.low_priority_postprocess_var,
+                                    command=self.toggle_low_priority_postprocess)
+        config_menu.add_separator(background=BG_DARK)
+        config_menu.add_checkbutton(label="Ignorer les éléments déjà téléchargés", variable=self.skip_archived_var,
+                                    command=self.toggle_skip_archived)
+        config_menu.add_command(label="Vider l'archive des téléchargements", command=self.clear_download_archive)
+        config_menu.add_command(label="Cache des métadonnées", command=self.set_metadata_cache_dialog)
+        config_menu.add_checkbutton(label="Mode hors ligne (métadonnées en cache uniquement)", variable=self.offline_mode_var,
+                                    command=self.toggle_offline_mode)
+        config_menu.add_command(label="Historique des téléchargements affichés", command=self.set_download_retention_dialog)
+        config_menu.add_command(label="Taille de la console de log", command=self.set_log_max_lines_dialog)
+        config_menu.add_command(label="Journal des événements", command=self.set_event_log_dialog)
+        config_menu.add_command(label="API de contrôle locale", command=self.set_control_api_dialog)
+        config_menu.add_command(label="Métriques", command=self.set_metrics_dialog)
+        config_menu.add_checkbutton(label="Vue compacte des téléchargements", variable=self.compact_downloads_view_var,
+                                    command=self.toggle_compact_downloads_view)
 
         help_menu = tk.Menu(menubar, tearoff=0, bg=BG_MEDIUM, fg=FG_PRIMARY,
                              activebackground=ACCENT_COLOR, activeforeground='white')
@@ -431,141 +525,109 @@ class MusicDLGUI:
 
         self.update_memory_display() # Afficher les éléments de la mémoire au démarrage
 
-    def _on_canvas_resize(self, event):
-        """Redimensionne la fenêtre interne du canvas pour qu'elle corresponde à la largeur du canvas."""
-        self.downloads_canvas.itemconfig(self.downloads_container_frame_id, width=event.width)
-
-
-    def log(self, message: str):
-        """Affiche un message dans la zone de log de l'interface graphique."""
-        if self.log_display:
-            self.root.after(0, lambda: self._update_log_display(message))
-
-    def _update_log_display(self, message: str):
-        """Méthode interne pour mettre à jour le widget de log en toute sécurité depuis n'importe quel thread."""
-        self.log_display.configure(state='normal')
-        self.log_display.insert(tk.END, message + "\n")
-        self.log_display.see(tk.END)
-        self.log_display.configure(state='disabled')
-
-    def _validate_youtube_url(self, url: str) -> bool:
-        """Valide si l'URL fournie est une URL YouTube/YouTube Music valide (vidéos individuelles ou playlists)."""
-        youtube_patterns = [
-            # Vidéos YouTube classiques
-            r'https?://(www\.)?youtube\.com/watch\?v=',
-            r'https?://(www\.)?youtu\.be/',
-            r'https?://(www\.)?youtube\.com/embed/',
-            r'https?://(www\.)?youtube\.com/v/',
-            r'https?://m\.youtube\.com/watch\?v=',
-            # Playlists YouTube
-            r'https?://(www\.)?youtube\.com/playlist\?list=',
-            r'https?://(www\.)?youtube\.com/watch\?.*&list=',
-            # YouTube Music
-            r'https?://music\.youtube\.com/watch\?v=',
-            r'https?://music\.youtube\.com/playlist\?list=',
-            # YouTube Shorts
-            r'https?://(www\.)?youtube\.com/shorts/',
-        ]
-        import re
-        for pattern in youtube_patterns:
-            if re.match(pattern, url):
-                return True
-        return False
-
-    def _extract_video_info_from_url(self, url: str) -> list:
+        # Démarrer la pompe du bus d'événements (une seule mise à jour groupée par image)
+        self.ui_bus.attach(self.root, self._apply_ui_frame)
+
+    def _ensure_downloads_tab(self):
+        """Construit le contenu de l'onglet Téléchargements s'il ne l'est pas encore."""
+        if self._downloads_tab_builder is not None:
+            builder, self._downloads_tab_builder = self._downloads_tab_builder, None
+            builder()
+            STARTUP_TIMER.mark("Onglet Téléchargements construit")
+
+    def _on_notebook_tab_changed(self, event):
+        if self.notebook.select() == str(self._downloads_tab):
+            self._ensure_downloads_tab()
+
+    def _apply_downloads_view_mode(self):
+        """Affiche les téléchargements en cartes ou en tableau compact (le pool de lignes est reconstruit)."""
+        self.row_tooltip.hide() # Les lignes survolées sont détruites
+        if self.compact_downloads_view_var.get():
+            self.downloads_table_header.pack(fill='x', padx=5, before=self.downloads_view.frame)
+            self.downloads_view.set_renderer(
+                TABLE_ROW_HEIGHT, lambda parent: self.row_tooltip.attach(create_table_row(parent, self._row_actions)),
+                row_padding=(5, 1))
+        else:
+            self.downloads_table_header.pack_forget()
+            self.downloads_view.set_renderer(
+                CARD_ROW_HEIGHT, lambda parent: self.row_tooltip.attach(create_card_row(parent, self._row_actions)))
+
+    def _row_tooltip_text(self, key):
+        """Infobulle d'une ligne: temps passé par le téléchargement dans chaque étape (rien pour une playlist)."""
+        timing = self.manager.timings.get(key) if key is not None else None
+        return timing.describe() if timing is not None else None
+
+    @property
+    def _row_actions(self) -> dict:
+        return {
+            'cancel': self._cancel_row,
+            'retry': self.manager.retry_download,
+            'front': lambda key: self.manager.move_pending_download(key, to_front=True),
+            'back': lambda key: self.manager.move_pending_download(key, to_front=False),
+            'menu': self._show_row_menu,
+            'logs': self.show_download_logs,
+        }
+
+    def toggle_compact_downloads_view(self):
+        """Bascule entre les cartes et le tableau compact dans l'onglet Téléchargements."""
+        compact = self.compact_downloads_view_var.get()
+        self.config.set_compact_downloads_view(compact)
+        if self.downloads_view is not None:
+            self._apply_downloads_view_mode()
+
+
+    def log(self, message: str, download_id: str = None):
         """
-        Extrait les informations (titre, URL, durée) depuis une URL YouTube/YouTube Music.
-        Gère à la fois les vidéos individuelles et les playlists.
-        Retourne une liste de dictionnaires, chaque dict étant {'title': ..., 'url': ..., 'duration': ...}.
+        Affiche un message dans la console de log (thread-safe, groupé par image).
+        `download_id` rattache le message à un téléchargement pour le filtre de la console.
         """
-        import re
-        
-        # Vérifier si yt-dlp est disponible
-        if not self.downloader.yt_dlp_path:
-            self.log("Erreur: yt-dlp n'est pas trouvé. Impossible d'extraire les informations.")
-            return []
+        self.manager.log(message, download_id)
 
-        is_playlist = self._is_playlist_url(url)
-        
-        try:
-            creationflags = 0
-            if sys.platform == "win32":
-                creationflags = subprocess.CREATE_NO_WINDOW
-
-            cmd = [self.downloader.yt_dlp_path, "--dump-json"]
-            if is_playlist:
-                cmd.append("--flat-playlist") # Ne télécharge pas, juste extrait la liste des vidéos
-            cmd.append(url)
-
-            self.log(f"Extraction des informations pour: {url} (playlist: {is_playlist})...")
-            process = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True,
-                creationflags=creationflags
-            )
-            
-            output_lines = process.stdout.strip().split('\n')
-            extracted_items = []
-
-            for line in output_lines:
-                try:
-                    data = json.loads(line)
-                    title = data.get('title', 'Titre inconnu')
-                    video_url = data.get('webpage_url', data.get('url', url)) # Utilise webpage_url ou url
-                    
-                    # Assurez-vous que duration_seconds est un entier, même si yt-dlp renvoie None
-                    duration_seconds = data.get('duration')
-                    if duration_seconds is None:
-                        duration_seconds = 0 # Valeur par défaut si None est retourné
-
-                    # Convertir la durée en format HH:MM:SS
-                    hours = duration_seconds // 3600
-                    minutes = (duration_seconds % 3600) // 60
-                    seconds = duration_seconds % 60
-                    duration_formatted = f"{hours:02}:{minutes:02}:{seconds:02}"
-                    
-                    extracted_items.append({
-                        "title": title,
-                        "url": video_url,
-                        "duration": duration_formatted
-                    })
-                except json.JSONDecodeError:
-                    self.log(f"Avertissement: Ligne non-JSON reçue de yt-dlp: {line[:100]}...") # Log partiel
-                    continue
-            
-            if not extracted_items:
-                self.log(f"Aucune information extraite pour l'URL: {url}. Sortie brute: {process.stdout.strip()}")
-                return []
-            
-            self.log(f"Informations extraites pour {len(extracted_items)} élément(s) depuis {url}.")
-            return extracted_items
-
-        except FileNotFoundError:
-            self.log("Erreur: yt-dlp n'est pas trouvé. Impossible d'extraire les informations.")
-            return []
-        except subprocess.CalledProcessError as e:
-            self.log(f"Erreur lors de l'exécution de yt-dlp pour extraire les infos: {e.stderr}")
-            self.log(f"Commande exécutée: {' '.join(cmd)}")
-            return []
-        except Exception as e:
-            self.log(f"Erreur inattendue lors de l'extraction des informations: {e}")
-            return []
-
-    def _is_playlist_url(self, url: str) -> bool:
-        """Vérifie si l'URL est une URL de playlist YouTube."""
-        playlist_patterns = [
-            r'https?://(www\.)?youtube\.com/playlist\?list=',
-            r'https?://(www\.)?youtube\.com/watch\?.*&list=',
-            r'https?://music\.youtube\.com/playlist\?list=',
-        ]
-        import re
-        for pattern in playlist_patterns:
-            if re.match(pattern, url):
-                return True
-        return False
+    def _update_log_display(self, messages: list):
+        """Insère en un seul bloc les messages accumulés depuis la dernière image (thread Tk uniquement)."""
+        if self.log_console:
+            self.log_console.append(messages)
 
+    def show_download_logs(self, download_id: str):
+        """Affiche l'onglet Logs filtré sur un téléchargement."""
+        dl_info = self.registry.get(download_id)
+        if dl_info is None or not self.log_console:
+            return
+        self.log_console.set_download_filter(download_id, dl_info['title'])
+        self.notebook.select(0)
+
+    def _apply_ui_frame(self, states: dict, logs: list):
+        """Applique en une fois les mises à jour coalescées d'une image du bus d'événements."""
+        for download_id, state in states.items():
+            self.manager.apply_download_progress(download_id, **state)
+        self._evict_finished_downloads()
+        self._refresh_counters()
+        for group_id in self._dirty_groups:
+            self._refresh_row(group_id) # Progression agrégée recalculée seulement si la carte est visible
+        self._dirty_groups.clear()
+        if logs:
+            self._update_log_display(logs)
+
+    @property
+    def active_download_count(self) -> int:
+        """Téléchargements occupant une place réseau (compteur du registre, O(1))."""
+        return self.registry.count("active")
+
+    def _refresh_counters(self):
+        """Recopie les compteurs du registre dans les variables Tkinter (thread Tk uniquement)."""
+        if self.active_downloads_count_var is None:
+            return
+        self.active_downloads_count_var.set(self.registry.count("active"))
+        self.postprocessing_downloads_count_var.set(self.registry.count("postprocessing"))
+        self.completed_downloads_count_var.set(self.registry.count("completed"))
+        self.failed_downloads_count_var.set(self.registry.count("failed", "cancelled"))
+        self.pending_downloads_count_var.set(self.registry.count("En attente"))
+
+    def _evict_finished_downloads(self):
+        """Retire l'affichage des téléchargements terminés évincés du registre (thread Tk uniquement)."""
+        evicted = self.registry.evict_finished()
+        if evicted and self.downloads_view is not None:
+            self.downloads_view.remove(dl_info.id for dl_info in evicted)
 
     def add_url_to_memory(self):
         url = self.url_entry.get().strip()
@@ -573,7 +635,7 @@ class MusicDLGUI:
             messagebox.showwarning("Ajouter à la Mémoire", "Veuillez entrer une URL.")
             return
 
-        if not self._validate_youtube_url(url):
+        if not validate_youtube_url(url):
             messagebox.showwarning("URL Invalide", "L'URL fournie n'est pas une URL YouTube/YouTube Music valide.")
             return
 
@@ -582,29 +644,58 @@ class MusicDLGUI:
 
     def _add_url_to_memory_task(self, url: str):
         try:
-            # Cette méthode retourne maintenant une liste
-            extracted_items = self._extract_video_info_from_url(url)
-            
-            if not extracted_items:
+            # Les éléments sont ajoutés à la mémoire au fil de l'extraction (une sauvegarde et un affichage par image)
+            def on_item(info: dict):
+                with self._pending_memory_lock:
+                    self._pending_memory_items.append(info)
+                self.ui_bus.call_once(self._flush_pending_memory_items)
+
+            extraction = self.manager.stream_video_info(url, on_item)
+
+            if not extraction['count'] and not extraction['cancelled']:
                 self.log(f"Impossible d'obtenir des informations valides pour l'URL: {url}. Non ajouté.")
                 self.root.after(0, lambda: messagebox.showerror("Erreur d'extraction", "Impossible d'extraire les informations de la vidéo/playlist pour l'URL fournie. Veuillez vérifier l'URL ou votre connexion Internet."))
                 return
 
-            added_count = 0
-            for info in extracted_items:
-                if self.memory.add_item(info["title"], info["url"], info["duration"]):
-                    self.log(f"Ajouté à la mémoire: {info['title']}")
-                    added_count += 1
-                else:
-                    self.log(f"Échec de l'ajout à la mémoire (peut-être déjà présent): {info['title']}")
-            
-            self.root.after(0, self.update_memory_display)
-            self.root.after(0, lambda: messagebox.showinfo("Ajouter à la Mémoire", f"{added_count} élément(s) ajouté(s) à la mémoire."))
+            self.root.after(0, lambda: messagebox.showinfo("Ajouter à la Mémoire", f"{extraction['count']} élément(s) ajouté(s) à la mémoire."))
 
         except Exception as e:
             self.log(f"Erreur lors de l'ajout de l'URL à la mémoire: {e}")
             self.root.after(0, lambda: messagebox.showerror("Erreur", f"Une erreur est survenue: {e}"))
 
+    def _flush_pending_memory_items(self):
+        """Ajoute à la mémoire (une seule sauvegarde) et affiche les éléments extraits depuis la dernière image."""
+        with self._pending_memory_lock:
+            items, self._pending_memory_items = self._pending_memory_items, []
+        if not items:
+            return
+        first_index = self.memory.size()
+        added_count = self.memory.add_items(items)
+        for i, item in enumerate(self.memory.get_memory()[first_index:], first_index):
+            self.memory_tree.insert("", "end", iid=str(i), values=(i + 1, item['title'], item['duration']), tags=('clickable_row',))
+        self.log(f"Ajouté à la mémoire: {items[0]['title']}" if added_count == 1 else f"{added_count} éléments ajoutés à la mémoire.")
+
+    def _refresh_extraction_status(self):
+        """Affiche le nombre d'éléments lus par les extractions en cours (thread Tk, une fois par image au plus)."""
+        extractions = list(self.manager.extractions.values())
+        if not extractions:
+            self.extraction_status_frame.pack_forget()
+            return
+        count = sum(extraction['count'] for extraction in extractions)
+        if all(extraction['cancelled'] for extraction in extractions):
+            text = f"Annulation de l'extraction ({count} élément(s) lu(s))..."
+        else:
+            urls = f" ({len(extractions)} URL)" if len(extractions) > 1 else ""
+            text = f"Extraction en cours{urls}: {count} élément(s) lu(s)"
+        self.extraction_status_var.set(text)
+        if not self.extraction_status_frame.winfo_manager():
+            self.extraction_status_frame.pack(fill='x', pady=(10, 0))
+
+    def cancel_extractions(self):
+        """Interrompt les extractions en cours; les éléments déjà lus restent en file d'attente ou en mémoire."""
+        for extraction_id in list(self.manager.extractions):
+            self.manager.cancel_extraction(extraction_id)
+
 
     def perform_Youtube(self):
         query = self.search_entry.get().strip()
@@ -688,11 +779,11 @@ class MusicDLGUI:
             messagebox.showwarning("Téléchargement", "Veuillez entrer une URL.")
             return
 
-        if not self._validate_youtube_url(url):
+        if not validate_youtube_url(url):
             messagebox.showwarning("URL Invalide", "L'URL fournie n'est pas une URL YouTube/YouTube Music valide.")
             return
 
-        if not self.downloader.yt_dlp_path:
+        if not self.downloader.is_available():
             messagebox.showwarning("yt-dlp introuvable", "yt-dlp n'est pas configuré. Impossible de télécharger. Veuillez l'installer via le menu Aide.")
             return
         
@@ -709,26 +800,12 @@ class MusicDLGUI:
     def _queue_download_from_url_task(self, url: str, selected_format: str):
         """Tâche asynchrone pour extraire les infos et ajouter à la file d'attente."""
         try:
-            extracted_items = self._extract_video_info_from_url(url)
-            if not extracted_items:
+            if self.manager.queue_url(url, selected_format) is None:
                 self.root.after(0, lambda: messagebox.showerror("Erreur d'extraction", "Impossible d'extraire les informations de la vidéo/playlist pour l'URL fournie. Le téléchargement ne peut pas démarrer."))
-                return
-
-            for item_info in extracted_items:
-                download_id = str(uuid.uuid4())
-                self.add_download_to_queue({
-                    "id": download_id,
-                    "title": item_info['title'],
-                    "url": item_info['url'],
-                    "format": selected_format,
-                    "status": "En attente",
-                    "progress": 0
-                })
         except Exception as e:
             self.log(f"Erreur lors de la mise en file d'attente de l'URL: {e}")
             self.root.after(0, lambda: messagebox.showerror("Erreur", f"Une erreur est survenue lors de la préparation du téléchargement: {e}"))
 
-
     def add_selected_to_memory(self):
         selected_items = self.results_tree.selection()
         if not selected_items:
@@ -764,7 +841,7 @@ class MusicDLGUI:
 
         selected_format = self.download_format_var.get().lower()
 
-        if not self.downloader.yt_dlp_path:
+        if not self.downloader.is_available():
             messagebox.showwarning("yt-dlp introuvable", "yt-dlp n'est pas configuré. Impossible de télécharger. Veuillez l'installer via le menu Aide.")
             return
         
@@ -773,20 +850,16 @@ class MusicDLGUI:
             return
 
         self.log(f"Préparation du téléchargement de {len(selected_items_ids)} éléments sélectionnés...")
+        skipped_count = 0
         for item_id in selected_items_ids:
             item_values = self.results_tree.item(item_id, 'values')
             selected_result_index = int(item_values[0]) - 1
             if 0 <= selected_result_index < len(self.search_results):
                 item_data = self.search_results[selected_result_index]
-                download_id = str(uuid.uuid4())
-                self.add_download_to_queue({
-                    "id": download_id,
-                    "title": item_data['title'],
-                    "url": item_data['url'],
-                    "format": selected_format,
-                    "status": "En attente",
-                    "progress": 0
-                })
+                if self.manager.queue_item(item_data['title'], item_data['url'], selected_format,
+                                           item_data.get('duration')) is None:
+                    skipped_count += 1
+        self.manager.log_archived_skips(skipped_count)
         self.notebook.select(1) # Sélectionner l'onglet "Téléchargements"
 
 
@@ -827,7 +900,7 @@ class MusicDLGUI:
 
         selected_format = self.download_format_var.get().lower()
 
-        if not self.downloader.yt_dlp_path:
+        if not self.downloader.is_available():
             messagebox.showwarning("yt-dlp introuvable", "yt-dlp n'est pas configuré. Impossible de télécharger. Veuillez l'installer via le menu Aide.")
             return
         
@@ -836,212 +909,232 @@ class MusicDLGUI:
             return
 
         self.log(f"Préparation du téléchargement de tous les {len(memory_items)} éléments de la mémoire...")
+        skipped_count = 0
         for item in memory_items:
-            download_id = str(uuid.uuid4())
-            self.add_download_to_queue({
-                "id": download_id,
-                "title": item['title'],
-                "url": item['url'],
-                "format": selected_format,
-                "status": "En attente",
-                "progress": 0
-            })
+            if self.manager.queue_item(item['title'], item['url'], selected_format, item.get('duration')) is None:
+                skipped_count += 1
+        self.manager.log_archived_skips(skipped_count)
         self.notebook.select(1) # Sélectionner l'onglet "Téléchargements"
 
-    def add_download_to_queue(self, download_info: dict):
-        """Ajoute un téléchargement à la file d'attente et crée sa carte d'affichage."""
-        self.download_queue.put(download_info)
-        self.downloads_list.append(download_info) # Ajouter à la liste globale pour suivi
-        self.root.after(0, lambda: self._create_download_card(download_info))
-        self.log(f"Ajouté à la file d'attente: {download_info['title']} (ID: {download_info['id']})")
-        self.pending_downloads_count_var.set(self.pending_downloads_count_var.get() + 1) # Incrémenter le compteur "en attente"
-        self.root.after(100, self._start_next_download_if_possible) # Tenter de démarrer immédiatement
-
-    def _create_download_card(self, download_info: dict):
-        """Crée les widgets Tkinter pour une nouvelle carte de téléchargement."""
-        download_id = download_info['id']
-        title = download_info['title']
-        status = download_info['status']
-        progress = download_info['progress']
-
-        card_frame = ttk.Frame(self.downloads_container_frame, style='DownloadCard.TFrame')
-        card_frame.pack(fill='x', padx=5, pady=5)
-
-        title_label = ttk.Label(card_frame, text=title, style='DownloadTitle.TLabel', wraplength=300)
-        title_label.pack(fill='x', anchor='w', pady=(0, 5))
-
-        status_label = ttk.Label(card_frame, text=f"Statut: {status}", style='DownloadStatus.TLabel')
-        status_label.pack(fill='x', anchor='w', pady=(0, 5))
-
-        progressbar = ttk.Progressbar(card_frame, orient="horizontal", length=200, mode="determinate", style="TProgressbar")
-        progressbar.pack(fill='x', pady=(0, 5))
-        progressbar.config(value=progress)
-
-        cancel_button = ttk.Button(card_frame, text="Annuler", style='Danger.TButton',
-                                   command=lambda: self.cancel_download(download_id))
-        cancel_button.pack(side='right', pady=(0, 0))
-
-        self.download_widgets[download_id] = {
-            'card_frame': card_frame,
-            'title_label': title_label,
-            'status_label': status_label,
-            'progressbar': progressbar,
-            'cancel_button': cancel_button
-        }
-        self.downloads_container_frame.update_idletasks()
-        self.downloads_canvas.config(scrollregion=self.downloads_canvas.bbox("all"))
-
-    def _start_next_download_if_possible(self):
-        """Démarre le prochain téléchargement de la file d'attente si la limite n'est pas atteinte."""
-        with self.download_lock:
-            if self.active_download_count < self.concurrent_limit and not self.download_queue.empty():
-                try:
-                    download_info = self.download_queue.get_nowait() # Récupère sans bloquer
-                    # Vérifier si le téléchargement n'a pas été annulé pendant qu'il était en attente
-                    if download_info['status'] == "cancelled":
-                        self.log(f"Téléchargement {download_info['title']} (ID: {download_info['id']}) a été annulé avant de commencer.")
-                        self.root.after(0, lambda: self._update_download_card_widgets(self.download_widgets[download_info['id']], download_info))
-                        # Le compteur failed_downloads_count_var est déjà mis à jour dans cancel_download si annulé depuis "En attente"
-                        # Ou il sera mis à jour par update_download_progress si le statut final est "cancelled"
-                        # Décrémenter le compteur "en attente" car il ne l'est plus
-                        self.pending_downloads_count_var.set(self.pending_downloads_count_var.get() - 1)
-                        self._start_next_download_if_possible() # Tenter le suivant
-                        return
-
-                    self.active_download_count += 1
-                    self.active_downloads_count_var.set(self.active_download_count) # Mettre à jour le compteur Tkinter
-                    self.pending_downloads_count_var.set(self.pending_downloads_count_var.get() - 1) # Décrémenter le compteur "en attente"
-
-                    self.log(f"Démarrage du téléchargement: {download_info['title']} (Actifs: {self.active_download_count}/{self.concurrent_limit})")
-                    # Mettre à jour le statut de la carte immédiatement
-                    self.root.after(0, lambda: self._update_download_card_widgets(
-                        self.download_widgets[download_info['id']], 
-                        {**download_info, 'status': 'active', 'message': 'Démarrage...'} # Utiliser 'active' pour correspondre au downloader
-                    ))
-                    # Lancer le téléchargement dans un thread séparé
-                    threading.Thread(target=lambda: self.downloader._download_single_item(
-                        download_info['url'], 
-                        download_info['format'], 
-                        download_info['id']
-                    )).start()
-                except queue.Empty:
-                    pass # La queue était vide, rien à faire
-            else:
-                self.log(f"File d'attente pleine ou limite atteinte. Actifs: {self.active_download_count}/{self.concurrent_limit}, En attente: {self.download_queue.qsize()}")
-
+    def _add_download_row(self, download_id: str):
+        """Ajoute la ligne d'un téléchargement à la liste (ses widgets ne sont créés que s'il est visible)."""
+        self._ensure_downloads_tab()
+        self.downloads_view.append(download_id)
+
+    def _add_group_row(self, group_id: str):
+        """Ajoute la carte parente d'une playlist éclatée (progression agrégée de ses éléments)."""
+        self._ensure_downloads_tab()
+        self.downloads_view.append(group_id)
+        self._dirty_groups.add(group_id)
+
+    def _remove_group_row(self, group_id: str):
+        """Supprime la carte et le groupe d'une playlist sans aucun élément en file d'attente."""
+        if self.downloads_view is not None:
+            self.downloads_view.remove([group_id])
+        self.download_groups.pop(group_id, None)
+        self._dirty_groups.discard(group_id)
+
+    def _refresh_row(self, key: str):
+        """Redessine la ligne d'un téléchargement ou d'une playlist si elle est visible (thread Tk)."""
+        if self.downloads_view is not None:
+            self.downloads_view.refresh(key)
+
+    def _on_download_changed(self, download_id: str):
+        """Un téléchargement a changé d'état: sa ligne et celle de sa playlist sont redessinées (thread Tk)."""
+        self._refresh_row(download_id)
+        dl_info = self.registry.get(download_id)
+        if dl_info and dl_info.get('group_id'):
+            self._dirty_groups.add(dl_info['group_id'])
+
+    def _bind_download_row(self, row: dict, key: str):
+        """Recopie un téléchargement ou une playlist dans une ligne recyclée de la liste."""
+        if key in self.download_groups:
+            self._update_group_row(row, key)
+            return
+        dl_info = self.registry.get(key)
+        if dl_info is None:
+            return
+        if row['kind'] == 'table':
+            self._update_download_table_row(row, dl_info)
+        else:
+            row['title_label'].config(text=dl_info['title'])
+            row['cancel_button'].config(text="Annuler")
+            row['logs_button'].config(state='normal')
+            self._update_download_card_widgets(row, dl_info)
+
+    def _group_summary(self, group_id: str):
+        """Retourne (progression, texte, tout traité) pour une playlist, à partir des compteurs du registre."""
+        # Les éléments terminés évincés de l'affichage restent comptés
+        counts = self.registry.group_counts(group_id)
+        total = sum(counts.values())
+        if not total:
+            return 0.0, "En attente", False
+        finished = sum(counts.get(status, 0) for status in FINAL_STATUSES)
+        # Un élément terminé, échoué ou annulé ne progressera plus: il compte comme traité
+        total_progress = 100.0 * finished + sum(dl.get('progress', 0) for dl in self.registry.group_members(group_id)
+                                                if dl['status'] not in FINAL_STATUSES)
+        counts = {status: counts.get(status, 0) for status in ("completed", "failed", "cancelled", "active", "postprocessing")}
+        text = (f"{counts['completed']}/{total} terminés, {counts['active']} en cours, "
+                f"{counts['postprocessing']} en conversion, "
+                f"{counts['failed'] + counts['cancelled']} échoués/annulés")
+        return total_progress / total, text, finished == total
+
+    def _update_group_row(self, row: dict, group_id: str):
+        """Affiche la progression agrégée d'une playlist dans une carte ou une ligne du tableau."""
+        group = self.download_groups[group_id]
+        progress, text, all_finished = self._group_summary(group_id)
+        if row['kind'] == 'table':
+            row['title_label'].config(text=f"Playlist: {group['title']}")
+            row['format_label'].config(text="")
+            row['status_label'].config(text=text, foreground=self._status_color(None))
+            row['progress_label'].config(text=f"{progress:.1f}%")
+            return
+        row['title_label'].config(text=f"Playlist: {group['title']}")
+        row['status_label'].config(text=f"Statut: {text}", foreground=self._status_color(None))
+        row['progressbar'].config(value=progress)
+        row['cancel_button'].config(text="Annuler la playlist", state='disabled' if all_finished else 'normal')
+        row['retry_button'].config(state='disabled')
+        row['front_button'].config(state='disabled')
+        row['back_button'].config(state='disabled')
+        row['logs_button'].config(state='disabled')
+
+    def _cancel_row(self, key: str):
+        if key in self.download_groups:
+            self.cancel_group(key)
+        else:
+            self.cancel_download(key)
 
-    def update_download_progress(self, download_id: str, status: str, progress: float, message: str = ""):
-        """
-        Met à jour la progression d'un téléchargement dans la liste et son widget.
-        Appelé par le Downloader.
-        """
-        # Trouver l'info de téléchargement dans la liste
-        dl_info = next((dl for dl in self.downloads_list if dl['id'] == download_id), None)
-        if dl_info:
-            # Sauvegarder l'ancien statut pour la logique de décrémentation
-            old_status = dl_info['status'] 
-            dl_info['status'] = status
-            dl_info['progress'] = progress
-            dl_info['message'] = message # Stocker le message de progression détaillé
-
-            # Mettre à jour les compteurs si le statut final est atteint
-            if status in ["completed", "failed", "cancelled"] and old_status not in ["completed", "failed", "cancelled"]:
-                with self.download_lock:
-                    self.active_download_count -= 1
-                    self.active_downloads_count_var.set(self.active_downloads_count) # Décrémenter le compteur Tkinter actif
-                    self.log(f"Téléchargement {download_id} terminé/annulé/échoué. Actifs restants: {self.active_download_count}")
-                
-                if status == "completed":
-                    self.completed_downloads_count_var.set(self.completed_downloads_count_var.get() + 1)
-                elif status in ["failed", "cancelled"]: # Regrouper les échecs et annulations
-                    self.failed_downloads_count_var.set(self.failed_downloads_count_var.get() + 1)
-
-                self.root.after(100, self._start_next_download_if_possible) # Tenter de démarrer le suivant
-
-        # Mettre à jour les widgets correspondants
-        if download_id in self.download_widgets:
-            widgets = self.download_widgets[download_id]
-            self.root.after(0, lambda: self._update_download_card_widgets(widgets, dl_info))
+    def _show_row_menu(self, key: str, event):
+        """Menu contextuel d'une ligne de la vue compacte (actions des boutons des cartes)."""
+        if key is None:
+            return
+        menu = tk.Menu(self.root, tearoff=0)
+        if key in self.download_groups:
+            menu.add_command(label="Annuler la playlist", command=lambda: self.cancel_group(key))
+        else:
+            dl_info = self.registry.get(key)
+            if dl_info is None:
+                return
+            status = dl_info['status']
+            menu.add_command(label="Annuler", command=lambda: self.cancel_download(key),
+                             state='normal' if status in ["active", "postprocessing", "En attente"] else 'disabled')
+            menu.add_command(label="Réessayer", command=lambda: self.manager.retry_download(key),
+                             state='normal' if status in ["failed", "cancelled"] else 'disabled')
+            move_state = 'normal' if status == "En attente" else 'disabled'
+            menu.add_command(label="En tête", command=lambda: self.manager.move_pending_download(key, to_front=True), state=move_state)
+            menu.add_command(label="En fin", command=lambda: self.manager.move_pending_download(key, to_front=False), state=move_state)
+            menu.add_separator()
+            menu.add_command(label="Afficher les logs", command=lambda: self.show_download_logs(key))
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    def _download_status_text(self, dl_info) -> str:
+        """Texte de statut d'un téléchargement (progression, débit, message) pour les cartes et le tableau."""
+        status = dl_info['status']
+        if status == "active":
+            status_text = f"Actif ({dl_info['progress']:.1f}%)"
+            if dl_info.get('stage') in ('postprocess', 'plan'):
+                status_text += f" - {dl_info['message']}"
+            elif dl_info.get('speed'):
+                status_text += f" - {format_bytes(dl_info['speed'])}/s, reste {format_eta(dl_info.get('eta'))}"
+                job_rate = self.downloader.bandwidth.job_rate(dl_info['id'])
+                if job_rate:
+                    status_text += f" (max {format_bytes(job_rate)}/s)"
+            return status_text
+        if status == "postprocessing":
+            return f"Conversion - {dl_info['message']}"
+        if status == "completed":
+            status_text = f"Terminé ({dl_info['message']})"
+            if dl_info.get('format_plan_mode'):
+                status_text += f" - {PLAN_LABELS.get(dl_info['format_plan_mode'], dl_info['format_plan_mode'])}"
+            return status_text
+        if status == "failed":
+            return f"Échec ({dl_info['message']})"
+        if status == "cancelled":
+            return f"Annulé ({dl_info['message']})"
+        return status
+
+    def _status_color(self, status) -> str:
+        """Couleur du texte de statut (couleur par défaut du style pour 'En attente' et les playlists)."""
+        colors = {"active": "blue", "postprocessing": "purple", "completed": "green", "failed": "red", "cancelled": "orange"}
+        if status in colors:
+            return colors[status]
+        return self.root.tk.eval('ttk::style lookup DownloadStatus.TLabel -foreground')
+
+    def _download_progress_value(self, dl_info) -> float:
+        """Valeur de la barre de progression: pleine une fois terminé, vide en attente ou après un échec."""
+        if dl_info['status'] in ("active", "postprocessing"):
+            return dl_info['progress']
+        return 100 if dl_info['status'] == "completed" else 0
 
     def _update_download_card_widgets(self, widgets: dict, dl_info: dict):
         """Met à jour les widgets d'une carte de téléchargement spécifique."""
-        status_text = f"Statut: {dl_info['status']}"
-        if dl_info['status'] == "active":
-            status_text = f"Statut: Actif ({dl_info['progress']:.1f}%)"
-            widgets['progressbar'].config(value=dl_info['progress'])
-            widgets['cancel_button'].config(state='normal') # Activer le bouton Annuler
-        elif dl_info['status'] == "En attente":
-            status_text = f"Statut: En attente"
-            widgets['progressbar'].config(value=0)
-            widgets['cancel_button'].config(state='normal')
-        elif dl_info['status'] == "completed":
-            status_text = f"Statut: Terminé ({dl_info['message']})"
-            widgets['progressbar'].config(value=100)
-            widgets['cancel_button'].config(state='disabled') # Désactiver le bouton Annuler après la fin
-            widgets['progressbar'].stop() # Arrêter l'animation si elle était en mode indéterminé
-        elif dl_info['status'] == "failed":
-            status_text = f"Statut: Échec ({dl_info['message']})"
-            widgets['progressbar'].config(value=0) # Réinitialiser la barre ou la vider
-            widgets['cancel_button'].config(state='disabled')
-            widgets['progressbar'].stop()
-        elif dl_info['status'] == "cancelled":
-            status_text = f"Statut: Annulé ({dl_info['message']})"
-            widgets['progressbar'].config(value=0)
-            widgets['cancel_button'].config(state='disabled')
-            widgets['progressbar'].stop()
-
-        widgets['status_label'].config(text=status_text)
-        
-        # Mettre à jour la couleur du statut
-        if dl_info['status'] == "active":
-            widgets['status_label'].config(foreground="blue")
-        elif dl_info['status'] == "completed":
-            widgets['status_label'].config(foreground="green")
-        elif dl_info['status'] == "failed":
-            widgets['status_label'].config(foreground="red")
-        elif dl_info['status'] == "cancelled":
-            widgets['status_label'].config(foreground="orange")
-        elif dl_info['status'] == "En attente":
-            widgets['status_label'].config(foreground=self.root.tk.eval('ttk::style lookup DownloadStatus.TLabel -foreground')) # Couleur par défaut ou gris
-        else:
-            widgets['status_label'].config(foreground=self.root.tk.eval('ttk::style lookup DownloadStatus.TLabel -foreground')) # Couleur par défaut
-
-        # Mettre à jour la région de défilement du canvas après la mise à jour des widgets
-        self.downloads_container_frame.update_idletasks()
-        self.downloads_canvas.config(scrollregion=self.downloads_canvas.bbox("all"))
+        status = dl_info['status']
+        widgets['progressbar'].config(value=self._download_progress_value(dl_info))
+        # Seuls les téléchargements en cours ou en attente peuvent être annulés
+        widgets['cancel_button'].config(state='normal' if status in ["active", "postprocessing", "En attente"] else 'disabled')
+        # Seuls les téléchargements échoués ou annulés peuvent être relancés
+        widgets['retry_button'].config(state='normal' if status in ["failed", "cancelled"] else 'disabled')
+        # Seuls les téléchargements en attente peuvent être déplacés dans la file
+        move_state = 'normal' if status == "En attente" else 'disabled'
+        widgets['front_button'].config(state=move_state)
+        widgets['back_button'].config(state=move_state)
+        widgets['status_label'].config(text=f"Statut: {self._download_status_text(dl_info)}",
+                                       foreground=self._status_color(status))
+
+    def _update_download_table_row(self, row: dict, dl_info: dict):
+        """Met à jour une ligne de la vue compacte."""
+        row['title_label'].config(text=dl_info['title'])
+        row['format_label'].config(text=str(dl_info['format']).upper())
+        row['status_label'].config(text=self._download_status_text(dl_info), foreground=self._status_color(dl_info['status']))
+        row['progress_label'].config(text=f"{self._download_progress_value(dl_info):.1f}%")
 
 
     def cancel_download(self, download_id: str):
         """Annule un téléchargement spécifique."""
-        dl_to_cancel = next((dl for dl in self.downloads_list if dl['id'] == download_id), None)
+        dl_to_cancel = self.registry.get(download_id)
         if dl_to_cancel:
-            if dl_to_cancel['status'] == "active":
+            if dl_to_cancel['status'] in ["active", "postprocessing"]:
                 if messagebox.askyesno("Confirmer Annulation", f"Êtes-vous sûr de vouloir annuler le téléchargement de '{dl_to_cancel['title']}' ?"):
-                    self.downloader.cancel_download(download_id)
-                    # Le progress_callback mettra à jour le statut à "cancelled"
+                    self.manager.cancel_download_now(dl_to_cancel)
             elif dl_to_cancel['status'] == "En attente":
                 # Si en attente, on le marque comme annulé et on met à jour son statut
                 if messagebox.askyesno("Confirmer Annulation", f"Êtes-vous sûr de vouloir annuler le téléchargement en attente de '{dl_to_cancel['title']}' ?"):
-                    dl_to_cancel['status'] = "cancelled"
-                    dl_to_cancel['message'] = "Annulé (en attente)"
-                    self.root.after(0, lambda: self._update_download_card_widgets(self.download_widgets[download_id], dl_to_cancel))
-                    self.log(f"Téléchargement en attente {dl_to_cancel['title']} annulé.")
-                    # Mettre à jour le compteur d'échecs/annulations et décrémenter "en attente"
-                    self.failed_downloads_count_var.set(self.failed_downloads_count_var.get() + 1)
-                    self.pending_downloads_count_var.set(self.pending_downloads_count_var.get() - 1)
-                    # Tenter de démarrer le prochain téléchargement si un slot se libère (bien que ce ne soit pas un slot "actif")
-                    self.root.after(100, self._start_next_download_if_possible)
+                    self.manager.cancel_download_now(dl_to_cancel)
             else:
                 messagebox.showinfo("Annuler Téléchargement", f"Le téléchargement de '{dl_to_cancel['title']}' n'est pas actif ou en attente et ne peut pas être annulé.")
         else:
             self.log(f"Erreur: Téléchargement non trouvé pour l'ID {download_id}.")
 
+    def cancel_group(self, group_id: str):
+        """Annule tous les éléments actifs ou en attente d'une playlist."""
+        group = self.download_groups.get(group_id)
+        if not group:
+            return
+        if not messagebox.askyesno("Confirmer Annulation", f"Êtes-vous sûr de vouloir annuler tous les téléchargements restants de la playlist '{group['title']}' ?"):
+            return
+        for extraction in list(self.manager.extractions.values()):
+            if extraction['group_id'] == group_id:
+                self.manager.cancel_extraction(extraction['id']) # Playlist encore en cours d'extraction
+        for dl in self.registry.group_members(group_id):
+            if dl['status'] in ["active", "postprocessing", "En attente"]:
+                self.manager.cancel_download_now(dl)
+        self._dirty_groups.add(group_id)
+
+    def change_scheduler_policy(self):
+        """Change l'ordre de la file d'attente (les éléments en attente sont réordonnés)."""
+        policy = self.scheduler_policy_var.get()
+        self.config.set_scheduler_policy(policy)
+        self.download_queue.set_policy(policy)
+        self.log(f"Ordre de la file d'attente: {POLICY_LABELS[policy]}.")
 
     def set_concurrent_downloads_limit_dialog(self):
-        """Ouvre une boîte de dialogue pour définir la limite de téléchargements simultanés."""
+        """Ouvre une boîte de dialogue pour définir la limite de téléchargements simultanés (fixe ou automatique)."""
         dialog = tk.Toplevel(self.root)
         dialog.title("Limite de Téléchargements")
-        dialog.geometry("300x150")
+        dialog.geometry("340x260")
         dialog.configure(bg='#2b2b2b')
         dialog.resizable(False, False)
         dialog.transient(self.root)
@@ -1049,6 +1142,10 @@ class MusicDLGUI:
 
         current_limit = self.config.get_concurrent_downloads_limit()
         limit_var = tk.IntVar(value=current_limit)
+        min_limit, max_limit = self.config.get_adaptive_limit_range()
+        adaptive_var = tk.BooleanVar(value=self.config.get_adaptive_concurrency())
+        min_var = tk.IntVar(value=min_limit)
+        max_var = tk.IntVar(value=max_limit)
 
         ttk.Label(dialog, text="Nombre de téléchargements simultanés (1-15):",
                   style='Custom.TLabel', background='#2b2b2b').pack(pady=10)
@@ -1057,15 +1154,42 @@ class MusicDLGUI:
                                     width=5, font=('Arial', 10), style='TEntry')
         limit_spinbox.pack(pady=5)
 
+        tk.Checkbutton(dialog, text="Mode automatique (selon le débit, les erreurs et le CPU)", variable=adaptive_var,
+                       bg='#2b2b2b', fg='white', selectcolor='#3c3c3c', activebackground='#2b2b2b',
+                       activeforeground='white').pack(pady=(10, 5))
+
+        range_frame = ttk.Frame(dialog, style='Custom.TFrame')
+        range_frame.pack(pady=5)
+        ttk.Label(range_frame, text="Entre", style='Custom.TLabel', background='#2b2b2b').pack(side='left', padx=5)
+        ttk.Spinbox(range_frame, from_=1, to=15, textvariable=min_var, width=4,
+                    font=('Arial', 10), style='TEntry').pack(side='left')
+        ttk.Label(range_frame, text="et", style='Custom.TLabel', background='#2b2b2b').pack(side='left', padx=5)
+        ttk.Spinbox(range_frame, from_=1, to=15, textvariable=max_var, width=4,
+                    font=('Arial', 10), style='TEntry').pack(side='left')
+
         def save_limit():
             try:
                 new_limit = limit_var.get()
+                adaptive = adaptive_var.get()
+                new_min, new_max = min_var.get(), max_var.get()
+                if not (1 <= new_min <= new_max <= 15):
+                    messagebox.showerror("Erreur", "La plage automatique doit vérifier 1 ≤ minimum ≤ maximum ≤ 15.")
+                    return
                 self.config.set_concurrent_downloads_limit(new_limit)
-                self.concurrent_limit = new_limit # Mettre à jour la limite interne
-                self.log(f"Limite de téléchargements simultanés définie sur: {new_limit}")
-                messagebox.showinfo("Configuration", f"Limite définie sur {new_limit}.")
+                self.config.set_adaptive_concurrency(adaptive, new_min, new_max)
+                controller = self.manager.concurrency_controller
+                controller.set_range(new_min, new_max)
+                if adaptive:
+                    self.manager.concurrent_limit = controller.limit
+                    self.log(f"Limite de téléchargements automatique entre {new_min} et {new_max} (actuellement {controller.limit}).")
+                    messagebox.showinfo("Configuration", f"Limite automatique entre {new_min} et {new_max}.")
+                else:
+                    self.manager.concurrent_limit = new_limit # Mettre à jour la limite interne
+                    controller.limit = max(new_min, min(new_max, new_limit)) # Point de départ du mode automatique
+                    self.log(f"Limite de téléchargements simultanés définie sur: {new_limit}")
+                    messagebox.showinfo("Configuration", f"Limite définie sur {new_limit}.")
                 dialog.destroy()
-                self.root.after(100, self._start_next_download_if_possible) # Tenter de démarrer de nouveaux téléchargements avec la nouvelle limite
+                self.ui_bus.call_once(self.manager.start_next_download_if_possible) # Tenter de démarrer de nouveaux téléchargements avec la nouvelle limite
             except tk.TclError:
                 messagebox.showerror("Erreur", "Veuillez entrer un nombre valide.")
 
@@ -1075,6 +1199,432 @@ class MusicDLGUI:
         dialog.wait_window(dialog)
 
 
+    def set_bandwidth_limit_dialog(self):
+        """Ouvre une boîte de dialogue pour définir la limite globale de bande passante et ses plages horaires."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Bande Passante")
+        dialog.geometry("380x330")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        limit_var = tk.IntVar(value=self.config.get_bandwidth_limit())
+
+        ttk.Label(dialog, text="Limite globale en Kio/s (0 = illimitée):",
+                  style='Custom.TLabel', background='#2b2b2b').pack(pady=10)
+        ttk.Spinbox(dialog, from_=0, to=10000000, increment=128, textvariable=limit_var,
+                    width=10, font=('Arial', 10), style='TEntry').pack(pady=5)
+
+        ttk.Label(dialog, text="Plages horaires, une par ligne (prioritaires):\nex: lun-ven 08:00-18:00 500",
+                  style='Custom.TLabel', background='#2b2b2b', justify='center').pack(pady=(10, 5))
+        schedule_text = tk.Text(dialog, height=5, width=36, bg='#4c4c4c', fg='white', insertbackground='white',
+                                font=('Arial', 10))
+        schedule_text.pack(pady=5)
+        schedule_text.insert('1.0', "\n".join(format_schedule_rule(rule) for rule in self.config.get_bandwidth_schedule()))
+
+        def save_bandwidth():
+            try:
+                limit_kib = limit_var.get()
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer un nombre valide.")
+                return
+            schedule = []
+            for line in schedule_text.get('1.0', 'end').splitlines():
+                if not line.strip():
+                    continue
+                rule = parse_schedule_line(line)
+                if rule is None:
+                    messagebox.showerror("Erreur", f"Plage horaire invalide: '{line.strip()}'\nFormat attendu: [jours] HH:MM-HH:MM Kio/s")
+                    return
+                schedule.append(rule)
+            self.config.set_bandwidth_limit(limit_kib, schedule)
+            self.downloader.set_bandwidth_limit(limit_kib, schedule)
+            current = self.downloader.bandwidth.current_limit()
+            self.event_log.emit('bandwidth_limit', limit=limit_kib, current=current, schedule_rules=len(schedule))
+            self.log(f"Limite de bande passante: {format_bytes(current) + '/s' if current else 'illimitée'} actuellement "
+                     f"({len(schedule)} plage(s) horaire(s)); appliquée aux prochains téléchargements du moteur subprocess, "
+                     f"immédiatement pour le moteur en bibliothèque.")
+            dialog.destroy()
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_bandwidth, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
+    def _adaptive_concurrency_tick(self):
+        """Mesure périodique du contrôleur adaptatif (thread Tk), toutes les DEFAULT_SAMPLE_INTERVAL_MS."""
+        try:
+            self.manager.adaptive_concurrency_tick()
+        finally:
+            self.root.after(DEFAULT_SAMPLE_INTERVAL_MS, self._adaptive_concurrency_tick)
+
+    def toggle_io_engine(self):
+        """Active ou désactive la boucle E/S partagée pour les prochains téléchargements."""
+        mode = "async" if self.async_io_engine_var.get() else "threads"
+        self.config.set_io_engine(mode)
+        self.downloader.set_io_engine(mode)
+        self.log(f"Moteur E/S des téléchargements: {mode} (appliqué aux prochains téléchargements).")
+
+    def change_download_backend(self):
+        """Change le moteur de téléchargement pour les prochaines tâches et extractions."""
+        requested = self.download_backend_var.get()
+        self.downloader.set_backend(requested)
+        actual = self.downloader.backend.name
+        self.download_backend_var.set(actual)
+        self.config.set_download_backend(actual)
+        if actual != requested:
+            messagebox.showwarning("Moteur de téléchargement", "La bibliothèque yt_dlp n'est pas installée.\n\nInstallez-la avec : pip install yt-dlp")
+        self.log(f"Moteur de téléchargement: {actual} (appliqué aux prochains téléchargements).")
+
+    def toggle_format_planning(self):
+        """Active ou non la planification des formats pour les prochains téléchargements."""
+        enabled = self.format_planning_var.get()
+        self.config.set_format_planning(enabled)
+        self.downloader.set_format_planning(enabled)
+        self.log("Planification des formats: " + ("activée (copie/remultiplexage si possible)" if enabled else "désactivée (profils par défaut)"))
+
+    def toggle_offline_mode(self):
+        """Active ou non le mode hors ligne: les URLs ne sont plus extraites, seul le cache des métadonnées répond."""
+        enabled = self.offline_mode_var.get()
+        self.config.set_offline_mode(enabled)
+        self.downloader.set_offline_mode(enabled)
+        self.log("Mode hors ligne: " + ("activé (métadonnées du cache uniquement)" if enabled else "désactivé"))
+
+    def toggle_two_stage_pipeline(self):
+        """Active ou non le pool de conversion séparé pour les prochains téléchargements."""
+        enabled = self.two_stage_pipeline_var.get()
+        self.config.set_two_stage_pipeline(enabled)
+        self.downloader.set_two_stage_pipeline(enabled)
+        self.log("Conversions séparées des téléchargements: " + ("activées" if enabled else "désactivées (conversion par yt-dlp)"))
+
+    def toggle_low_priority_postprocess(self):
+        """Active ou non la priorité basse des prochaines conversions."""
+        enabled = self.low_priority_postprocess_var.get()
+        self.config.set_low_priority_postprocess(enabled)
+        self.downloader.set_low_priority_postprocess(enabled)
+        self.log("Conversions en priorité basse: " + ("activée" if enabled else "désactivée"))
+
+    def set_postprocess_workers_dialog(self):
+        """Ouvre une boîte de dialogue pour définir le nombre de conversions simultanées."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Limite de Conversions")
+        dialog.geometry("320x150")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        workers_var = tk.IntVar(value=self.config.get_postprocess_workers())
+
+        ttk.Label(dialog, text=f"Conversions simultanées (0 = {default_postprocess_workers()} cœurs):",
+                  style='Custom.TLabel', background='#2b2b2b').pack(pady=10)
+
+        workers_spinbox = ttk.Spinbox(dialog, from_=0, to=64, textvariable=workers_var,
+                                      width=5, font=('Arial', 10), style='TEntry')
+        workers_spinbox.pack(pady=5)
+
+        def save_workers():
+            try:
+                workers = workers_var.get()
+                if not (0 <= workers <= 64):
+                    raise tk.TclError
+                self.config.set_postprocess_workers(workers)
+                self.downloader.set_postprocess_workers(workers)
+                self.log(f"Limite de conversions simultanées définie sur: {workers or default_postprocess_workers()}")
+                dialog.destroy()
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer un nombre entre 0 et 64.")
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_workers, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
+    def set_log_max_lines_dialog(self):
+        """Ouvre une boîte de dialogue pour définir le nombre de lignes gardées par la console de log."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Console de Log")
+        dialog.geometry("320x150")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        lines_var = tk.IntVar(value=self.config.get_log_max_lines())
+
+        ttk.Label(dialog, text="Lignes gardées par niveau (100-200000):",
+                  style='Custom.TLabel', background='#2b2b2b').pack(pady=10)
+
+        lines_spinbox = ttk.Spinbox(dialog, from_=100, to=200000, increment=1000, textvariable=lines_var,
+                                    width=8, font=('Arial', 10), style='TEntry')
+        lines_spinbox.pack(pady=5)
+
+        def save_lines():
+            try:
+                max_lines = lines_var.get()
+                if not (100 <= max_lines <= 200000):
+                    raise tk.TclError
+                self.config.set_log_max_lines(max_lines)
+                self.log_console.set_max_lines(max_lines)
+                self.log(f"Console de log limitée à {max_lines} lignes par niveau.")
+                dialog.destroy()
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer un nombre entre 100 et 200000.")
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_lines, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
+    def set_event_log_dialog(self):
+        """Ouvre une boîte de dialogue pour activer le journal des événements et définir sa taille avant rotation."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Journal des Événements")
+        dialog.geometry("340x190")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        enabled_var = tk.BooleanVar(value=self.config.get_event_log_enabled())
+        size_var = tk.IntVar(value=self.config.get_event_log_max_mb())
+
+        ttk.Checkbutton(dialog, text="Enregistrer les événements (events.jsonl)", variable=enabled_var).pack(pady=10)
+        ttk.Label(dialog, text="Taille d'un fichier avant rotation (1-2000 Mo):",
+                  style='Custom.TLabel', background='#2b2b2b').pack(pady=5)
+
+        size_spinbox = ttk.Spinbox(dialog, from_=1, to=2000, increment=10, textvariable=size_var,
+                                   width=8, font=('Arial', 10), style='TEntry')
+        size_spinbox.pack(pady=5)
+
+        def save_event_log():
+            try:
+                max_mb = size_var.get()
+                if not (1 <= max_mb <= 2000):
+                    raise tk.TclError
+                self.config.set_event_log(enabled_var.get(), max_mb)
+                self.event_log.enabled = enabled_var.get()
+                self.event_log.max_bytes = max_mb * 1024 * 1024
+                self.log(f"Journal des événements {'activé' if enabled_var.get() else 'désactivé'} "
+                         f"(rotation à {max_mb} Mo).")
+                dialog.destroy()
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer un nombre entre 1 et 2000.")
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_event_log, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
+    def set_control_api_dialog(self):
+        """Ouvre une boîte de dialogue pour activer l'API de contrôle locale et définir son port et son jeton."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("API de Contrôle Locale")
+        dialog.geometry("380x260")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        enabled_var = tk.BooleanVar(value=self.config.get_control_api_enabled())
+        port_var = tk.IntVar(value=self.config.get_control_api_port())
+        token_var = tk.StringVar(value=self.config.get_control_api_token())
+
+        ttk.Checkbutton(dialog, text="Activer l'API HTTP/JSON (127.0.0.1 uniquement)", variable=enabled_var).pack(pady=10)
+        ttk.Label(dialog, text="Port (1024-65535):", style='Custom.TLabel', background='#2b2b2b').pack(pady=5)
+        port_spinbox = ttk.Spinbox(dialog, from_=1024, to=65535, increment=1, textvariable=port_var,
+                                   width=8, font=('Arial', 10), style='TEntry')
+        port_spinbox.pack(pady=5)
+        ttk.Label(dialog, text="Jeton (en-tête Authorization: Bearer, vide: aucun):",
+                  style='Custom.TLabel', background='#2b2b2b').pack(pady=5)
+        ttk.Entry(dialog, textvariable=token_var, width=36, style='TEntry').pack(pady=5)
+
+        def save_control_api():
+            try:
+                port = port_var.get()
+                if not (1024 <= port <= 65535):
+                    raise tk.TclError
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer un port entre 1024 et 65535.")
+                return
+            self.config.set_control_api(enabled_var.get(), port, token_var.get())
+            self.stop_control_api()
+            if enabled_var.get():
+                self.start_control_api()
+            else:
+                self.log("API de contrôle désactivée.")
+            dialog.destroy()
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_control_api, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
+    def start_control_api(self):
+        """Démarre l'API de contrôle locale avec le port et le jeton configurés."""
+        server = ControlAPIServer(self.manager, self.config.get_control_api_port(), self.config.get_control_api_token())
+        try:
+            server.start()
+        except OSError as e:
+            self.log(f"Impossible de démarrer l'API de contrôle sur le port {server.port}: {e}")
+            return
+        self.control_api = server
+
+    def stop_control_api(self):
+        if self.control_api is not None:
+            self.control_api.stop()
+            self.control_api = None
+
+    def set_metrics_dialog(self):
+        """Ouvre une boîte de dialogue pour activer l'écriture périodique des métriques (format Prometheus)."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Métriques")
+        dialog.geometry("420x200")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        enabled_var = tk.BooleanVar(value=self.config.get_metrics_file_enabled())
+        ttk.Checkbutton(dialog, text=f"Écrire {METRICS_FILE_NAME} toutes les {DEFAULT_FILE_INTERVAL:.0f} s (dossier de données)",
+                        variable=enabled_var).pack(pady=10)
+        ttk.Label(dialog, text="Les métriques sont aussi servies sur /metrics\npar l'API de contrôle locale lorsqu'elle est activée.",
+                  style='Custom.TLabel', background='#2b2b2b', justify='center').pack(pady=5)
+
+        def save_metrics():
+            self.config.set_metrics_file_enabled(enabled_var.get())
+            self.stop_metrics_file()
+            if enabled_var.get():
+                self.start_metrics_file()
+            self.log(f"Écriture des métriques {'activée' if enabled_var.get() else 'désactivée'}.")
+            dialog.destroy()
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_metrics, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
+    def start_metrics_file(self):
+        """Démarre l'écriture périodique de metrics.prom dans le dossier de données."""
+        self.metrics_file_writer = MetricsFileWriter(self.manager, os.path.join(self.config.get_data_dir(), METRICS_FILE_NAME))
+        self.metrics_file_writer.start()
+
+    def stop_metrics_file(self):
+        if self.metrics_file_writer is not None:
+            self.metrics_file_writer.stop()
+            self.metrics_file_writer = None
+
+    def set_metadata_cache_dialog(self):
+        """Ouvre une boîte de dialogue pour régler le cache des métadonnées (durée de validité, taille) ou le vider."""
+        cache = self.downloader.metadata_cache
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Cache des Métadonnées")
+        dialog.geometry("380x300")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        enabled_var = tk.BooleanVar(value=self.config.get_metadata_cache_enabled())
+        ttl_var = tk.IntVar(value=self.config.get_metadata_cache_ttl_hours())
+        size_var = tk.IntVar(value=self.config.get_metadata_cache_max_entries())
+
+        ttk.Checkbutton(dialog, text="Réutiliser les métadonnées déjà extraites", variable=enabled_var).pack(pady=10)
+        ttk.Label(dialog, text="Durée de validité (1-720 heures):", style='Custom.TLabel', background='#2b2b2b').pack(pady=5)
+        ttk.Spinbox(dialog, from_=1, to=720, increment=1, textvariable=ttl_var,
+                    width=8, font=('Arial', 10), style='TEntry').pack(pady=5)
+        ttk.Label(dialog, text="Éléments gardés en cache (100-1000000):", style='Custom.TLabel', background='#2b2b2b').pack(pady=5)
+        ttk.Spinbox(dialog, from_=100, to=1000000, increment=1000, textvariable=size_var,
+                    width=8, font=('Arial', 10), style='TEntry').pack(pady=5)
+
+        def clear_cache():
+            cache.clear()
+            self.log("Le cache des métadonnées a été vidé.")
+
+        def save_metadata_cache():
+            try:
+                ttl_hours, max_entries = ttl_var.get(), size_var.get()
+                if not (1 <= ttl_hours <= 720) or not (100 <= max_entries <= 1000000):
+                    raise tk.TclError
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer une durée entre 1 et 720 heures et une taille entre 100 et 1000000.")
+                return
+            self.config.set_metadata_cache(enabled_var.get(), ttl_hours, max_entries)
+            self.downloader.set_metadata_cache(enabled_var.get(), ttl_hours, max_entries)
+            self.log(f"Cache des métadonnées {'activé' if enabled_var.get() else 'désactivé'} "
+                     f"(validité {ttl_hours} h, {max_entries} éléments au plus, {cache.size()} en cache).")
+            dialog.destroy()
+
+        buttons = ttk.Frame(dialog, style='Custom.TFrame')
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text=f"Vider ({cache.size()} éléments)", command=clear_cache).pack(side='left', padx=5)
+        ttk.Button(buttons, text="Sauvegarder", command=save_metadata_cache, style='Accent.TButton').pack(side='left', padx=5)
+
+        dialog.wait_window(dialog)
+
+    def show_event_log(self):
+        """Ouvre la fenêtre de consultation du journal des événements (les événements en attente sont écrits d'abord)."""
+        self.event_log.flush()
+        EventLogViewer(self.root, self.event_log.path)
+
+    def export_stage_timings(self):
+        """Exporte en CSV le temps passé par chaque téléchargement de la session dans chaque étape."""
+        path = filedialog.asksaveasfilename(title="Exporter les temps par étape", defaultextension=".csv",
+                                            initialfile="temps_par_etape.csv",
+                                            filetypes=[("Fichiers CSV", "*.csv"), ("Tous les fichiers", "*.*")])
+        if not path:
+            return
+        try:
+            count = self.manager.timings.export_csv(path)
+        except OSError as e:
+            messagebox.showerror("Exporter les temps par étape", f"Impossible d'écrire {path}: {e}")
+            return
+        self.log(f"Temps par étape de {count} téléchargement(s) exportés dans {path}")
+
+    def set_download_retention_dialog(self):
+        """Ouvre une boîte de dialogue pour définir le nombre de téléchargements terminés gardés affichés."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Historique des Téléchargements")
+        dialog.geometry("360x190")
+        dialog.configure(bg='#2b2b2b')
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        retention_var = tk.IntVar(value=self.config.get_download_retention())
+        history_var = tk.BooleanVar(value=self.config.get_download_history())
+
+        ttk.Label(dialog, text="Téléchargements terminés gardés affichés (10-100000):",
+                  style='Custom.TLabel', background='#2b2b2b').pack(pady=10)
+
+        retention_spinbox = ttk.Spinbox(dialog, from_=10, to=100000, increment=100, textvariable=retention_var,
+                                        width=8, font=('Arial', 10), style='TEntry')
+        retention_spinbox.pack(pady=5)
+        ttk.Checkbutton(dialog, text="Ajouter les plus anciens à l'historique (download_history.jsonl)",
+                        variable=history_var).pack(pady=5)
+
+        def save_retention():
+            try:
+                retention = retention_var.get()
+                if not (10 <= retention <= 100000):
+                    raise tk.TclError
+                self.config.set_download_retention(retention, history_var.get())
+                self.registry.retention = retention
+                self.registry.history_path = (os.path.join(self.config.get_data_dir(), "download_history.jsonl")
+                                              if history_var.get() else None)
+                self._evict_finished_downloads()
+                history_note = " (les plus anciens sont ajoutés à l'historique)" if history_var.get() else ""
+                self.log(f"Téléchargements terminés gardés affichés: {retention}{history_note}.")
+                dialog.destroy()
+            except tk.TclError:
+                messagebox.showerror("Erreur", "Veuillez entrer un nombre entre 10 et 100000.")
+
+        save_btn = ttk.Button(dialog, text="Sauvegarder", command=save_retention, style='Accent.TButton')
+        save_btn.pack(pady=10)
+
+        dialog.wait_window(dialog)
+
     def configure_api_key(self):
         current_key = self.config.api_key
         dialog = APIKeyDialog(self.root, current_key)
@@ -1090,8 +1640,15 @@ class MusicDLGUI:
             else:
                 messagebox.showwarning("Configuration API", "Clé API sauvegardée, mais la connexion à l'API a échoué. Vérifiez votre clé ou votre connexion internet.")
 
+    def _startup_google_api_check(self):
+        """Vérification de google-api-python-client au démarrage, une fois son installation éventuelle terminée."""
+        if self.dependencies_checked is not None and not self.dependencies_checked.is_set():
+            self.root.after(300, self._startup_google_api_check) # pip install encore en cours
+            return
+        self.check_google_api_client()
+
     def check_google_api_client(self):
-        if GOOGLE_API_AVAILABLE:
+        if google_api_installed():
             if self.youtube_api.is_available():
                 messagebox.showinfo("Vérification API", "google-api-python-client est installé et la clé API YouTube est configurée correctement.")
                 self.log("API Google YouTube: Disponible et configurée.")
@@ -1107,7 +1664,8 @@ class MusicDLGUI:
         """Vérifie si yt-dlp est installé et met à jour son chemin."""
         yt_dlp_location = self.downloader.find_yt_dlp_location()
         if yt_dlp_location:
-            messagebox.showinfo("Vérification yt-dlp", f"yt-dlp est trouvé à : {yt_dlp_location}")
+            version = self.downloader.executable_versions.get("yt-dlp", "?")
+            messagebox.showinfo("Vérification yt-dlp", f"yt-dlp est trouvé à : {yt_dlp_location}\nVersion : {version}")
         else:
             messagebox.showwarning("Vérification yt-dlp", "yt-dlp n'est pas trouvé. La fonctionnalité de téléchargement pourrait être limitée.")
 
@@ -1136,7 +1694,8 @@ class MusicDLGUI:
         """Vérifie si FFmpeg est installé et met à jour son chemin."""
         ffmpeg_location = self.downloader.find_ffmpeg_location()
         if ffmpeg_location:
-            messagebox.showinfo("Vérification FFmpeg", f"FFmpeg est trouvé à : {ffmpeg_location}")
+            version = self.downloader.executable_versions.get("ffmpeg", "?")
+            messagebox.showinfo("Vérification FFmpeg", f"FFmpeg est trouvé à : {ffmpeg_location}\nVersion : {version}")
         else:
             messagebox.showwarning("Vérification FFmpeg", "FFmpeg n'est pas trouvé. La conversion en MP3/WAV pourrait ne pas fonctionner. Veuillez l'installer.")
 
@@ -1153,9 +1712,43 @@ class MusicDLGUI:
         self.root.after(1000, self.check_ffmpeg_status)
 
 
-    def check_and_offer_yt_dlp_install(self):
+    def _discover_tools_in_background(self):
+        """Localise yt-dlp et FFmpeg hors du thread Tk (résultat en cache, revalidé par stat)."""
+        started_at = time.perf_counter()
+        yt_dlp_found, ffmpeg_found = self.manager.discover_tools()
+        STARTUP_TIMER.mark_background("Recherche de yt-dlp et FFmpeg", started_at)
+        self.ui_bus.call(self._on_tools_discovered, yt_dlp_found, ffmpeg_found)
+
+    def _on_tools_discovered(self, yt_dlp_found: bool, ffmpeg_found: bool):
+        self.manager.tools_discovered = True
+        self.check_and_offer_yt_dlp_install(yt_dlp_found)
+        self.check_and_offer_ffmpeg_install(ffmpeg_found)
+        self.manager.start_next_download_if_possible() # Téléchargements restaurés ou ajoutés pendant la recherche
+        self._report_startup_timings()
+
+    def _on_first_idle(self):
+        """Appelé quand la fenêtre est affichée et que la boucle Tk est disponible."""
+        self._interactive = True
+        STARTUP_TIMER.mark_interactive()
+        if self.config.get_control_api_enabled():
+            self.start_control_api()
+        if self.config.get_metrics_file_enabled():
+            self.start_metrics_file()
+        self._report_startup_timings()
+
+    def _report_startup_timings(self):
+        """Affiche les temps de démarrage (option --startup-timings) une fois toutes les phases terminées."""
+        if not STARTUP_TIMER.enabled or not (self._interactive and self.manager.tools_discovered):
+            return
+        report = STARTUP_TIMER.report()
+        print(report)
+        self.log(report)
+
+    def check_and_offer_yt_dlp_install(self, found: bool = None):
         """Vérifie yt-dlp au démarrage et propose l'installation si non trouvé."""
-        if not self.downloader.find_yt_dlp_location():
+        if found is None:
+            found = bool(self.downloader.find_yt_dlp_location())
+        if not found:
             self.root.after(500, lambda: messagebox.showwarning(
                 "yt-dlp Manquant",
                 "yt-dlp (le téléchargeur) n'a pas été trouvé sur votre système. "
@@ -1164,9 +1757,11 @@ class MusicDLGUI:
             ))
             self.log("Avertissement: yt-dlp n'a pas été trouvé au démarrage.")
 
-    def check_and_offer_ffmpeg_install(self):
+    def check_and_offer_ffmpeg_install(self, found: bool = None):
         """Vérifie FFmpeg au démarrage et propose l'installation si non trouvé."""
-        if not self.downloader.find_ffmpeg_location():
+        if found is None:
+            found = bool(self.downloader.find_ffmpeg_location())
+        if not found:
             self.root.after(600, lambda: messagebox.showwarning(
                 "FFmpeg Manquant",
                 "FFmpeg (le convertisseur audio/vidéo) n'a pas été trouvé sur votre système. "
@@ -1182,6 +1777,25 @@ class MusicDLGUI:
             self.downloader.set_download_path(folder_selected)
             self.log(f"Dossier de téléchargement défini sur: {self.config.download_path}")
 
+    def set_data_folder(self):
+        """Change le dossier des données persistantes (archive des téléchargements)."""
+        folder_selected = filedialog.askdirectory(initialdir=self.config.get_data_dir())
+        if folder_selected:
+            self.config.set_data_dir(folder_selected)
+            self.manager.archive = DownloadArchive(os.path.join(folder_selected, "archive.txt"))
+            self.log(f"Dossier de données défini sur: {folder_selected} ({self.manager.archive.size()} élément(s) archivé(s))")
+
+    def toggle_skip_archived(self):
+        """Active ou non l'omission des éléments déjà présents dans l'archive."""
+        enabled = self.skip_archived_var.get()
+        self.config.set_skip_archived_downloads(enabled)
+        self.log("Éléments déjà téléchargés: " + ("ignorés" if enabled else "retéléchargés (signalés)"))
+
+    def clear_download_archive(self):
+        if messagebox.askyesno("Vider l'archive", f"Êtes-vous sûr de vouloir vider l'archive des téléchargements ({self.manager.archive.size()} élément(s)) ? Tous les éléments pourront à nouveau être téléchargés."):
+            self.manager.archive.clear()
+            self.log("L'archive des téléchargements a été vidée.")
+
     def on_multiple_download_complete(self, success_count: int, total_count: int):
         """Callback après un téléchargement multiple."""
         self.log(f"Téléchargement multiple terminé: {success_count} sur {total_count} réussis.")
@@ -1194,5 +1808,12 @@ class MusicDLGUI:
 
     def run(self):
         """Lancer l'application."""
+        # after(0) puis after_idle: exécuté après l'affichage initial de la fenêtre
+        self.root.after(0, lambda: self.root.after_idle(self._on_first_idle))
         self.root.mainloop()
+        self.ui_bus.detach()
+        self.stop_control_api()
+        self.stop_metrics_file()
+        # Les téléchargements encore actifs restent "active" dans le journal et seront repris au prochain lancement
+        self.manager.close()
 
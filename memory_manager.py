@@ -42,6 +42,18 @@ class MemoryManager:
             print(f"Erreur lors de l'ajout: {e}")
             return False
             
+    def add_items(self, items: List[Dict]) -> int:
+        """Ajouter plusieurs éléments en une seule sauvegarde. Retourne le nombre d'éléments ajoutés"""
+        for info in items:
+            self.memory_data.append({
+                "title": info["title"],
+                "url": info["url"],
+                "duration": info["duration"]
+            })
+        if items:
+            self.save_memory()
+        return len(items)
+
     def remove_item(self, index: int) -> bool:
         """Supprimer un élément de la mémoire"""
         try:
@@ -0,0 +1,236 @@
+# metadata_cache.py
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from download_archive import extract_video_key
+
+CACHE_FILE_NAME = "metadata_cache.jsonl"
+# Durée de validité des métadonnées d'une vidéo (titre, durée, formats), en heures
+DEFAULT_TTL_HOURS = 24
+# Le contenu d'une playlist change plus souvent: sa liste d'éléments n'est gardée qu'une heure (au plus le TTL)
+PLAYLIST_TTL = 3600
+# Nombre maximal d'éléments en cache (une vidéo compte pour 1, une playlist pour son nombre d'éléments)
+DEFAULT_MAX_ENTRIES = 20000
+# Champs conservés des métadonnées d'une vidéo ou d'un élément de playlist (lus par extract_video_info)
+_INFO_FIELDS = ('id', 'title', 'webpage_url', 'url', 'duration', 'filesize', 'filesize_approx',
+                'playlist_title', 'playlist')
+# Champs conservés de chaque format (lus par format_planner.plan_format)
+_FORMAT_FIELDS = ('format_id', 'ext', 'acodec', 'vcodec', 'abr', 'tbr', 'asr', 'height', 'fps',
+                  'filesize', 'filesize_approx')
+
+
+def cache_key(url: str, playlist: bool = False) -> str:
+    """
+    Clé d'une URL sans accès réseau: identifiant de la vidéo (quelle que soit la forme de l'URL)
+    ou, pour une playlist, identifiant de la liste. Les URLs non reconnues sont gardées telles quelles.
+    """
+    url = url.strip()
+    if playlist:
+        list_ids = parse_qs(urlparse(url).query).get('list')
+        if list_ids:
+            return f"playlist:{list_ids[0]}"
+        return f"playlist:{url}"
+    extractor, video_id = extract_video_key(url)
+    return f"{extractor}:{video_id}"
+
+
+def _trim(data: Dict, fields) -> Dict:
+    return {field: data[field] for field in fields if data.get(field) is not None}
+
+
+class MetadataCache:
+    """
+    Cache persistant des métadonnées extraites par yt-dlp, indexé par identifiant de vidéo ou de playlist:
+    titre, durée, taille approximative et formats disponibles (pour la planification des formats).
+    Les entrées expirent après `ttl_hours` (une heure pour le contenu d'une playlist) et les moins récemment
+    utilisées sont évincées au-delà de `max_entries` éléments. En mode hors ligne, les entrées expirées
+    restent servies. Le fichier est en ajout seul (une ligne JSON par entrée écrite), compacté au chargement
+    et quand il contient deux fois plus de lignes que d'entrées.
+    """
+
+    def __init__(self, cache_path: str = "C:/YoutubeDownloader/" + CACHE_FILE_NAME,
+                 ttl_hours: int = DEFAULT_TTL_HOURS, max_entries: int = DEFAULT_MAX_ENTRIES, enabled: bool = True):
+        self.cache_path = cache_path
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict() # Du moins au plus récemment utilisé
+        self._weight = 0 # Nombre d'éléments en cache
+        self._lines = 0 # Lignes du fichier (compactage)
+        self._lock = threading.Lock()
+        self.load_cache()
+
+    # --- Fichier ---
+
+    def load_cache(self):
+        """Relit le fichier (la dernière ligne d'une clé l'emporte), écarte les entrées expirées et compacte."""
+        entries: "OrderedDict[str, Dict]" = OrderedDict()
+        try:
+            with open(self.cache_path, "r", encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # Dernière ligne tronquée par un arrêt brutal
+                    if isinstance(entry, dict) and entry.get('key'):
+                        entries.pop(entry['key'], None)
+                        entries[entry['key']] = entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Erreur lors de la lecture du cache des métadonnées: {e}")
+        # Les entrées expirées depuis longtemps ne servent plus, même hors ligne
+        oldest = time.time() - max(self.ttl, PLAYLIST_TTL) * 30
+        with self._lock:
+            self._entries = OrderedDict((key, entry) for key, entry in entries.items() if entry.get('at', 0) >= oldest)
+            self._weight = sum(self._entry_weight(entry) for entry in self._entries.values())
+            self._evict()
+            self._compact()
+
+    def _compact(self):
+        """Réécrit le fichier avec les seules entrées en mémoire, de la moins à la plus récemment utilisée."""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, "w", encoding='utf-8') as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(temp_path, self.cache_path)
+            self._lines = len(self._entries)
+        except Exception as e:
+            print(f"Erreur lors du compactage du cache des métadonnées: {e}")
+
+    def _append(self, entries: List[Dict]):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "a", encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._lines += len(entries)
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du cache des métadonnées: {e}")
+        if self._lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    # --- Entrées ---
+
+    @staticmethod
+    def _entry_weight(entry: Dict) -> int:
+        return max(1, len(entry.get('items') or ()))
+
+    def _store(self, entry: Dict):
+        old = self._entries.pop(entry['key'], None)
+        if old is not None:
+            self._weight -= self._entry_weight(old)
+        self._entries[entry['key']] = entry
+        self._weight += self._entry_weight(entry)
+
+    def _evict(self):
+        """Évince les entrées les moins récemment utilisées au-delà de max_entries éléments."""
+        while self._weight > self.max_entries and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._weight -= self._entry_weight(entry)
+
+    def _fresh(self, entry: Optional[Dict], ttl: float, offline: bool) -> bool:
+        return entry is not None and (offline or time.time() - entry.get('at', 0) < ttl)
+
+    def _lookup(self, key: str, ttl: float, offline: bool) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if not self._fresh(entry, ttl, offline):
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_entries(self, url: str, flat_playlist: bool = False, offline: bool = False) -> Optional[List[Dict]]:
+        """
+        Métadonnées en cache pour une URL, au format de Downloader.extract_info (une entrée par vidéo),
+        ou None si l'URL est absente, expirée (sauf hors ligne) ou si le cache est désactivé.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if flat_playlist:
+                entry = self._lookup(cache_key(url, playlist=True), min(self.ttl, PLAYLIST_TTL), offline)
+                result = [dict(item) for item in entry['items']] if entry is not None else None
+            else:
+                entry = self._lookup(cache_key(url), self.ttl, offline)
+                result = [dict(entry['info'])] if entry is not None and entry.get('info') else None
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put_entries(self, url: str, flat_playlist: bool, entries: List[Dict]):
+        """
+        Mémorise le résultat d'une extraction. Les éléments d'une playlist sont aussi mémorisés
+        individuellement (une vidéo de la playlist ajoutée seule ne sera pas réextraite).
+        """
+        if not self.enabled or not entries:
+            return
+        now = time.time()
+        written = []
+        with self._lock:
+            items = [_trim(data, _INFO_FIELDS) for data in entries]
+            if flat_playlist:
+                written.append({'key': cache_key(url, playlist=True), 'at': now, 'items': items})
+            for item in items if flat_playlist else items[:1]:
+                video_url = item.get('webpage_url') or item.get('url') or url
+                key = cache_key(video_url)
+                old = self._entries.get(key) or {}
+                info = {field: value for field, value in item.items() if field not in ('playlist_title', 'playlist')}
+                entry = {'key': key, 'at': now, 'info': info}
+                if old.get('formats') is not None:
+                    entry['formats'], entry['formats_at'] = old['formats'], old.get('formats_at', old.get('at', 0))
+                written.append(entry)
+            if not flat_playlist and entries[0].get('formats'):
+                written[-1]['formats'] = [_trim(fmt, _FORMAT_FIELDS) for fmt in entries[0]['formats']]
+                written[-1]['formats_at'] = now
+            for entry in written:
+                self._store(entry)
+            self._evict()
+            self._append(written)
+
+    def get_formats(self, url: str, offline: bool = False) -> Optional[List[Dict]]:
+        """Formats disponibles d'une vidéo (pour format_planner.plan_format), None s'ils ne sont pas en cache."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(cache_key(url))
+            if entry is None or entry.get('formats') is None:
+                return None
+            if not offline and time.time() - entry.get('formats_at', 0) >= self.ttl:
+                return None
+            self._entries.move_to_end(entry['key'])
+            return [dict(fmt) for fmt in entry['formats']]
+
+    def put_formats(self, url: str, info: Dict):
+        """Mémorise les formats (et le titre, la durée...) issus d'une extraction complète (-J) d'une vidéo."""
+        if not self.enabled or not info or info.get('_type') == 'playlist' or not info.get('formats'):
+            return
+        self.put_entries(url, False, [info])
+
+    def configure(self, enabled: bool, ttl_hours: int, max_entries: int):
+        """Applique de nouveaux réglages (l'éviction suit immédiatement une limite abaissée)."""
+        with self._lock:
+            self.enabled = enabled
+            self.ttl = ttl_hours * 3600
+            self.max_entries = max_entries
+            self._evict()
+
+    def size(self) -> int:
+        """Nombre d'éléments en cache."""
+        return self._weight
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._weight = 0
+            self._compact()
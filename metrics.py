@@ -0,0 +1,263 @@
+# metrics.py
+import os
+import time
+import bisect
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+# Bornes des histogrammes de durée (secondes), au format Prometheus (le bucket +Inf est implicite)
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+# Étapes mesurées: attente dans la file, téléchargement (réseau), conversion (pool de post-traitement)
+STAGES = ("queue_wait", "download", "postprocess")
+# Intervalle d'écriture du fichier de métriques (secondes)
+DEFAULT_FILE_INTERVAL = 15.0
+METRICS_FILE_NAME = "metrics.prom"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Classes d'erreur des échecs, reconnues dans la dernière erreur de yt-dlp (ou le message d'échec), dans cet ordre
+_FAILURE_CLASSES = (
+    ('throttled', ("http error 429", "too many requests", "http error 403", "rate-limit", "rate limit")),
+    ('geo_blocked', ("not available in your country", "geo restrict", "geo-restrict")),
+    ('unavailable', ("video unavailable", "private video", "has been removed", "is not available",
+                     "members-only", "sign in to confirm", "account associated")),
+    ('network', ("timed out", "connection", "network", "unable to download webpage", "getaddrinfo",
+                 "ssl", "temporary failure", "incompleteread")),
+    ('missing_tool', ("non trouvé", "non configuré", "non installé")),
+    ('filesystem', ("dossier de téléchargement", "no space left", "permission denied", "introuvable",
+                    "errno 28", "errno 13")),
+    ('postprocess', ("ffmpeg", "postprocess", "conversion")),
+)
+_FINAL_STATUSES = ("completed", "failed", "cancelled")
+_ACTIVE_STATUSES = ("active", "postprocessing")
+
+
+def classify_failure(text: str) -> str:
+    """Classe d'erreur d'un échec (throttled, unavailable, network...), 'other' si rien n'est reconnu."""
+    text = (text or "").lower()
+    for error_class, markers in _FAILURE_CLASSES:
+        if any(marker in text for marker in markers):
+            return error_class
+    return 'other'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (compteurs par bucket, somme et nombre d'observations)."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Dernier: au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class SubprocessSpawnCounter:
+    """Nombre de processus lancés par programme (yt-dlp, ffmpeg...), pour tout le processus."""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, executable: str):
+        """Compte un lancement; `executable` est le chemin ou le nom du programme (args[0])."""
+        program = os.path.splitext(os.path.basename(str(executable)))[0].lower() or "?"
+        with self._lock:
+            self._counts[program] = self._counts.get(program, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# Compteur partagé par tous les modules qui lancent des processus
+SUBPROCESS_SPAWNS = SubprocessSpawnCounter()
+
+
+class DownloadMetrics:
+    """
+    Métriques du moteur de téléchargement, au format texte de Prometheus.
+    Les observations (mise en file, transitions d'état, octets, échecs) sont faites dans le thread du bus;
+    render() peut être appelé depuis n'importe quel thread (API de contrôle, écriture du fichier).
+    Les jauges (file, places, débit) sont lues sur le gestionnaire au moment du rendu.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.downloaded_bytes = 0
+        self.stage_durations: Dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+        self.job_durations: Dict[str, Histogram] = {status: Histogram() for status in _FINAL_STATUSES}
+        self.finished: Dict[str, int] = {status: 0 for status in _FINAL_STATUSES}
+        self.failures: Dict[str, int] = {}
+        self._stage_started: Dict[str, Tuple[str, float, float]] = {} # id -> (étape, début, mise en file)
+        self._job_bytes: Dict[str, Tuple[int, int]] = {} # id -> (octets téléchargés, taille totale) du fichier en cours
+        self._lock = threading.Lock()
+
+    def job_queued(self, download_id: str):
+        with self._lock:
+            now = time.monotonic()
+            self._stage_started[download_id] = ("queue_wait", now, now)
+
+    def job_status(self, download_id: str, status: str):
+        """Transition d'état: clôt l'étape en cours (histogramme) et ouvre la suivante."""
+        now = time.monotonic()
+        with self._lock:
+            stage, stage_start, queued_at = self._stage_started.get(download_id, (None, now, now))
+            if stage is not None:
+                self.stage_durations[stage].observe(now - stage_start)
+            if status == "En attente": # Nouvelle tentative
+                self._stage_started[download_id] = ("queue_wait", now, now)
+            elif status == "active":
+                self._stage_started[download_id] = ("download", now, queued_at)
+            elif status == "postprocessing":
+                self._stage_started[download_id] = ("postprocess", now, queued_at)
+                self._flush_job_bytes(download_id)
+            elif status in _FINAL_STATUSES:
+                self._stage_started.pop(download_id, None)
+                self.job_durations[status].observe(now - queued_at)
+                self.finished[status] += 1
+                if status == "completed":
+                    self._flush_job_bytes(download_id)
+                self._job_bytes.pop(download_id, None)
+
+    def job_progress(self, download_id: str, downloaded_bytes: Optional[int], total_bytes: Optional[int]):
+        """Octets téléchargés d'après la progression (les états intermédiaires coalescés sont rattrapés)."""
+        if downloaded_bytes is None:
+            return
+        with self._lock:
+            previous, _ = self._job_bytes.get(download_id, (0, 0))
+            # Une valeur plus petite signale un nouveau fichier (piste audio après la vidéo, élément suivant)
+            self.downloaded_bytes += downloaded_bytes - previous if downloaded_bytes >= previous else downloaded_bytes
+            self._job_bytes[download_id] = (downloaded_bytes, total_bytes or 0)
+
+    def _flush_job_bytes(self, download_id: str):
+        # Fin de l'étape réseau: la fin du fichier, arrivée après le dernier état affiché, est comptée
+        downloaded, total = self._job_bytes.get(download_id, (0, 0))
+        if total > downloaded:
+            self.downloaded_bytes += total - downloaded
+            self._job_bytes[download_id] = (total, total)
+
+    def job_failed(self, error_text: str):
+        error_class = classify_failure(error_text)
+        with self._lock:
+            self.failures[error_class] = self.failures.get(error_class, 0) + 1
+
+    def render(self, manager) -> str:
+        """Texte d'exposition Prometheus (compteurs de ce module et jauges lues sur le gestionnaire)."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(**labels)} {value}")
+
+        registry = manager.registry
+        active = registry.with_status("active")
+        job_speeds = [(dl['id'], dl.get('speed') or 0) for dl in active if dl.get('stage') == 'download']
+        bandwidth_limit = manager.downloader.bandwidth.current_limit()
+        with self._lock:
+            metric("musicdl_queue_depth", "gauge", "Téléchargements en attente dans la file.",
+                   [({}, manager.download_queue.qsize())])
+            metric("musicdl_jobs", "gauge", "Téléchargements du registre par état (terminés évincés compris).",
+                   [({'status': "pending" if status == "En attente" else status}, registry.count(status))
+                    for status in ("En attente",) + _ACTIVE_STATUSES + _FINAL_STATUSES])
+            metric("musicdl_active_slots", "gauge", "Places de téléchargement occupées.",
+                   [({}, manager.active_download_count)])
+            metric("musicdl_slot_limit", "gauge", "Limite de téléchargements simultanés (fixe ou adaptative).",
+                   [({}, manager.concurrent_limit)])
+            metric("musicdl_throughput_bytes_per_second", "gauge", "Débit total des téléchargements en cours.",
+                   [({}, round(sum(speed for _, speed in job_speeds)))])
+            metric("musicdl_job_throughput_bytes_per_second", "gauge", "Débit de chaque téléchargement en cours.",
+                   [({'id': download_id}, round(speed)) for download_id, speed in job_speeds])
+            metric("musicdl_bandwidth_limit_bytes_per_second", "gauge", "Limite de bande passante en vigueur (0: illimitée).",
+                   [({}, bandwidth_limit or 0)])
+            metric("musicdl_downloaded_bytes_total", "counter", "Octets téléchargés depuis le lancement.",
+                   [({}, self.downloaded_bytes)])
+            metric("musicdl_jobs_finished_total", "counter", "Téléchargements terminés depuis le lancement, par état final.",
+                   [({'status': status}, count) for status, count in self.finished.items()])
+            metric("musicdl_failures_total", "counter", "Échecs par classe d'erreur.",
+                   [({'error_class': error_class}, count) for error_class, count in sorted(self.failures.items())])
+            metric("musicdl_throttle_events_total", "counter", "Limitations de débit signalées par yt-dlp (HTTP 429/403).",
+                   [({}, manager.downloader.throttle_events)])
+            metric("musicdl_subprocess_spawns_total", "counter", "Processus lancés, par programme.",
+                   [({'program': program}, count) for program, count in sorted(SUBPROCESS_SPAWNS.snapshot().items())])
+            self._render_histograms(lines, "musicdl_stage_duration_seconds",
+                                    "Durée de chaque étape d'un téléchargement.", 'stage', self.stage_durations)
+            self._render_histograms(lines, "musicdl_job_duration_seconds",
+                                    "Durée totale d'un téléchargement (mise en file à état final), par état final.",
+                                    'status', self.job_durations)
+            metric("musicdl_start_time_seconds", "gauge", "Heure de lancement (secondes depuis l'epoch).",
+                   [({}, round(self.started_at, 3))])
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines, name: str, help_text: str, label: str, histograms: Dict[str, Histogram]):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in histograms.items():
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(**{label: key, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{_labels(**{label: key})} {round(histogram.sum, 3)}")
+            lines.append(f"{name}_count{_labels(**{label: key})} {histogram.count}")
+
+
+def write_metrics_file(path: str, text: str):
+    """Écrit le fichier de métriques de manière atomique (lu par le textfile collector de node_exporter)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+class MetricsFileWriter:
+    """Réécrit périodiquement le fichier de métriques depuis un thread dédié (et une dernière fois à l'arrêt)."""
+
+    def __init__(self, manager, path: str, interval: float = DEFAULT_FILE_INTERVAL):
+        self.manager = manager
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MetricsFile", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            write_metrics_file(self.path, self.manager.metrics.render(self.manager))
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du fichier de métriques: {e}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.write()
@@ -0,0 +1,223 @@
+# postprocess_pool.py
+import os
+import sys
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from metrics import SUBPROCESS_SPAWNS
+
+# Options ffmpeg par format audio cible: (codec de réencodage, options de qualité). Équivalent de -x --audio-format de yt-dlp.
+AUDIO_ENCODERS = {
+    "mp3": ("libmp3lame", ["-q:a", "5"]),
+    "m4a": ("aac", ["-b:a", "192k"]),
+    "opus": ("libopus", ["-b:a", "128k"]),
+    "flac": ("flac", []),
+    "wav": ("pcm_s16le", []),
+}
+# Options supplémentaires quand le flux audio est simplement copié dans son conteneur
+AUDIO_COPY_OPTIONS = {
+    "m4a": ["-bsf:a", "aac_adtstoasc"],
+}
+
+
+def default_postprocess_workers() -> int:
+    """Nombre de conversions simultanées par défaut: une par cœur."""
+    return os.cpu_count() or 1
+
+
+def needs_postprocess(plan: Dict) -> bool:
+    """Indique si un plan demande une conversion ffmpeg après le téléchargement (extraction audio ou réencodage vidéo)."""
+    return bool(plan.get('audio_format')) or (plan.get('mode') == 'transcode' and bool(plan.get('recode_video')))
+
+
+def build_ffmpeg_args(ffmpeg_path: str, input_path: str, plan: Dict) -> Tuple[List[str], str]:
+    """
+    Construit la commande ffmpeg qui convertit un fichier téléchargé selon le plan.
+    Retourne (arguments, chemin de sortie). La progression est écrite sur stdout (-progress).
+    """
+    if plan.get('audio_format'):
+        target = plan['audio_format']
+        if plan.get('mode') == 'copy':
+            codec_args = ["-c:a", "copy"] + AUDIO_COPY_OPTIONS.get(target, [])
+        else:
+            encoder, quality = AUDIO_ENCODERS.get(target, (None, []))
+            codec_args = (["-c:a", encoder] if encoder else []) + quality
+        codec_args = ["-vn"] + codec_args
+    else:
+        target = plan['recode_video']
+        codec_args = [] # Codecs par défaut du conteneur cible, comme --recode-video
+    output_path = os.path.splitext(input_path)[0] + "." + target
+    args = [ffmpeg_path or "ffmpeg", "-y", "-nostdin", "-loglevel", "error", "-nostats",
+            "-progress", "pipe:1", "-i", input_path, *codec_args, output_path]
+    return args, output_path
+
+
+class PostProcessPool:
+    """
+    Pool de conversions ffmpeg (seconde étape d'un téléchargement), indépendant des téléchargements réseau.
+    Un téléchargement terminé y dépose ses fichiers et libère aussitôt sa place réseau.
+    Au plus `max_workers` conversions tournent en même temps, éventuellement en priorité basse;
+    les suivantes attendent dans une file FIFO.
+    """
+
+    def __init__(self, log_callback: Optional[Callable] = None, max_workers: int = 0, low_priority: bool = True):
+        self.log_callback = log_callback or print
+        self.max_workers = max_workers or default_postprocess_workers()
+        self.low_priority = low_priority
+        self._waiting: Deque[Dict] = deque()
+        self._running: Dict[str, Optional[subprocess.Popen]] = {} # id -> processus ffmpeg en cours
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def log(self, message: str):
+        self.log_callback(message)
+
+    def set_max_workers(self, max_workers: int):
+        """Change la limite de conversions simultanées (0: nombre de cœurs)."""
+        with self._lock:
+            self.max_workers = max_workers or default_postprocess_workers()
+        self._start_waiting()
+
+    def set_low_priority(self, enabled: bool):
+        """Les prochaines conversions sont lancées en priorité basse (ou normale)."""
+        self.low_priority = bool(enabled)
+
+    def submit(self, job_id: str, input_paths: List[str], plan: Dict, ffmpeg_path: str,
+               on_progress: Callable, on_done: Callable, durations: Optional[List[float]] = None):
+        """
+        Met en file la conversion des fichiers d'un téléchargement.
+        on_progress(job_id, pourcentage) est appelé pendant la conversion,
+        on_done(job_id, erreur ou None) une seule fois à la fin (y compris après une annulation).
+        """
+        job = {'id': job_id, 'inputs': list(input_paths), 'plan': plan, 'ffmpeg_path': ffmpeg_path,
+               'durations': list(durations or []), 'on_progress': on_progress, 'on_done': on_done}
+        with self._lock:
+            self._cancelled.discard(job_id)
+            self._waiting.append(job)
+        self._start_waiting()
+
+    def has_job(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._running or any(job['id'] == job_id for job in self._waiting)
+
+    def counts(self) -> Tuple[int, int]:
+        """Retourne (conversions en cours, conversions en attente)."""
+        with self._lock:
+            return len(self._running), len(self._waiting)
+
+    def cancel(self, job_id: str) -> bool:
+        """Annule une conversion en attente ou en cours. Retourne False si elle n'est pas trouvée."""
+        with self._lock:
+            for job in self._waiting:
+                if job['id'] == job_id:
+                    self._waiting.remove(job)
+                    break
+            else:
+                job = None
+                if job_id not in self._running:
+                    return False
+                self._cancelled.add(job_id)
+                process = self._running[job_id]
+        if job is not None:
+            job['on_done'](job_id, "Annulé")
+            return True
+        if process is not None:
+            try:
+                process.terminate()
+            except OSError:
+                pass
+        return True
+
+    def _start_waiting(self):
+        """Démarre des conversions tant que la limite le permet (un thread par conversion en cours)."""
+        with self._lock:
+            jobs = []
+            while self._waiting and len(self._running) < self.max_workers:
+                job = self._waiting.popleft()
+                self._running[job['id']] = None
+                jobs.append(job)
+        for job in jobs:
+            threading.Thread(target=self._run_job, args=(job,), name="PostProcess", daemon=True).start()
+
+    def _popen_options(self) -> Dict:
+        if sys.platform == "win32":
+            creationflags = subprocess.CREATE_NO_WINDOW
+            if self.low_priority:
+                creationflags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+            return {'creationflags': creationflags}
+        if self.low_priority:
+            return {'preexec_fn': lambda: os.nice(10)}
+        return {}
+
+    def _run_job(self, job: Dict):
+        job_id = job['id']
+        error = None
+        try:
+            total = len(job['inputs'])
+            for index, input_path in enumerate(job['inputs']):
+                duration = job['durations'][index] if index < len(job['durations']) else None
+                error = self._convert(job, input_path, duration, index, total)
+                if error:
+                    break
+        except Exception as e:
+            error = f"Erreur inattendue: {e}"
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                if job_id in self._cancelled:
+                    self._cancelled.discard(job_id)
+                    error = "Annulé"
+            self._start_waiting()
+        job['on_done'](job_id, error)
+
+    def _convert(self, job: Dict, input_path: str, duration: Optional[float], index: int, total: int) -> Optional[str]:
+        """Convertit un fichier; retourne un message d'erreur ou None."""
+        job_id = job['id']
+        args, output_path = build_ffmpeg_args(job['ffmpeg_path'], input_path, job['plan'])
+        if os.path.normcase(os.path.abspath(output_path)) == os.path.normcase(os.path.abspath(input_path)):
+            return None # Déjà dans le format demandé
+        SUBPROCESS_SPAWNS.record(args[0])
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   **self._popen_options())
+        with self._lock:
+            cancelled = job_id in self._cancelled
+            self._running[job_id] = process
+        if cancelled:
+            process.terminate() # Annulé entre deux fichiers ou pendant le lancement
+
+        errors = []
+        stderr_thread = threading.Thread(target=lambda: errors.extend(process.stderr.read().splitlines()), daemon=True)
+        stderr_thread.start()
+        for line in process.stdout:
+            # Blocs clé=valeur de -progress; out_time_us est la position atteinte dans le fichier
+            if line.startswith("out_time_us=") and duration:
+                try:
+                    position = int(line.split("=", 1)[1]) / 1000000
+                except ValueError:
+                    continue
+                item_percent = max(0.0, min(100.0, position * 100.0 / duration))
+                job['on_progress'](job_id, (index * 100.0 + item_percent) / total)
+        process.wait()
+        stderr_thread.join(timeout=5)
+
+        with self._lock:
+            cancelled = job_id in self._cancelled
+        if process.returncode != 0 or cancelled:
+            try:
+                os.remove(output_path) # Ne pas laisser de fichier converti incomplet
+            except OSError:
+                pass
+            if cancelled:
+                return "Annulé"
+            for error_line in errors:
+                self.log(f"ffmpeg Erreur: {error_line}")
+            return f"Échec de la conversion (Code: {process.returncode})"
+
+        try:
+            os.remove(input_path) # Comme yt-dlp sans -k: seul le fichier converti est conservé
+        except OSError as e:
+            self.log(f"Avertissement: impossible de supprimer {input_path}: {e}")
+        job['on_progress'](job_id, (index + 1) * 100.0 / total)
+        return None
@@ -0,0 +1,170 @@
+# process_io.py
+import sys
+import asyncio
+import locale
+import threading
+import subprocess
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Set
+
+from metrics import SUBPROCESS_SPAWNS
+
+# Taille maximale d'une ligne lue sur un pipe (les sorties JSON de yt-dlp peuvent être longues)
+STREAM_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class ProcessIOEngine:
+    """
+    Boucle asyncio unique qui possède les pipes stdout/stderr de tous les processus actifs.
+    Remplace les deux threads de lecture + deux queues créés pour chaque téléchargement:
+    les lignes sont lues sans polling et transmises directement aux callbacks.
+    Les callbacks sont appelés depuis le thread de la boucle et doivent donc rester rapides.
+    """
+
+    def __init__(self, log_callback: Optional[Callable] = None):
+        self.log_callback = log_callback or print
+        self.encoding = locale.getpreferredencoding(False) # Même décodage que Popen(text=True)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+        self._submitted: Set[str] = set() # Clés soumises, y compris celles dont le processus n'est pas encore lancé
+        self._pending_terminate: Dict[str, float] = {} # Arrêts demandés avant le lancement effectif
+
+    def log(self, message: str):
+        self.log_callback(message)
+
+    def start(self):
+        """Démarre le thread de la boucle d'événements s'il ne tourne pas déjà."""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="ProcessIOEngine", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        if sys.platform == "win32":
+            # Seule la ProactorEventLoop sait gérer les pipes de sous-processus sous Windows
+            self._loop = asyncio.ProactorEventLoop()
+        else:
+            self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def stop(self):
+        """Arrête la boucle d'événements (les processus encore actifs sont tués)."""
+        if not self._loop or not self._thread:
+            return
+        for key in list(self._submitted):
+            self.kill(key)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def run_process(self, key: str, args: List[str],
+                    on_stdout: Callable[[str], None],
+                    on_stderr: Callable[[str], None]) -> Future:
+        """
+        Lance un processus dont les sorties sont lues par la boucle partagée.
+        Retourne un Future (concurrent.futures) résolu avec le code de retour du processus.
+        """
+        self.start()
+        self._submitted.add(key)
+        return asyncio.run_coroutine_threadsafe(self._run_process(key, args, on_stdout, on_stderr), self._loop)
+
+    async def _run_process(self, key: str, args: List[str], on_stdout, on_stderr) -> int:
+        creationflags = 0
+        if sys.platform == "win32":
+            creationflags = subprocess.CREATE_NO_WINDOW
+
+        try:
+            SUBPROCESS_SPAWNS.record(args[0])
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=STREAM_LINE_LIMIT,
+                creationflags=creationflags
+            )
+        except Exception:
+            self._submitted.discard(key)
+            self._pending_terminate.pop(key, None)
+            raise
+        self._processes[key] = process
+        if key in self._pending_terminate:
+            self._terminate_later(key, self._pending_terminate.pop(key))
+        try:
+            await asyncio.gather(
+                self._pump(process.stdout, on_stdout),
+                self._pump(process.stderr, on_stderr)
+            )
+            return await process.wait()
+        finally:
+            self._processes.pop(key, None)
+            self._submitted.discard(key)
+
+    async def _pump(self, stream: asyncio.StreamReader, callback: Callable[[str], None]):
+        """Lit un flux ligne par ligne et transmet chaque ligne décodée au callback."""
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            try:
+                callback(line.decode(self.encoding, errors='replace'))
+            except Exception as e:
+                self.log(f"Erreur dans le traitement d'une ligne de sortie: {e}")
+
+    def is_running(self, key: str) -> bool:
+        return key in self._submitted
+
+    def terminate(self, key: str, timeout: float = 5.0) -> bool:
+        """
+        Demande l'arrêt d'un processus, puis le tue s'il n'est pas terminé après `timeout` secondes.
+        Retourne False si aucun processus n'est associé à cette clé.
+        """
+        if not self._loop or key not in self._submitted:
+            return False
+        self._loop.call_soon_threadsafe(self._terminate_later, key, timeout)
+        return True
+
+    def kill(self, key: str) -> bool:
+        """Tue immédiatement un processus."""
+        if not self._loop or key not in self._submitted:
+            return False
+        self._loop.call_soon_threadsafe(self._terminate_later, key, 0)
+        return True
+
+    def _terminate_later(self, key: str, timeout: float):
+        process = self._processes.get(key)
+        if process is None:
+            if key in self._submitted:
+                self._pending_terminate[key] = timeout # Appliqué dès que le processus sera lancé
+            return
+        if timeout <= 0:
+            self._signal(key, "kill")
+            return
+        self._signal(key, "terminate")
+        self._loop.call_later(timeout, self._kill_if_alive, key, process)
+
+    def _kill_if_alive(self, key: str, process):
+        if process.returncode is None and self._processes.get(key) is process:
+            self._signal(key, "kill")
+            self.log(f"Processus {key} tué (forcé).")
+
+    def _signal(self, key: str, method: str):
+        process = self._processes.get(key)
+        if process is None or process.returncode is not None:
+            return
+        try:
+            getattr(process, method)()
+        except ProcessLookupError:
+            pass # Le processus s'est terminé entre-temps
+        except Exception as e:
+            self.log(f"Erreur lors de l'arrêt du processus {key}: {e}")
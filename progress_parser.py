@@ -0,0 +1,255 @@
+# progress_parser.py
+import re
+import json
+from typing import Optional, Dict, List
+
+# Préfixe des lignes produites par nos --progress-template: permet un test startswith() très rapide
+PROGRESS_MARKER = "[DLP]"
+# Préfixe des lignes de sortie brute de yt-dlp relayées dans les logs
+RAW_PREFIX = "[RAW YT-DLP]"
+
+# Champs demandés à yt-dlp. "|null" remplace les valeurs absentes pour garder un JSON valide.
+DOWNLOAD_TEMPLATE = (
+    PROGRESS_MARKER +
+    '{"stage":"download","status":%(progress.status|null)j,'
+    '"downloaded_bytes":%(progress.downloaded_bytes|null)s,'
+    '"total_bytes":%(progress.total_bytes|null)s,'
+    '"total_bytes_estimate":%(progress.total_bytes_estimate|null)s,'
+    '"speed":%(progress.speed|null)s,'
+    '"eta":%(progress.eta|null)s,'
+    '"fragment_index":%(progress.fragment_index|null)s,'
+    '"fragment_count":%(progress.fragment_count|null)s,'
+    '"playlist_index":%(info.playlist_index|null)s,'
+    '"playlist_count":%(info.n_entries|null)s}'
+)
+POSTPROCESS_TEMPLATE = (
+    PROGRESS_MARKER +
+    '{"stage":"postprocess","status":%(progress.status|null)j,'
+    '"postprocessor":%(progress.postprocessor|null)j,'
+    '"playlist_index":%(info.playlist_index|null)s,'
+    '"playlist_count":%(info.n_entries|null)s}'
+)
+# Fichier final d'un élément (après déplacement), utilisé quand la conversion est confiée au pool de post-traitement
+OUTPUT_FILE_TEMPLATE = (
+    PROGRESS_MARKER +
+    '{"stage":"file","filepath":%(filepath)j,"duration":%(duration|null)s}'
+)
+
+
+def classify_message(message: str) -> str:
+    """Déduit le niveau d'un message de log ('raw', 'info', 'warning' ou 'error')."""
+    if message.startswith(RAW_PREFIX):
+        return "raw"
+    lowered = message.lower()
+    if "erreur" in lowered or "échec" in lowered or "error" in lowered:
+        return "error"
+    if "avertissement" in lowered or "attention" in lowered or "warning" in lowered:
+        return "warning"
+    return "info"
+
+
+def progress_template_args() -> List[str]:
+    """Arguments yt-dlp qui activent le protocole de progression JSON (une ligne par mise à jour)."""
+    return [
+        "--progress-template", "download:" + DOWNLOAD_TEMPLATE,
+        "--progress-template", "postprocess:" + POSTPROCESS_TEMPLATE,
+    ]
+
+
+def output_file_args() -> List[str]:
+    """Arguments yt-dlp qui affichent le chemin de chaque fichier téléchargé ("--progress" garde la progression)."""
+    return ["--print", "after_move:" + OUTPUT_FILE_TEMPLATE]
+
+
+# --- Expressions précompilées pour l'ancienne sortie texte de yt-dlp ---
+_LEGACY_PERCENT_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+_LEGACY_PLAYLIST_RE = re.compile(r'Downloading item (\d+) of (\d+)')
+_LEGACY_SIZE_RE = re.compile(r' of ~?\s*(\d+(?:\.\d+)?)\s*([KMGT]?i?B)')
+_LEGACY_SPEED_RE = re.compile(r' at\s+(\d+(?:\.\d+)?)\s*([KMGT]?i?B)/s')
+_LEGACY_ETA_RE = re.compile(r' ETA\s+(?:(\d+):)?(\d+):(\d+)')
+_LEGACY_FRAG_RE = re.compile(r'\(frag (\d+)/(\d+)\)')
+# Étiquettes de post-traitement de l'ancienne sortie -> nom de postprocesseur yt-dlp
+_LEGACY_POSTPROCESSORS = (
+    ("[ExtractAudio]", "ExtractAudio"),
+    ("[Merger]", "Merger"),
+    ("[VideoConvertor]", "VideoConvertor"),
+    ("[VideoRemuxer]", "VideoRemuxer"),
+    ("[ffmpeg]", "FFmpeg"),
+)
+
+_UNITS = {
+    'B': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4,
+    'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4,
+}
+
+# Libellés affichés pour les étapes de post-traitement
+POSTPROCESSOR_LABELS = {
+    "ExtractAudio": "Extraction audio...",
+    "Merger": "Multiplexage audio/vidéo...",
+    "VideoConvertor": "Conversion vidéo...",
+    "VideoRemuxer": "Remultiplexage...",
+    "FFmpeg": "Conversion/Multiplexage...",
+}
+
+
+def _to_bytes(value: str, unit: str) -> Optional[int]:
+    factor = _UNITS.get(unit)
+    if factor is None:
+        return None
+    return int(float(value) * factor)
+
+
+def format_bytes(size: Optional[float]) -> str:
+    """Formate une taille en octets (Kio, Mio, Gio)."""
+    if size is None:
+        return "?"
+    for unit in ("o", "Kio", "Mio", "Gio"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Tio"
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """Formate un temps restant en MM:SS ou HH:MM:SS."""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours:02}:{minutes:02}:{secs:02}"
+    return f"{minutes:02}:{secs:02}"
+
+
+class ProgressParser:
+    """
+    Décode la sortie stdout de yt-dlp pour un téléchargement.
+    Chemin rapide: lignes JSON produites par progress_template_args().
+    Repli: anciennes lignes texte ("[download]  12.3% of ...", "[ExtractAudio]", ...).
+    Chaque appel à parse_line retourne un événement (dict) ou None pour les lignes sans intérêt.
+    """
+
+    def __init__(self):
+        self.playlist_index = 0
+        self.playlist_count = 1
+
+    def parse_line(self, line: str) -> Optional[Dict]:
+        if line.startswith(PROGRESS_MARKER):
+            try:
+                event = json.loads(line[len(PROGRESS_MARKER):])
+            except ValueError:
+                return None
+            return self._normalize(event)
+        return self._parse_legacy_line(line)
+
+    def parse_hook(self, stage: str, data: Dict) -> Dict:
+        """
+        Construit un événement à partir d'un dict de progress_hooks / postprocessor_hooks
+        de yt_dlp.YoutubeDL (moteur en bibliothèque): même format que les lignes JSON.
+        """
+        info = data.get('info_dict') or {}
+        event = {'stage': stage, 'status': data.get('status'),
+                 'playlist_index': info.get('playlist_index'), 'playlist_count': info.get('n_entries')}
+        if stage == 'download':
+            for key in ('downloaded_bytes', 'total_bytes', 'total_bytes_estimate', 'speed', 'eta',
+                        'fragment_index', 'fragment_count'):
+                event[key] = data.get(key)
+        else:
+            event['postprocessor'] = data.get('postprocessor')
+            if data.get('postprocessor') == 'MoveFiles' and data.get('status') == 'finished':
+                # Fichier final de l'élément: même événement que la ligne --print after_move
+                return {'stage': 'file', 'filepath': info.get('filepath'), 'duration': info.get('duration')}
+        return self._normalize(event)
+
+    def _normalize(self, event: Dict) -> Dict:
+        self._update_playlist(event.get('playlist_index'), event.get('playlist_count'))
+        if event.get('stage') == 'download':
+            total = event.get('total_bytes') or event.get('total_bytes_estimate')
+            event['total_bytes'] = total
+            downloaded = event.get('downloaded_bytes')
+            if event.get('status') == 'finished':
+                event['percent'] = 100.0
+            elif total and downloaded is not None:
+                event['percent'] = min(100.0, downloaded * 100.0 / total)
+            else:
+                event['percent'] = None
+        return event
+
+    def _update_playlist(self, index, count):
+        if isinstance(index, int) and index > 0:
+            self.playlist_index = index
+        if isinstance(count, int) and count > 0:
+            self.playlist_count = count
+
+    def _parse_legacy_line(self, line: str) -> Optional[Dict]:
+        if line.startswith("[download]"):
+            playlist_match = _LEGACY_PLAYLIST_RE.search(line)
+            if playlist_match:
+                self._update_playlist(int(playlist_match.group(1)), int(playlist_match.group(2)))
+                return {'stage': 'playlist_item', 'playlist_index': self.playlist_index,
+                        'playlist_count': self.playlist_count}
+
+            percent_match = _LEGACY_PERCENT_RE.search(line)
+            if not percent_match:
+                return None
+            event = {'stage': 'download', 'status': 'downloading', 'percent': float(percent_match.group(1)),
+                     'downloaded_bytes': None, 'total_bytes': None, 'speed': None, 'eta': None,
+                     'fragment_index': None, 'fragment_count': None}
+            size_match = _LEGACY_SIZE_RE.search(line)
+            if size_match:
+                event['total_bytes'] = _to_bytes(size_match.group(1), size_match.group(2))
+                if event['total_bytes'] is not None:
+                    event['downloaded_bytes'] = int(event['total_bytes'] * event['percent'] / 100.0)
+            speed_match = _LEGACY_SPEED_RE.search(line)
+            if speed_match:
+                event['speed'] = _to_bytes(speed_match.group(1), speed_match.group(2))
+            eta_match = _LEGACY_ETA_RE.search(line)
+            if eta_match:
+                hours = int(eta_match.group(1) or 0)
+                event['eta'] = hours * 3600 + int(eta_match.group(2)) * 60 + int(eta_match.group(3))
+            frag_match = _LEGACY_FRAG_RE.search(line)
+            if frag_match:
+                event['fragment_index'] = int(frag_match.group(1))
+                event['fragment_count'] = int(frag_match.group(2))
+            if event['percent'] >= 100.0:
+                event['status'] = 'finished'
+            return event
+
+        if line.startswith("["):
+            for tag, postprocessor in _LEGACY_POSTPROCESSORS:
+                if line.startswith(tag):
+                    return {'stage': 'postprocess', 'status': 'started', 'postprocessor': postprocessor}
+        return None
+
+    def overall_percent(self, item_percent: float) -> float:
+        """Convertit la progression de l'élément courant en progression globale (playlists)."""
+        if self.playlist_count > 1:
+            done_items = max(self.playlist_index - 1, 0)
+            return (done_items * 100.0 + item_percent) / self.playlist_count
+        return item_percent
+
+    def describe(self, event: Dict) -> str:
+        """Construit un message lisible pour un événement."""
+        prefix = ""
+        if self.playlist_count > 1:
+            prefix = f"[{self.playlist_index}/{self.playlist_count}] "
+
+        stage = event.get('stage')
+        if stage == 'playlist_item':
+            return f"Téléchargement de l'élément {self.playlist_index}/{self.playlist_count}"
+        if stage == 'postprocess':
+            label = POSTPROCESSOR_LABELS.get(event.get('postprocessor'), f"Post-traitement ({event.get('postprocessor')})...")
+            return prefix + label
+
+        percent = event.get('percent')
+        parts = [f"{percent:.1f}%" if percent is not None else "?%"]
+        if event.get('total_bytes'):
+            parts.append(f"de {format_bytes(event['total_bytes'])}")
+        if event.get('speed'):
+            parts.append(f"à {format_bytes(event['speed'])}/s")
+        if event.get('eta') is not None:
+            parts.append(f"reste {format_eta(event['eta'])}")
+        if event.get('fragment_count'):
+            parts.append(f"(fragment {event.get('fragment_index')}/{event['fragment_count']})")
+        return prefix + " ".join(parts)
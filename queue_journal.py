@@ -0,0 +1,152 @@
+# queue_journal.py
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+# Intervalle entre deux écritures groupées du journal (secondes)
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+# États après lesquels un téléchargement n'a plus à être repris
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class QueueJournal:
+    """
+    Journal en écriture anticipée (write-ahead) de la file d'attente des téléchargements.
+    Chaque transition d'état (queued, active, completed, failed, cancelled) est ajoutée en fin de
+    fichier sous forme d'une ligne JSON. Les appels à record_* ne font qu'empiler l'entrée en mémoire:
+    un thread d'écriture les regroupe et les écrit (puis fsync) toutes les `flush_interval` secondes.
+    Au démarrage, replay() rejoue le journal pour retrouver les téléchargements non terminés.
+    """
+
+    def __init__(self, journal_path: str = "C:/YoutubeDownloader/queue_journal.jsonl",
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._file = None
+        self._writer: Optional[threading.Thread] = None
+
+    def replay(self) -> List[Dict]:
+        """
+        Relit le journal et retourne, dans l'ordre d'ajout, les téléchargements qui n'ont pas atteint
+        un état final. Le champ 'interrupted' vaut True pour ceux qui étaient actifs (téléchargement ou conversion).
+        Le journal est ensuite compacté pour ne garder que ces téléchargements.
+        """
+        jobs: Dict[str, Dict] = {} # dict pour garder l'ordre d'ajout
+        try:
+            with open(self.journal_path, "r", encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # Dernière ligne tronquée par un arrêt brutal
+                    job_id = entry.get('id')
+                    if entry.get('op') == 'queued':
+                        jobs[job_id] = {'id': job_id, 'title': entry.get('title', ''), 'url': entry.get('url', ''),
+                                        'format': entry.get('format', ''), 'duration': entry.get('duration'),
+                                        'priority': entry.get('priority', 0), 'group_id': entry.get('group_id'),
+                                        'group_title': entry.get('group_title'), 'status': 'queued'}
+                    elif entry.get('op') == 'status' and job_id in jobs:
+                        jobs[job_id]['status'] = entry.get('status')
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        except Exception as e:
+            print(f"Erreur lors de la lecture du journal de la file d'attente: {e}")
+
+        unfinished = []
+        for job in jobs.values():
+            if job['status'] in FINAL_STATUSES:
+                continue
+            job['interrupted'] = job['status'] in ('active', 'postprocessing')
+            unfinished.append(job)
+        self._compact(unfinished)
+        return unfinished
+
+    def _compact(self, jobs: List[Dict]):
+        """Réécrit le journal avec uniquement les téléchargements à reprendre."""
+        try:
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, "w", encoding='utf-8') as f:
+                for job in jobs:
+                    f.write(json.dumps(self._queued_entry(job, job.get('group_title')), ensure_ascii=False) + "\n")
+            os.replace(temp_path, self.journal_path)
+        except Exception as e:
+            print(f"Erreur lors du compactage du journal de la file d'attente: {e}")
+
+    def _queued_entry(self, download_info: Dict, group_title: Optional[str] = None) -> Dict:
+        entry = {'op': 'queued', 'id': download_info['id'], 'title': download_info.get('title', ''),
+                 'url': download_info.get('url', ''), 'format': download_info.get('format', ''),
+                 't': round(time.time(), 3)}
+        if download_info.get('duration'):
+            entry['duration'] = download_info['duration'] # Utilisée par l'ordonnancement "plus courts d'abord"
+        if download_info.get('priority'):
+            entry['priority'] = download_info['priority']
+        if download_info.get('group_id'):
+            # La playlist est reconstituée à la reprise (même tour de rôle entre playlists, même carte)
+            entry['group_id'] = download_info['group_id']
+            if group_title:
+                entry['group_title'] = group_title
+        return entry
+
+    def start(self):
+        """Ouvre le journal en ajout et démarre le thread d'écriture."""
+        if self._writer is not None:
+            return
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._file = open(self.journal_path, "a", encoding='utf-8')
+        self._writer = threading.Thread(target=self._run_writer, name="QueueJournal", daemon=True)
+        self._writer.start()
+
+    def record_queued(self, download_info: Dict, group_title: Optional[str] = None):
+        """Enregistre l'ajout d'un téléchargement à la file d'attente (priorité et playlist comprises)."""
+        self._append(self._queued_entry(download_info, group_title))
+
+    def record_status(self, download_id: str, status: str):
+        """Enregistre un changement d'état ('queued', 'active', 'postprocessing', 'completed', 'failed', 'cancelled')."""
+        self._append({'op': 'status', 'id': download_id, 'status': status, 't': round(time.time(), 3)})
+
+    def _append(self, entry: Dict):
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.append(entry)
+
+    def _run_writer(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Écrit en un bloc toutes les entrées en attente."""
+        with self._lock:
+            entries, self._pending = self._pending, []
+        if not entries or self._file is None:
+            return
+        try:
+            self._file.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du journal de la file d'attente: {e}")
+
+    def close(self):
+        """Écrit les dernières entrées et ferme le journal."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            self._writer = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
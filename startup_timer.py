@@ -0,0 +1,64 @@
+# startup_timer.py
+import os
+import sys
+import time
+import threading
+from typing import List, Tuple
+
+# Option de ligne de commande (ou variable d'environnement) qui affiche les temps de démarrage
+STARTUP_TIMINGS_FLAG = "--startup-timings"
+STARTUP_TIMINGS_ENV = "MUSICDL_STARTUP_TIMINGS"
+
+
+class StartupTimer:
+    """
+    Mesure la durée de chaque phase du démarrage, depuis l'import de ce module
+    jusqu'à ce que l'interface soit utilisable (time-to-interactive).
+    Les phases en arrière-plan (recherche des outils, dépendances) sont notées sans bloquer.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self._last_time = self.start_time
+        self._phases: List[Tuple[str, float, float]] = [] # (phase, durée ms, depuis le lancement ms)
+        self._lock = threading.Lock()
+        self.enabled = STARTUP_TIMINGS_FLAG in sys.argv or bool(os.environ.get(STARTUP_TIMINGS_ENV))
+        self.time_to_interactive_ms = None
+
+    def mark(self, phase: str) -> float:
+        """Termine une phase et retourne sa durée en millisecondes."""
+        now = time.perf_counter()
+        with self._lock:
+            duration = (now - self._last_time) * 1000
+            self._last_time = now
+            self._phases.append((phase, duration, (now - self.start_time) * 1000))
+        return duration
+
+    def mark_background(self, phase: str, started_at: float) -> float:
+        """Note une phase exécutée en parallèle (sa durée ne s'ajoute pas au chemin critique)."""
+        now = time.perf_counter()
+        duration = (now - started_at) * 1000
+        with self._lock:
+            self._phases.append((f"{phase} (arrière-plan)", duration, (now - self.start_time) * 1000))
+        return duration
+
+    def mark_interactive(self) -> float:
+        """Note le moment où l'interface devient utilisable."""
+        self.mark("Première image, interface utilisable")
+        self.time_to_interactive_ms = (time.perf_counter() - self.start_time) * 1000
+        return self.time_to_interactive_ms
+
+    def report(self) -> str:
+        """Construit un tableau lisible des phases mesurées."""
+        with self._lock:
+            phases = list(self._phases)
+        lines = ["Temps de démarrage:"]
+        for phase, duration, since_start in phases:
+            lines.append(f"  {since_start:8.1f} ms  +{duration:7.1f} ms  {phase}")
+        if self.time_to_interactive_ms is not None:
+            lines.append(f"  Time-to-interactive: {self.time_to_interactive_ms:.1f} ms")
+        return "\n".join(lines)
+
+
+# Instance partagée par main.pyw et l'interface
+STARTUP_TIMER = StartupTimer()
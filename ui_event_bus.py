@@ -0,0 +1,102 @@
+# ui_event_bus.py
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Cadence de rafraîchissement de l'interface (20 images par seconde)
+DEFAULT_FRAME_INTERVAL_MS = 50
+
+
+class UIEventBus:
+    """
+    Bus d'événements thread-safe entre les threads de travail et la boucle Tk.
+    - publish_state: ne conserve que le dernier état par clé (ex: un téléchargement);
+      un état final (terminé, échoué, annulé) n'est jamais écrasé par un état intermédiaire.
+    - publish_log: accumule les lignes de log (avec le téléchargement concerné), insérées en un seul bloc par image.
+    - call / call_once: exécute des fonctions dans le thread Tk à la prochaine image.
+    Le tout est vidé par un unique `after` périodique, quel que soit le nombre de téléchargements.
+    """
+
+    def __init__(self, frame_interval_ms: int = DEFAULT_FRAME_INTERVAL_MS):
+        self.frame_interval_ms = frame_interval_ms
+        self._lock = threading.Lock()
+        self._states: Dict[str, Tuple[dict, bool]] = {}
+        self._logs: List[Tuple[str, Optional[str]]] = []
+        self._calls: List[Tuple[Callable, tuple]] = []
+        self._once: Dict[Callable, None] = {} # dict pour garder l'ordre d'insertion
+        self._root = None
+        self._frame_handler: Optional[Callable] = None
+        self._after_id = None
+
+    def publish_state(self, key: str, state: dict, final: bool = False):
+        with self._lock:
+            previous = self._states.get(key)
+            if previous is not None and previous[1] and not final:
+                return # Un état final en attente d'affichage reste prioritaire
+            self._states[key] = (state, final)
+
+    def publish_log(self, message: str, download_id: Optional[str] = None):
+        with self._lock:
+            self._logs.append((message, download_id))
+
+    def call(self, func: Callable, *args):
+        """Programme un appel dans le thread Tk (ordre de soumission conservé)."""
+        with self._lock:
+            self._calls.append((func, args))
+
+    def call_once(self, func: Callable):
+        """Programme un appel sans argument, fusionné s'il est demandé plusieurs fois dans la même image."""
+        with self._lock:
+            self._once[func] = None
+
+    def drain(self):
+        """Retourne et vide (appels, états, logs, appels uniques) de manière atomique."""
+        with self._lock:
+            calls, self._calls = self._calls, []
+            states, self._states = self._states, {}
+            logs, self._logs = self._logs, []
+            once, self._once = list(self._once), {}
+        return calls, states, logs, once
+
+    def attach(self, root, frame_handler: Callable[[Dict[str, dict], List[str]], None]):
+        """
+        Démarre la pompe périodique sur la fenêtre Tk.
+        `frame_handler(states, logs)` reçoit les états coalescés et les logs de l'image.
+        """
+        self._root = root
+        self._frame_handler = frame_handler
+        self._after_id = root.after(self.frame_interval_ms, self._pump)
+
+    def attach_headless(self, frame_handler: Callable[[Dict[str, dict], List[str]], None]):
+        """Mode sans interface: pas de pompe Tk, la boucle de l'appelant appelle flush() à cadence fixe."""
+        self._root = None
+        self._frame_handler = frame_handler
+
+    def detach(self):
+        if self._root is not None and self._after_id is not None:
+            try:
+                self._root.after_cancel(self._after_id)
+            except Exception:
+                pass
+        self._after_id = None
+
+    def flush(self):
+        """Applique immédiatement tout ce qui est en attente (à appeler depuis le thread Tk)."""
+        calls, states, logs, once = self.drain()
+        for func, args in calls:
+            self._safe_call(func, *args)
+        if states or logs:
+            self._safe_call(self._frame_handler, {key: state for key, (state, _) in states.items()}, logs)
+        for func in once:
+            self._safe_call(func)
+
+    def _pump(self):
+        self.flush()
+        if self._root is not None:
+            self._after_id = self._root.after(self.frame_interval_ms, self._pump)
+
+    def _safe_call(self, func: Callable, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            # Une erreur d'affichage ne doit pas arrêter la pompe
+            print(f"Erreur lors de la mise à jour de l'interface: {e}")
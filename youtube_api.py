@@ -1,39 +1,43 @@
 import re
+import importlib.util
 from typing import List, Dict, Optional
 
-# Vérification et import de l'API Google
-try:
-    from googleapiclient.discovery import build
-    GOOGLE_API_AVAILABLE = True
-except ImportError:
-    GOOGLE_API_AVAILABLE = False
+# Vérification de l'API Google sans l'importer: googleapiclient.discovery est lourd à charger,
+# il n'est importé qu'à la première recherche
+GOOGLE_API_AVAILABLE = importlib.util.find_spec("googleapiclient") is not None
+if not GOOGLE_API_AVAILABLE:
     print("[!] google-api-python-client n'est pas installé.")
 
+
+def google_api_installed() -> bool:
+    """Vérifier si google-api-python-client est installé (il peut l'être en cours d'exécution)"""
+    global GOOGLE_API_AVAILABLE
+    if not GOOGLE_API_AVAILABLE:
+        importlib.invalidate_caches()
+        GOOGLE_API_AVAILABLE = importlib.util.find_spec("googleapiclient") is not None
+    return GOOGLE_API_AVAILABLE
+
+
 class YouTubeAPI:
     def __init__(self, api_key: str = None):
         self.api_key = api_key
-        self.youtube = None
+        self.youtube = None # Client créé à la première recherche
         
-        if GOOGLE_API_AVAILABLE and self.api_key:
-            try:
-                self.youtube = build("youtube", "v3", developerKey=self.api_key)
-            except Exception as e:
-                print(f"Erreur lors de l'initialisation de l'API YouTube: {e}")
-                self.youtube = None
-                
     def is_available(self) -> bool:
         """Vérifier si l'API est disponible et configurée"""
-        return GOOGLE_API_AVAILABLE and self.youtube is not None
+        return google_api_installed() and bool(self.api_key)
         
     def set_api_key(self, api_key: str):
         """Définir une nouvelle clé API"""
         self.api_key = api_key
-        if GOOGLE_API_AVAILABLE and self.api_key:
-            try:
-                self.youtube = build("youtube", "v3", developerKey=self.api_key)
-            except Exception as e:
-                print(f"Erreur avec la clé API: {e}")
-                self.youtube = None
+        self.youtube = None # Recréé avec la nouvelle clé à la prochaine recherche
+
+    def _get_client(self):
+        """Importe googleapiclient et construit le client au premier usage"""
+        if self.youtube is None:
+            from googleapiclient.discovery import build
+            self.youtube = build("youtube", "v3", developerKey=self.api_key)
+        return self.youtube
                 
     def search_videos(self, query: str, max_results: int = 30) -> List[Dict]:
         """Rechercher des vidéos sur YouTube"""
@@ -41,6 +45,7 @@ class YouTubeAPI:
             raise Exception("API YouTube non disponible ou non configurée")
             
         try:
+            self._get_client()
             # Recherche des vidéos
             search_request = self.youtube.search().list(
                 part="snippet",